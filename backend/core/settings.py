@@ -184,3 +184,64 @@ CELERY_TIMEZONE = TIME_ZONE
 # Docker settings
 DOCKER_HOST = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
 ENABLE_DOCKER_EVENTS = os.getenv("ENABLE_DOCKER_EVENTS", "true").lower() == "true"
+
+# Monitoring
+METRICS_SUMMARY_CACHE_TTL = int(os.getenv("METRICS_SUMMARY_CACHE_TTL", "5"))
+METRICS_SUMMARY_MAX_SAMPLE_AGE = int(os.getenv("METRICS_SUMMARY_MAX_SAMPLE_AGE", "300"))
+PROCESS_TOP_N = int(os.getenv("PROCESS_TOP_N", "10"))
+METRICS_TSDB_PATH = os.getenv("METRICS_TSDB_PATH", "")
+METRICS_TSDB_SEGMENT_SECONDS = int(os.getenv("METRICS_TSDB_SEGMENT_SECONDS", "3600"))
+METRICS_TSDB_RETENTION_HOURS = float(os.getenv("METRICS_TSDB_RETENTION_HOURS", "168"))
+METRICS_COMPRESS_AFTER_HOURS = int(os.getenv("METRICS_COMPRESS_AFTER_HOURS", "24"))
+METRICS_REGISTRY_DIR = os.getenv("METRICS_REGISTRY_DIR", "")
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+METRICS_INGEST_MAX_SAMPLES = int(os.getenv("METRICS_INGEST_MAX_SAMPLES", "10000"))
+METRICS_INGEST_MAX_BYTES = int(os.getenv("METRICS_INGEST_MAX_BYTES", "33554432"))
+ANOMALY_EWMA_ALPHA = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.05"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "4"))
+ANOMALY_SUSTAIN = int(os.getenv("ANOMALY_SUSTAIN", "3"))
+ANOMALY_WARMUP_SAMPLES = int(os.getenv("ANOMALY_WARMUP_SAMPLES", "30"))
+ANOMALY_MIN_STD = float(os.getenv("ANOMALY_MIN_STD", "0.5"))
+FORECAST_LOOKBACK_HOURS = int(os.getenv("FORECAST_LOOKBACK_HOURS", "24"))
+FORECAST_MIN_POINTS = int(os.getenv("FORECAST_MIN_POINTS", "6"))
+FORECAST_ALERT_HOURS = float(os.getenv("FORECAST_ALERT_HOURS", "72"))
+FORECAST_ALERT_COOLDOWN_HOURS = float(os.getenv("FORECAST_ALERT_COOLDOWN_HOURS", "12"))
+FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", "3600"))
+RIGHTSIZING_WINDOW_HOURS = int(os.getenv("RIGHTSIZING_WINDOW_HOURS", "168"))
+RIGHTSIZING_MIN_HOURS = int(os.getenv("RIGHTSIZING_MIN_HOURS", "24"))
+RIGHTSIZING_MEMORY_HEADROOM = float(os.getenv("RIGHTSIZING_MEMORY_HEADROOM", "0.2"))
+RIGHTSIZING_CPU_HEADROOM = float(os.getenv("RIGHTSIZING_CPU_HEADROOM", "0.25"))
+RIGHTSIZING_OVER_RATIO = float(os.getenv("RIGHTSIZING_OVER_RATIO", "0.5"))
+RIGHTSIZING_UNDER_RATIO = float(os.getenv("RIGHTSIZING_UNDER_RATIO", "0.9"))
+RIGHTSIZING_CACHE_TTL = int(os.getenv("RIGHTSIZING_CACHE_TTL", "3600"))
+DOCKER_INVENTORY_REPLAY_SECONDS = int(
+    os.getenv("DOCKER_INVENTORY_REPLAY_SECONDS", "60")
+)
+DOCKER_INVENTORY_FALLBACK_TTL = int(os.getenv("DOCKER_INVENTORY_FALLBACK_TTL", "10"))
+DOCKER_EVENT_BATCH_WINDOW = float(os.getenv("DOCKER_EVENT_BATCH_WINDOW", "0.05"))
+DOCKER_EXECUTOR_WORKERS = int(os.getenv("DOCKER_EXECUTOR_WORKERS", "4"))
+DOCKER_EXECUTOR_MAX_PENDING = int(os.getenv("DOCKER_EXECUTOR_MAX_PENDING", "64"))
+LOG_STREAM_BUFFER_LINES = int(os.getenv("LOG_STREAM_BUFFER_LINES", "1000"))
+LOG_STREAM_BATCH_LINES = int(os.getenv("LOG_STREAM_BATCH_LINES", "200"))
+DOCKER_LOG_POLL_INTERVAL = float(os.getenv("DOCKER_LOG_POLL_INTERVAL", "0.25"))
+LOG_STORE_PATH = os.getenv("LOG_STORE_PATH", "")
+LOG_STORE_SEGMENT_SECONDS = int(os.getenv("LOG_STORE_SEGMENT_SECONDS", "3600"))
+LOG_STORE_MAX_TOKENS = int(os.getenv("LOG_STORE_MAX_TOKENS", "50000"))
+LOG_STORE_FLUSH_SECONDS = float(os.getenv("LOG_STORE_FLUSH_SECONDS", "1"))
+LOG_STORE_FLUSH_LINES = int(os.getenv("LOG_STORE_FLUSH_LINES", "10000"))
+LOG_STORE_REFRESH_SECONDS = float(os.getenv("LOG_STORE_REFRESH_SECONDS", "10"))
+LOG_STORE_RETENTION_HOURS = int(os.getenv("LOG_STORE_RETENTION_HOURS", "168"))
+LOG_ERROR_LEVELS = [
+    level
+    for level in os.getenv("LOG_ERROR_LEVELS", "error,fatal,critical,panic").split(",")
+    if level
+]
+LOG_ERROR_PATTERN = os.getenv("LOG_ERROR_PATTERN", "")
+LOG_ERROR_MATCHERS = ([{"levels": LOG_ERROR_LEVELS}] if LOG_ERROR_LEVELS else []) + (
+    [{"pattern": LOG_ERROR_PATTERN}] if LOG_ERROR_PATTERN else []
+)
+LOG_ERROR_INTERVAL_SECONDS = float(os.getenv("LOG_ERROR_INTERVAL_SECONDS", "60"))
+STATSD_HOST = os.getenv("STATSD_HOST", "0.0.0.0")
+STATSD_PORT = int(os.getenv("STATSD_PORT", "8125"))
+STATSD_FLUSH_INTERVAL = float(os.getenv("STATSD_FLUSH_INTERVAL", "10"))
+STATSD_GAUGE_EXPIRE_INTERVALS = int(os.getenv("STATSD_GAUGE_EXPIRE_INTERVALS", "60"))
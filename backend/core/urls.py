@@ -21,12 +21,14 @@ from django.urls import path
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
+from monitoring.views import PrometheusMetricsView
 
 def health_check(request):
     return JsonResponse({'status': 'healthy', 'message': 'Hot reloading is working!'})
 
 urlpatterns = [
     path("health/", health_check, name="health_check"),
+    path("metrics", PrometheusMetricsView.as_view(), name="prometheus-metrics"),
     path("admin/", admin.site.urls),
     path("api/v1/", include("authentication.urls")),
     path("api/v1/", include("services.urls")),
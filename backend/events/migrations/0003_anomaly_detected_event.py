@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0002_event_acknowledged_event_acknowledged_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="event",
+            name="event_type",
+            field=models.CharField(
+                choices=[
+                    ("service_started", "Service Started"),
+                    ("service_stopped", "Service Stopped"),
+                    ("service_restarted", "Service Restarted"),
+                    ("service_created", "Service Created"),
+                    ("service_updated", "Service Updated"),
+                    ("service_deleted", "Service Deleted"),
+                    ("health_check_failed", "Health Check Failed"),
+                    ("health_check_recovered", "Health Check Recovered"),
+                    ("health_check_success", "Health Check Success"),
+                    ("alert_triggered", "Alert Triggered"),
+                    ("alert_resolved", "Alert Resolved"),
+                    ("alert_created", "Alert Created"),
+                    ("alert_updated", "Alert Updated"),
+                    ("alert_deleted", "Alert Deleted"),
+                    ("anomaly_detected", "Anomaly Detected"),
+                    ("system_startup", "System Startup"),
+                    ("system_shutdown", "System Shutdown"),
+                    ("user_login", "User Login"),
+                    ("user_logout", "User Logout"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
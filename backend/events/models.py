@@ -20,6 +20,8 @@ class Event(models.Model):
         ("alert_created", "Alert Created"),
         ("alert_updated", "Alert Updated"),
         ("alert_deleted", "Alert Deleted"),
+        ("anomaly_detected", "Anomaly Detected"),
+        ("capacity_forecast", "Capacity Forecast"),
         ("system_startup", "System Startup"),
         ("system_shutdown", "System Shutdown"),
         ("user_login", "User Login"),
@@ -1,11 +1,21 @@
 from django.contrib import admin
 
 from .models import HealthCheck
+from .models import Probe
 
 
 @admin.register(HealthCheck)
 class HealthCheckAdmin(admin.ModelAdmin):
-    list_display = ["service", "status", "response_time", "checked_at"]
-    list_filter = ["status", "checked_at"]
+    list_display = ["service", "status", "response_time", "probe", "checked_at"]
+    list_filter = ["status", "probe", "checked_at"]
     search_fields = ["service__name", "message"]
     readonly_fields = ["checked_at"]
+
+
+@admin.register(Probe)
+class ProbeAdmin(admin.ModelAdmin):
+    list_display = ["name", "user", "enabled", "last_seen"]
+    list_filter = ["enabled"]
+    search_fields = ["name"]
+    filter_horizontal = ["services"]
+    readonly_fields = ["last_seen", "created_at"]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("healthchecks", "0002_healthcheck_duration_healthcheck_error_code_and_more"),
+        ("services", "0002_service_check_interval_service_enabled_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="healthcheck",
+            name="checked_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.CreateModel(
+            name="Probe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("enabled", models.BooleanField(default=True)),
+                ("last_seen", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "services",
+                    models.ManyToManyField(
+                        blank=True, related_name="probes", to="services.service"
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="probe",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="healthcheck",
+            name="probe",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Probe that ran the check; empty when run by the hub",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="health_checks",
+                to="healthchecks.probe",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="healthcheck",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("probe__isnull", False)),
+                fields=("probe", "service", "checked_at"),
+                name="unique_probe_result",
+            ),
+        ),
+    ]
@@ -1,7 +1,29 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
 from services.models import Service
 
 
+class Probe(models.Model):
+    """A remote runner that checks its assigned services and uploads results
+
+    A probe authenticates with the API token of its ``user``.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="probe")
+    services = models.ManyToManyField(Service, related_name="probes", blank=True)
+    enabled = models.BooleanField(default=True)
+    last_seen = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class HealthCheck(models.Model):
     """Represents a health check result for a service"""
 
@@ -28,13 +50,29 @@ class HealthCheck(models.Model):
     http_status = models.IntegerField(
         null=True, blank=True, help_text="HTTP status code for HTTP checks"
     )
-    checked_at = models.DateTimeField(auto_now_add=True)
+    probe = models.ForeignKey(
+        Probe,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="health_checks",
+        help_text="Probe that ran the check; empty when run by the hub",
+    )
+    checked_at = models.DateTimeField(default=timezone.now)
     duration = models.FloatField(
         null=True, blank=True, help_text="Total check duration in seconds"
     )
 
     class Meta:
         ordering = ["-checked_at"]
+        constraints = [
+            # Probes retry uploads, so the same result may arrive twice
+            models.UniqueConstraint(
+                fields=["probe", "service", "checked_at"],
+                condition=models.Q(probe__isnull=False),
+                name="unique_probe_result",
+            )
+        ]
 
     def __str__(self):
         return f"{self.service.name} - {self.status} ({self.checked_at})"
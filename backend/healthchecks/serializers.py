@@ -5,6 +5,9 @@ from .models import HealthCheck
 
 class HealthCheckSerializer(serializers.ModelSerializer):
     service_name = serializers.CharField(source="service.name", read_only=True)
+    probe_name = serializers.CharField(
+        source="probe.name", read_only=True, default=None
+    )
 
     class Meta:
         model = HealthCheck
@@ -20,5 +23,7 @@ class HealthCheckSerializer(serializers.ModelSerializer):
             "http_status",
             "checked_at",
             "duration",
+            "probe",
+            "probe_name",
         ]
         read_only_fields = ["id", "checked_at"]
@@ -0,0 +1,179 @@
+"""Standalone collector agent
+
+Samples this host with ``MetricsCollector`` and pushes batches to a hub's
+ingest API. It needs neither Django nor a database:
+
+    python -m monitoring.agent --hub https://hub.example.com --token <token>
+
+Every option can also be given as a ``SAURON_AGENT_*`` environment variable.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import psutil
+
+from .hub_client import BatchSender
+from .hub_client import HubClient
+from .hub_client import Spool
+from .hub_client import build_batch
+from .metrics_collector import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+
+class Agent:
+    """Collects a sample every ``interval`` seconds and pushes every ``push_every``"""
+
+    def __init__(
+        self,
+        sender: BatchSender,
+        host: str,
+        interval: float = 30,
+        push_every: int = 1,
+        collect_docker: bool = True,
+        collector: Optional[MetricsCollector] = None,
+    ):
+        self.sender = sender
+        self.host = host
+        self.interval = interval
+        self.push_every = max(1, push_every)
+        self.collect_docker = collect_docker
+        self.collector = collector or MetricsCollector()
+        self.server_metrics: List[Dict] = []
+        self.docker_metrics: List[Dict] = []
+        self.stopped = threading.Event()
+        self._docker_service = None
+
+        # Prime the CPU counters so samples never block on a measuring interval
+        psutil.cpu_percent(interval=None)
+
+    def docker_available(self) -> bool:
+        if not self.collect_docker:
+            return False
+        if self._docker_service is None:
+            # Imported on first use: the Docker SDK is the slowest import here
+            from services.docker_service import docker_service
+
+            self._docker_service = docker_service
+        return self._docker_service.is_available()
+
+    def sample(self):
+        """Take one sample of the host and its containers"""
+        timestamp = datetime.now(timezone.utc).isoformat()
+        server = self.collector.collect_server_metrics(cpu_interval=None)
+        if server:
+            self.server_metrics.append({**server, "timestamp": timestamp})
+        if self.docker_available():
+            for container in self.collector.collect_docker_metrics():
+                self.docker_metrics.append({**container, "timestamp": timestamp})
+
+    def flush(self) -> bool:
+        """Push buffered samples, or retry spooled batches if there are none"""
+        if not self.server_metrics and not self.docker_metrics:
+            return self.sender.drain()
+        batch = build_batch(self.host, self.server_metrics, self.docker_metrics)
+        self.server_metrics = []
+        self.docker_metrics = []
+        return self.sender.send(batch)
+
+    def run(self, iterations: Optional[int] = None):
+        """Sample on a fixed schedule until stopped"""
+        next_run = time.monotonic()
+        count = 0
+        while not self.stopped.is_set():
+            self.sample()
+            count += 1
+            if count % self.push_every == 0:
+                self.flush()
+            if iterations is not None and count >= iterations:
+                break
+            # Schedule from the previous deadline so slow cycles do not drift
+            next_run = max(next_run + self.interval, time.monotonic())
+            self.stopped.wait(next_run - time.monotonic())
+        self.flush()
+
+    def stop(self, *args):
+        self.stopped.set()
+
+
+def _env(name: str, default=None):
+    return os.getenv(f"SAURON_AGENT_{name}", default)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Push host metrics to a hub")
+    parser.add_argument("--hub", default=_env("HUB"), help="Hub base URL")
+    parser.add_argument("--token", default=_env("TOKEN"), help="Hub API token")
+    parser.add_argument("--host", default=_env("HOST", socket.gethostname()))
+    parser.add_argument("--interval", type=float, default=float(_env("INTERVAL", "30")))
+    parser.add_argument(
+        "--push-every",
+        type=int,
+        default=int(_env("PUSH_EVERY", "2")),
+        help="Samples per batch",
+    )
+    parser.add_argument(
+        "--spool-dir",
+        default=_env("SPOOL_DIR", "/var/lib/sauron-agent/spool"),
+    )
+    parser.add_argument(
+        "--spool-max-mb", type=int, default=int(_env("SPOOL_MAX_MB", "64"))
+    )
+    parser.add_argument(
+        "--no-docker",
+        action="store_true",
+        default=_env("NO_DOCKER", "false").lower() == "true",
+    )
+    parser.add_argument(
+        "--nice",
+        type=int,
+        default=int(_env("NICE", "10")),
+        help="Scheduling niceness increment",
+    )
+    args = parser.parse_args(argv)
+    if not args.hub or not args.token:
+        parser.error("--hub and --token are required")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    if args.nice:
+        try:
+            os.nice(args.nice)
+        except OSError as e:
+            logger.warning(f"Could not lower priority: {e}")
+
+    sender = BatchSender(
+        HubClient(args.hub, args.token),
+        Spool(args.spool_dir, args.spool_max_mb * 1024 * 1024),
+    )
+    agent = Agent(
+        sender,
+        args.host,
+        interval=args.interval,
+        push_every=args.push_every,
+        collect_docker=not args.no_docker,
+    )
+    signal.signal(signal.SIGTERM, agent.stop)
+    signal.signal(signal.SIGINT, agent.stop)
+    logger.info(f"Agent for {args.host} pushing to {args.hub}")
+    agent.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import logging
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from django.conf import settings
+from events.models import Event
+
+from .broadcast import event_broadcaster
+from .models import LOCAL_HOST
+
+logger = logging.getLogger(__name__)
+
+# Fields scored per series. Totals and limits only change on reconfiguration,
+# and container network/block I/O are cumulative counters, so they are left out.
+SERVER_ANOMALY_FIELDS = [
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "network_rx_mb",
+    "network_tx_mb",
+    "load_average_1m",
+]
+DOCKER_ANOMALY_FIELDS = ["cpu_percent", "memory_usage_mb"]
+
+
+class SeriesGroup:
+    """EWMA mean and variance for a set of series sharing the same fields
+
+    State is one row per series and one column per field, so a sample of
+    every container is scored and folded in with a few array operations.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = list(fields)
+        self.index: Dict[str, int] = {}
+        width = len(self.fields)
+        self.mean = np.zeros((0, width))
+        self.var = np.zeros((0, width))
+        self.count = np.zeros((0, width), dtype=np.int64)
+        self.streak = np.zeros((0, width), dtype=np.int64)
+
+    def retain(self, keys: Sequence[str]):
+        """Drop series that are not in ``keys``, e.g. removed containers"""
+        wanted = set(keys)
+        kept = [key for key in self.index if key in wanted]
+        if len(kept) == len(self.index):
+            return
+        keep = [self.index[key] for key in kept]
+        self.index = {key: position for position, key in enumerate(kept)}
+        self.mean = self.mean[keep]
+        self.var = self.var[keep]
+        self.count = self.count[keep]
+        self.streak = self.streak[keep]
+
+    def _rows(self, keys: Sequence[str]) -> np.ndarray:
+        new = [key for key in dict.fromkeys(keys) if key not in self.index]
+        if new:
+            for key in new:
+                self.index[key] = len(self.index)
+            pad = ((0, len(new)), (0, 0))
+            self.mean = np.pad(self.mean, pad)
+            self.var = np.pad(self.var, pad)
+            self.count = np.pad(self.count, pad)
+            self.streak = np.pad(self.streak, pad)
+        return np.array([self.index[key] for key in keys], dtype=np.int64)
+
+    def update(
+        self,
+        keys: Sequence[str],
+        values: np.ndarray,
+        alpha: float,
+        threshold: float,
+        sustain: int,
+        warmup: int,
+        min_std: float,
+    ) -> List[Dict]:
+        """Score one sample per key, fold it into the state and return anomalies
+
+        ``values`` has one row per key and one column per field; NaN marks a
+        missing value. An anomaly is reported once, on the ``sustain``-th
+        consecutive sample whose z-score is above ``threshold``.
+        """
+        rows = self._rows(keys)
+        mean = self.mean[rows]
+        var = self.var[rows]
+        count = self.count[rows]
+        valid = ~np.isnan(values)
+
+        diff = np.where(valid, values - mean, 0.0)
+        std = np.maximum(np.sqrt(var), np.maximum(min_std, 0.01 * np.abs(mean)))
+        z = np.abs(diff) / std
+        outlier = valid & (count >= warmup) & (z > threshold)
+        streak = np.where(outlier, self.streak[rows] + 1, 0)
+        streak = np.where(valid, streak, self.streak[rows])
+        fired = outlier & (streak == sustain)
+
+        # The first samples use a running average so the baseline settles
+        # quickly before switching to the fixed smoothing factor. After that,
+        # deviations are clipped so one outlier cannot inflate the variance
+        # enough to hide the ones that follow it.
+        weight = np.maximum(alpha, 1.0 / (count + 1))
+        limit = np.where(count >= warmup, threshold * std, np.inf)
+        diff = np.clip(diff, -limit, limit)
+        increment = weight * diff
+        self.mean[rows] = mean + increment
+        self.var[rows] = np.where(valid, (1 - weight) * (var + diff * increment), var)
+        self.count[rows] = count + valid
+        self.streak[rows] = streak
+
+        return [
+            {
+                "key": keys[row],
+                "field": self.fields[column],
+                "value": float(values[row, column]),
+                "mean": float(mean[row, column]),
+                "std": float(std[row, column]),
+                "z_score": round(float(z[row, column]), 2),
+            }
+            for row, column in zip(*np.nonzero(fired))
+        ]
+
+
+class AnomalyDetector:
+    """Flags samples that stay far from each series' recent behaviour
+
+    Every server and container series keeps an exponentially weighted mean
+    and variance, updated in O(1) per sample. When a field's z-score stays
+    above ``ANOMALY_Z_THRESHOLD`` for ``ANOMALY_SUSTAIN`` consecutive samples
+    an ``anomaly_detected`` Event is created. State is per process and is
+    rebuilt after a restart once ``ANOMALY_WARMUP_SAMPLES`` have been seen.
+    """
+
+    def __init__(self):
+        self.alpha = getattr(settings, "ANOMALY_EWMA_ALPHA", 0.05)
+        self.threshold = getattr(settings, "ANOMALY_Z_THRESHOLD", 4.0)
+        self.sustain = getattr(settings, "ANOMALY_SUSTAIN", 3)
+        self.warmup = getattr(settings, "ANOMALY_WARMUP_SAMPLES", 30)
+        self.min_std = getattr(settings, "ANOMALY_MIN_STD", 0.5)
+        self.groups: Dict[Tuple[str, str], SeriesGroup] = {}
+        self._lock = threading.Lock()
+
+    def _group(self, kind: str, host: str, fields: Sequence[str]) -> SeriesGroup:
+        group = self.groups.get((kind, host))
+        if group is None:
+            group = self.groups[(kind, host)] = SeriesGroup(fields)
+        return group
+
+    def _update(self, group: SeriesGroup, keys: List[str], samples: List[Dict]):
+        values = np.array(
+            [
+                [
+                    np.nan if sample.get(field) is None else sample[field]
+                    for field in group.fields
+                ]
+                for sample in samples
+            ],
+            dtype=np.float64,
+        ).reshape(len(samples), len(group.fields))
+        return group.update(
+            keys,
+            values,
+            self.alpha,
+            self.threshold,
+            self.sustain,
+            self.warmup,
+            self.min_std,
+        )
+
+    def observe_server(self, metrics: Dict, host: str = LOCAL_HOST) -> List[Event]:
+        """Score a server sample"""
+        with self._lock:
+            group = self._group("server", host, SERVER_ANOMALY_FIELDS)
+            anomalies = self._update(group, [host], [metrics])
+        return self._emit(anomalies, host, None)
+
+    def observe_docker(
+        self, metrics_list: List[Dict], host: str = LOCAL_HOST
+    ) -> List[Event]:
+        """Score one sample of every running container"""
+        names = {m["container_id"]: m["container_name"] for m in metrics_list}
+        with self._lock:
+            group = self._group("docker", host, DOCKER_ANOMALY_FIELDS)
+            group.retain(list(names))
+            anomalies = self._update(
+                group, [m["container_id"] for m in metrics_list], metrics_list
+            )
+        return self._emit(anomalies, host, names)
+
+    def _emit(
+        self, anomalies: List[Dict], host: str, names: Optional[Dict[str, str]]
+    ) -> List[Event]:
+        events = []
+        for anomaly in anomalies:
+            key = anomaly.pop("key")
+            if names is None:
+                subject = "server" if host == LOCAL_HOST else host
+                metadata = {"host": host, **anomaly}
+            else:
+                subject = f"container {names[key]}"
+                metadata = {
+                    "host": host,
+                    "container_id": key,
+                    "container_name": names[key],
+                    **anomaly,
+                }
+            event = Event.objects.create(
+                event_type="anomaly_detected",
+                severity="warning",
+                title=f"Anomaly: {anomaly['field']} on {subject}",
+                message=(
+                    f"{anomaly['field']} is {anomaly['value']:.2f}, usually "
+                    f"{anomaly['mean']:.2f} (z-score {anomaly['z_score']})"
+                ),
+                metadata=metadata,
+                source="anomaly_detector",
+            )
+            events.append(event)
+            try:
+                event_broadcaster.broadcast_new_event(event)
+            except Exception as e:
+                logger.error(f"Error broadcasting anomaly event: {e}")
+        return events
+
+
+# Global instance
+anomaly_detector = AnomalyDetector()
@@ -61,10 +61,11 @@ class EventBroadcaster:
         if not self.channel_layer:
             return
 
+        service = event.service
         event_data = {
             "id": event.id,
-            "service_id": event.service.id,
-            "service_name": event.service.name,
+            "service_id": service.id if service else None,
+            "service_name": service.name if service else None,
             "event_type": event.event_type,
             "severity": event.severity,
             "title": event.title,
@@ -79,10 +80,11 @@ class EventBroadcaster:
         )
 
         # Broadcast to service-specific event subscribers
-        async_to_sync(self.channel_layer.group_send)(
-            f"events_service_{event.service.id}",
-            {"type": "new_event", "event": event_data},
-        )
+        if service:
+            async_to_sync(self.channel_layer.group_send)(
+                f"events_service_{service.id}",
+                {"type": "new_event", "event": event_data},
+            )
 
     def broadcast_health_check_result(self, service: Service, result: dict):
         """Broadcast health check result"""
@@ -143,6 +145,15 @@ class EventBroadcaster:
             "monitoring", {"type": "container_update", "containers": containers}
         )
 
+    def broadcast_process_update(self, snapshot: dict):
+        """Broadcast top process snapshot to monitoring clients"""
+        if not self.channel_layer:
+            return
+
+        async_to_sync(self.channel_layer.group_send)(
+            "monitoring", {"type": "process_update", "data": snapshot}
+        )
+
 
 # Global instance
 event_broadcaster = EventBroadcaster()
@@ -0,0 +1,143 @@
+import socket
+import subprocess
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+
+import requests
+
+# Checks that only need network access, so they can run on the hub or on a
+# remote probe. They take a service's ``config`` and ``timeout`` and must not
+# depend on Django.
+
+
+def check_http(config: Dict, timeout: float) -> Dict[str, Any]:
+    """HTTP health check"""
+    url = config.get("url")
+    method = config.get("method", "GET")
+    expected_status = config.get("expected_status", 200)
+
+    if not url:
+        return {
+            "success": False,
+            "error": "URL not specified in service config",
+            "timestamp": time.time(),
+        }
+
+    try:
+        response = requests.request(
+            method=method, url=url, timeout=timeout, allow_redirects=True
+        )
+
+        success = response.status_code == expected_status
+
+        return {
+            "success": success,
+            "status_code": response.status_code,
+            "response_time": response.elapsed.total_seconds()
+            * 1000,  # Convert to milliseconds
+            "timestamp": time.time(),
+            "error": (
+                None
+                if success
+                else f"Expected status {expected_status}, got {response.status_code}"
+            ),
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "timestamp": time.time(),
+        }
+
+
+def check_tcp(config: Dict, timeout: float) -> Dict[str, Any]:
+    """TCP port check"""
+    host = config.get("host")
+    port = config.get("port")
+
+    if not host or not port:
+        return {
+            "success": False,
+            "error": "Host and port not specified in service config",
+            "timestamp": time.time(),
+        }
+
+    try:
+        start_time = time.time()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        result = sock.connect_ex((host, port))
+        sock.close()
+
+        response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+        success = result == 0
+
+        return {
+            "success": success,
+            "response_time": response_time,
+            "timestamp": time.time(),
+            "error": None if success else f"Connection failed with code {result}",
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "timestamp": time.time(),
+        }
+
+
+def check_custom(config: Dict, timeout: float) -> Dict[str, Any]:
+    """Custom script health check"""
+    script_path = config.get("script_path")
+
+    if not script_path:
+        return {
+            "success": False,
+            "error": "Script path not specified in service config",
+            "timestamp": time.time(),
+        }
+
+    try:
+        start_time = time.time()
+        result = subprocess.run(
+            [script_path], capture_output=True, text=True, timeout=timeout
+        )
+        response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+
+        success = result.returncode == 0
+
+        return {
+            "success": success,
+            "return_code": result.returncode,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "response_time": response_time,
+            "timestamp": time.time(),
+            "error": (
+                None
+                if success
+                else f"Script failed with return code {result.returncode}"
+            ),
+        }
+    except subprocess.TimeoutExpired:
+        return {
+            "success": False,
+            "error": "Script execution timed out",
+            "timestamp": time.time(),
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "timestamp": time.time(),
+        }
+
+
+# Service types a remote probe can check
+REMOTE_CHECKS: Dict[str, Callable[[Dict, float], Dict[str, Any]]] = {
+    "http": check_http,
+    "tcp": check_tcp,
+    "custom": check_custom,
+}
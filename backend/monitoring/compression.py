@@ -0,0 +1,333 @@
+import logging
+import math
+import struct
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from itertools import groupby
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LOCAL_HOST
+from .models import DockerMetrics
+from .models import DockerMetricsChunk
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Version 2 appended error_lines_per_minute and stores missing values as NaN.
+# Fields are only ever appended, so a chunk holds the first ``column_count``
+# entries of CHUNK_FIELDS whichever version wrote it.
+CHUNK_FORMAT_VERSION = 2
+SUPPORTED_CHUNK_VERSIONS = (1, 2)
+CHUNK_FIELDS = [
+    "cpu_percent",
+    "memory_usage_mb",
+    "memory_limit_mb",
+    "network_rx_mb",
+    "network_tx_mb",
+    "block_read_mb",
+    "block_write_mb",
+    "error_lines_per_minute",
+]
+
+# Delta-of-delta buckets: (prefix, prefix bits, value bits)
+TIMESTAMP_BUCKETS = [
+    (0b10, 2, 7),
+    (0b110, 3, 9),
+    (0b1110, 4, 12),
+    (0b11110, 5, 32),
+]
+TIMESTAMP_FALLBACK = (0b11111, 5, 64)
+
+
+class BitWriter:
+    """Appends variable-width unsigned values to a byte buffer"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, bits: int):
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.buffer.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self._bits:
+            return bytes(self.buffer) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+        return bytes(self.buffer)
+
+
+class BitReader:
+    """Reads variable-width unsigned values written by ``BitWriter``"""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = data
+        self.pos = offset * 8
+
+    def read(self, bits: int) -> int:
+        start, end = self.pos >> 3, (self.pos + bits + 7) >> 3
+        window = int.from_bytes(self.data[start:end], "big")
+        shift = (end << 3) - self.pos - bits
+        self.pos += bits
+        return (window >> shift) & ((1 << bits) - 1)
+
+    def read_bit(self) -> int:
+        byte = self.data[self.pos >> 3]
+        bit = (byte >> (7 - (self.pos & 7))) & 1
+        self.pos += 1
+        return bit
+
+
+def _signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value >= 1 << (bits - 1) else value
+
+
+def encode_timestamps(writer: BitWriter, timestamps: Sequence[int]):
+    """Delta-of-delta encode integer timestamps"""
+    writer.write(timestamps[0], 64)
+    previous, previous_delta = timestamps[0], 0
+    for ts in timestamps[1:]:
+        delta = ts - previous
+        dod = delta - previous_delta
+        previous, previous_delta = ts, delta
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        for prefix, prefix_bits, value_bits in TIMESTAMP_BUCKETS:
+            if -(1 << (value_bits - 1)) <= dod < 1 << (value_bits - 1):
+                break
+        else:
+            prefix, prefix_bits, value_bits = TIMESTAMP_FALLBACK
+        writer.write(prefix, prefix_bits)
+        writer.write(dod, value_bits)
+
+
+def decode_timestamps(reader: BitReader, count: int) -> List[int]:
+    timestamps = [_signed(reader.read(64), 64)]
+    previous, delta = timestamps[0], 0
+    for _ in range(count - 1):
+        prefix_bits = 0
+        while prefix_bits < 5 and reader.read_bit():
+            prefix_bits += 1
+        if prefix_bits:
+            value_bits = (
+                TIMESTAMP_BUCKETS[prefix_bits - 1][2]
+                if prefix_bits <= len(TIMESTAMP_BUCKETS)
+                else TIMESTAMP_FALLBACK[2]
+            )
+            delta += _signed(reader.read(value_bits), value_bits)
+        previous += delta
+        timestamps.append(previous)
+    return timestamps
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack(">Q", struct.pack(">d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack(">d", struct.pack(">Q", bits))[0]
+
+
+def encode_floats(writer: BitWriter, values: Sequence[float]):
+    """XOR encode floats against their predecessor"""
+    previous = _float_bits(values[0])
+    writer.write(previous, 64)
+    leading, trailing = -1, 0
+    for value in values[1:]:
+        bits = _float_bits(value)
+        xor = bits ^ previous
+        previous = bits
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        new_leading = min(64 - xor.bit_length(), 31)
+        new_trailing = (xor & -xor).bit_length() - 1
+        if leading >= 0 and new_leading >= leading and new_trailing >= trailing:
+            # Meaningful bits fit the previous window
+            writer.write(0b10, 2)
+            writer.write(xor >> trailing, 64 - leading - trailing)
+        else:
+            leading, trailing = new_leading, new_trailing
+            length = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            writer.write(length - 1, 6)
+            writer.write(xor >> trailing, length)
+
+
+def decode_floats(reader: BitReader, count: int) -> List[float]:
+    previous = reader.read(64)
+    values = [_bits_float(previous)]
+    leading, trailing = 0, 0
+    for _ in range(count - 1):
+        if reader.read_bit():
+            if reader.read_bit():
+                leading = reader.read(5)
+                trailing = 64 - leading - (reader.read(6) + 1)
+            previous ^= reader.read(64 - leading - trailing) << trailing
+        values.append(_bits_float(previous))
+    return values
+
+
+def encode_chunk(
+    timestamps: Sequence[int], columns: Sequence[Sequence[float]]
+) -> bytes:
+    """Pack millisecond timestamps and float columns into one chunk"""
+    writer = BitWriter()
+    writer.write(CHUNK_FORMAT_VERSION, 8)
+    writer.write(len(columns), 8)
+    writer.write(len(timestamps), 32)
+    encode_timestamps(writer, timestamps)
+    for column in columns:
+        encode_floats(writer, column)
+    return writer.getvalue()
+
+
+def decode_chunk(data: bytes) -> Tuple[List[int], List[List[float]]]:
+    """Unpack a chunk into timestamps and float columns"""
+    reader = BitReader(data)
+    version = reader.read(8)
+    if version not in SUPPORTED_CHUNK_VERSIONS:
+        raise ValueError(f"Unsupported chunk format version: {version}")
+    column_count = reader.read(8)
+    count = reader.read(32)
+    timestamps = decode_timestamps(reader, count)
+    columns = [decode_floats(reader, count) for _ in range(column_count)]
+    return timestamps, columns
+
+
+def to_ms(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_ms(value: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=value)
+
+
+class MetricsCompressor:
+    """Moves aged container samples into compressed per-container hourly chunks
+
+    Timestamps are kept at millisecond precision.
+    """
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+
+    def compress_before(self, cutoff: Optional[datetime] = None) -> Dict[str, int]:
+        """Compress every complete hour of samples older than ``cutoff``"""
+        if cutoff is None:
+            cutoff = timezone.now() - timedelta(
+                hours=getattr(settings, "METRICS_COMPRESS_AFTER_HOURS", 24)
+            )
+        cutoff = cutoff.replace(minute=0, second=0, microsecond=0)
+
+        queryset = (
+            DockerMetrics.objects.filter(timestamp__lt=cutoff)
+            .order_by("host", "container_id", "timestamp", "id")
+            .values_list(
+                "id",
+                "host",
+                "container_id",
+                "container_name",
+                "timestamp",
+                *CHUNK_FIELDS,
+            )
+        )
+
+        stats = {"chunks": 0, "rows": 0}
+        while True:
+            rows = list(queryset[: self.batch_size])
+            if not rows:
+                break
+            groups = [list(group) for _, group in groupby(rows, key=self._chunk_key)]
+            if len(rows) == self.batch_size and len(groups) > 1:
+                # The last container-hour may continue in the next batch
+                groups.pop()
+            self._flush(groups, stats)
+
+        logger.info(
+            f"Compressed {stats['rows']} Docker metric samples "
+            f"into {stats['chunks']} chunks"
+        )
+        return stats
+
+    def _chunk_key(self, row: tuple) -> tuple:
+        return row[1], row[2], row[4].replace(minute=0, second=0, microsecond=0)
+
+    def _build_chunk(self, group: List[tuple]) -> DockerMetricsChunk:
+        timestamps = [to_ms(row[4]) for row in group]
+        columns = [
+            [math.nan if row[5 + i] is None else row[5 + i] for row in group]
+            for i in range(len(CHUNK_FIELDS))
+        ]
+        return DockerMetricsChunk(
+            host=group[0][1],
+            container_id=group[0][2],
+            container_name=group[-1][3],
+            start=group[0][4],
+            end=group[-1][4],
+            count=len(group),
+            data=encode_chunk(timestamps, columns),
+        )
+
+    def _flush(self, groups: List[List[tuple]], stats: Dict):
+        chunks = [self._build_chunk(group) for group in groups]
+        ids = [row[0] for group in groups for row in group]
+        with transaction.atomic():
+            DockerMetricsChunk.objects.bulk_create(chunks)
+            DockerMetrics.objects.filter(id__in=ids).delete()
+        stats["chunks"] += len(chunks)
+        stats["rows"] += len(ids)
+
+    def read_columns(
+        self,
+        container_id: Optional[str],
+        since: datetime,
+        fields: Sequence[str],
+        host: str = LOCAL_HOST,
+    ) -> Dict[str, List]:
+        """Decompressed samples from ``since`` onwards as newest-first columns"""
+        chunks = DockerMetricsChunk.objects.filter(host=host, end__gte=since)
+        if container_id:
+            chunks = chunks.filter(container_id=container_id)
+
+        rows = []
+        for chunk in chunks.order_by("start").iterator():
+            timestamps, columns = decode_chunk(bytes(chunk.data))
+            labels = {
+                "host": chunk.host,
+                "container_id": chunk.container_id,
+                "container_name": chunk.container_name,
+            }
+            for index, ts in enumerate(timestamps):
+                timestamp = from_ms(ts)
+                if timestamp < since:
+                    continue
+                row = {
+                    field: None if math.isnan(column[index]) else column[index]
+                    for field, column in zip(CHUNK_FIELDS, columns)
+                }
+                row.update(labels, id=None, timestamp=timestamp)
+                rows.append(row)
+
+        rows.sort(key=lambda row: row["timestamp"], reverse=True)
+        # Fields outside CHUNK_FIELDS, or newer than the chunk, read as None
+        return {field: [row.get(field) for row in rows] for field in fields}
+
+
+# Global instance
+metrics_compressor = MetricsCompressor()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 
@@ -7,7 +8,14 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 from events.models import Event
 from services.models import Service
+from services.async_docker import DockerAPIError
+from services.async_docker import async_docker
+from services.container_inventory import container_inventory
 from services.docker_service import docker_service
+from services.json_log_reader import json_file_logs
+
+from .docker_executor import docker_executor
+from .log_streams import log_streams
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +103,8 @@ class ServiceDetailConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.service_id = self.scope["url_route"]["kwargs"]["service_id"]
         self.group_name = f"service_{self.service_id}"
+        self.log_subscription = None
+        self.log_sender = None
 
         # Check authentication
         if self.scope["user"] == AnonymousUser():
@@ -118,6 +128,7 @@ class ServiceDetailConsumer(AsyncWebsocketConsumer):
         )
 
     async def disconnect(self, close_code):
+        await self.unfollow_logs()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive(self, text_data):
@@ -128,6 +139,10 @@ class ServiceDetailConsumer(AsyncWebsocketConsumer):
             if message_type == "get_logs":
                 logs = await self.get_service_logs()
                 await self.send(text_data=json.dumps({"type": "logs", "logs": logs}))
+            elif message_type == "follow_logs":
+                await self.follow_logs(data.get("since"), data.get("tail", 100))
+            elif message_type == "unfollow_logs":
+                await self.unfollow_logs()
         except json.JSONDecodeError:
             await self.send(
                 text_data=json.dumps({"type": "error", "message": "Invalid JSON"})
@@ -168,10 +183,10 @@ class ServiceDetailConsumer(AsyncWebsocketConsumer):
                 "description": service.description,
                 "service_type": service.service_type,
                 "status": service.status,
-                "container_name": service.container_name,
-                "image_name": service.image_name,
-                "endpoint_url": service.endpoint_url,
-                "port": service.port,
+                "container_name": service.config.get("container_name"),
+                "image_name": service.config.get("image"),
+                "endpoint_url": service.config.get("url"),
+                "port": service.config.get("port"),
                 "check_interval": service.check_interval,
                 "tags": service.tags,
                 "metadata": service.metadata,
@@ -185,20 +200,88 @@ class ServiceDetailConsumer(AsyncWebsocketConsumer):
         except Service.DoesNotExist:
             return None
 
-    @database_sync_to_async
-    def get_service_logs(self):
-        """Get service logs"""
+    def container_name(self, service):
+        """Container of a Docker service, or None"""
+        if service is None or service.service_type != "docker":
+            return None
+        return service.config.get("container_name")
+
+    async def get_service_logs(self):
+        """Get service logs
+
+        Only the service lookup uses the database thread; the logs are read
+        from the container's log file or the Docker socket, or on the Docker
+        executor without a socket.
+        """
+        service = await self.get_service()
+        if service is None:
+            return "Service not found"
+        container_name = self.container_name(service)
+        if container_name:
+            if async_docker.is_available():
+                try:
+                    return await json_file_logs.logs(container_name, tail=100)
+                except (OSError, DockerAPIError) as e:
+                    logger.error(f"Error getting logs for {container_name}: {e}")
+                    return ""
+            return await docker_executor.run(
+                docker_service.get_container_logs, container_name, tail=100
+            )
+        return "Logs not available for this service type"
+
+    async def follow_logs(self, since=None, tail=100):
+        """Stream the container's logs to this client until it unfollows
+
+        ``since`` is a unix time; without it the last ``tail`` lines are sent
+        first. A client that falls behind loses its oldest unsent lines, and
+        the next batch says how many.
+        """
+        await self.unfollow_logs()
+        container_name = self.container_name(await self.get_service())
+        if not container_name:
+            await self.send_error("Logs not available for this service type")
+            return
+        if not log_streams.is_available():
+            await self.send_error("Following logs requires the Docker socket")
+            return
         try:
-            service = Service.objects.get(id=self.service_id)
-            if service.service_type == "docker" and service.container_name:
-                from services.docker_service import docker_service
+            since = None if since is None else str(float(since))
+            tail = int(tail)
+        except (TypeError, ValueError):
+            await self.send_error("Invalid since or tail")
+            return
+
+        try:
+            self.log_subscription = await log_streams.subscribe(
+                container_name, since=since, tail=tail
+            )
+        except (OSError, DockerAPIError) as e:
+            logger.error(f"Error following logs for {container_name}: {e}")
+            await self.send_error(f"Could not follow logs: {e}")
+            return
+        self.log_sender = asyncio.ensure_future(self.send_logs(self.log_subscription))
 
-                return docker_service.get_container_logs(
-                    service.container_name, tail=100
+    async def send_logs(self, subscription):
+        while True:
+            lines, dropped = await subscription.next_batch(log_streams.batch_lines)
+            if not lines and subscription.closed:
+                return
+            await self.send(
+                text_data=json.dumps(
+                    {"type": "log_lines", "lines": lines, "dropped": dropped}
                 )
-            return "Logs not available for this service type"
-        except Service.DoesNotExist:
-            return "Service not found"
+            )
+
+    async def unfollow_logs(self):
+        if self.log_subscription is not None:
+            log_streams.unsubscribe(self.log_subscription)
+            self.log_subscription = None
+        if self.log_sender is not None:
+            self.log_sender.cancel()
+            self.log_sender = None
+
+    async def send_error(self, message):
+        await self.send(text_data=json.dumps({"type": "error", "message": message}))
 
 
 class EventConsumer(AsyncWebsocketConsumer):
@@ -332,24 +415,27 @@ class MonitoringConsumer(AsyncWebsocketConsumer):
             )
         )
 
-    @database_sync_to_async
-    def get_initial_data(self):
+    async def process_update(self, event):
+        """Handle top process snapshot messages"""
+        await self.send(
+            text_data=json.dumps({"type": "process_update", "data": event["data"]})
+        )
+
+    async def get_initial_data(self):
         """Get initial monitoring data"""
-        try:
-            containers = docker_service.list_containers()
-            return {
-                "containers": containers,
-                "timestamp": "2025-01-06T21:36:32Z"  # You might want to use timezone.now()
-            }
-        except Exception as e:
-            logger.error(f"Error getting initial monitoring data: {e}")
-            return {"containers": [], "timestamp": "2025-01-06T21:36:32Z"}
+        return {
+            "containers": await self.get_containers(),
+            "timestamp": "2025-01-06T21:36:32Z"  # You might want to use timezone.now()
+        }
 
-    @database_sync_to_async
-    def get_containers(self):
-        """Get current container data"""
+    async def get_containers(self):
+        """Get current container data
+
+        Served by the container inventory, which keeps the listing current
+        from Docker events; it is read on the Docker executor.
+        """
         try:
-            return docker_service.list_containers()
+            return await docker_executor.run(container_inventory.list_containers)
         except Exception as e:
             logger.error(f"Error getting containers: {e}")
             return []
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+
+import psutil
+from django.utils import timezone
+
+from .models import DeviceMetrics
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 * 1024 * 1024
+
+
+class RateCalculator:
+    """Turns monotonically increasing counters into per-second rates
+
+    Each counter keeps its own baseline and monotonic timestamp, so the rate
+    is correct no matter how often or by whom the counters are sampled.
+    """
+
+    def __init__(self):
+        self._baselines: Dict[Hashable, tuple] = {}
+
+    def rate(self, key: Hashable, value: float, now: float) -> Optional[float]:
+        """Rate of ``key`` since its previous value, or None without a baseline"""
+        previous = self._baselines.get(key)
+        self._baselines[key] = (value, now)
+        if previous is None:
+            return None
+
+        last_value, last_time = previous
+        elapsed = now - last_time
+        if elapsed <= 0 or value < last_value:
+            # Counter reset (reboot, interface re-created) or clock oddity
+            return None
+        return (value - last_value) / elapsed
+
+    def prune(self, alive: set):
+        """Forget baselines for counters that no longer exist"""
+        for key in list(self._baselines):
+            if key not in alive:
+                del self._baselines[key]
+
+
+class DeviceMetricsCollector:
+    """Collects per-CPU, per-interface, per-disk and per-filesystem metrics"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self.rates = RateCalculator()
+        self.last_cpu_times: Dict[str, tuple] = {}
+        self.last_sample: List[Dict] = []
+        self.last_sample_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def collect_device_metrics(self) -> List[Dict]:
+        """Collect one sample for every device
+
+        Callers within ``min_interval`` of the previous sample share it
+        instead of producing rates over a few milliseconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self.last_sample_time is not None
+                and now - self.last_sample_time < self.min_interval
+            ):
+                return list(self.last_sample)
+
+            metrics = []
+            alive = set()
+            for collect in (
+                self._collect_cpu,
+                self._collect_network,
+                self._collect_disks,
+                self._collect_filesystems,
+            ):
+                try:
+                    metrics.extend(collect(now, alive))
+                except Exception as e:
+                    logger.error(f"Error collecting device metrics: {e}")
+
+            self.rates.prune(alive)
+            self.last_sample = metrics
+            self.last_sample_time = now
+            return list(metrics)
+
+    def _collect_cpu(self, now: float, alive: set) -> List[Dict]:
+        """Per-core utilization from cpu_times deltas"""
+        metrics = []
+        current = {}
+        for index, times in enumerate(psutil.cpu_times(percpu=True)):
+            core = f"cpu{index}"
+            total = sum(times)
+            idle = times.idle + getattr(times, "iowait", 0)
+            current[core] = (total, idle)
+
+            previous = self.last_cpu_times.get(core)
+            if previous is None:
+                continue
+            total_delta = total - previous[0]
+            idle_delta = idle - previous[1]
+            if total_delta <= 0:
+                continue
+            busy = max(0.0, min(100.0, (1 - idle_delta / total_delta) * 100))
+            metrics.append(
+                {"device_type": "cpu", "device": core, "percent": round(busy, 2)}
+            )
+
+        self.last_cpu_times = current
+        return metrics
+
+    def _collect_network(self, now: float, alive: set) -> List[Dict]:
+        """Per-interface byte and packet rates"""
+        metrics = []
+        for nic, counters in psutil.net_io_counters(pernic=True).items():
+            rates = self._rates(
+                ("network", nic),
+                now,
+                alive,
+                read_rate=counters.bytes_recv,
+                write_rate=counters.bytes_sent,
+                read_ops_rate=counters.packets_recv,
+                write_ops_rate=counters.packets_sent,
+            )
+            if rates:
+                metrics.append({"device_type": "network", "device": nic, **rates})
+        return metrics
+
+    def _collect_disks(self, now: float, alive: set) -> List[Dict]:
+        """Per-block-device throughput, IOPS and busy percentage"""
+        metrics = []
+        for disk, counters in (psutil.disk_io_counters(perdisk=True) or {}).items():
+            counter_values = {
+                "read_rate": counters.read_bytes,
+                "write_rate": counters.write_bytes,
+                "read_ops_rate": counters.read_count,
+                "write_ops_rate": counters.write_count,
+            }
+            if hasattr(counters, "busy_time"):
+                # busy_time is in milliseconds, so ms/s divided by 10 is percent
+                counter_values["percent"] = counters.busy_time
+
+            rates = self._rates(("disk", disk), now, alive, **counter_values)
+            if rates:
+                if rates.get("percent") is not None:
+                    rates["percent"] = round(min(rates["percent"] / 10, 100.0), 2)
+                metrics.append({"device_type": "disk", "device": disk, **rates})
+        return metrics
+
+    def _collect_filesystems(self, now: float, alive: set) -> List[Dict]:
+        """Usage of every mounted filesystem"""
+        metrics = []
+        seen = set()
+        for partition in psutil.disk_partitions(all=False):
+            if partition.mountpoint in seen:
+                continue
+            seen.add(partition.mountpoint)
+            try:
+                usage = psutil.disk_usage(partition.mountpoint)
+            except OSError:
+                continue
+            metrics.append(
+                {
+                    "device_type": "filesystem",
+                    "device": partition.mountpoint,
+                    "percent": round(usage.percent, 2),
+                    "used_gb": round(usage.used / GB, 2),
+                    "total_gb": round(usage.total / GB, 2),
+                }
+            )
+        return metrics
+
+    def _rates(self, key: tuple, now: float, alive: set, **counters) -> Dict:
+        """Per-second rates for a device's counters; empty until a baseline exists"""
+        rates = {}
+        for field, value in counters.items():
+            counter_key = key + (field,)
+            alive.add(counter_key)
+            rates[field] = self.rates.rate(counter_key, value, now)
+
+        if any(rate is None for rate in rates.values()):
+            return {}
+        return {field: round(rate, 2) for field, rate in rates.items()}
+
+    def save_device_metrics(self, metrics_list: List[Dict]) -> List[DeviceMetrics]:
+        """Save device metrics to database"""
+        return DeviceMetrics.objects.bulk_create(
+            [DeviceMetrics(**metrics) for metrics in metrics_list]
+        )
+
+    def get_recent_device_metrics(
+        self, device_type: str = None, device: str = None, hours: int = 1
+    ):
+        """Get recent device metrics"""
+        since = timezone.now() - timedelta(hours=hours)
+        queryset = DeviceMetrics.objects.filter(timestamp__gte=since)
+
+        if device_type:
+            queryset = queryset.filter(device_type=device_type)
+        if device:
+            queryset = queryset.filter(device=device)
+
+        return queryset
+
+
+# Global instance
+device_collector = DeviceMetricsCollector()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from django.conf import settings
+
+from .prometheus import record_docker_executor
+
+logger = logging.getLogger(__name__)
+
+# While calls are in flight the shared metrics state is written at most this often
+PUBLISH_INTERVAL = 1.0
+
+
+class DockerExecutorFull(RuntimeError):
+    """Raised when too many Docker calls are already waiting"""
+
+
+class DockerExecutor:
+    """Bounded thread pool for blocking Docker calls made from async code
+
+    ``database_sync_to_async`` runs everything on the one thread that also
+    serves the ORM for the whole ASGI worker, so a slow Docker call there
+    stalls every consumer's database access. Calls run here instead, on
+    ``DOCKER_EXECUTOR_WORKERS`` threads of their own. At most
+    ``DOCKER_EXECUTOR_MAX_PENDING`` calls wait for a thread; more fail at
+    once with ``DockerExecutorFull``. Queue depth, busy threads and time spent
+    waiting are published to the Prometheus registry.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, max_pending: Optional[int] = None
+    ):
+        self.max_workers = max_workers or getattr(
+            settings, "DOCKER_EXECUTOR_WORKERS", 4
+        )
+        self.max_pending = max_pending or getattr(
+            settings, "DOCKER_EXECUTOR_MAX_PENDING", 64
+        )
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="docker-io"
+                )
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking Docker call on the pool and wait for its result"""
+        with self._lock:
+            if self.queued >= self.max_pending:
+                self.rejected += 1
+                raise DockerExecutorFull(
+                    f"{self.queued} Docker calls already waiting for a worker"
+                )
+            self.queued += 1
+        self._publish()
+
+        future = self._pool().submit(self._call, time.monotonic(), func, args, kwargs)
+        future.add_done_callback(self._forget_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _call(self, submitted: float, func: Callable, args, kwargs) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        self._publish(time.monotonic() - submitted)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+            self._publish()
+
+    def _forget_cancelled(self, future: Future):
+        # A caller that gave up while queued cancels the call before it starts
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+            self._publish()
+
+    def _publish(self, wait: Optional[float] = None):
+        # The idle state is always written, so it never reads as busy
+        busy = self.queued or self.running
+        try:
+            record_docker_executor(
+                self.queued, self.running, wait, PUBLISH_INTERVAL if busy else 0.0
+            )
+        except Exception as e:
+            logger.error(f"Error recording Docker executor metrics: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Global instance
+docker_executor = DockerExecutor()
@@ -1,27 +1,67 @@
+import asyncio
 import logging
+import queue
 import threading
 import time
 from typing import Any
 from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Optional
 
-import docker
 from django.conf import settings
+from django.db import close_old_connections
+from django.db import transaction
+from django.utils import timezone
 from events.models import Event
-from services.docker_service import docker_service
+from services.async_docker import async_docker
 from services.models import Service
 
 from .broadcast import event_broadcaster
 
 logger = logging.getLogger(__name__)
 
+# Docker action: (service status, event type, severity)
+STATUS_MAPPING = {
+    "start": ("healthy", "service_started", "info"),
+    "restart": ("healthy", "service_restarted", "info"),
+    "stop": ("unhealthy", "service_stopped", "info"),
+    "die": ("unhealthy", "service_stopped", "warning"),
+}
+# Docker health status: (service status, event type, severity)
+HEALTH_MAPPING = {
+    "healthy": ("healthy", "health_check_recovered", "info"),
+    "unhealthy": ("unhealthy", "health_check_failed", "warning"),
+}
+MAX_RETRY_DELAY = 30.0
+
 
 class DockerEventMonitor:
+    """Streams Docker container events into service status updates
+
+    One thread reads the event stream from the Engine API socket and another
+    applies what it read.
+    Events arriving within ``DOCKER_EVENT_BATCH_WINDOW`` seconds of each
+    other are applied together, with one query for the affected services
+    and bulk writes. The position in the stream is kept as a nanosecond
+    cursor, starting at the time monitoring began, so after a disconnect the
+    stream is reopened with ``since`` and nothing in between is lost, even
+    before the first event arrives.
+    """
+
     def __init__(self):
         self.client = None
         self.monitoring = False
         self.event_handlers = []
         self.monitor_thread = None
+        self.apply_thread = None
+        self.batch_window = getattr(settings, "DOCKER_EVENT_BATCH_WINDOW", 0.05)
+        self.retry_delay = 1.0
+        self.cursor: Optional[int] = None
+        self._cursor_keys = set()
+        self._queue: queue.Queue = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[asyncio.Task] = None
 
     def add_event_handler(self, handler: Callable[[Dict[str, Any]], None]):
         """Add an event handler function"""
@@ -32,113 +72,223 @@ class DockerEventMonitor:
         if self.monitoring:
             return
 
-        if not docker_service.is_available():
-            logger.error("Docker service not available")
+        if not async_docker.is_available():
+            logger.error(f"Docker socket {async_docker.socket_path} not available")
             return
 
-        # For now, we'll skip event monitoring since it requires Docker SDK
-        # In a production environment, you might want to implement this differently
-        logger.warning("Docker event monitoring requires Docker SDK - skipping for now")
-        return
-
+        self.client = async_docker
         self.monitoring = True
         self.monitor_thread = threading.Thread(target=self._monitor_events, daemon=True)
+        self.apply_thread = threading.Thread(target=self._apply_events, daemon=True)
         self.monitor_thread.start()
+        self.apply_thread.start()
         logger.info("Started Docker event monitoring")
 
     def stop_monitoring(self):
         """Stop monitoring Docker events"""
         self.monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=5)
+        if self._loop is not None and self._reader is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._reader.cancel)
+            except RuntimeError:
+                # The loop has already finished
+                pass
+        self._queue.put(None)
+        for thread in (self.monitor_thread, self.apply_thread):
+            if thread:
+                thread.join(timeout=5)
         logger.info("Stopped Docker event monitoring")
 
+    def _since(self) -> Optional[str]:
+        if self.cursor is None:
+            return None
+        seconds, nanos = divmod(self.cursor, 1_000_000_000)
+        return f"{seconds}.{nanos:09d}"
+
     def _monitor_events(self):
-        """Monitor Docker events in a separate thread"""
         try:
-            for event in self.client.events(decode=True):
-                if not self.monitoring:
-                    break
+            asyncio.run(self._read_events())
+        except asyncio.CancelledError:
+            pass
 
-                self._process_event(event)
-        except Exception as e:
-            logger.error(f"Error monitoring Docker events: {e}")
+    async def _read_events(self):
+        """Read Docker events, reconnecting from the cursor when the stream drops"""
+        self._loop = asyncio.get_running_loop()
+        self._reader = asyncio.current_task()
+        if self.cursor is None:
+            self.cursor = time.time_ns()
+        delay = self.retry_delay
+        while self.monitoring:
+            try:
+                async for event in self.client.events(
+                    since=self._since(), filters={"type": "container"}
+                ):
+                    delay = self.retry_delay
+                    if not self.monitoring:
+                        break
+                    if self._advance(event):
+                        self._queue.put(event)
+            except Exception as e:
+                if self.monitoring:
+                    logger.warning(f"Docker event stream interrupted: {e}")
+            if self.monitoring:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
 
-    def _process_event(self, event: Dict[str, Any]):
-        """Process a Docker event"""
-        try:
-            # Filter relevant events
-            if event.get("Type") == "container":
-                event_type = event.get("Action")
-                container_name = (
-                    event.get("Actor", {}).get("Attributes", {}).get("name")
-                )
+    def _advance(self, event: Dict[str, Any]) -> bool:
+        """Move the cursor past ``event``; False if it was already seen
 
-                if container_name and event_type in ["start", "stop", "die", "restart"]:
-                    processed_event = {
-                        "type": event_type,
-                        "container_name": container_name,
-                        "container_id": event.get("Actor", {}).get("ID"),
-                        "timestamp": event.get("time"),
-                        "raw_event": event,
-                    }
-
-                    # Update service status
-                    self._update_service_status(container_name, event_type)
-
-                    # Notify all handlers
-                    for handler in self.event_handlers:
-                        try:
-                            handler(processed_event)
-                        except Exception as e:
-                            logger.error(f"Error in event handler: {e}")
-        except Exception as e:
-            logger.error(f"Error processing Docker event: {e}")
+        ``since`` is inclusive, so a replay repeats the events that share the
+        cursor's timestamp.
+        """
+        time_nano = event.get("timeNano")
+        if time_nano is None:
+            return True
+        key = (event.get("id") or event.get("Actor", {}).get("ID"), event.get("Action"))
+        if self.cursor is not None:
+            if time_nano < self.cursor:
+                return False
+            if time_nano == self.cursor and key in self._cursor_keys:
+                return False
+        if time_nano != self.cursor:
+            self.cursor = time_nano
+            self._cursor_keys = set()
+        self._cursor_keys.add(key)
+        return True
 
-    def _update_service_status(self, container_name: str, event_type: str):
-        """Update service status based on Docker event"""
-        try:
-            service = Service.objects.get(
-                container_name=container_name, service_type="docker"
-            )
+    def _apply_events(self):
+        """Apply queued events in batches"""
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            batch = [event]
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if event is None:
+                    self.process_events(batch)
+                    return
+                batch.append(event)
 
-            old_status = service.status
-
-            # Map Docker events to service status
-            status_mapping = {
-                "start": "healthy",
-                "stop": "unhealthy",
-                "die": "unhealthy",
-                "restart": "healthy",
-            }
-
-            new_status = status_mapping.get(event_type, service.status)
-            service.status = new_status
-            service.save()
-
-            # Create event
-            event = Event.objects.create(
-                service=service,
-                event_type=f"service_{event_type}",
-                severity="info",
-                title=f"Container {event_type.title()}",
-                message=f"Docker container {container_name} {event_type}",
-                metadata={"docker_event": event_type},
-            )
+            close_old_connections()
+            self.process_events(batch)
 
-            # Broadcast updates
-            event_broadcaster.broadcast_service_update(service)
-            event_broadcaster.broadcast_new_event(event)
+    def _process_event(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Turn a Docker event into a status change, or None if it is not one"""
+        if event.get("Type") != "container":
+            return None
+        action, _, health = event.get("Action", "").partition(":")
+        if action == "health_status":
+            mapping = HEALTH_MAPPING.get(health.strip())
+        else:
+            mapping = STATUS_MAPPING.get(action)
+        container_name = event.get("Actor", {}).get("Attributes", {}).get("name")
+        if not mapping or not container_name:
+            return None
 
-            if old_status != new_status:
-                event_broadcaster.broadcast_service_status_change(
-                    service, old_status, new_status
-                )
+        status, event_type, severity = mapping
+        return {
+            "type": action,
+            "health_status": health.strip() or None,
+            "status": status,
+            "event_type": event_type,
+            "severity": severity,
+            "container_name": container_name,
+            "container_id": event.get("Actor", {}).get("ID"),
+            "timestamp": event.get("time"),
+            "raw_event": event,
+        }
 
-        except Service.DoesNotExist:
-            logger.warning(f"Service not found for container: {container_name}")
+    def process_events(self, events: List[Dict[str, Any]]) -> List[Event]:
+        """Apply a batch of Docker events to the services they concern"""
+        processed = [p for p in map(self._process_event, events) if p is not None]
+        for processed_event in processed:
+            for handler in self.event_handlers:
+                try:
+                    handler(processed_event)
+                except Exception as e:
+                    logger.error(f"Error in event handler: {e}")
+        if not processed:
+            return []
+
+        try:
+            return self._update_service_status(processed)
         except Exception as e:
             logger.error(f"Error updating service status: {e}")
+            return []
+
+    def _update_service_status(self, processed: List[Dict[str, Any]]) -> List[Event]:
+        """Update service status from processed Docker events in bulk"""
+        names = {p["container_name"] for p in processed}
+        services = {}
+        for service in Service.objects.filter(
+            service_type="docker", config__container_name__in=names
+        ):
+            services.setdefault(service.config.get("container_name"), service)
+
+        now = timezone.now()
+        old_statuses = {}
+        events = []
+        for processed_event in processed:
+            service = services.get(processed_event["container_name"])
+            if service is None:
+                continue
+            old_statuses.setdefault(service.id, service.status)
+            service.status = processed_event["status"]
+            service.updated_at = now
+            description = (
+                f"health {processed_event['health_status']}"
+                if processed_event["type"] == "health_status"
+                else processed_event["type"]
+            )
+            events.append(
+                Event(
+                    service=service,
+                    event_type=processed_event["event_type"],
+                    severity=processed_event["severity"],
+                    title=f"Container {description.title()}",
+                    message=(
+                        f"Docker container {processed_event['container_name']} "
+                        f"{description}"
+                    ),
+                    metadata={
+                        "docker_event": processed_event["type"],
+                        "health_status": processed_event["health_status"],
+                        "container_id": processed_event["container_id"],
+                    },
+                    source="docker_events",
+                )
+            )
+
+        updated = [s for s in services.values() if s.id in old_statuses]
+        if not updated:
+            return []
+        with transaction.atomic():
+            Service.objects.bulk_update(updated, ["status", "updated_at"])
+            Event.objects.bulk_create(events)
+
+        for service in updated:
+            try:
+                event_broadcaster.broadcast_service_update(service)
+                if old_statuses[service.id] != service.status:
+                    event_broadcaster.broadcast_service_status_change(
+                        service, old_statuses[service.id], service.status
+                    )
+            except Exception as e:
+                logger.error(f"Error broadcasting service update: {e}")
+        for event in events:
+            try:
+                event_broadcaster.broadcast_new_event(event)
+            except Exception as e:
+                logger.error(f"Error broadcasting Docker event: {e}")
+        return events
 
 
 # Global instance
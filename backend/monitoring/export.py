@@ -0,0 +1,156 @@
+import csv
+import io
+import zlib
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from events.models import Event
+from healthchecks.models import HealthCheck
+
+from .models import DockerMetrics
+from .models import ServerMetrics
+from .serializers import DOCKER_METRICS_COLUMNS
+from .serializers import SERVER_METRICS_COLUMNS
+
+EXPORT_CHUNK_ROWS = 2000
+EXPORT_BUFFER_BYTES = 64 * 1024
+
+EXPORT_DATASETS = {
+    "server_metrics": {
+        "model": ServerMetrics,
+        "fields": ["id"] + SERVER_METRICS_COLUMNS,
+        "time_field": "timestamp",
+        "host_field": "host",
+    },
+    "docker_metrics": {
+        "model": DockerMetrics,
+        "fields": ["id"] + DOCKER_METRICS_COLUMNS,
+        "time_field": "timestamp",
+        "host_field": "host",
+        "container_field": "container_id",
+    },
+    "healthchecks": {
+        "model": HealthCheck,
+        "fields": [
+            "id",
+            "service_id",
+            "status",
+            "response_time",
+            "message",
+            "error_code",
+            "http_status",
+            "checked_at",
+            "duration",
+        ],
+        "time_field": "checked_at",
+        "service_field": "service_id",
+        "owner_field": "service__created_by",
+    },
+    "events": {
+        "model": Event,
+        "fields": [
+            "id",
+            "service_id",
+            "event_type",
+            "severity",
+            "title",
+            "message",
+            "source",
+            "timestamp",
+            "acknowledged",
+        ],
+        "time_field": "timestamp",
+        "service_field": "service_id",
+        "owner_field": "service__created_by",
+        # Anomaly and capacity events belong to no service and go to everyone
+        "shared_field": "service",
+    },
+}
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_rows(queryset, fields: Sequence[str]) -> Iterator[tuple]:
+    """Iterate rows through a server-side cursor"""
+    return queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_ROWS)
+
+
+def iter_ndjson(rows: Iterable[tuple], fields: Sequence[str]) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding buffered chunks"""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    buffer = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(dict(zip(fields, row))) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def iter_csv(rows: Iterable[tuple], fields: Sequence[str]) -> Iterator[bytes]:
+    """Encode rows as CSV with a header line, yielding buffered chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in row
+            ]
+        )
+        if buffer.tell() >= EXPORT_BUFFER_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def async_stream(chunks: Iterable[bytes]):
+    """Drive a synchronous chunk iterator from an async response
+
+    Django buffers synchronous iterators completely when serving
+    ``StreamingHttpResponse`` over ASGI, so each chunk is pulled in the
+    database thread instead.
+    """
+    iterator = iter(chunks)
+    sentinel = object()
+    while True:
+        chunk = await sync_to_async(next)(iterator, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+
+def build_export(
+    dataset: Dict, queryset, output: str, compress: bool
+) -> Iterator[bytes]:
+    """Build the encoded (and optionally compressed) chunk stream"""
+    fields = dataset["fields"]
+    rows = export_rows(queryset.order_by(dataset["time_field"]), fields)
+    encode = iter_csv if output == "csv" else iter_ndjson
+    chunks = encode(rows, fields)
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,323 @@
+import logging
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from events.models import Event
+
+from .broadcast import event_broadcaster
+from .compression import CHUNK_FIELDS
+from .compression import decode_chunk
+from .models import LOCAL_HOST
+from .models import DeviceMetrics
+from .models import DockerMetrics
+from .models import DockerMetricsChunk
+from .models import ServerMetrics
+
+logger = logging.getLogger(__name__)
+
+FORECAST_CACHE_KEY = "monitoring:forecasts"
+# Trends that take longer than this to exhaust a resource are reported as flat
+MAX_HORIZON_HOURS = 24 * 365
+
+
+def fit_trends(series: np.ndarray, hours: np.ndarray, values: np.ndarray) -> Dict:
+    """Least-squares line per series over (series index, hour, value) points
+
+    All series are fitted at once from per-series sums, so the cost is a few
+    passes over the points regardless of how many series there are. Returns
+    arrays indexed by series: point count, slope per hour and the fitted
+    value at each series' last hour.
+    """
+    size = int(series.max()) + 1 if len(series) else 0
+    n = np.bincount(series, minlength=size).astype(np.float64)
+    sum_x = np.bincount(series, hours, size)
+    sum_y = np.bincount(series, values, size)
+    sum_xx = np.bincount(series, hours * hours, size)
+    sum_xy = np.bincount(series, hours * values, size)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = n * sum_xx - sum_x * sum_x
+        slope = np.where(
+            denominator > 0, (n * sum_xy - sum_x * sum_y) / denominator, 0.0
+        )
+        intercept = (sum_y - slope * sum_x) / n
+
+    last_hour = np.full(size, -np.inf)
+    np.maximum.at(last_hour, series, hours)
+    return {
+        "points": n.astype(np.int64),
+        "slope": slope,
+        "current": intercept + slope * last_hour,
+    }
+
+
+class ExhaustionForecaster:
+    """Forecasts when filesystems fill up and containers reach their memory limit
+
+    Samples from the last ``FORECAST_LOOKBACK_HOURS`` are rolled up to hourly
+    averages in the database, container hours already compressed into chunks
+    included, and a trend line is fitted to every series.
+    Forecasts are cached for ``FORECAST_CACHE_TTL`` seconds; series expected
+    to run out within ``FORECAST_ALERT_HOURS`` raise a ``capacity_forecast``
+    event at most once per ``FORECAST_ALERT_COOLDOWN_HOURS``.
+    """
+
+    def __init__(self):
+        self.lookback_hours = getattr(settings, "FORECAST_LOOKBACK_HOURS", 24)
+        self.min_points = getattr(settings, "FORECAST_MIN_POINTS", 6)
+        self.alert_hours = getattr(settings, "FORECAST_ALERT_HOURS", 72)
+        self.cooldown_hours = getattr(settings, "FORECAST_ALERT_COOLDOWN_HOURS", 12)
+        self.ttl = getattr(settings, "FORECAST_CACHE_TTL", 3600)
+
+    def get_forecasts(self) -> Dict:
+        """Return the cached forecasts, computing them if there are none"""
+        forecasts = cache.get(FORECAST_CACHE_KEY)
+        if forecasts is None:
+            forecasts = self.build_forecasts()
+            cache.set(FORECAST_CACHE_KEY, forecasts, self.ttl)
+        return forecasts
+
+    def run(self) -> Dict:
+        """Recompute and cache forecasts, raising events for imminent exhaustion"""
+        forecasts = self.build_forecasts()
+        cache.set(FORECAST_CACHE_KEY, forecasts, self.ttl)
+        forecasts["alerts"] = len(self._alert(forecasts["series"]))
+        return forecasts
+
+    def build_forecasts(self) -> Dict:
+        now = timezone.now()
+        since = now - timedelta(hours=self.lookback_hours)
+        rollups = (
+            self._disk_rollups(since)
+            + self._filesystem_rollups(since)
+            + self._container_rollups(since)
+        )
+
+        series = [self._forecast(rollup, now) for rollup in self._fit(rollups, since)]
+        series = [s for s in series if s is not None]
+        series.sort(
+            key=lambda s: (
+                s["hours_to_exhaustion"] is None,
+                s["hours_to_exhaustion"] or 0,
+            )
+        )
+        return {"generated_at": now.isoformat(), "series": series}
+
+    def _disk_rollups(self, since) -> List[Dict]:
+        rows = (
+            ServerMetrics.objects.filter(timestamp__gte=since)
+            .annotate(hour=TruncHour("timestamp"))
+            .values("host", "hour")
+            .annotate(value=Avg("disk_percent"))
+        )
+        return [
+            {
+                "key": f"disk:{row['host']}",
+                "kind": "disk",
+                "host": row["host"],
+                "name": "/",
+                "unit": "percent",
+                "hour": row["hour"],
+                "value": row["value"],
+                "capacity": 100.0,
+            }
+            for row in rows
+        ]
+
+    def _filesystem_rollups(self, since) -> List[Dict]:
+        rows = (
+            DeviceMetrics.objects.filter(
+                device_type="filesystem", timestamp__gte=since, percent__isnull=False
+            )
+            .annotate(hour=TruncHour("timestamp"))
+            .values("device", "hour")
+            .annotate(value=Avg("percent"))
+        )
+        return [
+            {
+                "key": f"filesystem:{LOCAL_HOST}:{row['device']}",
+                "kind": "filesystem",
+                "host": LOCAL_HOST,
+                "name": row["device"],
+                "unit": "percent",
+                "hour": row["hour"],
+                "value": row["value"],
+                "capacity": 100.0,
+            }
+            for row in rows
+        ]
+
+    def _container_rollups(self, since) -> List[Dict]:
+        """Hourly memory per container, including hours moved into chunks"""
+        rollups = self._raw_container_rollups(since)
+        rollups += self._chunk_container_rollups(since)
+        merged: Dict[tuple, Dict] = {}
+        for rollup in rollups:
+            key = (rollup["host"], rollup["container_id"], rollup["hour"])
+            current = merged.get(key)
+            if current is None:
+                merged[key] = rollup
+                continue
+            samples = current["samples"] + rollup["samples"]
+            current["value"] = (
+                current["value"] * current["samples"]
+                + rollup["value"] * rollup["samples"]
+            ) / samples
+            current["capacity"] = max(current["capacity"], rollup["capacity"])
+            current["samples"] = samples
+        return [
+            {
+                "key": f"container_memory:{row['host']}:{row['container_id']}",
+                "kind": "container_memory",
+                "host": row["host"],
+                "name": row["name"],
+                "unit": "mb",
+                "hour": row["hour"],
+                "value": row["value"],
+                "capacity": row["capacity"],
+            }
+            for row in merged.values()
+        ]
+
+    def _raw_container_rollups(self, since) -> List[Dict]:
+        rows = (
+            DockerMetrics.objects.filter(timestamp__gte=since)
+            .annotate(hour=TruncHour("timestamp"))
+            .values("host", "container_id", "hour")
+            .annotate(
+                value=Avg("memory_usage_mb"),
+                capacity=Max("memory_limit_mb"),
+                name=Max("container_name"),
+                samples=Count("id"),
+            )
+        )
+        return list(rows)
+
+    def _chunk_container_rollups(self, since) -> List[Dict]:
+        memory = CHUNK_FIELDS.index("memory_usage_mb")
+        limit = CHUNK_FIELDS.index("memory_limit_mb")
+        rollups = []
+        for chunk in DockerMetricsChunk.objects.filter(start__gte=since).iterator():
+            _, columns = decode_chunk(bytes(chunk.data))
+            rollups.append(
+                {
+                    "host": chunk.host,
+                    "container_id": chunk.container_id,
+                    "hour": chunk.start.replace(minute=0, second=0, microsecond=0),
+                    "name": chunk.container_name,
+                    "samples": len(columns[memory]),
+                    "value": float(np.mean(columns[memory])),
+                    "capacity": float(max(columns[limit])),
+                }
+            )
+        return rollups
+
+    def _fit(self, rollups: List[Dict], since) -> List[Dict]:
+        """Fit every series and return one summary per series"""
+        index: Dict[str, int] = {}
+        latest: Dict[str, Dict] = {}
+        for rollup in rollups:
+            index.setdefault(rollup["key"], len(index))
+            current = latest.get(rollup["key"])
+            if current is None or rollup["hour"] > current["hour"]:
+                latest[rollup["key"]] = rollup
+        if not index:
+            return []
+
+        trends = fit_trends(
+            np.array([index[r["key"]] for r in rollups], dtype=np.int64),
+            np.array(
+                [(r["hour"] - since).total_seconds() / 3600 for r in rollups],
+                dtype=np.float64,
+            ),
+            np.array([r["value"] for r in rollups], dtype=np.float64),
+        )
+        return [
+            {
+                **latest[key],
+                "points": int(trends["points"][position]),
+                "slope": float(trends["slope"][position]),
+                "current": float(trends["current"][position]),
+            }
+            for key, position in index.items()
+        ]
+
+    def _forecast(self, fitted: Dict, now) -> Optional[Dict]:
+        if fitted["points"] < self.min_points or not fitted["capacity"]:
+            return None
+
+        hours_left = None
+        exhausts_at = None
+        remaining = max(fitted["capacity"] - fitted["current"], 0.0)
+        if fitted["slope"] > 0 and remaining < fitted["slope"] * MAX_HORIZON_HOURS:
+            # The fit is anchored at the middle of the last rollup's hour
+            elapsed = (now - fitted["hour"]).total_seconds() / 3600 - 0.5
+            hours_left = max(remaining / fitted["slope"] - elapsed, 0.0)
+            exhausts_at = (now + timedelta(hours=hours_left)).isoformat()
+
+        return {
+            "series": fitted["key"],
+            "kind": fitted["kind"],
+            "host": fitted["host"],
+            "name": fitted["name"],
+            "unit": fitted["unit"],
+            "current": round(fitted["current"], 2),
+            "capacity": round(fitted["capacity"], 2),
+            "slope_per_hour": round(fitted["slope"], 4),
+            "points": fitted["points"],
+            "hours_to_exhaustion": (
+                round(hours_left, 1) if hours_left is not None else None
+            ),
+            "exhausts_at": exhausts_at,
+        }
+
+    def _alert(self, forecasts: List[Dict]) -> List[Event]:
+        cooldown_start = timezone.now() - timedelta(hours=self.cooldown_hours)
+        events = []
+        for forecast in forecasts:
+            hours_left = forecast["hours_to_exhaustion"]
+            if hours_left is None or hours_left > self.alert_hours:
+                continue
+            if Event.objects.filter(
+                event_type="capacity_forecast",
+                metadata__series=forecast["series"],
+                timestamp__gte=cooldown_start,
+            ).exists():
+                continue
+
+            resource = (
+                f"memory of container {forecast['name']}"
+                if forecast["kind"] == "container_memory"
+                else f"filesystem {forecast['name']}"
+            )
+            event = Event.objects.create(
+                event_type="capacity_forecast",
+                severity="critical" if hours_left <= 24 else "warning",
+                title=f"Capacity forecast: {resource} on {forecast['host']}",
+                message=(
+                    f"At the current trend {resource} is exhausted in "
+                    f"{hours_left:.1f} hours"
+                ),
+                metadata=forecast,
+                source="forecaster",
+            )
+            events.append(event)
+            try:
+                event_broadcaster.broadcast_new_event(event)
+            except Exception as e:
+                logger.error(f"Error broadcasting capacity forecast: {e}")
+        return events
+
+
+# Global instance
+exhaustion_forecaster = ExhaustionForecaster()
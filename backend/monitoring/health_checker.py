@@ -1,12 +1,9 @@
 import logging
-import socket
-import subprocess
 import time
 from typing import Any
 from typing import Dict
 from typing import Optional
 
-import requests
 from django.utils import timezone
 from events.models import Event
 from healthchecks.models import HealthCheck
@@ -14,6 +11,10 @@ from services.docker_service import docker_service
 from services.models import Service
 
 from .broadcast import event_broadcaster
+from .checks import check_custom
+from .checks import check_http
+from .checks import check_tcp
+from .prometheus import record_health_check
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,11 @@ class HealthChecker:
                     "timestamp": time.time(),
                 }
 
+            started = time.perf_counter()
             result = check_method(service)
+            record_health_check(
+                service, result["success"], time.perf_counter() - started
+            )
 
             # Store old status for broadcasting
             old_status = service.status
@@ -88,81 +93,11 @@ class HealthChecker:
 
     def _check_http(self, service: Service) -> Dict[str, Any]:
         """HTTP health check"""
-        config = service.config
-        url = config.get("url")
-        method = config.get("method", "GET")
-        timeout = service.timeout
-        expected_status = config.get("expected_status", 200)
-
-        if not url:
-            return {
-                "success": False,
-                "error": "URL not specified in service config",
-                "timestamp": time.time(),
-            }
-
-        try:
-            response = requests.request(
-                method=method, url=url, timeout=timeout, allow_redirects=True
-            )
-
-            success = response.status_code == expected_status
-
-            return {
-                "success": success,
-                "status_code": response.status_code,
-                "response_time": response.elapsed.total_seconds()
-                * 1000,  # Convert to milliseconds
-                "timestamp": time.time(),
-                "error": (
-                    None
-                    if success
-                    else f"Expected status {expected_status}, got {response.status_code}"
-                ),
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "timestamp": time.time(),
-            }
+        return check_http(service.config, service.timeout)
 
     def _check_tcp(self, service: Service) -> Dict[str, Any]:
         """TCP port check"""
-        config = service.config
-        host = config.get("host")
-        port = config.get("port")
-        timeout = service.timeout
-
-        if not host or not port:
-            return {
-                "success": False,
-                "error": "Host and port not specified in service config",
-                "timestamp": time.time(),
-            }
-
-        try:
-            start_time = time.time()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((host, port))
-            sock.close()
-
-            response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-            success = result == 0
-
-            return {
-                "success": success,
-                "response_time": response_time,
-                "timestamp": time.time(),
-                "error": None if success else f"Connection failed with code {result}",
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "timestamp": time.time(),
-            }
+        return check_tcp(service.config, service.timeout)
 
     def _check_docker(self, service: Service) -> Dict[str, Any]:
         """Docker container health check"""
@@ -205,50 +140,7 @@ class HealthChecker:
 
     def _check_custom(self, service: Service) -> Dict[str, Any]:
         """Custom script health check"""
-        config = service.config
-        script_path = config.get("script_path")
-
-        if not script_path:
-            return {
-                "success": False,
-                "error": "Script path not specified in service config",
-                "timestamp": time.time(),
-            }
-
-        try:
-            start_time = time.time()
-            result = subprocess.run(
-                [script_path], capture_output=True, text=True, timeout=service.timeout
-            )
-            response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-
-            success = result.returncode == 0
-
-            return {
-                "success": success,
-                "return_code": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "response_time": response_time,
-                "timestamp": time.time(),
-                "error": (
-                    None
-                    if success
-                    else f"Script failed with return code {result.returncode}"
-                ),
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Script execution timed out",
-                "timestamp": time.time(),
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "timestamp": time.time(),
-            }
+        return check_custom(service.config, service.timeout)
 
     def _create_event(self, service: Service, result: Dict[str, Any]) -> Event:
         """Create an event for the health check result"""
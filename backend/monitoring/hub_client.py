@@ -0,0 +1,170 @@
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+INGEST_PATH = "/api/v1/monitoring/ingest/"
+PROBE_ASSIGNMENTS_PATH = "/api/v1/monitoring/probes/assignments/"
+PROBE_RESULTS_PATH = "/api/v1/monitoring/probes/results/"
+SPOOL_SUFFIX = ".json.gz"
+# The hub found the batch itself invalid; other errors (auth, rate limits,
+# size limits) may clear up, so those batches are kept for a retry
+REJECTED_STATUSES = (400, 422)
+
+
+class BatchRejected(Exception):
+    """The hub refused a batch; retrying it unchanged will not help"""
+
+
+class HubClient:
+    """Talks to a hub's API, pushing gzip-compressed batches"""
+
+    def __init__(self, hub_url: str, token: str, timeout: float = 10):
+        self.base_url = hub_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Token {token}"
+
+    def get(self, path: str) -> Dict:
+        response = self.session.get(self.base_url + path, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def push(self, body: bytes, path: str = INGEST_PATH) -> Dict:
+        """Send one compressed batch
+
+        Raises ``BatchRejected`` when the hub finds the batch invalid (400 or
+        422) and ``requests.RequestException`` when the hub is unreachable or
+        refuses it for any other reason.
+        """
+        response = self.session.post(
+            self.base_url + path,
+            data=body,
+            headers={
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code in REJECTED_STATUSES:
+            raise BatchRejected(f"{response.status_code}: {response.text[:200]}")
+        response.raise_for_status()
+        return response.json()
+
+
+def encode_batch(batch: Dict) -> bytes:
+    """Serialize and compress a batch once, for sending or spooling"""
+    return gzip.compress(json.dumps(batch, separators=(",", ":")).encode("utf-8"))
+
+
+class Spool:
+    """Bounded on-disk queue of compressed batches awaiting delivery
+
+    Batches are files named by enqueue time, so delivery is oldest first.
+    When the spool grows past ``max_bytes`` the oldest batches are dropped.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, body: bytes):
+        name = f"{time.time_ns():020d}{SPOOL_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(body)
+        os.replace(path + ".tmp", path)
+        self._enforce_limit()
+
+    def pending(self) -> List[str]:
+        """Spooled batch paths, oldest first"""
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))
+            if name.endswith(SPOOL_SUFFIX)
+        ]
+
+    def read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _enforce_limit(self):
+        paths = self.pending()
+        sizes = {path: os.path.getsize(path) for path in paths}
+        total = sum(sizes.values())
+        for path in paths:
+            if total <= self.max_bytes:
+                break
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropping {path}")
+            total -= sizes[path]
+            self.remove(path)
+
+
+class BatchSender:
+    """Delivers batches, spooling them while the hub is unreachable"""
+
+    def __init__(
+        self,
+        client: HubClient,
+        spool: Spool,
+        drain_limit: int = 20,
+        path: str = INGEST_PATH,
+    ):
+        self.client = client
+        self.spool = spool
+        self.drain_limit = drain_limit
+        self.path = path
+
+    def send(self, batch: Dict) -> bool:
+        """Send a batch after any spooled ones; returns False if it was spooled"""
+        body = encode_batch(batch)
+        if self.drain() and self._deliver(body):
+            return True
+        self.spool.put(body)
+        return False
+
+    def drain(self) -> bool:
+        """Deliver up to ``drain_limit`` spooled batches; True once the spool is empty"""
+        pending = self.spool.pending()
+        for path in pending[: self.drain_limit]:
+            if not self._deliver(self.spool.read(path)):
+                return False
+            self.spool.remove(path)
+        return len(pending) <= self.drain_limit
+
+    def _deliver(self, body: bytes) -> bool:
+        try:
+            self.client.push(body, self.path)
+            return True
+        except BatchRejected as e:
+            # A rejected batch would block the queue forever, so drop it
+            logger.error(f"Hub rejected batch, dropping it: {e}")
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Could not deliver batch to hub: {e}")
+            return False
+
+
+def build_batch(
+    host: str, server_metrics: List[Dict], docker_metrics: Optional[List[Dict]] = None
+) -> Dict:
+    return {
+        "host": host,
+        "server_metrics": server_metrics,
+        "docker_metrics": docker_metrics or [],
+    }
@@ -0,0 +1,179 @@
+import logging
+import re
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from django.conf import settings
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import LOCAL_HOST
+from .models import DockerMetrics
+from .models import ServerMetrics
+
+logger = logging.getLogger(__name__)
+
+HOST_RE = re.compile(r"^[A-Za-z0-9_.-]{1,255}$")
+
+
+def _float_fields(model, null: bool = False) -> List[str]:
+    """Required float fields, or with ``null`` the optional ones"""
+    return [
+        field.name
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FloatField) and field.null == null
+    ]
+
+
+SERVER_INGEST_FIELDS = _float_fields(ServerMetrics)
+DOCKER_INGEST_FIELDS = _float_fields(DockerMetrics)
+SERVER_OPTIONAL_FIELDS = _float_fields(ServerMetrics, null=True)
+DOCKER_OPTIONAL_FIELDS = _float_fields(DockerMetrics, null=True)
+DOCKER_LABEL_FIELDS = ["container_id", "container_name"]
+
+
+class MetricsIngestor:
+    """Validates batches of samples pushed by remote hosts and bulk-writes them
+
+    A batch is ``{"host": ..., "server_metrics": [...], "docker_metrics": [...]}``.
+    Samples carry their own ISO 8601 ``timestamp``; when it is missing the
+    time of ingest is used. A batch is written all or nothing.
+    """
+
+    def __init__(self, max_samples: Optional[int] = None, batch_size: int = 1000):
+        self.max_samples = max_samples or getattr(
+            settings, "METRICS_INGEST_MAX_SAMPLES", 10000
+        )
+        self.batch_size = batch_size
+
+    def ingest(self, payload: Dict) -> Dict:
+        """Write one batch, raising ValueError if any sample is invalid"""
+        if not isinstance(payload, dict):
+            raise ValueError("Batch must be a JSON object")
+
+        host = payload.get("host")
+        if not isinstance(host, str) or not HOST_RE.match(host):
+            raise ValueError("host must be 1-255 letters, digits, '.', '_' or '-'")
+        if host == LOCAL_HOST:
+            raise ValueError(f"host '{LOCAL_HOST}' is reserved for this server")
+
+        server_samples = payload.get("server_metrics") or []
+        docker_samples = payload.get("docker_metrics") or []
+        if not isinstance(server_samples, list) or not isinstance(docker_samples, list):
+            raise ValueError("server_metrics and docker_metrics must be lists")
+        if len(server_samples) + len(docker_samples) > self.max_samples:
+            raise ValueError(f"Batch exceeds {self.max_samples} samples")
+
+        now = timezone.now()
+        server_rows = [
+            ServerMetrics(
+                host=host,
+                **self._clean(
+                    sample, SERVER_INGEST_FIELDS, SERVER_OPTIONAL_FIELDS, [], now
+                ),
+            )
+            for sample in server_samples
+        ]
+        docker_rows = [
+            DockerMetrics(
+                host=host,
+                **self._clean(
+                    sample,
+                    DOCKER_INGEST_FIELDS,
+                    DOCKER_OPTIONAL_FIELDS,
+                    DOCKER_LABEL_FIELDS,
+                    now,
+                ),
+            )
+            for sample in docker_samples
+        ]
+
+        with transaction.atomic():
+            ServerMetrics.objects.bulk_create(server_rows, batch_size=self.batch_size)
+            DockerMetrics.objects.bulk_create(docker_rows, batch_size=self.batch_size)
+
+        self._detect_anomalies(host, server_rows, docker_rows)
+
+        return {
+            "host": host,
+            "server_metrics": len(server_rows),
+            "docker_metrics": len(docker_rows),
+        }
+
+    def _detect_anomalies(
+        self,
+        host: str,
+        server_rows: List[ServerMetrics],
+        docker_rows: List[DockerMetrics],
+    ):
+        """Score the batch in time order, one snapshot of all containers at a time"""
+        from .anomaly import anomaly_detector
+
+        try:
+            for row in sorted(server_rows, key=lambda row: row.timestamp):
+                anomaly_detector.observe_server(
+                    {field: getattr(row, field) for field in SERVER_INGEST_FIELDS},
+                    host,
+                )
+            snapshots = {}
+            for row in docker_rows:
+                snapshots.setdefault(row.timestamp, []).append(
+                    {
+                        field: getattr(row, field)
+                        for field in DOCKER_INGEST_FIELDS + DOCKER_LABEL_FIELDS
+                    }
+                )
+            for timestamp in sorted(snapshots):
+                anomaly_detector.observe_docker(snapshots[timestamp], host)
+        except Exception as e:
+            logger.error(f"Error running anomaly detection for {host}: {e}")
+
+    def _clean(
+        self,
+        sample: Dict,
+        float_fields: Sequence[str],
+        optional_fields: Sequence[str],
+        label_fields: Sequence[str],
+        now,
+    ) -> Dict:
+        if not isinstance(sample, dict):
+            raise ValueError("Each sample must be a JSON object")
+
+        cleaned = {"timestamp": self._timestamp(sample.get("timestamp"), now)}
+        for field in float_fields:
+            value = sample.get(field)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} must be a number")
+            cleaned[field] = float(value)
+        for field in optional_fields:
+            value = sample.get(field)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} must be a number or null")
+            cleaned[field] = float(value)
+        for field in label_fields:
+            value = sample.get(field)
+            max_length = DockerMetrics._meta.get_field(field).max_length
+            if not isinstance(value, str) or not 0 < len(value) <= max_length:
+                raise ValueError(f"{field} must be a string of 1-{max_length} chars")
+            cleaned[field] = value
+        return cleaned
+
+    def _timestamp(self, value, now):
+        if value is None:
+            return now
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise ValueError(f"Invalid timestamp: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+# Global instance
+metrics_ingestor = MetricsIngestor()
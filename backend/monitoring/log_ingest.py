@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from datetime import timezone
+from functools import lru_cache
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+from services.async_docker import async_docker
+from services.json_log_reader import json_file_logs
+from services.json_log_reader import since_to_key
+
+from .log_metrics import LogErrorCounter
+from .log_store import LogStore
+from .log_streams import ContainerLogStream
+from .log_streams import LogEntry
+from .tsdb import NS_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _base_seconds(base: str) -> int:
+    parsed = datetime.strptime(base, "%Y-%m-%dT%H:%M:%S")
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+def key_to_ns(key: Tuple[str, int]) -> int:
+    """Nanoseconds since the epoch of a timestamp key"""
+    base, nanos = key
+    return _base_seconds(base) * NS_PER_SECOND + nanos
+
+
+def ns_to_key(timestamp_ns: int) -> Tuple[str, int]:
+    seconds, nanos = divmod(timestamp_ns, NS_PER_SECOND)
+    return since_to_key(f"{seconds}.{nanos:09d}")
+
+
+class StoreWriter:
+    """Subscriber of a ``ContainerLogStream`` that buffers lines into the store"""
+
+    def __init__(self, ingester: "LogIngester", container_name: str):
+        self.ingester = ingester
+        self.container_name = container_name
+
+    def push(self, entry: LogEntry):
+        key, _, text = entry
+        pending = self.ingester.store.add(self.container_name, key_to_ns(key), text)
+        if pending >= self.ingester.flush_lines:
+            self.ingester.flush_now.set()
+
+
+class CounterWriter:
+    """Subscriber of a ``ContainerLogStream`` that counts error lines"""
+
+    def __init__(self, counter: LogErrorCounter, container_name: str):
+        self.counter = counter
+        self.container_name = container_name
+
+    def push(self, entry: LogEntry):
+        self.counter.observe(self.container_name, entry[2])
+
+
+class LogIngester:
+    """Copies the logs of every running container into a ``LogStore``
+
+    Runs in its own process (``manage.py ingest_container_logs``), so a noisy
+    container costs the ASGI workers nothing. Lines are buffered in memory and
+    written every ``LOG_STORE_FLUSH_SECONDS``, or as soon as
+    ``LOG_STORE_FLUSH_LINES`` are waiting; compression and file writes run on
+    a worker thread while the event loop keeps reading. After a restart each
+    container resumes after its last stored line.
+
+    With a ``LogErrorCounter`` the same streams also feed per-container error
+    line counts, written every ``LOG_ERROR_INTERVAL_SECONDS``. Either the
+    store or the counter may be left out.
+    """
+
+    def __init__(
+        self,
+        store: Optional[LogStore],
+        client=None,
+        docker=None,
+        counter: Optional[LogErrorCounter] = None,
+    ):
+        self.store = store
+        self.counter = counter
+        self.client = client or json_file_logs
+        self.docker = docker or async_docker
+        self.flush_interval = getattr(settings, "LOG_STORE_FLUSH_SECONDS", 1.0)
+        self.flush_lines = getattr(settings, "LOG_STORE_FLUSH_LINES", 10000)
+        self.refresh_interval = getattr(settings, "LOG_STORE_REFRESH_SECONDS", 10.0)
+        self.retention_hours = getattr(settings, "LOG_STORE_RETENTION_HOURS", 168)
+        self.retry_delay = 1.0
+        self.streams: Dict[str, ContainerLogStream] = {}
+        self.flush_now = asyncio.Event()
+        self.written = 0
+
+    def follow(self, container_name: str):
+        stream = ContainerLogStream(container_name, self.client, self.retry_delay)
+        if self.store is not None:
+            last_ns = self.store.last_timestamp(container_name)
+            if last_ns is not None:
+                stream.last_key = ns_to_key(last_ns)
+            stream.subscribers.add(StoreWriter(self, container_name))
+        if self.counter is not None:
+            self.counter.track(container_name)
+            stream.subscribers.add(CounterWriter(self.counter, container_name))
+        self.streams[container_name] = stream
+        stream.start()
+
+    def unfollow(self, container_name: str):
+        stream = self.streams.pop(container_name)
+        stream.subscribers.clear()
+        if stream.task is not None:
+            stream.task.cancel()
+        if self.counter is not None:
+            self.counter.forget(container_name)
+
+    async def sync_containers(self):
+        """Follow containers that started and drop those that went away"""
+        containers = await self.docker.list_containers()
+        names = {
+            container["Names"][0].lstrip("/")
+            for container in containers
+            if container.get("Names")
+        }
+        for name in sorted(names - self.streams.keys()):
+            logger.info(f"Ingesting logs of {name}")
+            self.follow(name)
+        for name in self.streams.keys() - names:
+            self.unfollow(name)
+
+    async def flush(self):
+        if self.store is None:
+            return
+        loop = asyncio.get_running_loop()
+        self.written += await loop.run_in_executor(None, self.store.flush)
+
+    async def flush_counts(self):
+        rows = self.counter.flush(active=self.streams)
+        if rows:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.counter.write, rows)
+
+    async def prune(self):
+        cutoff = time.time_ns() - int(self.retention_hours * 3600 * NS_PER_SECOND)
+        loop = asyncio.get_running_loop()
+        removed = await loop.run_in_executor(None, self.store.prune, cutoff)
+        if removed:
+            logger.info(f"Removed {removed} expired log segments")
+
+    async def run(self, stopped: Optional[asyncio.Event] = None):
+        """Ingest until ``stopped`` is set, then write what is buffered"""
+        stopped = stopped or asyncio.Event()
+        refreshed = pruned = float("-inf")
+        try:
+            while not stopped.is_set():
+                now = time.monotonic()
+                if now - refreshed >= self.refresh_interval:
+                    refreshed = now
+                    try:
+                        await self.sync_containers()
+                    except Exception as e:
+                        logger.warning(f"Could not list containers: {e}")
+                if (
+                    self.store is not None
+                    and self.retention_hours
+                    and now - pruned >= 3600
+                ):
+                    pruned = now
+                    await self.prune()
+
+                try:
+                    await asyncio.wait_for(
+                        self.flush_now.wait(), timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self.flush_now.clear()
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.error(f"Error writing container logs: {e}")
+                if self.counter is not None and self.counter.due():
+                    try:
+                        await self.flush_counts()
+                    except Exception as e:
+                        logger.error(f"Error writing log error counts: {e}")
+        finally:
+            for name in list(self.streams):
+                self.unfollow(name)
+            await self.flush()
+            if self.counter is not None:
+                await self.flush_counts()
@@ -0,0 +1,176 @@
+import logging
+import re
+import time
+from datetime import timedelta
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import LOCAL_HOST
+from .models import CustomMetric
+
+logger = logging.getLogger(__name__)
+
+LOG_ERROR_METRIC = "container.log.error_lines"
+DEFAULT_LEVELS = ["error", "fatal", "critical", "panic"]
+
+
+class LogMatcher:
+    """Marks a log line as an error by regex or by log level
+
+    ``contains`` lists literals of which a matching line holds at least one.
+    They are checked with plain substring tests before the regex runs, so
+    most lines are rejected without touching the regex engine. A level
+    matcher looks for the level names as whole words, in lower, upper or
+    title case.
+    """
+
+    def __init__(
+        self,
+        pattern: Optional[str] = None,
+        levels: Sequence[str] = (),
+        contains: Sequence[str] = (),
+        ignore_case: bool = False,
+    ):
+        if levels:
+            names = "|".join(re.escape(level) for level in levels)
+            pattern = rf"\b(?:{names})\b"
+            ignore_case = True
+            contains = [
+                variant
+                for level in levels
+                for variant in (level.lower(), level.upper(), level.title())
+            ]
+        if not pattern:
+            raise ValueError("A log matcher needs a pattern or levels")
+        if not contains and not ignore_case and re.escape(pattern) == pattern:
+            # A plain literal is its own prefilter, unless case is ignored
+            contains = [pattern]
+        self.regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        self.contains = list(dict.fromkeys(contains))
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "LogMatcher":
+        return cls(
+            pattern=config.get("pattern"),
+            levels=config.get("levels", ()),
+            contains=config.get("contains", ()),
+            ignore_case=config.get("ignore_case", False),
+        )
+
+    def match(self, line: str) -> bool:
+        if self.contains and not any(literal in line for literal in self.contains):
+            return False
+        return self.regex.search(line) is not None
+
+
+class LogErrorCounter:
+    """Counts error lines per container over fixed intervals
+
+    Lines are tallied in memory as they stream past; every
+    ``LOG_ERROR_INTERVAL_SECONDS`` the tallies become one ``CustomMetric``
+    counter per container (``value`` error lines out of ``count`` lines),
+    written in a single bulk insert. Tracked containers that logged nothing
+    still get a zero row, so a quiet container reads as zero errors rather
+    than unknown.
+    """
+
+    def __init__(
+        self,
+        matchers: Optional[List[LogMatcher]] = None,
+        interval: Optional[float] = None,
+    ):
+        if matchers is None:
+            configs = getattr(
+                settings, "LOG_ERROR_MATCHERS", [{"levels": DEFAULT_LEVELS}]
+            )
+            matchers = [LogMatcher.from_config(config) for config in configs]
+        self.matchers = matchers
+        self.interval = interval or getattr(settings, "LOG_ERROR_INTERVAL_SECONDS", 60)
+        self.lines: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.started = time.monotonic()
+
+    def track(self, container_name: str):
+        self.lines.setdefault(container_name, 0)
+        self.errors.setdefault(container_name, 0)
+
+    def forget(self, container_name: str):
+        """Stop reporting a container once its current interval is flushed"""
+        if not self.lines.get(container_name):
+            self.lines.pop(container_name, None)
+            self.errors.pop(container_name, None)
+
+    def is_error(self, line: str) -> bool:
+        return any(matcher.match(line) for matcher in self.matchers)
+
+    def observe(self, container_name: str, line: str):
+        self.lines[container_name] = self.lines.get(container_name, 0) + 1
+        if self.is_error(line):
+            self.errors[container_name] = self.errors.get(container_name, 0) + 1
+
+    def due(self) -> bool:
+        return time.monotonic() - self.started >= self.interval
+
+    def flush(
+        self, active: Iterable[str] = (), host: str = LOCAL_HOST
+    ) -> List[CustomMetric]:
+        """Turn the current interval into rows and start a new one
+
+        Counting goes on for the ``active`` containers; the rest are dropped.
+        """
+        now = timezone.now()
+        started, self.started = self.started, time.monotonic()
+        interval = self.started - started
+        lines, self.lines = self.lines, {}
+        errors, self.errors = self.errors, {}
+        for container_name in active:
+            self.track(container_name)
+
+        return [
+            CustomMetric(
+                host=host,
+                name=LOG_ERROR_METRIC,
+                metric_type="counter",
+                tags={"container": container_name},
+                timestamp=now,
+                interval=interval,
+                value=float(errors.get(container_name, 0)),
+                count=count,
+            )
+            for container_name, count in lines.items()
+        ]
+
+    def write(self, rows: List[CustomMetric]):
+        from django.db import close_old_connections
+
+        close_old_connections()
+        CustomMetric.objects.bulk_create(rows, batch_size=1000)
+
+
+def latest_error_rates(
+    container_names: Iterable[str], host: str = LOCAL_HOST
+) -> Dict[str, float]:
+    """Error lines per minute of each container over its last reported interval"""
+    interval = getattr(settings, "LOG_ERROR_INTERVAL_SECONDS", 60)
+    since = timezone.now() - timedelta(seconds=2 * interval)
+    rows = CustomMetric.objects.filter(
+        name=LOG_ERROR_METRIC, host=host, timestamp__gte=since
+    ).order_by("timestamp")
+
+    names = set(container_names)
+    rates = {}
+    for row in rows:
+        container_name = row.tags.get("container")
+        if container_name in names and row.interval > 0:
+            rates[container_name] = row.value * 60 / row.interval
+    return rates
+
+
+# Global instance
+log_error_counter = LogErrorCounter()
@@ -0,0 +1,399 @@
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+from django.conf import settings
+
+from .tsdb import NS_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+DATA_SUFFIX = ".log.gz"
+INDEX_SUFFIX = ".idx"
+CONTAINER_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 32
+COMPRESS_LEVEL = 6
+READ_CHUNK_BYTES = 1 << 16
+
+# (nanoseconds since the epoch, line)
+LogRecord = Tuple[int, str]
+
+
+def tokenize(text: str) -> Set[str]:
+    """Lowercase words of a line, as indexed and as searched"""
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+def indexable(token: str) -> bool:
+    """Whether a token goes into segment indexes
+
+    Bare numbers and very long tokens (ids, hashes) are nearly all unique, so
+    they would fill the index without ever ruling a segment out.
+    """
+    return MIN_TOKEN_LENGTH <= len(token) <= MAX_TOKEN_LENGTH and not token.isdigit()
+
+
+class LogSegment:
+    """Log lines of one container over one time bucket
+
+    ``<start>.log.gz`` holds JSON lines as a series of gzip members, one per
+    flush, so appending never rewrites what is already there. ``<start>.idx``
+    records the time range, the line count, how many bytes of the data file
+    are complete and the set of indexable tokens in the segment. Once there
+    are more than ``max_tokens`` distinct tokens the set is dropped and the
+    segment is always scanned.
+    """
+
+    def __init__(self, directory: Path, start_ns: int, max_tokens: int):
+        self.start_ns = start_ns
+        self.data_path = directory / f"{start_ns}{DATA_SUFFIX}"
+        self.index_path = directory / f"{start_ns}{INDEX_SUFFIX}"
+        self.max_tokens = max_tokens
+        self.first_ns: Optional[int] = None
+        self.last_ns: Optional[int] = None
+        self.count = 0
+        self.size = 0
+        self.tokens: Optional[Set[str]] = set()
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            index = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Unreadable log index {self.index_path}, rebuilding")
+            self._rebuild_index()
+            return
+        self.first_ns = index["first_ns"]
+        self.last_ns = index["last_ns"]
+        self.count = index["count"]
+        self.size = index["size"]
+        tokens = index["tokens"]
+        self.tokens = set(tokens) if tokens is not None else None
+
+    def _rebuild_index(self):
+        self.first_ns, self.last_ns, self.count, self.size = None, None, 0, 0
+        self.tokens = set()
+        for end, payload in self._members(self._read_data(None)):
+            for timestamp_ns, line in self._records(payload):
+                self._index(timestamp_ns, line)
+            self.size = end
+        self._write_index()
+
+    def _index(self, timestamp_ns: int, line: str):
+        if self.first_ns is None or timestamp_ns < self.first_ns:
+            self.first_ns = timestamp_ns
+        if self.last_ns is None or timestamp_ns > self.last_ns:
+            self.last_ns = timestamp_ns
+        self.count += 1
+        if self.tokens is not None:
+            self.tokens.update(t for t in tokenize(line) if indexable(t))
+            if len(self.tokens) > self.max_tokens:
+                self.tokens = None
+
+    def _write_index(self):
+        index = {
+            "first_ns": self.first_ns,
+            "last_ns": self.last_ns,
+            "count": self.count,
+            "size": self.size,
+            "tokens": sorted(self.tokens) if self.tokens is not None else None,
+        }
+        temporary = self.index_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(temporary, self.index_path)
+
+    def append(self, records: List[LogRecord]):
+        """Write records as one gzip member, then the index that covers it"""
+        payload = "".join(
+            json.dumps({"t": timestamp_ns, "line": line}) + "\n"
+            for timestamp_ns, line in records
+        )
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+        member = compressor.compress(payload.encode()) + compressor.flush()
+
+        with open(self.data_path, "ab") as f:
+            # Bytes past the indexed size are from a write that never got
+            # its index, and readers would stop at them
+            if f.tell() != self.size:
+                f.truncate(self.size)
+            f.write(member)
+        self.size += len(member)
+        for timestamp_ns, line in records:
+            self._index(timestamp_ns, line)
+        self._write_index()
+
+    def may_match(
+        self, start_ns: Optional[int], end_ns: Optional[int], tokens: Set[str]
+    ) -> bool:
+        """False when the index rules the segment out"""
+        if self.count == 0:
+            return False
+        if start_ns is not None and self.last_ns < start_ns:
+            return False
+        if end_ns is not None and self.first_ns >= end_ns:
+            return False
+        if self.tokens is None:
+            return True
+        return all(t in self.tokens for t in tokens if indexable(t))
+
+    def read(self, tokens: Iterable[str] = ()) -> Iterator[LogRecord]:
+        """Records in the order they were written
+
+        With ``tokens``, records that cannot contain all of them are skipped
+        before being decoded. Tokens are plain ASCII, so they appear verbatim
+        in the JSON of any line holding them.
+        """
+        needles = [token.encode() for token in tokens]
+        for _, payload in self._members(self._read_data(self.size)):
+            if needles and not all(n in payload.lower() for n in needles):
+                continue
+            yield from self._records(payload, needles)
+
+    def _read_data(self, size: Optional[int]) -> bytes:
+        try:
+            with open(self.data_path, "rb") as f:
+                return f.read(size) if size is not None else f.read()
+        except FileNotFoundError:
+            return b""
+
+    def _members(self, data: bytes) -> Iterator[Tuple[int, bytes]]:
+        """Each complete gzip member's payload and the offset it ends at"""
+        decompressor = zlib.decompressobj(31)
+        parts: List[bytes] = []
+        position = 0
+        try:
+            while position < len(data):
+                chunk = data[position : position + READ_CHUNK_BYTES]
+                position += len(chunk)
+                parts.append(decompressor.decompress(chunk))
+                while decompressor.eof:
+                    rest = decompressor.unused_data
+                    yield position - len(rest), b"".join(parts)
+                    decompressor = zlib.decompressobj(31)
+                    parts = [decompressor.decompress(rest)] if rest else []
+        except zlib.error as e:
+            logger.warning(f"Corrupt log segment {self.data_path}: {e}")
+        # A member left incomplete by a crash mid-write is ignored
+
+    @staticmethod
+    def _records(payload: bytes, needles: Sequence[bytes] = ()) -> Iterator[LogRecord]:
+        for line in payload.splitlines():
+            if needles:
+                lowered = line.lower()
+                if not all(n in lowered for n in needles):
+                    continue
+            record = json.loads(line)
+            yield record["t"], record["line"]
+
+
+class LogStore:
+    """Searchable container logs in compressed, time-bucketed segments
+
+    Each container has a directory with one segment per
+    ``segment_seconds`` bucket. Lines are buffered by ``add`` and written by
+    ``flush``, which the ingester calls off its event loop. A search reads
+    only the segments whose time range and token index could hold a match.
+    """
+
+    def __init__(self, root, segment_seconds: int = 3600, max_tokens: int = 50000):
+        self.root = Path(root)
+        self.segment_ns = int(segment_seconds) * NS_PER_SECOND
+        self.max_tokens = max_tokens
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._pending: Dict[str, List[LogRecord]] = {}
+        self._pending_lines = 0
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # Segments the ingester is appending to
+        self._open: Dict[Tuple[str, int], LogSegment] = {}
+        # Segments loaded for searches, by index path and modification time
+        self._loaded: Dict[Path, Tuple[int, LogSegment]] = {}
+
+    def _directory(self, container: str) -> Path:
+        if not CONTAINER_NAME_RE.match(container):
+            raise ValueError(f"Invalid container name: {container!r}")
+        return self.root / container
+
+    def _bucket(self, timestamp_ns: int) -> int:
+        return timestamp_ns - timestamp_ns % self.segment_ns
+
+    def add(self, container: str, timestamp_ns: int, line: str) -> int:
+        """Buffer a line; returns how many lines are waiting to be flushed"""
+        with self._pending_lock:
+            self._pending.setdefault(container, []).append((timestamp_ns, line))
+            self._pending_lines += 1
+            return self._pending_lines
+
+    def pending(self) -> int:
+        return self._pending_lines
+
+    def flush(self) -> int:
+        """Write buffered lines to their segments; returns the number written"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._pending_lines = 0
+
+        written = 0
+        with self._write_lock:
+            for container, records in pending.items():
+                directory = self._directory(container)
+                directory.mkdir(exist_ok=True)
+                buckets: Dict[int, List[LogRecord]] = {}
+                for record in records:
+                    buckets.setdefault(self._bucket(record[0]), []).append(record)
+                for start_ns, bucket_records in buckets.items():
+                    key = (container, start_ns)
+                    segment = self._open.get(key)
+                    if segment is None:
+                        segment = LogSegment(directory, start_ns, self.max_tokens)
+                        self._open[key] = segment
+                    segment.append(bucket_records)
+                    written += len(bucket_records)
+            self._close_idle()
+        return written
+
+    def _close_idle(self):
+        """Forget open segments older than the newest bucket of each container"""
+        newest: Dict[str, int] = {}
+        for container, start_ns in self._open:
+            newest[container] = max(newest.get(container, start_ns), start_ns)
+        for key in list(self._open):
+            container, start_ns = key
+            if start_ns < newest[container]:
+                del self._open[key]
+
+    def containers(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def segments(self, container: str) -> List[LogSegment]:
+        """Segments of a container, oldest first"""
+        directory = self._directory(container)
+        if not directory.exists():
+            return []
+        segments = []
+        for path in directory.iterdir():
+            if not path.name.endswith(INDEX_SUFFIX):
+                continue
+            try:
+                modified = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            cached = self._loaded.get(path)
+            if cached is None or cached[0] != modified:
+                start_ns = int(path.name[: -len(INDEX_SUFFIX)])
+                cached = modified, LogSegment(directory, start_ns, self.max_tokens)
+                self._loaded[path] = cached
+            segments.append(cached[1])
+        return sorted(segments, key=lambda segment: segment.start_ns)
+
+    def last_timestamp(self, container: str) -> Optional[int]:
+        """Time of the newest stored line of a container"""
+        for segment in reversed(self.segments(container)):
+            if segment.last_ns is not None:
+                return segment.last_ns
+        return None
+
+    def search(
+        self,
+        containers: Optional[Iterable[str]] = None,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        query: str = "",
+        limit: int = 100,
+    ) -> Dict:
+        """Lines containing every word of ``query``, newest first
+
+        Segments are read a time bucket at a time from the newest, so a
+        search stops as soon as ``limit`` lines are found.
+        """
+        tokens = tokenize(query)
+        names = list(containers) if containers else self.containers()
+        buckets: Dict[int, List[Tuple[str, LogSegment]]] = {}
+        skipped = 0
+        for name in names:
+            for segment in self.segments(name):
+                if segment.may_match(start_ns, end_ns, tokens):
+                    buckets.setdefault(segment.start_ns, []).append((name, segment))
+                else:
+                    skipped += 1
+
+        results: List[Dict] = []
+        scanned = 0
+        for start in sorted(buckets, reverse=True):
+            if len(results) >= limit:
+                skipped += len(buckets[start])
+                continue
+            matches = []
+            for name, segment in buckets[start]:
+                scanned += 1
+                for timestamp_ns, line in segment.read(tokens):
+                    if start_ns is not None and timestamp_ns < start_ns:
+                        continue
+                    if end_ns is not None and timestamp_ns >= end_ns:
+                        continue
+                    if tokens and not tokens <= tokenize(line):
+                        continue
+                    matches.append((timestamp_ns, name, line))
+            matches.sort(key=lambda match: match[0], reverse=True)
+            results += [
+                {"container": name, "timestamp_ns": timestamp_ns, "line": line}
+                for timestamp_ns, name, line in matches[: limit - len(results)]
+            ]
+        return {
+            "results": results,
+            "segments_scanned": scanned,
+            "segments_skipped": skipped,
+        }
+
+    def prune(self, before_ns: int) -> int:
+        """Delete segments whose whole bucket is older than ``before_ns``"""
+        removed = 0
+        with self._write_lock:
+            for name in self.containers():
+                for segment in self.segments(name):
+                    if segment.start_ns + self.segment_ns > before_ns:
+                        continue
+                    self._open.pop((name, segment.start_ns), None)
+                    self._loaded.pop(segment.index_path, None)
+                    for path in (segment.index_path, segment.data_path):
+                        path.unlink(missing_ok=True)
+                    removed += 1
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_log_store() -> Optional[LogStore]:
+    """The configured store, or None when LOG_STORE_PATH is not set"""
+    global _store
+    path = getattr(settings, "LOG_STORE_PATH", "")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != Path(path):
+            _store = LogStore(
+                path,
+                getattr(settings, "LOG_STORE_SEGMENT_SECONDS", 3600),
+                getattr(settings, "LOG_STORE_MAX_TOKENS", 50000),
+            )
+        return _store
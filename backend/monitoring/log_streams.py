@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from datetime import timezone
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from django.conf import settings
+from services.json_log_reader import json_file_logs
+from services.json_log_reader import timestamp_key
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 30.0
+
+# (sortable timestamp, timestamp, line)
+LogEntry = Tuple[Tuple[str, int], str, str]
+
+
+def key_to_since(key: Tuple[str, int]) -> str:
+    """Turn a timestamp key into the ``since`` the logs API accepts"""
+    base, nanos = key
+    seconds = datetime.strptime(base, "%Y-%m-%dT%H:%M:%S")
+    seconds = int(seconds.replace(tzinfo=timezone.utc).timestamp())
+    return f"{seconds}.{nanos:09d}"
+
+
+def parse_line(line: str) -> Optional[LogEntry]:
+    """Split a ``timestamps=True`` log line into its entry"""
+    timestamp, _, text = line.rstrip("\r").partition(" ")
+    if len(timestamp) < 20 or timestamp[4] != "-" or timestamp[10] != "T":
+        return None
+    try:
+        return timestamp_key(timestamp), timestamp, text
+    except ValueError:
+        return None
+
+
+class LogSubscription:
+    """One client's view of a container log stream
+
+    Lines wait in a buffer of at most ``max_lines``. When the client reads
+    slower than the container writes, the oldest lines are dropped and the
+    number dropped is reported with the next batch.
+    """
+
+    def __init__(self, container_name: str, max_lines: int):
+        self.container_name = container_name
+        self.max_lines = max_lines
+        self.lines: Deque[LogEntry] = deque()
+        self.dropped = 0
+        self.closed = False
+        # Live lines up to here were already sent with the backlog
+        self.after: Optional[Tuple[str, int]] = None
+        self._ready = asyncio.Event()
+
+    def push(self, entry: LogEntry):
+        if self.after is not None and entry[0] <= self.after:
+            return
+        if len(self.lines) >= self.max_lines:
+            self.lines.popleft()
+            self.dropped += 1
+        self.lines.append(entry)
+        self._ready.set()
+
+    def load_backlog(self, backlog: List[LogEntry]):
+        """Put lines written before the subscription ahead of the live ones"""
+        if backlog:
+            self.after = backlog[-1][0]
+            live = [entry for entry in self.lines if entry[0] > self.after]
+            entries = backlog + live
+        else:
+            entries = list(self.lines)
+        excess = len(entries) - self.max_lines
+        if excess > 0:
+            self.dropped += excess
+            entries = entries[excess:]
+        self.lines = deque(entries)
+        self._ready.set()
+
+    async def next_batch(self, max_lines: int) -> Tuple[List[Dict], int]:
+        """Wait for lines; returns up to ``max_lines`` and the count dropped"""
+        while not self.lines and not self.closed:
+            self._ready.clear()
+            await self._ready.wait()
+        batch = []
+        while self.lines and len(batch) < max_lines:
+            _, timestamp, text = self.lines.popleft()
+            batch.append({"timestamp": timestamp, "line": text})
+        dropped, self.dropped = self.dropped, 0
+        return batch, dropped
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+
+class ContainerLogStream:
+    """One followed ``docker logs`` stream shared by every subscriber"""
+
+    def __init__(self, container_name: str, client, retry_delay: float):
+        self.container_name = container_name
+        self.client = client
+        self.retry_delay = retry_delay
+        self.subscribers: Set[LogSubscription] = set()
+        # Clients read their backlog after the stream is created, so starting
+        # here leaves no gap between backlog and live lines
+        self.since = f"{time.time():.9f}"
+        self.last_key: Optional[Tuple[str, int]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._follow())
+
+    async def _follow(self):
+        """Follow the container, resuming after the last line when the stream ends
+
+        The stream ends whenever the container stops, so it is reopened until
+        the last subscriber leaves.
+        """
+        delay = self.retry_delay
+        while self.subscribers:
+            since = key_to_since(self.last_key) if self.last_key else self.since
+            buffer = ""
+            try:
+                async for text in self.client.stream_logs(
+                    self.container_name, tail=0, timestamps=True, since=since
+                ):
+                    buffer += text
+                    *lines, buffer = buffer.split("\n")
+                    for line in lines:
+                        self._publish(line)
+                    delay = self.retry_delay
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Log stream for {self.container_name} ended: {e}")
+            if buffer:
+                self._publish(buffer)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def _publish(self, line: str):
+        entry = parse_line(line)
+        # ``since`` is inclusive, so a resumed stream repeats the last line
+        if entry is None or (self.last_key and entry[0] <= self.last_key):
+            return
+        self.last_key = entry[0]
+        for subscription in self.subscribers:
+            subscription.push(entry)
+
+
+class LogStreamHub:
+    """Fans followed container logs out to WebSocket clients
+
+    Clients watching the same container share one upstream stream, which is
+    closed when the last of them unsubscribes. Streams live in the event loop
+    of the ASGI worker, so sharing is per worker process.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or json_file_logs
+        self.buffer_lines = getattr(settings, "LOG_STREAM_BUFFER_LINES", 1000)
+        self.batch_lines = getattr(settings, "LOG_STREAM_BATCH_LINES", 200)
+        self.retry_delay = 1.0
+        self.streams: Dict[str, ContainerLogStream] = {}
+
+    def is_available(self) -> bool:
+        return self.client.is_available()
+
+    async def subscribe(
+        self, container_name: str, since: Optional[str] = None, tail: int = 100
+    ) -> LogSubscription:
+        """Follow a container from ``since`` (a unix time), or its last ``tail`` lines
+
+        The backlog is at most ``tail`` lines, and never more than the buffer
+        holds, even from an early ``since``.
+        """
+        tail = max(0, min(tail, self.buffer_lines))
+        subscription = LogSubscription(container_name, self.buffer_lines)
+        stream = self.streams.get(container_name)
+        if stream is None:
+            stream = ContainerLogStream(container_name, self.client, self.retry_delay)
+            self.streams[container_name] = stream
+            stream.subscribers.add(subscription)
+            stream.start()
+        else:
+            stream.subscribers.add(subscription)
+
+        # Subscribed first, so lines written while the backlog is read are
+        # buffered; load_backlog drops the overlap
+        try:
+            backlog = await self.client.logs(
+                container_name, tail=tail, since=since, timestamps=True
+            )
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        subscription.load_backlog(
+            [entry for entry in map(parse_line, backlog.splitlines()) if entry]
+        )
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription):
+        subscription.close()
+        stream = self.streams.get(subscription.container_name)
+        if stream is None:
+            return
+        stream.subscribers.discard(subscription)
+        if not stream.subscribers:
+            del self.streams[subscription.container_name]
+            if stream.task is not None:
+                stream.task.cancel()
+
+
+# Global instance
+log_streams = LogStreamHub()
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from monitoring.compression import metrics_compressor
+
+
+class Command(BaseCommand):
+    help = "Compress aged Docker metrics into per-container hourly chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-hours",
+            type=float,
+            default=getattr(settings, "METRICS_COMPRESS_AFTER_HOURS", 24),
+            help="Only compress samples older than this many hours",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = timezone.now() - timedelta(hours=options["older_than_hours"])
+            stats = metrics_compressor.compress_before(cutoff)
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Compressed {stats['rows']} samples into {stats['chunks']} chunks"
+                )
+            )
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error compressing metrics: {e}"))
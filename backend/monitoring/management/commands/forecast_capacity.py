@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from monitoring.forecast import exhaustion_forecaster
+
+
+class Command(BaseCommand):
+    help = "Forecast filesystem and container memory exhaustion and raise events"
+
+    def handle(self, *args, **options):
+        try:
+            forecasts = exhaustion_forecaster.run()
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Forecast {len(forecasts['series'])} series, "
+                    f"{forecasts['alerts']} new alerts"
+                )
+            )
+
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error forecasting capacity: {e}"))
@@ -0,0 +1,46 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+from monitoring.log_ingest import LogIngester
+from monitoring.log_metrics import log_error_counter
+from monitoring.log_store import get_log_store
+from services.async_docker import async_docker
+
+
+class Command(BaseCommand):
+    help = (
+        "Follow running containers, copying their logs into the searchable log "
+        "store and counting error lines"
+    )
+
+    def handle(self, *args, **options):
+        store = get_log_store()
+        counter = log_error_counter if log_error_counter.matchers else None
+        if store is None and counter is None:
+            self.stdout.write(
+                self.style.ERROR("Neither LOG_STORE_PATH nor error matchers are set")
+            )
+            return
+        if not async_docker.is_available():
+            self.stdout.write(self.style.ERROR("Docker is not available"))
+            return
+
+        if store is not None:
+            self.stdout.write(
+                self.style.SUCCESS(f"Ingesting container logs into {store.root}")
+            )
+        if counter is not None:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Counting error lines every {counter.interval:g} seconds"
+                )
+            )
+        asyncio.run(self.ingest(LogIngester(store, counter=counter)))
+
+    async def ingest(self, ingester: LogIngester):
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopped.set)
+        await ingester.run(stopped)
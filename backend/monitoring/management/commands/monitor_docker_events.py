@@ -0,0 +1,24 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from monitoring.event_monitor import event_monitor
+
+
+class Command(BaseCommand):
+    help = "Update Docker service status from the Docker event stream"
+
+    def handle(self, *args, **options):
+        event_monitor.start_monitoring()
+        if not event_monitor.monitoring:
+            self.stdout.write(self.style.ERROR("Docker events are not available"))
+            return
+
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *args: stopped.set())
+        self.stdout.write(self.style.SUCCESS("Monitoring Docker events"))
+        try:
+            stopped.wait()
+        except KeyboardInterrupt:
+            pass
+        event_monitor.stop_monitoring()
@@ -0,0 +1,109 @@
+import asyncio
+import multiprocessing
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from monitoring.statsd import StatsdServer
+
+SAMPLE_LINES = [
+    b"bench.requests:1|c",
+    b"bench.latency:%d|ms|@0.5|#env:bench",
+    b"bench.queue_depth:%d|g",
+    b"bench.users:%d|s",
+]
+
+
+class _CountingServer(StatsdServer):
+    """Listener that counts aggregate rows instead of writing them"""
+
+    rows = 0
+
+    def _write(self, rows):
+        self.rows += len(rows)
+
+
+def _send(port: int, packets: int, offset: int):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payloads = [
+        SAMPLE_LINES[i % len(SAMPLE_LINES)].replace(b"%d", str(i % 500).encode())
+        for i in range(1000)
+    ]
+    for i in range(packets):
+        sock.sendto(payloads[(i + offset) % 1000], ("127.0.0.1", port))
+    sock.close()
+
+
+class Command(BaseCommand):
+    help = "Measure StatsD listener throughput on loopback"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--packets", type=int, default=500000)
+        parser.add_argument("--senders", type=int, default=2)
+
+    def handle(self, *args, **options):
+        result = run_benchmark(options["packets"], options["senders"])
+        self.stdout.write(
+            f"Sent {result['sent']} packets, received {result['received']} "
+            f"({result['loss_percent']:.2f}% lost) at "
+            f"{result['packets_per_second']:,.0f} packets/sec "
+            f"({result['packets_per_cpu_second']:,.0f} per listener CPU second); "
+            f"wrote {result['rows']} aggregate rows"
+        )
+
+
+def run_benchmark(packets: int, senders: int = 2) -> dict:
+    """Blast the listener from sender processes and report its receive rate
+
+    The listener runs on one thread of this process, as in production, and
+    the senders are separate processes. On a machine with a single core the
+    senders take CPU from the listener, so packets per listener CPU second is
+    the figure to compare against a core's capacity.
+    """
+    # Flush only at the end so the measurement covers receiving and parsing
+    server = _CountingServer("127.0.0.1", 0, flush_interval=3600)
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(),))
+    thread.start()
+    server.ready.wait(5)
+    aggregator = server.aggregator
+
+    per_sender = packets // senders
+    processes = [
+        multiprocessing.Process(target=_send, args=(server.port, per_sender, n))
+        for n in range(senders)
+    ]
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for process in processes:
+        process.start()
+
+    # Wait until the senders are done and the socket has drained
+    last_count, last_change = -1, time.perf_counter()
+    while True:
+        time.sleep(0.05)
+        count = aggregator.packets
+        if count != last_count:
+            last_count, last_change = count, time.perf_counter()
+        elif not any(p.is_alive() for p in processes) and (
+            time.perf_counter() - last_change > 0.5
+        ):
+            break
+    elapsed = last_change - started
+    # The listener is the only busy thread here; senders are other processes
+    cpu = time.process_time() - cpu_started
+    for process in processes:
+        process.join()
+
+    server.stop()
+    thread.join()
+
+    sent = per_sender * senders
+    return {
+        "sent": sent,
+        "received": last_count,
+        "loss_percent": 100 * (sent - last_count) / sent if sent else 0.0,
+        "packets_per_second": last_count / elapsed if elapsed > 0 else 0.0,
+        "packets_per_cpu_second": last_count / cpu if cpu > 0 else 0.0,
+        "rows": server.rows,
+    }
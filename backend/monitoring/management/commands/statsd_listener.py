@@ -0,0 +1,35 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from monitoring.statsd import StatsdServer
+
+
+class Command(BaseCommand):
+    help = "Receive StatsD metrics over UDP and store per-interval aggregates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--host", default=getattr(settings, "STATSD_HOST", "0.0.0.0")
+        )
+        parser.add_argument(
+            "--port", type=int, default=getattr(settings, "STATSD_PORT", 8125)
+        )
+        parser.add_argument(
+            "--flush-interval",
+            type=float,
+            default=getattr(settings, "STATSD_FLUSH_INTERVAL", 10),
+            help="Seconds between aggregate writes",
+        )
+
+    def handle(self, *args, **options):
+        server = StatsdServer(
+            options["host"], options["port"], options["flush_interval"]
+        )
+        self.stdout.write(
+            f"Listening for StatsD on {options['host']}:{options['port']}"
+        )
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
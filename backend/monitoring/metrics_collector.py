@@ -1,16 +1,22 @@
+import asyncio
 import json
 import logging
 import subprocess
-from datetime import datetime
 from datetime import timedelta
+from typing import TYPE_CHECKING
 from typing import Dict
 from typing import List
 from typing import Optional
 
 import psutil
+from services.async_docker import AsyncDockerClient
+from services.async_docker import async_docker
 
-from .models import DockerMetrics
-from .models import ServerMetrics
+# Storage dependencies are imported where they are used so that sampling works
+# without Django (see monitoring.agent)
+if TYPE_CHECKING:
+    from .models import DockerMetrics
+    from .models import ServerMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +27,18 @@ class MetricsCollector:
     def __init__(self):
         self.last_network_stats = None
         self.last_disk_stats = None
+        # Container ID: (container CPU time, system CPU time) at the last sample
+        self.last_container_cpu: Dict[str, tuple] = {}
 
-    def collect_server_metrics(self) -> Dict:
-        """Collect current server metrics"""
+    def collect_server_metrics(self, cpu_interval: Optional[float] = 1) -> Dict:
+        """Collect current server metrics
+
+        ``cpu_interval=None`` samples CPU without blocking, relative to the
+        previous call.
+        """
         try:
             # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=cpu_interval)
 
             # Memory metrics
             memory = psutil.virtual_memory()
@@ -68,7 +80,18 @@ class MetricsCollector:
             return {}
 
     def collect_docker_metrics(self) -> List[Dict]:
-        """Collect Docker container metrics"""
+        """Collect Docker container metrics
+
+        Stats come from the Engine API when the daemon socket is local, and
+        from `docker stats` otherwise.
+        """
+        if async_docker.is_available():
+            try:
+                return asyncio.run(self._collect_docker_metrics_once())
+            except Exception as e:
+                logger.error(f"Error collecting Docker metrics: {e}")
+                return []
+
         try:
             # Get container stats using docker stats command
             result = subprocess.run(
@@ -99,6 +122,108 @@ class MetricsCollector:
             logger.error(f"Error collecting Docker metrics: {e}")
             return []
 
+    async def _collect_docker_metrics_once(self) -> List[Dict]:
+        try:
+            return await self.collect_docker_metrics_async()
+        finally:
+            await async_docker.close()
+
+    async def collect_docker_metrics_async(
+        self, client: Optional[AsyncDockerClient] = None
+    ) -> List[Dict]:
+        """Collect Docker container metrics with concurrent Engine API calls"""
+        client = client or async_docker
+        containers = await client.list_containers()
+        samples = await asyncio.gather(
+            *(client.stats(container["Id"]) for container in containers),
+            return_exceptions=True,
+        )
+        metrics = []
+        for container, stats in zip(containers, samples):
+            if isinstance(stats, Exception):
+                # Usually a container that stopped since the listing
+                logger.warning(
+                    f"No stats for container {container['Id'][:12]}: {stats}"
+                )
+                continue
+            container_metrics = self._parse_api_stats(container, stats)
+            if container_metrics:
+                metrics.append(container_metrics)
+        return metrics
+
+    def _parse_api_stats(self, container: Dict, stats: Dict) -> Optional[Dict]:
+        """Parse a Docker Engine API stats sample
+
+        One-shot samples carry no previous CPU reading, so CPU usage is taken
+        relative to this collector's last sample of the container and is 0 the
+        first time a container is seen.
+        """
+        try:
+            container_id = container["Id"]
+            cpu_stats = stats.get("cpu_stats") or {}
+            cpu_usage = cpu_stats.get("cpu_usage") or {}
+            total_usage = cpu_usage.get("total_usage", 0)
+            system_usage = cpu_stats.get("system_cpu_usage", 0)
+            precpu = stats.get("precpu_stats") or {}
+            if precpu.get("system_cpu_usage"):
+                previous = (
+                    (precpu.get("cpu_usage") or {}).get("total_usage", 0),
+                    precpu["system_cpu_usage"],
+                )
+            else:
+                previous = self.last_container_cpu.get(container_id)
+            self.last_container_cpu[container_id] = (total_usage, system_usage)
+
+            cpu_percent = 0.0
+            if previous:
+                cpu_delta = total_usage - previous[0]
+                system_delta = system_usage - previous[1]
+                online_cpus = cpu_stats.get("online_cpus") or len(
+                    cpu_usage.get("percpu_usage") or [None]
+                )
+                if cpu_delta > 0 and system_delta > 0:
+                    cpu_percent = cpu_delta / system_delta * online_cpus * 100
+
+            # Like `docker stats`, page cache that can be reclaimed is not usage
+            memory_stats = stats.get("memory_stats") or {}
+            memory_detail = memory_stats.get("stats") or {}
+            memory_usage = memory_stats.get("usage", 0)
+            inactive_file = memory_detail.get(
+                "total_inactive_file", memory_detail.get("inactive_file", 0)
+            )
+            if inactive_file < memory_usage:
+                memory_usage -= inactive_file
+
+            networks = (stats.get("networks") or {}).values()
+            block_io = {"read": 0, "write": 0}
+            blkio_stats = stats.get("blkio_stats") or {}
+            for entry in blkio_stats.get("io_service_bytes_recursive") or []:
+                op = entry.get("op", "").lower()
+                if op in block_io:
+                    block_io[op] += entry.get("value", 0)
+
+            mb = 1024 * 1024
+            names = container.get("Names") or []
+            return {
+                "container_id": container_id[:12],
+                "container_name": names[0].lstrip("/") if names else container_id[:12],
+                "cpu_percent": round(cpu_percent, 2),
+                "memory_usage_mb": round(memory_usage / mb, 2),
+                "memory_limit_mb": round(memory_stats.get("limit", 0) / mb, 2),
+                "network_rx_mb": round(
+                    sum(n.get("rx_bytes", 0) for n in networks) / mb, 2
+                ),
+                "network_tx_mb": round(
+                    sum(n.get("tx_bytes", 0) for n in networks) / mb, 2
+                ),
+                "block_read_mb": round(block_io["read"] / mb, 2),
+                "block_write_mb": round(block_io["write"] / mb, 2),
+            }
+
+        except Exception as e:
+            logger.error(f"Error parsing Docker stats: {e}")
+            return None
+
     def _get_network_stats(self) -> Dict:
         """Get network statistics"""
         try:
@@ -216,28 +341,114 @@ class MetricsCollector:
                 logger.warning(f"Could not parse size string: {size_str}")
                 return 0.0
 
-    def save_server_metrics(self, metrics: Dict) -> ServerMetrics:
+    def save_server_metrics(self, metrics: Dict) -> "ServerMetrics":
         """Save server metrics to database"""
-        return ServerMetrics.objects.create(**metrics)
-
-    def save_docker_metrics(self, metrics_list: List[Dict]) -> List[DockerMetrics]:
+        from .models import ServerMetrics
+        from .prometheus import record_server_metrics
+        from .tsdb import SERVER_SERIES
+
+        saved = ServerMetrics.objects.create(**metrics)
+        record_server_metrics(metrics)
+        self._append_to_tsdb(
+            SERVER_SERIES, saved.timestamp, metrics, {"host": saved.host}
+        )
+        self._detect_anomalies("observe_server", metrics)
+        return saved
+
+    def save_docker_metrics(self, metrics_list: List[Dict]) -> List["DockerMetrics"]:
         """Save Docker metrics to database"""
-        saved_metrics = []
-        for metrics in metrics_list:
-            saved_metrics.append(DockerMetrics.objects.create(**metrics))
+        from .models import DockerMetrics
+        from .prometheus import record_docker_metrics
+        from .tsdb import DOCKER_SERIES_PREFIX
+
+        self._attach_log_error_rates(metrics_list)
+        saved_metrics = DockerMetrics.objects.bulk_create(
+            [DockerMetrics(**metrics) for metrics in metrics_list]
+        )
+        record_docker_metrics(metrics_list)
+        for saved, metrics in zip(saved_metrics, metrics_list):
+            values = {
+                key: value
+                for key, value in metrics.items()
+                if key not in ("container_id", "container_name")
+            }
+            self._append_to_tsdb(
+                f"{DOCKER_SERIES_PREFIX}{saved.container_id}",
+                saved.timestamp,
+                values,
+                {
+                    "host": saved.host,
+                    "container_id": saved.container_id,
+                    "container_name": saved.container_name,
+                },
+            )
+        self._detect_anomalies("observe_docker", metrics_list)
         return saved_metrics
 
-    def get_recent_server_metrics(self, hours: int = 1) -> List[ServerMetrics]:
+    def _attach_log_error_rates(self, metrics_list: List[Dict]):
+        """Add error lines per minute counted by the log ingester, if running"""
+        from .log_metrics import latest_error_rates
+
+        try:
+            rates = latest_error_rates(m["container_name"] for m in metrics_list)
+        except Exception as e:
+            logger.error(f"Error reading log error rates: {e}")
+            rates = {}
+        for metrics in metrics_list:
+            metrics.setdefault(
+                "error_lines_per_minute", rates.get(metrics["container_name"])
+            )
+
+    def _detect_anomalies(self, method: str, metrics):
+        """Score a saved sample, creating events for sustained anomalies"""
+        from .anomaly import anomaly_detector
+
+        try:
+            getattr(anomaly_detector, method)(metrics)
+        except Exception as e:
+            logger.error(f"Error running anomaly detection: {e}")
+
+    def _append_to_tsdb(
+        self, name: str, timestamp, values: Dict, labels: Optional[Dict] = None
+    ):
+        """Mirror a sample into the time-series store when one is configured"""
+        from .tsdb import get_tsdb
+
+        store = get_tsdb()
+        if store is None:
+            return
+        try:
+            store.append(name, timestamp, values, labels)
+        except Exception as e:
+            logger.error(f"Error writing {name} to time-series store: {e}")
+
+    def get_recent_server_metrics(
+        self, hours: int = 1, host: Optional[str] = None
+    ) -> List["ServerMetrics"]:
         """Get recent server metrics"""
-        since = datetime.now() - timedelta(hours=hours)
-        return ServerMetrics.objects.filter(timestamp__gte=since)
+        from django.utils import timezone
+
+        from .models import LOCAL_HOST
+        from .models import ServerMetrics
+
+        since = timezone.now() - timedelta(hours=hours)
+        return ServerMetrics.objects.filter(
+            host=host or LOCAL_HOST, timestamp__gte=since
+        )
 
     def get_recent_docker_metrics(
-        self, container_id: str = None, hours: int = 1
-    ) -> List[DockerMetrics]:
+        self, container_id: str = None, hours: int = 1, host: Optional[str] = None
+    ) -> List["DockerMetrics"]:
         """Get recent Docker metrics"""
-        since = datetime.now() - timedelta(hours=hours)
-        queryset = DockerMetrics.objects.filter(timestamp__gte=since)
+        from django.utils import timezone
+
+        from .models import LOCAL_HOST
+        from .models import DockerMetrics
+
+        since = timezone.now() - timedelta(hours=hours)
+        queryset = DockerMetrics.objects.filter(
+            host=host or LOCAL_HOST, timestamp__gte=since
+        )
 
         if container_id:
             queryset = queryset.filter(container_id=container_id)
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeviceMetrics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                (
+                    "device_type",
+                    models.CharField(
+                        choices=[
+                            ("cpu", "CPU Core"),
+                            ("network", "Network Interface"),
+                            ("disk", "Block Device"),
+                            ("filesystem", "Filesystem"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "device",
+                    models.CharField(
+                        help_text="CPU core, interface, block device or mount point",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "percent",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Utilization or usage percentage",
+                        null=True,
+                    ),
+                ),
+                (
+                    "read_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Bytes read or received per second",
+                        null=True,
+                    ),
+                ),
+                (
+                    "write_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Bytes written or sent per second",
+                        null=True,
+                    ),
+                ),
+                (
+                    "read_ops_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Read operations or packets received per second",
+                        null=True,
+                    ),
+                ),
+                (
+                    "write_ops_rate",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Write operations or packets sent per second",
+                        null=True,
+                    ),
+                ),
+                (
+                    "used_gb",
+                    models.FloatField(
+                        blank=True, help_text="Filesystem used in GB", null=True
+                    ),
+                ),
+                (
+                    "total_gb",
+                    models.FloatField(
+                        blank=True, help_text="Filesystem size in GB", null=True
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Device Metrics",
+                "verbose_name_plural": "Device Metrics",
+                "ordering": ["-timestamp"],
+                "indexes": [
+                    models.Index(
+                        fields=["device_type", "device", "timestamp"],
+                        name="monitoring__device__022bf8_idx",
+                    ),
+                    models.Index(
+                        fields=["timestamp"], name="monitoring__timesta_7f0f93_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
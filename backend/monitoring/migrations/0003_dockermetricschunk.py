@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0002_devicemetrics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DockerMetricsChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("container_id", models.CharField(max_length=64)),
+                ("container_name", models.CharField(max_length=255)),
+                (
+                    "start",
+                    models.DateTimeField(help_text="Timestamp of the first sample"),
+                ),
+                ("end", models.DateTimeField(help_text="Timestamp of the last sample")),
+                (
+                    "count",
+                    models.IntegerField(help_text="Number of samples in the chunk"),
+                ),
+                (
+                    "data",
+                    models.BinaryField(
+                        help_text="Delta-of-delta timestamps and XOR-encoded metric columns"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Docker Metrics Chunk",
+                "verbose_name_plural": "Docker Metrics Chunks",
+                "ordering": ["-start"],
+                "indexes": [
+                    models.Index(
+                        fields=["container_id", "end"],
+                        name="monitoring__contain_f3949f_idx",
+                    ),
+                    models.Index(fields=["end"], name="monitoring__end_56c128_idx"),
+                ],
+            },
+        ),
+    ]
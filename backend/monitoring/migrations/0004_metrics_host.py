@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0003_dockermetricschunk"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dockermetrics",
+            name="host",
+            field=models.CharField(
+                default="local", help_text="Host the container runs on", max_length=255
+            ),
+        ),
+        migrations.AddField(
+            model_name="dockermetricschunk",
+            name="host",
+            field=models.CharField(default="local", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="servermetrics",
+            name="host",
+            field=models.CharField(
+                default="local", help_text="Host the sample came from", max_length=255
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dockermetrics",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name="servermetrics",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="dockermetrics",
+            index=models.Index(
+                fields=["host", "timestamp"], name="monitoring__host_65aa32_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="servermetrics",
+            index=models.Index(
+                fields=["host", "timestamp"], name="monitoring__host_a683ff_idx"
+            ),
+        ),
+    ]
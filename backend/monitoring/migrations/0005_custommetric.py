@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0004_metrics_host"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomMetric",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "host",
+                    models.CharField(
+                        default="local",
+                        help_text="Host that received the metric",
+                        max_length=255,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "metric_type",
+                    models.CharField(
+                        choices=[
+                            ("counter", "Counter"),
+                            ("gauge", "Gauge"),
+                            ("timer", "Timer"),
+                            ("set", "Set"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("tags", models.JSONField(blank=True, default=dict)),
+                ("timestamp", models.DateTimeField(default=django.utils.timezone.now)),
+                ("interval", models.FloatField(help_text="Flush interval in seconds")),
+                (
+                    "value",
+                    models.FloatField(
+                        help_text="Counter total, last gauge value, mean timing or unique set members"
+                    ),
+                ),
+                ("count", models.IntegerField(default=0, help_text="Samples received")),
+                ("min", models.FloatField(blank=True, null=True)),
+                ("max", models.FloatField(blank=True, null=True)),
+                ("p50", models.FloatField(blank=True, null=True)),
+                ("p90", models.FloatField(blank=True, null=True)),
+                ("p95", models.FloatField(blank=True, null=True)),
+                ("p99", models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-timestamp"],
+                "indexes": [
+                    models.Index(
+                        fields=["name", "timestamp"], name="monitoring__name_99fd0e_idx"
+                    ),
+                    models.Index(
+                        fields=["timestamp"], name="monitoring__timesta_f1bbdf_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("monitoring", "0005_custommetric"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dockermetrics",
+            name="error_lines_per_minute",
+            field=models.FloatField(
+                blank=True,
+                help_text="Error lines logged per minute, when the container's logs are followed",
+                null=True,
+            ),
+        ),
+    ]
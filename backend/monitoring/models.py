@@ -1,11 +1,17 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
+
+LOCAL_HOST = "local"
 
 
 class ServerMetrics(models.Model):
     """Server usage metrics"""
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    host = models.CharField(
+        max_length=255, default=LOCAL_HOST, help_text="Host the sample came from"
+    )
+    timestamp = models.DateTimeField(default=timezone.now)
     cpu_percent = models.FloatField(help_text="CPU usage percentage")
     memory_percent = models.FloatField(help_text="Memory usage percentage")
     memory_used_mb = models.FloatField(help_text="Memory used in MB")
@@ -23,6 +29,9 @@ class ServerMetrics(models.Model):
         ordering = ["-timestamp"]
         verbose_name = "Server Metrics"
         verbose_name_plural = "Server Metrics"
+        indexes = [
+            models.Index(fields=["host", "timestamp"]),
+        ]
 
     def __str__(self):
         return f"Server Metrics - {self.timestamp}"
@@ -31,9 +40,12 @@ class ServerMetrics(models.Model):
 class DockerMetrics(models.Model):
     """Docker container metrics"""
 
+    host = models.CharField(
+        max_length=255, default=LOCAL_HOST, help_text="Host the container runs on"
+    )
     container_id = models.CharField(max_length=64)
     container_name = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     cpu_percent = models.FloatField(help_text="CPU usage percentage")
     memory_usage_mb = models.FloatField(help_text="Memory usage in MB")
     memory_limit_mb = models.FloatField(help_text="Memory limit in MB")
@@ -41,6 +53,11 @@ class DockerMetrics(models.Model):
     network_tx_mb = models.FloatField(help_text="Network transmitted in MB")
     block_read_mb = models.FloatField(help_text="Block read in MB")
     block_write_mb = models.FloatField(help_text="Block write in MB")
+    error_lines_per_minute = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Error lines logged per minute, when the container's logs are followed",
+    )
 
     class Meta:
         ordering = ["-timestamp"]
@@ -48,8 +65,127 @@ class DockerMetrics(models.Model):
         verbose_name_plural = "Docker Metrics"
         indexes = [
             models.Index(fields=["container_id", "timestamp"]),
+            models.Index(fields=["host", "timestamp"]),
             models.Index(fields=["timestamp"]),
         ]
 
     def __str__(self):
         return f"{self.container_name} - {self.timestamp}"
+
+
+class DockerMetricsChunk(models.Model):
+    """Compressed Docker metrics for one container over one hour"""
+
+    host = models.CharField(max_length=255, default=LOCAL_HOST)
+    container_id = models.CharField(max_length=64)
+    container_name = models.CharField(max_length=255)
+    start = models.DateTimeField(help_text="Timestamp of the first sample")
+    end = models.DateTimeField(help_text="Timestamp of the last sample")
+    count = models.IntegerField(help_text="Number of samples in the chunk")
+    data = models.BinaryField(
+        help_text="Delta-of-delta timestamps and XOR-encoded metric columns"
+    )
+
+    class Meta:
+        ordering = ["-start"]
+        verbose_name = "Docker Metrics Chunk"
+        verbose_name_plural = "Docker Metrics Chunks"
+        indexes = [
+            models.Index(fields=["container_id", "end"]),
+            models.Index(fields=["end"]),
+        ]
+
+    def __str__(self):
+        return f"{self.container_name} - {self.start} ({self.count} samples)"
+
+
+class DeviceMetrics(models.Model):
+    """Per-device host metrics: CPU cores, network interfaces, disks, filesystems"""
+
+    DEVICE_TYPES = [
+        ("cpu", "CPU Core"),
+        ("network", "Network Interface"),
+        ("disk", "Block Device"),
+        ("filesystem", "Filesystem"),
+    ]
+
+    timestamp = models.DateTimeField(auto_now_add=True)
+    device_type = models.CharField(max_length=20, choices=DEVICE_TYPES)
+    device = models.CharField(
+        max_length=255, help_text="CPU core, interface, block device or mount point"
+    )
+    percent = models.FloatField(
+        null=True, blank=True, help_text="Utilization or usage percentage"
+    )
+    read_rate = models.FloatField(
+        null=True, blank=True, help_text="Bytes read or received per second"
+    )
+    write_rate = models.FloatField(
+        null=True, blank=True, help_text="Bytes written or sent per second"
+    )
+    read_ops_rate = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Read operations or packets received per second",
+    )
+    write_ops_rate = models.FloatField(
+        null=True, blank=True, help_text="Write operations or packets sent per second"
+    )
+    used_gb = models.FloatField(
+        null=True, blank=True, help_text="Filesystem used in GB"
+    )
+    total_gb = models.FloatField(
+        null=True, blank=True, help_text="Filesystem size in GB"
+    )
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name = "Device Metrics"
+        verbose_name_plural = "Device Metrics"
+        indexes = [
+            models.Index(fields=["device_type", "device", "timestamp"]),
+            models.Index(fields=["timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.device_type}:{self.device} - {self.timestamp}"
+
+
+class CustomMetric(models.Model):
+    """An application metric aggregated over one StatsD flush interval"""
+
+    METRIC_TYPES = [
+        ("counter", "Counter"),
+        ("gauge", "Gauge"),
+        ("timer", "Timer"),
+        ("set", "Set"),
+    ]
+
+    host = models.CharField(
+        max_length=255, default=LOCAL_HOST, help_text="Host that received the metric"
+    )
+    name = models.CharField(max_length=255)
+    metric_type = models.CharField(max_length=10, choices=METRIC_TYPES)
+    tags = models.JSONField(default=dict, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    interval = models.FloatField(help_text="Flush interval in seconds")
+    value = models.FloatField(
+        help_text="Counter total, last gauge value, mean timing or unique set members"
+    )
+    count = models.IntegerField(default=0, help_text="Samples received")
+    min = models.FloatField(null=True, blank=True)
+    max = models.FloatField(null=True, blank=True)
+    p50 = models.FloatField(null=True, blank=True)
+    p90 = models.FloatField(null=True, blank=True)
+    p95 = models.FloatField(null=True, blank=True)
+    p99 = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["name", "timestamp"]),
+            models.Index(fields=["timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.metric_type}) - {self.timestamp}"
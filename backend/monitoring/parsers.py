@@ -0,0 +1,30 @@
+import io
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class GzipJSONParser(JSONParser):
+    """JSON parser that also accepts ``Content-Encoding: gzip`` bodies
+
+    The decompressed size is capped at ``METRICS_INGEST_MAX_BYTES``.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]
+        encoding = request.META.get("HTTP_CONTENT_ENCODING", "").lower()
+        if encoding == "gzip":
+            max_bytes = getattr(settings, "METRICS_INGEST_MAX_BYTES", 32 * 1024 * 1024)
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                body = decompressor.decompress(stream.read(), max_bytes)
+            except zlib.error as e:
+                raise ParseError(f"Invalid gzip body: {e}")
+            if decompressor.unconsumed_tail:
+                raise ParseError("Decompressed body is too large")
+            stream = io.BytesIO(body)
+        elif encoding not in ("", "identity"):
+            raise ParseError(f"Unsupported content encoding: {encoding}")
+        return super().parse(stream, media_type, parser_context)
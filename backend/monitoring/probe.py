@@ -0,0 +1,201 @@
+"""Remote check probe
+
+Pulls the services assigned to this probe from the hub, runs their HTTP, TCP
+and custom checks locally and uploads the results in compressed batches. Like
+the collector agent it needs neither Django nor a database:
+
+    python -m monitoring.probe --hub https://hub.example.com --token <token>
+
+Every option can also be given as a ``SAURON_PROBE_*`` environment variable.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from datetime import datetime
+from datetime import timezone
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import requests
+
+from .checks import REMOTE_CHECKS
+from .hub_client import PROBE_ASSIGNMENTS_PATH
+from .hub_client import PROBE_RESULTS_PATH
+from .hub_client import BatchSender
+from .hub_client import HubClient
+from .hub_client import Spool
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeRunner:
+    """Runs assigned checks on their intervals and uploads results in batches"""
+
+    def __init__(
+        self,
+        client: HubClient,
+        sender: BatchSender,
+        refresh_interval: float = 60,
+        push_interval: float = 10,
+        max_workers: int = 8,
+    ):
+        self.client = client
+        self.sender = sender
+        self.refresh_interval = refresh_interval
+        self.push_interval = push_interval
+        self.services: Dict[int, Dict] = {}
+        self.next_due: Dict[int, float] = {}
+        self.in_flight = set()
+        self.results: List[Dict] = []
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+        # Checks mostly wait on the network, so a small pool keeps a slow
+        # target from delaying the others without using much CPU
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def refresh(self) -> bool:
+        """Fetch assignments, keeping the previous ones if the hub is unreachable"""
+        try:
+            services = self.client.get(PROBE_ASSIGNMENTS_PATH)["services"]
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.warning(f"Could not refresh assignments: {e}")
+            return False
+
+        self.services = {service["id"]: service for service in services}
+        for service_id in list(self.next_due):
+            if service_id not in self.services:
+                del self.next_due[service_id]
+        for service_id in self.services:
+            self.next_due.setdefault(service_id, 0.0)
+        return True
+
+    def check(self, service: Dict) -> Dict:
+        """Run one check and buffer its result"""
+        checked_at = datetime.now(timezone.utc).isoformat()
+        try:
+            check = REMOTE_CHECKS[service["service_type"]]
+            result = check(service["config"], service["timeout"])
+        except Exception as e:
+            result = {"success": False, "error": str(e), "timestamp": time.time()}
+        result = {**result, "service": service["id"], "checked_at": checked_at}
+        with self._lock:
+            self.results.append(result)
+            self.in_flight.discard(service["id"])
+        return result
+
+    def run_due(self, now: float) -> list:
+        """Start every check whose interval has elapsed"""
+        futures = []
+        for service_id, service in self.services.items():
+            if self.next_due[service_id] > now:
+                continue
+            with self._lock:
+                # Skip a check that is still running from its last interval
+                if service_id in self.in_flight:
+                    continue
+                self.in_flight.add(service_id)
+            self.next_due[service_id] = now + service["check_interval"]
+            futures.append(self.executor.submit(self.check, service))
+        return futures
+
+    def flush(self) -> bool:
+        """Upload buffered results, or retry spooled batches if there are none"""
+        with self._lock:
+            results, self.results = self.results, []
+        if not results:
+            return self.sender.drain()
+        return self.sender.send({"results": results})
+
+    def run_once(self):
+        """Refresh, run every due check to completion and upload the results"""
+        self.refresh()
+        wait(self.run_due(time.monotonic()))
+        self.flush()
+
+    def run(self):
+        next_refresh = next_push = 0.0
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            if now >= next_refresh:
+                self.refresh()
+                next_refresh = now + self.refresh_interval
+            self.run_due(now)
+            if now >= next_push:
+                self.flush()
+                next_push = now + self.push_interval
+            self.stopped.wait(1)
+        self.executor.shutdown(wait=True)
+        self.flush()
+
+    def stop(self, *args):
+        self.stopped.set()
+
+
+def _env(name: str, default=None):
+    return os.getenv(f"SAURON_PROBE_{name}", default)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run health checks for a hub")
+    parser.add_argument("--hub", default=_env("HUB"), help="Hub base URL")
+    parser.add_argument("--token", default=_env("TOKEN"), help="Probe API token")
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=float(_env("REFRESH_INTERVAL", "60")),
+        help="Seconds between assignment refreshes",
+    )
+    parser.add_argument(
+        "--push-interval",
+        type=float,
+        default=float(_env("PUSH_INTERVAL", "10")),
+        help="Seconds between result uploads",
+    )
+    parser.add_argument("--workers", type=int, default=int(_env("WORKERS", "8")))
+    parser.add_argument(
+        "--spool-dir",
+        default=_env("SPOOL_DIR", "/var/lib/sauron-probe/spool"),
+    )
+    parser.add_argument(
+        "--spool-max-mb", type=int, default=int(_env("SPOOL_MAX_MB", "64"))
+    )
+    args = parser.parse_args(argv)
+    if not args.hub or not args.token:
+        parser.error("--hub and --token are required")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+
+    client = HubClient(args.hub, args.token)
+    sender = BatchSender(
+        client,
+        Spool(args.spool_dir, args.spool_max_mb * 1024 * 1024),
+        path=PROBE_RESULTS_PATH,
+    )
+    runner = ProbeRunner(
+        client,
+        sender,
+        refresh_interval=args.refresh_interval,
+        push_interval=args.push_interval,
+        max_workers=args.workers,
+    )
+    signal.signal(signal.SIGTERM, runner.stop)
+    signal.signal(signal.SIGINT, runner.stop)
+    logger.info(f"Probe running checks for {args.hub}")
+    runner.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import logging
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from events.models import Event
+from healthchecks.models import HealthCheck
+from healthchecks.models import Probe
+from services.models import Service
+
+from .broadcast import event_broadcaster
+from .checks import REMOTE_CHECKS
+
+logger = logging.getLogger(__name__)
+
+
+def probe_assignments(probe: Probe) -> List[Dict]:
+    """Services a probe should check, with what it needs to check them"""
+    services = probe.services.filter(
+        enabled=True, service_type__in=list(REMOTE_CHECKS)
+    ).order_by("id")
+    return [
+        {
+            "id": service.id,
+            "name": service.name,
+            "service_type": service.service_type,
+            "config": service.config,
+            "check_interval": service.check_interval,
+            "timeout": service.timeout,
+        }
+        for service in services
+    ]
+
+
+class ProbeResultIngestor:
+    """Stores check results uploaded by probes and aggregates service status
+
+    A batch is ``{"results": [{"service": id, "checked_at": ..., "success": ...,
+    ...}]}`` where each result is what ``monitoring.checks`` returned. Results
+    are unique per probe, service and ``checked_at``, so a retried upload is
+    stored once. Results for services no longer assigned to the probe are
+    skipped.
+
+    A service is unhealthy when most of the probes that reported within two
+    check intervals saw it fail, so one probe's network trouble does not
+    flip it.
+    """
+
+    def __init__(self, max_results: Optional[int] = None):
+        self.max_results = max_results or getattr(
+            settings, "PROBE_MAX_RESULTS_PER_BATCH", 5000
+        )
+
+    def ingest(self, probe: Probe, payload: Dict) -> Dict:
+        """Store one batch, raising ValueError if any result is invalid"""
+        if not isinstance(payload, dict) or not isinstance(
+            payload.get("results"), list
+        ):
+            raise ValueError("Batch must be an object with a results list")
+        results = payload["results"]
+        if len(results) > self.max_results:
+            raise ValueError(f"Batch exceeds {self.max_results} results")
+
+        assigned = set(probe.services.values_list("id", flat=True))
+        rows = [self._build(probe, result) for result in results]
+        rows = [row for row in rows if row.service_id in assigned]
+
+        # Only the batch's own keys are looked up, not the probe's history
+        keys = {(row.service_id, row.checked_at) for row in rows}
+        with transaction.atomic():
+            existing = set(
+                HealthCheck.objects.filter(
+                    probe=probe,
+                    service_id__in={service_id for service_id, _ in keys},
+                    checked_at__in={checked_at for _, checked_at in keys},
+                ).values_list("service_id", "checked_at")
+            )
+            HealthCheck.objects.bulk_create(rows, ignore_conflicts=True)
+        stored = len(keys - existing)
+
+        now = timezone.now()
+        Probe.objects.filter(pk=probe.pk).update(last_seen=now)
+        for service in Service.objects.filter(id__in={row.service_id for row in rows}):
+            self.aggregate(service, now)
+
+        return {
+            "received": len(results),
+            "stored": stored,
+            "skipped": len(results) - len(rows),
+        }
+
+    def _build(self, probe: Probe, result: Dict) -> HealthCheck:
+        if not isinstance(result, dict):
+            raise ValueError("Each result must be a JSON object")
+
+        service_id = result.get("service")
+        if isinstance(service_id, bool) or not isinstance(service_id, int):
+            raise ValueError("service must be an integer id")
+        if not isinstance(result.get("success"), bool):
+            raise ValueError("success must be a boolean")
+
+        checked_at = result.get("checked_at")
+        parsed = parse_datetime(checked_at) if isinstance(checked_at, str) else None
+        if parsed is None:
+            raise ValueError(f"Invalid checked_at: {checked_at}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+
+        response_time = result.get("response_time")
+        if response_time is not None and (
+            isinstance(response_time, bool)
+            or not isinstance(response_time, (int, float))
+        ):
+            raise ValueError("response_time must be a number")
+        http_status = result.get("status_code")
+        if http_status is not None and not isinstance(http_status, int):
+            raise ValueError("status_code must be an integer")
+
+        details = {
+            key: value
+            for key, value in result.items()
+            if key not in ("service", "checked_at")
+        }
+        return HealthCheck(
+            service_id=service_id,
+            probe=probe,
+            status="success" if result["success"] else "failure",
+            response_time=response_time,
+            message=str(
+                result.get("error")
+                or ("OK" if result["success"] else "Health check failed")
+            ),
+            details=details,
+            error_code=str(result.get("error_code") or "")[:50],
+            http_status=http_status,
+            duration=response_time,
+            checked_at=parsed,
+        )
+
+    def aggregate(self, service: Service, now=None):
+        """Set a service's status from the latest result of each probe"""
+        now = now or timezone.now()
+        since = now - timedelta(seconds=2 * max(service.check_interval, 1))
+        latest = {}
+        checks = (
+            HealthCheck.objects.filter(
+                service=service, probe__isnull=False, checked_at__gte=since
+            )
+            .select_related("probe")
+            .order_by("probe_id", "-checked_at")
+        )
+        for check in checks:
+            latest.setdefault(check.probe_id, check)
+        if not latest:
+            return
+
+        failures = [c for c in latest.values() if c.status != "success"]
+        old_status = service.status
+        service.status = "unhealthy" if len(failures) * 2 > len(latest) else "healthy"
+        service.last_check = max(c.checked_at for c in latest.values())
+        service.save(update_fields=["status", "last_check", "updated_at"])
+
+        event = None
+        if old_status != service.status:
+            healthy = service.status == "healthy"
+            event = Event.objects.create(
+                service=service,
+                event_type=(
+                    "health_check_recovered" if healthy else "health_check_failed"
+                ),
+                severity="info" if healthy else "warning",
+                title=f"Health Check: {service.name}",
+                message=(
+                    f"{len(latest) - len(failures)} of {len(latest)} probes report "
+                    f"{service.name} healthy"
+                ),
+                metadata={
+                    "probes": {
+                        check.probe.name: check.status for check in latest.values()
+                    }
+                },
+                source="probes",
+            )
+
+        # Results and status are stored; a broadcast failure must not fail
+        # the upload and make the probe retry it
+        try:
+            event_broadcaster.broadcast_service_update(service)
+            if event:
+                event_broadcaster.broadcast_service_status_change(
+                    service, old_status, service.status
+                )
+                event_broadcaster.broadcast_new_event(event)
+        except Exception as e:
+            logger.error(f"Error broadcasting probe results for {service.name}: {e}")
+
+
+# Global instance
+probe_result_ingestor = ProbeResultIngestor()
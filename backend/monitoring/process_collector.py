@@ -0,0 +1,130 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict
+from typing import Optional
+
+import psutil
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CONTAINER_ID_RE = re.compile(r"(?:docker[-/]|containerd[-/]|/)([0-9a-f]{64})")
+
+
+class ProcessCollector:
+    """Tracks the top host processes by CPU and resident memory
+
+    CPU usage is computed from per-process CPU time deltas between samples,
+    keyed by (pid, create_time) so recycled PIDs never inherit a baseline.
+    Only the top-N processes are mapped to containers.
+    """
+
+    ATTRS = ["pid", "name", "username", "cpu_times", "memory_info", "create_time"]
+
+    def __init__(
+        self, top_n: Optional[int] = None, min_interval: float = 1.0, proc_root="/proc"
+    ):
+        self.top_n = top_n or getattr(settings, "PROCESS_TOP_N", 10)
+        self.min_interval = min_interval
+        self.proc_root = proc_root
+        self.cpu_baselines: Dict[tuple, float] = {}
+        self.container_cache: Dict[tuple, Optional[str]] = {}
+        self.last_sample_time: Optional[float] = None
+        self.last_snapshot: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def get_snapshot(self) -> Dict:
+        """Latest snapshot, sampling again once it is older than min_interval"""
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self.last_snapshot is not None
+                and now - self.last_sample_time < self.min_interval
+            ):
+                return self.last_snapshot
+            return self._sample(now)
+
+    def sample(self) -> Dict:
+        """Take a new snapshot"""
+        with self._lock:
+            return self._sample(time.monotonic())
+
+    def _sample(self, now: float) -> Dict:
+        elapsed = now - self.last_sample_time if self.last_sample_time else None
+        baselines = {}
+        processes = []
+
+        for proc in psutil.process_iter(attrs=self.ATTRS, ad_value=None):
+            info = proc.info
+            cpu_times = info["cpu_times"]
+            if cpu_times is None:
+                continue
+
+            key = (info["pid"], info["create_time"])
+            cpu_total = cpu_times.user + cpu_times.system
+            baselines[key] = cpu_total
+
+            cpu_percent = 0.0
+            previous = self.cpu_baselines.get(key)
+            if previous is not None and elapsed:
+                cpu_percent = max(0.0, (cpu_total - previous) / elapsed * 100)
+
+            memory_info = info["memory_info"]
+            rss = memory_info.rss if memory_info else 0
+            processes.append((cpu_percent, rss, key, info["name"], info["username"]))
+
+        self.cpu_baselines = baselines
+        self.container_cache = {
+            key: value
+            for key, value in self.container_cache.items()
+            if key in baselines
+        }
+
+        top_cpu = heapq.nlargest(self.top_n, processes, key=lambda p: p[0])
+        top_memory = heapq.nlargest(self.top_n, processes, key=lambda p: p[1])
+
+        self.last_sample_time = now
+        self.last_snapshot = {
+            "timestamp": timezone.now().isoformat(),
+            "process_count": len(processes),
+            "top_cpu": [self._describe(p) for p in top_cpu],
+            "top_memory": [self._describe(p) for p in top_memory],
+        }
+        return self.last_snapshot
+
+    def _describe(self, process: tuple) -> Dict:
+        cpu_percent, rss, key, name, username = process
+        return {
+            "pid": key[0],
+            "name": name,
+            "username": username,
+            "cpu_percent": round(cpu_percent, 2),
+            "memory_rss_mb": round(rss / (1024 * 1024), 2),
+            "container_id": self._container_for(key),
+        }
+
+    def _container_for(self, key: tuple) -> Optional[str]:
+        """Short ID of the container a process runs in, from its cgroup"""
+        if key in self.container_cache:
+            return self.container_cache[key]
+
+        container_id = None
+        try:
+            with open(os.path.join(self.proc_root, str(key[0]), "cgroup")) as f:
+                match = CONTAINER_ID_RE.search(f.read())
+            if match:
+                container_id = match.group(1)[:12]
+        except OSError:
+            pass
+
+        self.container_cache[key] = container_id
+        return container_id
+
+
+# Global instance
+process_collector = ProcessCollector()
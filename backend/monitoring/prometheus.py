@@ -0,0 +1,381 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Sample field -> (metric name, help text, scale to base units)
+HOST_METRICS = {
+    "cpu_percent": ("sauron_host_cpu_percent", "Host CPU usage percentage", 1),
+    "memory_percent": ("sauron_host_memory_percent", "Host memory percentage", 1),
+    "memory_used_mb": ("sauron_host_memory_used_bytes", "Host memory in use", MB),
+    "memory_total_mb": ("sauron_host_memory_total_bytes", "Host memory size", MB),
+    "disk_percent": ("sauron_host_disk_percent", "Root filesystem percentage", 1),
+    "disk_used_gb": ("sauron_host_disk_used_bytes", "Root filesystem used", GB),
+    "disk_total_gb": ("sauron_host_disk_total_bytes", "Root filesystem size", GB),
+    "load_average_1m": ("sauron_host_load1", "1-minute load average", 1),
+    "load_average_5m": ("sauron_host_load5", "5-minute load average", 1),
+    "load_average_15m": ("sauron_host_load15", "15-minute load average", 1),
+}
+CONTAINER_METRICS = {
+    "cpu_percent": ("sauron_container_cpu_percent", "Container CPU percentage", 1),
+    "memory_usage_mb": ("sauron_container_memory_usage_bytes", "Memory in use", MB),
+    "memory_limit_mb": ("sauron_container_memory_limit_bytes", "Memory limit", MB),
+    "network_rx_mb": ("sauron_container_network_receive_bytes", "Bytes received", MB),
+    "network_tx_mb": ("sauron_container_network_transmit_bytes", "Bytes sent", MB),
+    "block_read_mb": ("sauron_container_block_read_bytes", "Block bytes read", MB),
+    "block_write_mb": ("sauron_container_block_write_bytes", "Block bytes written", MB),
+    "error_lines_per_minute": (
+        "sauron_container_log_error_lines_per_minute",
+        "Error lines logged per minute",
+        1,
+    ),
+}
+SERVICE_UP = "sauron_service_up"
+SERVICE_CHECKS = "sauron_service_checks_total"
+SERVICE_CHECK_DURATION = "sauron_service_check_duration_seconds"
+DOCKER_EXECUTOR_QUEUED = "sauron_docker_executor_queued"
+DOCKER_EXECUTOR_RUNNING = "sauron_docker_executor_running"
+DOCKER_EXECUTOR_WAIT = "sauron_docker_executor_wait_seconds"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class MetricFamily:
+    """One named metric and its labelled samples"""
+
+    def __init__(
+        self, name: str, kind: str, help_text: str, buckets=None, summed=False
+    ):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.buckets = tuple(buckets) if buckets else None
+        # A per-process gauge whose total across processes is reported
+        self.summed = summed
+        # label tuple -> float, or bucket counts + [sum] for histograms
+        self.samples: Dict[tuple, object] = {}
+        self.updated: Dict[tuple, float] = {}
+        self.replaced_at = 0.0
+
+
+class MetricsRegistry:
+    """In-memory registry rendered in the Prometheus text exposition format
+
+    Collectors push values in as they sample, so a scrape never touches the
+    database. With ``directory`` set, every process mirrors its state to
+    ``<directory>/<pid>.json`` and a scrape served by any worker merges
+    them: gauges keep the newest value, counters, histograms and gauges
+    declared ``summed`` are added up.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.families: Dict[str, MetricFamily] = {}
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        self._persisted_at = float("-inf")
+
+    def gauge(self, name: str, help_text: str, summed: bool = False) -> str:
+        return self._register(MetricFamily(name, "gauge", help_text, summed=summed))
+
+    def counter(self, name: str, help_text: str) -> str:
+        return self._register(MetricFamily(name, "counter", help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> str:
+        return self._register(MetricFamily(name, "histogram", help_text, buckets))
+
+    def _register(self, family: MetricFamily) -> str:
+        self.families[family.name] = family
+        return family.name
+
+    @contextmanager
+    def batch(self, persist_after: float = 0.0):
+        """Group several updates into one write of the shared state
+
+        With ``persist_after`` the state is only written if the last write is
+        that many seconds old; otherwise it goes out with a later one.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if (
+                    self._batch_depth == 0
+                    and self._dirty
+                    and time.monotonic() - self._persisted_at >= persist_after
+                ):
+                    self._persist()
+
+    def set(self, name: str, value: float, /, **labels):
+        with self.batch():
+            key = tuple(sorted(labels.items()))
+            family = self.families[name]
+            family.samples[key] = float(value)
+            family.updated[key] = time.time()
+            self._dirty = True
+
+    def replace(self, name: str, samples: Dict[tuple, float]):
+        """Replace every sample of a gauge, dropping label sets that are gone"""
+        with self.batch():
+            now = time.time()
+            family = self.families[name]
+            family.samples = {
+                tuple(sorted(key)): float(value) for key, value in samples.items()
+            }
+            family.updated = {key: now for key in family.samples}
+            family.replaced_at = now
+            self._dirty = True
+
+    def inc(self, name: str, amount: float = 1, /, **labels):
+        with self.batch():
+            key = tuple(sorted(labels.items()))
+            family = self.families[name]
+            family.samples[key] = family.samples.get(key, 0.0) + amount
+            self._dirty = True
+
+    def observe(self, name: str, value: float, /, **labels):
+        with self.batch():
+            key = tuple(sorted(labels.items()))
+            family = self.families[name]
+            counts = family.samples.get(key)
+            if counts is None:
+                counts = family.samples[key] = [0.0] * (len(family.buckets) + 2)
+            for index, bound in enumerate(family.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(family.buckets)] += 1
+            counts[-1] += value
+            self._dirty = True
+
+    def _snapshot(self) -> Dict:
+        return {
+            name: {
+                "replaced_at": family.replaced_at,
+                "samples": [
+                    [list(key), value, family.updated.get(key, 0.0)]
+                    for key, value in family.samples.items()
+                ],
+            }
+            for name, family in self.families.items()
+        }
+
+    def _persist(self):
+        self._dirty = False
+        self._persisted_at = time.monotonic()
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{os.getpid()}.json")
+            with open(path + ".tmp", "w") as f:
+                json.dump(self._snapshot(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"Error writing metrics registry state: {e}")
+
+    def _peer_snapshots(self) -> List[Dict]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        own = f"{os.getpid()}.json"
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def _merged(self, family: MetricFamily, peers: List[Dict]) -> Dict[tuple, object]:
+        """Samples of a family combined across processes"""
+        sources = [
+            (
+                family.replaced_at,
+                [(k, v, family.updated.get(k, 0.0)) for k, v in family.samples.items()],
+            )
+        ]
+        for snapshot in peers:
+            state = snapshot.get(family.name)
+            if state:
+                sources.append(
+                    (
+                        state["replaced_at"],
+                        [(tuple(map(tuple, k)), v, t) for k, v, t in state["samples"]],
+                    )
+                )
+
+        merged: Dict[tuple, object] = {}
+        if family.kind == "gauge" and not family.summed:
+            cutoff = max(replaced_at for replaced_at, _ in sources)
+            newest: Dict[tuple, float] = {}
+            for _, samples in sources:
+                for key, value, updated in samples:
+                    if updated >= cutoff and updated >= newest.get(key, -1.0):
+                        newest[key] = updated
+                        merged[key] = value
+        elif family.kind in ("gauge", "counter"):
+            for _, samples in sources:
+                for key, value, _ in samples:
+                    merged[key] = merged.get(key, 0.0) + value
+        else:
+            for _, samples in sources:
+                for key, counts, _ in samples:
+                    total = merged.setdefault(key, [0.0] * len(counts))
+                    for index, count in enumerate(counts):
+                        total[index] += count
+        return merged
+
+    def render(self) -> str:
+        """Render every family in the text exposition format"""
+        with self._lock:
+            peers = self._peer_snapshots()
+            lines = []
+            for family in self.families.values():
+                samples = self._merged(family, peers)
+                lines.append(f"# HELP {family.name} {family.help_text}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for key in sorted(samples):
+                    if family.kind == "histogram":
+                        lines.extend(self._render_histogram(family, key, samples[key]))
+                    else:
+                        lines.append(
+                            f"{family.name}{_format_labels(key)} "
+                            f"{_format_value(samples[key])}"
+                        )
+            return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, family: MetricFamily, key: tuple, counts) -> List[str]:
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(family.buckets + (math.inf,), counts):
+            cumulative += count
+            labels = _format_labels(key + (("le", _format_value(bound)),))
+            lines.append(f"{family.name}_bucket{labels} {_format_value(cumulative)}")
+        lines.append(
+            f"{family.name}_sum{_format_labels(key)} {_format_value(counts[-1])}"
+        )
+        lines.append(
+            f"{family.name}_count{_format_labels(key)} {_format_value(cumulative)}"
+        )
+        return lines
+
+
+def register_default_metrics(registry: MetricsRegistry):
+    """Declare the host, container and service metric families"""
+    for name, help_text, _ in list(HOST_METRICS.values()) + list(
+        CONTAINER_METRICS.values()
+    ):
+        registry.gauge(name, help_text)
+    registry.gauge(SERVICE_UP, "Whether the last health check of a service passed")
+    registry.counter(SERVICE_CHECKS, "Health checks run, by result")
+    registry.histogram(SERVICE_CHECK_DURATION, "Health check duration")
+    # Every worker process has its own executor, so their depths add up
+    registry.gauge(
+        DOCKER_EXECUTOR_QUEUED, "Docker calls waiting for a worker thread", summed=True
+    )
+    registry.gauge(
+        DOCKER_EXECUTOR_RUNNING, "Docker calls running on worker threads", summed=True
+    )
+    registry.histogram(DOCKER_EXECUTOR_WAIT, "Time Docker calls waited for a worker")
+
+
+def record_server_metrics(metrics: Dict):
+    """Publish a host sample"""
+    with metrics_registry.batch():
+        for field, (name, _, scale) in HOST_METRICS.items():
+            if metrics.get(field) is not None:
+                metrics_registry.set(name, metrics[field] * scale)
+
+
+def record_docker_metrics(metrics_list: List[Dict]):
+    """Publish one sample per running container, dropping containers that are gone"""
+    with metrics_registry.batch():
+        for field, (name, _, scale) in CONTAINER_METRICS.items():
+            samples = {}
+            for metrics in metrics_list:
+                if metrics.get(field) is None:
+                    continue
+                labels = (
+                    ("container_id", metrics["container_id"]),
+                    ("container_name", metrics["container_name"]),
+                )
+                samples[labels] = metrics[field] * scale
+            metrics_registry.replace(name, samples)
+
+
+def record_health_check(service, success: bool, duration: float):
+    """Publish the outcome of a service health check"""
+    labels = {
+        "service_id": service.id,
+        "service_name": service.name,
+        "service_type": service.service_type,
+    }
+    with metrics_registry.batch():
+        metrics_registry.set(SERVICE_UP, 1 if success else 0, **labels)
+        metrics_registry.inc(
+            SERVICE_CHECKS, result="success" if success else "failure", **labels
+        )
+        metrics_registry.observe(SERVICE_CHECK_DURATION, duration, **labels)
+
+
+def record_docker_executor(
+    queued: int,
+    running: int,
+    wait: Optional[float] = None,
+    persist_after: float = 0.0,
+):
+    """Publish the Docker executor's queue depth, and a call's wait if given"""
+    with metrics_registry.batch(persist_after):
+        metrics_registry.set(DOCKER_EXECUTOR_QUEUED, queued)
+        metrics_registry.set(DOCKER_EXECUTOR_RUNNING, running)
+        if wait is not None:
+            metrics_registry.observe(DOCKER_EXECUTOR_WAIT, wait)
+
+
+# Global instance
+metrics_registry = MetricsRegistry(
+    getattr(settings, "METRICS_REGISTRY_DIR", "") or None
+)
+register_default_metrics(metrics_registry)
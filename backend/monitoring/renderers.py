@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """JSON renderer for column-oriented metric history (``?format=columnar``)
+
+    Views check ``request.accepted_renderer.format`` and return a mapping of
+    field name to list of values instead of one object per sample.
+    """
+
+    format = "columnar"
@@ -0,0 +1,280 @@
+import logging
+import math
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Sequence
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .compression import CHUNK_FIELDS
+from .compression import decode_chunk
+from .models import DockerMetrics
+from .models import DockerMetricsChunk
+
+logger = logging.getLogger(__name__)
+
+RIGHTSIZING_CACHE_KEY = "monitoring:rightsizing"
+ROLLUPS_CACHE_KEY = "monitoring:rightsizing:rollups"
+PERCENTILES = (50, 95, 99)
+MEMORY_STEP_MB = 64
+CPU_STEP = 0.05
+# Docker rejects CPU shares below 2
+MIN_CPU_SHARES = 2
+
+
+def group_percentiles(
+    series: np.ndarray, values: np.ndarray, percentiles: Sequence[float]
+) -> np.ndarray:
+    """Percentiles of ``values`` per series, one row per percentile
+
+    Points are sorted once by (series, value) and every percentile is read
+    from each series' slice by linear interpolation, matching
+    ``np.percentile``. Series without points get NaN.
+    """
+    size = int(series.max()) + 1 if len(series) else 0
+    order = np.lexsort((values, series))
+    ordered = values[order]
+    counts = np.bincount(series, minlength=size)
+    starts = np.cumsum(counts) - counts
+    last = np.maximum(counts - 1, 0)
+
+    result = np.full((len(percentiles), size), np.nan)
+    has_points = counts > 0
+    for row, percentile in enumerate(percentiles):
+        position = last * (percentile / 100)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        fraction = position - lower
+        low = ordered[np.minimum(starts + lower, len(ordered) - 1)]
+        high = ordered[np.minimum(starts + upper, len(ordered) - 1)]
+        result[row, has_points] = (low + (high - low) * fraction)[has_points]
+    return result
+
+
+class RightsizingAnalyzer:
+    """Recommends container memory limits and CPU shares from observed usage
+
+    Usage over the last ``RIGHTSIZING_WINDOW_HOURS`` is rolled up per
+    container and hour, including hours already moved into compressed
+    chunks. Rollups of settled hours are cached and only newer hours are read
+    on each refresh, so recomputing is cheap; the recommendations themselves
+    are cached for ``RIGHTSIZING_CACHE_TTL`` seconds.
+
+    Percentiles are taken over hourly averages, ``max`` is the highest single
+    sample. Memory limits are sized from the peak and CPU from the p95, each
+    with headroom.
+    """
+
+    def __init__(self):
+        self.window_hours = getattr(settings, "RIGHTSIZING_WINDOW_HOURS", 168)
+        self.min_hours = getattr(settings, "RIGHTSIZING_MIN_HOURS", 24)
+        self.memory_headroom = getattr(settings, "RIGHTSIZING_MEMORY_HEADROOM", 0.2)
+        self.cpu_headroom = getattr(settings, "RIGHTSIZING_CPU_HEADROOM", 0.25)
+        self.over_ratio = getattr(settings, "RIGHTSIZING_OVER_RATIO", 0.5)
+        self.under_ratio = getattr(settings, "RIGHTSIZING_UNDER_RATIO", 0.9)
+        self.ttl = getattr(settings, "RIGHTSIZING_CACHE_TTL", 3600)
+
+    def get_recommendations(self) -> Dict:
+        """Return the cached recommendations, refreshing them if there are none"""
+        recommendations = cache.get(RIGHTSIZING_CACHE_KEY)
+        if recommendations is None:
+            recommendations = self.refresh()
+        return recommendations
+
+    def refresh(self) -> Dict:
+        """Roll up hours not seen yet and recompute every recommendation"""
+        now = timezone.now()
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        # The previous hour stays open for samples that agents deliver late
+        settled = current_hour - timedelta(hours=1)
+        window_start = current_hour - timedelta(hours=self.window_hours)
+
+        state = cache.get(ROLLUPS_CACHE_KEY)
+        if state is None or state["start"] > window_start:
+            state = {"start": window_start, "settled": window_start, "rollups": []}
+        rollups = [r for r in state["rollups"] if r["hour"] >= window_start]
+        if state["settled"] < settled:
+            rollups += self._rollups(state["settled"], settled)
+        cache.set(
+            ROLLUPS_CACHE_KEY,
+            {
+                "start": window_start,
+                "settled": max(state["settled"], settled),
+                "rollups": rollups,
+            },
+            self.window_hours * 3600,
+        )
+
+        containers = self.build_recommendations(
+            rollups + self._rollups(max(state["settled"], settled), None)
+        )
+        recommendations = {"generated_at": now.isoformat(), "containers": containers}
+        cache.set(RIGHTSIZING_CACHE_KEY, recommendations, self.ttl)
+        return recommendations
+
+    def _rollups(self, start, end) -> List[Dict]:
+        """Per-container hourly rollups of samples in [start, end)"""
+        merged: Dict[tuple, Dict] = {}
+        for rollup in self._raw_rollups(start, end) + self._chunk_rollups(start, end):
+            key = (rollup["host"], rollup["container_id"], rollup["hour"])
+            current = merged.get(key)
+            if current is None:
+                merged[key] = rollup
+                continue
+            samples = current["samples"] + rollup["samples"]
+            for field in ("cpu", "memory"):
+                current[f"{field}_avg"] = (
+                    current[f"{field}_avg"] * current["samples"]
+                    + rollup[f"{field}_avg"] * rollup["samples"]
+                ) / samples
+                current[f"{field}_max"] = max(
+                    current[f"{field}_max"], rollup[f"{field}_max"]
+                )
+            current["limit"] = max(current["limit"], rollup["limit"])
+            current["samples"] = samples
+        return list(merged.values())
+
+    def _raw_rollups(self, start, end) -> List[Dict]:
+        queryset = DockerMetrics.objects.filter(timestamp__gte=start)
+        if end is not None:
+            queryset = queryset.filter(timestamp__lt=end)
+        rows = (
+            queryset.annotate(hour=TruncHour("timestamp"))
+            .values("host", "container_id", "hour")
+            .annotate(
+                name=Max("container_name"),
+                samples=Count("id"),
+                cpu_avg=Avg("cpu_percent"),
+                cpu_max=Max("cpu_percent"),
+                memory_avg=Avg("memory_usage_mb"),
+                memory_max=Max("memory_usage_mb"),
+                limit=Max("memory_limit_mb"),
+            )
+        )
+        return list(rows)
+
+    def _chunk_rollups(self, start, end) -> List[Dict]:
+        chunks = DockerMetricsChunk.objects.filter(start__gte=start)
+        if end is not None:
+            chunks = chunks.filter(start__lt=end)
+
+        cpu = CHUNK_FIELDS.index("cpu_percent")
+        memory = CHUNK_FIELDS.index("memory_usage_mb")
+        limit = CHUNK_FIELDS.index("memory_limit_mb")
+        rollups = []
+        for chunk in chunks.iterator():
+            _, columns = decode_chunk(bytes(chunk.data))
+            cpu_values = np.array(columns[cpu])
+            memory_values = np.array(columns[memory])
+            rollups.append(
+                {
+                    "host": chunk.host,
+                    "container_id": chunk.container_id,
+                    "hour": chunk.start.replace(minute=0, second=0, microsecond=0),
+                    "name": chunk.container_name,
+                    "samples": len(cpu_values),
+                    "cpu_avg": float(cpu_values.mean()),
+                    "cpu_max": float(cpu_values.max()),
+                    "memory_avg": float(memory_values.mean()),
+                    "memory_max": float(memory_values.max()),
+                    "limit": float(max(columns[limit])),
+                }
+            )
+        return rollups
+
+    def build_recommendations(self, rollups: List[Dict]) -> List[Dict]:
+        index: Dict[tuple, int] = {}
+        latest: Dict[tuple, Dict] = {}
+        for rollup in rollups:
+            key = (rollup["host"], rollup["container_id"])
+            index.setdefault(key, len(index))
+            current = latest.get(key)
+            if current is None or rollup["hour"] > current["hour"]:
+                latest[key] = rollup
+        if not index:
+            return []
+
+        def column(field):
+            return np.array([r[field] for r in rollups], dtype=np.float64)
+
+        series = np.array(
+            [index[(r["host"], r["container_id"])] for r in rollups], dtype=np.int64
+        )
+        size = len(index)
+        hours = np.bincount(series, minlength=size)
+        samples = np.bincount(series, column("samples"), size)
+        cpu = group_percentiles(series, column("cpu_avg"), PERCENTILES)
+        memory = group_percentiles(series, column("memory_avg"), PERCENTILES)
+        cpu_max = np.full(size, -np.inf)
+        np.maximum.at(cpu_max, series, column("cpu_max"))
+        memory_max = np.full(size, -np.inf)
+        np.maximum.at(memory_max, series, column("memory_max"))
+
+        containers = []
+        for (host, container_id), position in index.items():
+            limit = latest[(host, container_id)]["limit"]
+            recommended_memory = max(
+                math.ceil(
+                    memory_max[position] * (1 + self.memory_headroom) / MEMORY_STEP_MB
+                )
+                * MEMORY_STEP_MB,
+                MEMORY_STEP_MB,
+            )
+            recommended_cpus = max(
+                math.ceil(cpu[1, position] * (1 + self.cpu_headroom) / 100 / CPU_STEP)
+                * CPU_STEP,
+                CPU_STEP,
+            )
+            containers.append(
+                {
+                    "host": host,
+                    "container_id": container_id,
+                    "container_name": latest[(host, container_id)]["name"],
+                    "hours": int(hours[position]),
+                    "samples": int(samples[position]),
+                    "status": self._status(
+                        hours[position], memory_max[position], limit, recommended_memory
+                    ),
+                    "memory": {
+                        "limit_mb": round(limit, 2),
+                        "p50": round(float(memory[0, position]), 2),
+                        "p95": round(float(memory[1, position]), 2),
+                        "p99": round(float(memory[2, position]), 2),
+                        "max": round(float(memory_max[position]), 2),
+                        "recommended_limit_mb": recommended_memory,
+                    },
+                    "cpu": {
+                        "p50": round(float(cpu[0, position]), 2),
+                        "p95": round(float(cpu[1, position]), 2),
+                        "p99": round(float(cpu[2, position]), 2),
+                        "max": round(float(cpu_max[position]), 2),
+                        "recommended_cpus": round(recommended_cpus, 2),
+                        "recommended_shares": max(
+                            round(1024 * recommended_cpus), MIN_CPU_SHARES
+                        ),
+                    },
+                }
+            )
+        containers.sort(key=lambda c: (c["host"], c["container_name"]))
+        return containers
+
+    def _status(self, hours, peak, limit, recommended) -> str:
+        if hours < self.min_hours:
+            return "insufficient_data"
+        if limit and peak >= limit * self.under_ratio:
+            return "under_provisioned"
+        if limit and recommended <= limit * self.over_ratio:
+            return "over_provisioned"
+        return "ok"
+
+
+# Global instance
+rightsizing_analyzer = RightsizingAnalyzer()
@@ -1,5 +1,11 @@
+from typing import Dict
+from typing import List
+from typing import Sequence
+
 from rest_framework import serializers
 
+from .models import CustomMetric
+from .models import DeviceMetrics
 from .models import DockerMetrics
 from .models import ServerMetrics
 
@@ -11,6 +17,7 @@ class ServerMetricsSerializer(serializers.ModelSerializer):
         model = ServerMetrics
         fields = [
             "id",
+            "host",
             "timestamp",
             "cpu_percent",
             "memory_percent",
@@ -35,6 +42,7 @@ class DockerMetricsSerializer(serializers.ModelSerializer):
         model = DockerMetrics
         fields = [
             "id",
+            "host",
             "container_id",
             "container_name",
             "timestamp",
@@ -45,10 +53,82 @@ class DockerMetricsSerializer(serializers.ModelSerializer):
             "network_tx_mb",
             "block_read_mb",
             "block_write_mb",
+            "error_lines_per_minute",
+        ]
+        read_only_fields = ["id", "timestamp"]
+
+
+class DeviceMetricsSerializer(serializers.ModelSerializer):
+    """Serializer for per-device metrics"""
+
+    class Meta:
+        model = DeviceMetrics
+        fields = [
+            "id",
+            "timestamp",
+            "device_type",
+            "device",
+            "percent",
+            "read_rate",
+            "write_rate",
+            "read_ops_rate",
+            "write_ops_rate",
+            "used_gb",
+            "total_gb",
         ]
         read_only_fields = ["id", "timestamp"]
 
 
+class CustomMetricSerializer(serializers.ModelSerializer):
+    """Serializer for aggregated application metrics"""
+
+    class Meta:
+        model = CustomMetric
+        fields = [
+            "id",
+            "host",
+            "timestamp",
+            "name",
+            "metric_type",
+            "tags",
+            "interval",
+            "value",
+            "count",
+            "min",
+            "max",
+            "p50",
+            "p90",
+            "p95",
+            "p99",
+        ]
+        read_only_fields = fields
+
+
+SERVER_METRICS_COLUMNS = [
+    field for field in ServerMetricsSerializer.Meta.fields if field != "id"
+]
+DOCKER_METRICS_COLUMNS = [
+    field for field in DockerMetricsSerializer.Meta.fields if field != "id"
+]
+
+DEVICE_METRICS_COLUMNS = [
+    field for field in DeviceMetricsSerializer.Meta.fields if field != "id"
+]
+CUSTOM_METRICS_COLUMNS = [
+    field for field in CustomMetricSerializer.Meta.fields if field != "id"
+]
+
+
+def serialize_columnar(queryset, fields: Sequence[str]) -> Dict[str, List]:
+    """Serialize a metrics queryset as one list per field
+
+    Rows are read with ``values_list`` so no model instances or serializers
+    are created.
+    """
+    columns = list(zip(*queryset.values_list(*fields))) or [()] * len(fields)
+    return {field: list(values) for field, values in zip(fields, columns)}
+
+
 class MetricsSummarySerializer(serializers.Serializer):
     """Serializer for metrics summary"""
 
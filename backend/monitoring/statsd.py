@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import socket
+import threading
+import time
+from array import array
+from datetime import timedelta
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import LOCAL_HOST
+from .models import CustomMetric
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _parse_tags(raw: bytes) -> Dict[str, str]:
+    tags = {}
+    for tag in raw.decode("utf-8", "replace").split(","):
+        key, _, value = tag.partition(":")
+        if key:
+            tags[key] = value
+    return tags
+
+
+def get_recent_custom_metrics(
+    name: str = None, metric_type: str = None, host: str = None, hours: int = 1
+):
+    """Get recent StatsD aggregates"""
+    since = timezone.now() - timedelta(hours=hours)
+    queryset = CustomMetric.objects.filter(timestamp__gte=since)
+
+    if name:
+        queryset = queryset.filter(name=name)
+    if metric_type:
+        queryset = queryset.filter(metric_type=metric_type)
+    if host:
+        queryset = queryset.filter(host=host)
+
+    return queryset
+
+
+class StatsdAggregator:
+    """Aggregates StatsD lines in memory until the next flush
+
+    Supports counters (``c``), gauges (``g``, including ``+``/``-`` deltas),
+    timers (``ms`` and ``h``) and sets (``s``), with ``@rate`` sample rates
+    and DogStatsD ``#tag:value`` tags. Parsing works on bytes and keeps
+    metric keys undecoded until flush. Timer samples go into compact
+    ``array("d")`` buffers that NumPy reads without copying for percentiles.
+    A gauge not updated for ``STATSD_GAUGE_EXPIRE_INTERVALS`` flushes is
+    dropped, so departed clients stop reporting; 0 keeps gauges forever.
+    """
+
+    def __init__(self, gauge_expire_intervals: Optional[int] = None):
+        self.counters: Dict[bytes, float] = {}
+        self.counter_samples: Dict[bytes, int] = {}
+        self.timers: Dict[bytes, array] = {}
+        self.timer_weights: Dict[bytes, float] = {}
+        self.sets: Dict[bytes, set] = {}
+        # Gauges keep their value between flushes, as in StatsD
+        self.gauges: Dict[bytes, float] = {}
+        self.gauge_samples: Dict[bytes, int] = {}
+        # Flushes in a row each gauge went without an update
+        self.gauge_idle: Dict[bytes, int] = {}
+        if gauge_expire_intervals is None:
+            gauge_expire_intervals = getattr(
+                settings, "STATSD_GAUGE_EXPIRE_INTERVALS", 60
+            )
+        self.gauge_expire_intervals = gauge_expire_intervals
+        self.packets = 0
+        self.bad_lines = 0
+        self._lock = threading.Lock()
+
+    def ingest(self, packet: bytes):
+        """Aggregate every line of one datagram"""
+        with self._lock:
+            self.packets += 1
+            for line in packet.split(b"\n"):
+                if line:
+                    self._ingest_line(line)
+
+    def _ingest_line(self, line: bytes):
+        name, _, rest = line.partition(b":")
+        raw_value, _, rest = rest.partition(b"|")
+        kind, _, rest = rest.partition(b"|")
+        if not name or not raw_value or not kind:
+            self.bad_lines += 1
+            return
+
+        key = name
+        rate = 1.0
+        while rest:
+            field, _, rest = rest.partition(b"|")
+            if field[:1] == b"@":
+                try:
+                    rate = float(field[1:]) or 1.0
+                except ValueError:
+                    self.bad_lines += 1
+                    return
+            elif field[:1] == b"#":
+                key = name + b"|" + field
+        try:
+            if kind == b"c":
+                self.counters[key] = (
+                    self.counters.get(key, 0.0) + float(raw_value) / rate
+                )
+                self.counter_samples[key] = self.counter_samples.get(key, 0) + 1
+            elif kind == b"ms" or kind == b"h":
+                samples = self.timers.get(key)
+                if samples is None:
+                    samples = self.timers[key] = array("d")
+                samples.append(float(raw_value))
+                self.timer_weights[key] = self.timer_weights.get(key, 0.0) + 1 / rate
+            elif kind == b"g":
+                if raw_value[:1] in (b"+", b"-"):
+                    value = self.gauges.get(key, 0.0) + float(raw_value)
+                else:
+                    value = float(raw_value)
+                self.gauges[key] = value
+                self.gauge_samples[key] = self.gauge_samples.get(key, 0) + 1
+            elif kind == b"s":
+                self.sets.setdefault(key, set()).add(raw_value)
+            else:
+                self.bad_lines += 1
+        except ValueError:
+            self.bad_lines += 1
+
+    def flush(self, interval: float, host: str = LOCAL_HOST) -> List[CustomMetric]:
+        """Turn the current interval into rows and start a new one"""
+        with self._lock:
+            counters, self.counters = self.counters, {}
+            counter_samples, self.counter_samples = self.counter_samples, {}
+            timers, self.timers = self.timers, {}
+            timer_weights, self.timer_weights = self.timer_weights, {}
+            sets, self.sets = self.sets, {}
+            gauge_samples, self.gauge_samples = self.gauge_samples, {}
+            self._expire_gauges(gauge_samples)
+            gauges = dict(self.gauges)
+
+        now = timezone.now()
+        rows = []
+
+        def row(key: bytes, metric_type: str, value: float, **fields):
+            name, _, tags = key.partition(b"|#")
+            rows.append(
+                CustomMetric(
+                    host=host,
+                    name=name.decode("utf-8", "replace")[:255],
+                    metric_type=metric_type,
+                    tags=_parse_tags(tags) if tags else {},
+                    timestamp=now,
+                    interval=interval,
+                    value=value,
+                    **fields,
+                )
+            )
+
+        for key, total in counters.items():
+            row(key, "counter", total, count=counter_samples[key])
+        for key, value in gauges.items():
+            row(key, "gauge", value, count=gauge_samples.get(key, 0))
+        for key, members in sets.items():
+            row(key, "set", float(len(members)), count=len(members))
+        for key, samples in timers.items():
+            values = np.frombuffer(samples, dtype=np.float64)
+            p50, p90, p95, p99 = np.percentile(values, PERCENTILES)
+            row(
+                key,
+                "timer",
+                float(values.mean()),
+                count=round(timer_weights[key]),
+                min=float(values.min()),
+                max=float(values.max()),
+                p50=float(p50),
+                p90=float(p90),
+                p95=float(p95),
+                p99=float(p99),
+            )
+        return rows
+
+    def _expire_gauges(self, gauge_samples: Dict[bytes, int]):
+        for key in list(self.gauges):
+            if key in gauge_samples:
+                self.gauge_idle[key] = 0
+                continue
+            idle = self.gauge_idle.get(key, 0) + 1
+            if self.gauge_expire_intervals and idle >= self.gauge_expire_intervals:
+                del self.gauges[key]
+                self.gauge_idle.pop(key, None)
+            else:
+                self.gauge_idle[key] = idle
+
+
+class StatsdServer:
+    """UDP StatsD listener that writes one bulk insert per flush interval
+
+    The socket is read directly from the event loop, draining up to
+    ``MAX_READS_PER_WAKEUP`` datagrams per readiness callback instead of one
+    as asyncio's datagram transport does.
+    """
+
+    MAX_READS_PER_WAKEUP = 1024
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8125,
+        flush_interval: Optional[float] = None,
+        aggregator: Optional[StatsdAggregator] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.flush_interval = flush_interval or getattr(
+            settings, "STATSD_FLUSH_INTERVAL", 10
+        )
+        self.aggregator = aggregator or StatsdAggregator()
+        self.sock: Optional[socket.socket] = None
+        self.ready = threading.Event()
+        self._stopped: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # A large receive buffer absorbs bursts while a flush is running
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+        self.sock.setblocking(False)
+        self.sock.bind((self.host, self.port))
+        self.port = self.sock.getsockname()[1]
+        self._loop.add_reader(self.sock.fileno(), self._drain)
+        self.ready.set()
+        logger.info(f"StatsD listener on {self.host}:{self.port}")
+
+        last_flush = time.monotonic()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    await asyncio.wait_for(
+                        self._stopped.wait(), timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                await self.flush(now - last_flush)
+                last_flush = now
+        finally:
+            self._loop.remove_reader(self.sock.fileno())
+            self.sock.close()
+
+    def _drain(self):
+        recv = self.sock.recv
+        ingest = self.aggregator.ingest
+        for _ in range(self.MAX_READS_PER_WAKEUP):
+            try:
+                ingest(recv(65535))
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.warning(f"StatsD socket error: {e}")
+                return
+
+    async def flush(self, interval: float) -> int:
+        """Write the aggregates of the last interval without blocking the socket"""
+        rows = self.aggregator.flush(interval)
+        if not rows:
+            return 0
+        try:
+            await self._loop.run_in_executor(None, self._write, rows)
+        except Exception as e:
+            logger.error(f"Error writing StatsD aggregates: {e}")
+            return 0
+        return len(rows)
+
+    def _write(self, rows: List[CustomMetric]):
+        from django.db import close_old_connections
+
+        close_old_connections()
+        CustomMetric.objects.bulk_create(rows, batch_size=1000)
+
+    def stop(self):
+        """Stop serving after a final flush; safe to call from another thread"""
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
@@ -0,0 +1,125 @@
+import logging
+from datetime import timedelta
+from typing import Dict
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.utils import timezone
+from services.container_inventory import container_inventory
+
+from .metrics_collector import metrics_collector
+from .models import LOCAL_HOST
+from .models import DockerMetrics
+from .models import ServerMetrics
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_KEY = "monitoring:metrics_summary"
+
+
+class MetricsSummaryEngine:
+    """Builds the dashboard metrics summary and caches it for a short TTL"""
+
+    def __init__(self, ttl: Optional[int] = None, window_hours: int = 1):
+        self.ttl = (
+            ttl
+            if ttl is not None
+            else getattr(settings, "METRICS_SUMMARY_CACHE_TTL", 5)
+        )
+        self.window_hours = window_hours
+
+    def get_summary(self) -> Dict:
+        """Return the cached summary, rebuilding it when the TTL has expired"""
+        summary = cache.get(SUMMARY_CACHE_KEY)
+        if summary is None:
+            summary = self.build_summary()
+            cache.set(SUMMARY_CACHE_KEY, summary, self.ttl)
+        return summary
+
+    def invalidate(self):
+        """Drop the cached summary"""
+        cache.delete(SUMMARY_CACHE_KEY)
+
+    def build_summary(self) -> Dict:
+        """Compute the summary from the latest samples"""
+        server_metrics = self._latest_server_metrics()
+        containers = container_inventory.list_containers()
+        totals = self._latest_container_totals()
+
+        running_containers = len(
+            [
+                c
+                for c in containers
+                if c.get("status") == "running" or c.get("status", "").startswith("up")
+            ]
+        )
+        healthy_containers = len(
+            [c for c in containers if "healthy" in c.get("status", "").lower()]
+        )
+        containers_with_ports = len([c for c in containers if c.get("ports")])
+
+        return {
+            "current_cpu": server_metrics.get("cpu_percent", 0),
+            "current_memory": server_metrics.get("memory_percent", 0),
+            "current_disk": server_metrics.get("disk_percent", 0),
+            "current_load": server_metrics.get("load_average_1m", 0),
+            "total_containers": len(containers),
+            "running_containers": running_containers,
+            "healthy_containers": healthy_containers,
+            "containers_with_ports": containers_with_ports,
+            "total_memory_usage": round(totals["memory"] or 0, 2),
+            "total_cpu_usage": round(totals["cpu"] or 0, 2),
+        }
+
+    def _latest_server_metrics(self) -> Dict:
+        """Latest stored host sample, or a non-blocking live sample if stale"""
+        since = timezone.now() - timedelta(
+            seconds=getattr(settings, "METRICS_SUMMARY_MAX_SAMPLE_AGE", 300)
+        )
+        latest = (
+            ServerMetrics.objects.filter(host=LOCAL_HOST, timestamp__gte=since)
+            .order_by("-timestamp")
+            .values("cpu_percent", "memory_percent", "disk_percent", "load_average_1m")
+            .first()
+        )
+        if latest:
+            return latest
+        return metrics_collector.collect_server_metrics(cpu_interval=None)
+
+    def _latest_container_totals(self) -> Dict:
+        """Sum memory and CPU over the latest sample of each container"""
+        since = timezone.now() - timedelta(hours=self.window_hours)
+        recent = DockerMetrics.objects.filter(host=LOCAL_HOST, timestamp__gte=since)
+
+        if connection.features.can_distinct_on_fields:
+            latest_ids = (
+                recent.order_by("container_id", "-timestamp")
+                .distinct("container_id")
+                .values("id")
+            )
+            latest = DockerMetrics.objects.filter(id__in=Subquery(latest_ids))
+        else:
+            newest = (
+                DockerMetrics.objects.filter(
+                    host=LOCAL_HOST, container_id=OuterRef("container_id")
+                )
+                .order_by("-timestamp", "-id")
+                .values("id")[:1]
+            )
+            latest = recent.filter(id=Subquery(newest))
+
+        return latest.order_by().aggregate(
+            memory=Sum("memory_usage_mb"),
+            cpu=Sum("cpu_percent"),
+            containers=Count("id"),
+        )
+
+
+# Global instance
+metrics_summary = MetricsSummaryEngine()
@@ -167,7 +167,7 @@ class HealthCheckerTest(TestCase):
         self.assertIn("Unknown service type", result["error"])
 
     @patch("monitoring.health_checker.event_broadcaster")
-    @patch("monitoring.health_checker.requests.request")
+    @patch("monitoring.checks.requests.request")
     def test_http_health_check_success(self, mock_request, mock_broadcaster):
         """Test successful HTTP health check"""
         from monitoring.health_checker import health_checker
@@ -184,7 +184,7 @@ class HealthCheckerTest(TestCase):
         self.assertIn("response_time", result)
 
     @patch("monitoring.health_checker.event_broadcaster")
-    @patch("monitoring.health_checker.requests.request")
+    @patch("monitoring.checks.requests.request")
     def test_http_health_check_failure(self, mock_request, mock_broadcaster):
         """Test failed HTTP health check"""
         from monitoring.health_checker import health_checker
@@ -467,16 +467,29 @@ class EventMonitorTest(TestCase):
 
         self.assertIsNotNone(event_monitor)
 
-    @patch("monitoring.event_monitor.docker_service")
-    def test_event_monitor_with_mock(self, mock_docker_service):
-        """Test event monitor with mocked Docker service"""
+    @patch("monitoring.event_monitor.async_docker")
+    def test_event_monitor_with_mock(self, mock_async_docker):
+        """Test event monitor with mocked Docker client"""
+        from monitoring.event_monitor import DockerEventMonitor
         from monitoring.event_monitor import event_monitor
 
-        mock_docker_service.is_available.return_value = True
+        async def events(**kwargs):
+            return
+            yield
+
+        mock_async_docker.is_available.return_value = True
+        mock_async_docker.events = events
 
         # Test that the monitor can be initialized without errors
         self.assertIsNotNone(event_monitor)
 
+        monitor = DockerEventMonitor()
+        monitor.start_monitoring()
+        self.assertTrue(monitor.monitoring)
+        self.assertIs(monitor.client, mock_async_docker)
+        monitor.stop_monitoring()
+        self.assertFalse(monitor.monitoring)
+
 
 class MonitoringIntegrationTest(TestCase):
     """Integration tests for monitoring functionality"""
@@ -507,7 +520,7 @@ class MonitoringIntegrationTest(TestCase):
         )
 
         # Run health check
-        with patch("monitoring.health_checker.requests.request") as mock_request:
+        with patch("monitoring.checks.requests.request") as mock_request:
             mock_response = Mock()
             mock_response.status_code = 200
             mock_response.elapsed.total_seconds.return_value = 0.5
@@ -0,0 +1,190 @@
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase
+from django.test import SimpleTestCase
+from monitoring.agent import Agent
+from monitoring.hub_client import BatchSender
+from monitoring.hub_client import HubClient
+from monitoring.hub_client import Spool
+from monitoring.models import DockerMetrics
+from monitoring.models import ServerMetrics
+from rest_framework.authtoken.models import Token
+
+SERVER_SAMPLE = {
+    "cpu_percent": 25.5,
+    "memory_percent": 60.2,
+    "memory_used_mb": 1024,
+    "memory_total_mb": 2048,
+    "disk_percent": 45.8,
+    "disk_used_gb": 50,
+    "disk_total_gb": 100,
+    "network_rx_mb": 10.5,
+    "network_tx_mb": 8.2,
+    "load_average_1m": 1.2,
+    "load_average_5m": 1.1,
+    "load_average_15m": 1.0,
+}
+
+DOCKER_SAMPLE = {
+    "container_id": "abc123def456",
+    "container_name": "web",
+    "cpu_percent": 5.0,
+    "memory_usage_mb": 64,
+    "memory_limit_mb": 512,
+    "network_rx_mb": 1,
+    "network_tx_mb": 2,
+    "block_read_mb": 3,
+    "block_write_mb": 4,
+}
+
+
+class StubCollector:
+    def collect_server_metrics(self, cpu_interval=1):
+        return dict(SERVER_SAMPLE)
+
+    def collect_docker_metrics(self):
+        return [dict(DOCKER_SAMPLE)]
+
+
+class StubDockerService:
+    def is_available(self):
+        return True
+
+
+class AgentEndToEndTestCase(LiveServerTestCase):
+    """The agent pushing to a live hub"""
+
+    def setUp(self):
+        user = User.objects.create_user(username="agent", password="pass")
+        self.token = Token.objects.create(user=user).key
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+    def make_agent(self, hub_url, **kwargs):
+        sender = BatchSender(HubClient(hub_url, self.token, timeout=5), self.spool)
+        agent = Agent(
+            sender, "edge-01", interval=0, collector=StubCollector(), **kwargs
+        )
+        agent._docker_service = StubDockerService()
+        return agent
+
+    @property
+    def spool(self):
+        return Spool(self.spool_dir)
+
+    def test_push_batches(self):
+        agent = self.make_agent(self.live_server_url, push_every=2)
+
+        agent.run(iterations=4)
+
+        self.assertEqual(ServerMetrics.objects.filter(host="edge-01").count(), 4)
+        self.assertEqual(DockerMetrics.objects.filter(host="edge-01").count(), 4)
+        self.assertEqual(self.spool.pending(), [])
+
+    def test_spools_while_hub_unreachable(self):
+        """Batches survive an outage on disk and are delivered oldest first"""
+        offline = self.make_agent("http://127.0.0.1:9")
+
+        offline.run(iterations=3)
+
+        self.assertEqual(len(self.spool.pending()), 3)
+        self.assertEqual(ServerMetrics.objects.count(), 0)
+
+        online = self.make_agent(self.live_server_url)
+        online.run(iterations=1)
+
+        self.assertEqual(self.spool.pending(), [])
+        timestamps = list(
+            ServerMetrics.objects.filter(host="edge-01")
+            .order_by("id")
+            .values_list("timestamp", flat=True)
+        )
+        self.assertEqual(len(timestamps), 4)
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_rejected_batch_dropped(self):
+        agent = self.make_agent(self.live_server_url)
+        agent.host = "local"
+
+        agent.run(iterations=1)
+
+        self.assertEqual(self.spool.pending(), [])
+        self.assertEqual(ServerMetrics.objects.count(), 0)
+
+    def test_unauthorized_batch_kept(self):
+        """A bad or rotated token keeps batches spooled until it is fixed"""
+        agent = self.make_agent(self.live_server_url)
+        agent.sender.client.session.headers["Authorization"] = "Token wrong"
+
+        agent.run(iterations=2)
+
+        self.assertEqual(len(self.spool.pending()), 2)
+        self.assertEqual(ServerMetrics.objects.count(), 0)
+
+
+class BatchSenderTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spool = Spool(directory)
+        self.client = HubClient("http://hub.invalid", "token")
+        self.sender = BatchSender(self.client, self.spool)
+
+    def respond(self, status_code):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = b"{}"
+        return patch.object(self.client.session, "post", return_value=response)
+
+    def test_rate_limited_batch_kept(self):
+        with self.respond(429):
+            delivered = self.sender.send({"host": "edge-01"})
+
+        self.assertFalse(delivered)
+        self.assertEqual(len(self.spool.pending()), 1)
+
+    def test_invalid_batch_dropped(self):
+        for status_code in (400, 422):
+            with self.respond(status_code):
+                self.assertTrue(self.sender.send({"host": "edge-01"}))
+
+        self.assertEqual(self.spool.pending(), [])
+
+
+class SpoolTestCase(SimpleTestCase):
+    def test_drops_oldest_over_limit(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        spool = Spool(directory, max_bytes=25)
+
+        for body in (b"a" * 10, b"b" * 10, b"c" * 10):
+            spool.put(body)
+
+        self.assertEqual(
+            [spool.read(path) for path in spool.pending()], [b"b" * 10, b"c" * 10]
+        )
+
+
+class AgentImportTestCase(SimpleTestCase):
+    def test_runs_without_django(self):
+        """Sampling modules load without Django, the ORM or NumPy"""
+        code = (
+            "import sys, monitoring.agent, monitoring.probe;"
+            "loaded = [m for m in ('django', 'numpy', 'rest_framework')"
+            " if m in sys.modules];"
+            "assert not loaded, loaded"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,129 @@
+from unittest.mock import patch
+
+import numpy as np
+from django.test import TestCase
+from events.models import Event
+from monitoring.anomaly import AnomalyDetector
+from monitoring.anomaly import SeriesGroup
+from monitoring.metrics_collector import metrics_collector
+
+PARAMS = dict(alpha=0.1, threshold=4.0, sustain=3, warmup=20, min_std=0.5)
+
+
+def steady(group, keys, base, samples=40):
+    rng = np.random.default_rng(0)
+    for _ in range(samples):
+        noise = rng.normal(0, 1, size=(len(keys), len(group.fields)))
+        assert group.update(keys, base + noise, **PARAMS) == []
+
+
+class SeriesGroupTestCase(TestCase):
+    def test_sustained_spike_reported_once(self):
+        group = SeriesGroup(["cpu_percent"])
+        steady(group, ["host"], np.array([[20.0]]))
+
+        results = [
+            group.update(["host"], np.array([[90.0]]), **PARAMS) for _ in range(5)
+        ]
+
+        self.assertEqual([len(r) for r in results], [0, 0, 1, 0, 0])
+        self.assertEqual(results[2][0]["field"], "cpu_percent")
+        self.assertGreater(results[2][0]["z_score"], 4)
+
+    def test_single_outlier_ignored(self):
+        group = SeriesGroup(["cpu_percent"])
+        steady(group, ["host"], np.array([[20.0]]))
+
+        anomalies = group.update(["host"], np.array([[90.0]]), **PARAMS)
+        anomalies += group.update(["host"], np.array([[20.0]]), **PARAMS)
+        anomalies += group.update(["host"], np.array([[90.0]]), **PARAMS)
+
+        self.assertEqual(anomalies, [])
+
+    def test_vectorized_across_containers(self):
+        """Only the misbehaving container and field are flagged"""
+        group = SeriesGroup(["cpu_percent", "memory_usage_mb"])
+        keys = ["a", "b", "c"]
+        base = np.array([[10.0, 100.0], [50.0, 400.0], [5.0, 50.0]])
+        steady(group, keys, base)
+
+        spike = base.copy()
+        spike[1, 1] = 2000.0
+        anomalies = []
+        for _ in range(3):
+            anomalies += group.update(keys, spike, **PARAMS)
+
+        self.assertEqual(
+            [(a["key"], a["field"]) for a in anomalies], [("b", "memory_usage_mb")]
+        )
+
+    def test_missing_values_leave_state_alone(self):
+        group = SeriesGroup(["cpu_percent"])
+        steady(group, ["host"], np.array([[20.0]]))
+        mean, count = group.mean.copy(), group.count.copy()
+
+        group.update(["host"], np.array([[np.nan]]), **PARAMS)
+
+        np.testing.assert_array_equal(group.mean, mean)
+        np.testing.assert_array_equal(group.count, count)
+
+    def test_retain_drops_removed_series(self):
+        group = SeriesGroup(["cpu_percent"])
+        group.update(["a", "b", "c"], np.array([[1.0], [2.0], [3.0]]), **PARAMS)
+
+        group.retain(["c", "a"])
+
+        self.assertEqual(group.index, {"a": 0, "c": 1})
+        np.testing.assert_array_equal(group.mean[:, 0], [1.0, 3.0])
+
+
+@patch("monitoring.anomaly.event_broadcaster")
+class AnomalyDetectorTestCase(TestCase):
+    def test_docker_anomaly_creates_event(self, broadcaster):
+        detector = AnomalyDetector()
+        sample = {
+            "container_id": "abc123",
+            "container_name": "web",
+            "cpu_percent": 10.0,
+            "memory_usage_mb": 100.0,
+        }
+        for i in range(40):
+            detector.observe_docker([{**sample, "cpu_percent": 10.0 + i % 2}])
+
+        for _ in range(3):
+            detector.observe_docker([{**sample, "cpu_percent": 95.0}], "rack-01")
+            detector.observe_docker([{**sample, "cpu_percent": 95.0}])
+
+        event = Event.objects.get()
+        self.assertEqual(event.event_type, "anomaly_detected")
+        self.assertIsNone(event.service)
+        self.assertEqual(event.metadata["container_name"], "web")
+        self.assertEqual(event.metadata["host"], "local")
+        self.assertEqual(event.metadata["field"], "cpu_percent")
+        broadcaster.broadcast_new_event.assert_called_once_with(event)
+
+    def test_saved_server_samples_are_scored(self, broadcaster):
+        metrics = {
+            "cpu_percent": 20.0,
+            "memory_percent": 50.0,
+            "memory_used_mb": 1024,
+            "memory_total_mb": 2048,
+            "disk_percent": 40.0,
+            "disk_used_gb": 40,
+            "disk_total_gb": 100,
+            "network_rx_mb": 1.0,
+            "network_tx_mb": 1.0,
+            "load_average_1m": 0.5,
+            "load_average_5m": 0.5,
+            "load_average_15m": 0.5,
+        }
+        with patch("monitoring.anomaly.anomaly_detector", AnomalyDetector()):
+            for _ in range(40):
+                metrics_collector.save_server_metrics(metrics)
+            for _ in range(3):
+                metrics_collector.save_server_metrics(
+                    {**metrics, "load_average_1m": 12.0}
+                )
+
+        event = Event.objects.get()
+        self.assertEqual(event.title, "Anomaly: load_average_1m on server")
@@ -0,0 +1,389 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from django.test import SimpleTestCase
+from monitoring.event_monitor import DockerEventMonitor
+from monitoring.metrics_collector import MetricsCollector
+from services.async_docker import AsyncDockerClient
+from services.async_docker import DockerAPIError
+
+
+def frame(stream, text):
+    """A frame of a multiplexed log stream"""
+    data = text.encode()
+    return bytes([stream, 0, 0, 0]) + len(data).to_bytes(4, "big") + data
+
+
+class Stream:
+    """A chunked response; ``complete=False`` drops the connection mid-stream"""
+
+    def __init__(self, chunks, complete=True):
+        self.chunks = chunks
+        self.complete = complete
+
+
+class FakeDockerDaemon:
+    """Serves canned Engine API responses on a unix socket in a thread"""
+
+    def __init__(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "docker.sock")
+        self.routes = {}
+        self.delays = {}
+        self.requests = []
+        self.connections = 0
+        self.open_connections = 0
+        self.max_open_connections = 0
+        self.close_after_response = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def route(self, method, path, response):
+        """``response`` is (status, JSON body), a Stream, or a callable of the query"""
+        self.routes[(method, path)] = response
+
+    def start(self):
+        self.thread.start()
+        self.server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_unix_server(self._serve, path=self.socket_path), self.loop
+        ).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.directory.cleanup()
+
+    async def _shutdown(self):
+        self.server.close()
+        handlers = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self.open_connections += 1
+        self.max_open_connections = max(
+            self.max_open_connections, self.open_connections
+        )
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, _ = request_line.decode().split(" ")
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+
+                url = urlsplit(target)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                self.requests.append((method, url.path, query))
+                await asyncio.sleep(self.delays.get((method, url.path), 0))
+                response = self.routes.get((method, url.path), (404, None))
+                if callable(response):
+                    response = response(query)
+                if isinstance(response, Stream):
+                    await self._stream(writer, response)
+                    if not response.complete:
+                        return
+                else:
+                    await self._respond(writer, *response)
+                # Let concurrent requests overlap
+                await asyncio.sleep(0.01)
+                if self.close_after_response:
+                    return
+        finally:
+            self.open_connections -= 1
+            writer.close()
+
+    async def _respond(self, writer, status, body):
+        if status == 404 and body is None:
+            body = {"message": "page not found"}
+        if isinstance(body, bytes):
+            data, content_type = body, "application/vnd.docker.raw-stream"
+        elif status == 204:
+            data, content_type = b"", "text/plain"
+        else:
+            data, content_type = json.dumps(body).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def _stream(self, writer, stream):
+        writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for chunk in stream.chunks:
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+        if stream.complete:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+
+CONTAINER = {
+    "Id": "a" * 64,
+    "Names": ["/web"],
+    "Image": "nginx:latest",
+    "State": "running",
+    "Labels": {},
+    "Ports": [{"PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"}],
+    "Created": 1700000000,
+}
+
+
+class FakeDaemonTestCase(SimpleTestCase):
+    def setUp(self):
+        self.daemon = FakeDockerDaemon()
+        self.daemon.start()
+        self.addCleanup(self.daemon.stop)
+        self.client = AsyncDockerClient(self.daemon.socket_path, pool_size=2)
+
+    def run_async(self, coro):
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.client.close()
+
+        return asyncio.run(run())
+
+
+class AsyncDockerClientTestCase(FakeDaemonTestCase):
+    def test_requests_share_keep_alive_connection(self):
+        self.daemon.route("GET", "/containers/json", (200, [CONTAINER]))
+        self.daemon.route(
+            "GET", f"/containers/{CONTAINER['Id']}/json", (200, CONTAINER)
+        )
+
+        async def calls():
+            containers = await self.client.list_containers(
+                all_containers=True, filters={"status": "running"}
+            )
+            return containers, await self.client.inspect_container(CONTAINER["Id"])
+
+        containers, inspected = self.run_async(calls())
+
+        self.assertEqual(containers, [CONTAINER])
+        self.assertEqual(inspected["Names"], ["/web"])
+        self.assertEqual(self.daemon.connections, 1)
+        _, _, query = self.daemon.requests[0]
+        self.assertEqual(query["all"], "1")
+        self.assertEqual(json.loads(query["filters"]), {"status": ["running"]})
+
+    def test_concurrent_requests_capped_by_pool(self):
+        self.daemon.route("GET", "/_ping", (200, "OK"))
+
+        async def calls():
+            return await asyncio.gather(*(self.client.ping() for _ in range(10)))
+
+        self.assertEqual(self.run_async(calls()), [True] * 10)
+        self.assertEqual(self.daemon.max_open_connections, 2)
+
+    def test_dropped_idle_connection_retried(self):
+        self.daemon.route("GET", "/_ping", (200, "OK"))
+        self.daemon.close_after_response = True
+
+        async def calls():
+            await self.client.ping()
+            # Give the daemon time to close the idle connection
+            await asyncio.sleep(0.05)
+            return await self.client._request("GET", "/_ping")
+
+        status, _ = self.run_async(calls())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.daemon.connections, 2)
+
+    def test_error_response_raises(self):
+        self.daemon.route(
+            "GET", "/containers/missing/json", (404, {"message": "No such container"})
+        )
+
+        with self.assertRaises(DockerAPIError) as raised:
+            self.run_async(self.client.inspect_container("missing"))
+
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(raised.exception.message, "No such container")
+
+    def test_container_actions(self):
+        for action in ("start", "stop", "restart"):
+            self.daemon.route("POST", f"/containers/web/{action}", (204, None))
+
+        async def calls():
+            await self.client.start("web")
+            await self.client.stop("web", timeout=3)
+            await self.client.restart("web")
+
+        self.run_async(calls())
+
+        self.assertEqual(
+            [(m, p, q.get("t")) for m, p, q in self.daemon.requests],
+            [
+                ("POST", "/containers/web/start", None),
+                ("POST", "/containers/web/stop", "3"),
+                ("POST", "/containers/web/restart", "10"),
+            ],
+        )
+
+    def test_stop_waits_out_grace_period(self):
+        """The request outlives the client timeout by the stop timeout"""
+        self.daemon.route("POST", "/containers/web/stop", (204, None))
+        self.daemon.delays[("POST", "/containers/web/stop")] = 0.2
+        self.client.timeout = 0.1
+
+        self.run_async(self.client.stop("web", timeout=1))
+
+        with self.assertRaises(TimeoutError):
+            self.run_async(self.client.stop("web", timeout=0))
+
+    def test_logs_demultiplexed(self):
+        self.daemon.route(
+            "GET",
+            "/containers/web/logs",
+            (200, frame(1, "started\n") + frame(2, "warning\n")),
+        )
+
+        logs = self.run_async(self.client.logs("web", tail=10))
+
+        self.assertEqual(logs, "started\nwarning\n")
+        self.assertEqual(self.daemon.requests[0][2]["tail"], "10")
+
+    def test_followed_logs_reassemble_frames(self):
+        data = frame(1, "one\n") + frame(1, "two\n")
+        self.daemon.route(
+            "GET", "/containers/web/logs", Stream([data[:5], data[5:14], data[14:]])
+        )
+
+        async def follow():
+            return [text async for text in self.client.stream_logs("web")]
+
+        self.assertEqual("".join(self.run_async(follow())), "one\ntwo\n")
+        self.assertEqual(self.daemon.requests[0][2]["follow"], "1")
+
+    def test_tty_logs_passed_through(self):
+        self.daemon.route("GET", "/containers/web/logs", Stream([b"raw ", b"output\n"]))
+
+        async def follow():
+            return [text async for text in self.client.stream_logs("web")]
+
+        self.assertEqual("".join(self.run_async(follow())), "raw output\n")
+
+    def test_events_split_across_chunks(self):
+        events = b'{"Action": "start"}\n{"Action": "die"}\n'
+        self.daemon.route("GET", "/events", Stream([events[:10], events[10:]]))
+
+        async def read():
+            return [e async for e in self.client.events(since="12.000000000")]
+
+        self.assertEqual(
+            [e["Action"] for e in self.run_async(read())], ["start", "die"]
+        )
+        self.assertEqual(self.daemon.requests[0][2]["since"], "12.000000000")
+
+
+class DockerConsumersTestCase(FakeDaemonTestCase):
+    def test_collector_computes_cpu_between_samples(self):
+        samples = iter([(10**9, 10**11), (3 * 10**9, 2 * 10**11)])
+
+        def stats(query):
+            self.assertEqual(query["one-shot"], "1")
+            total, system = next(samples)
+            return (
+                200,
+                {
+                    "cpu_stats": {
+                        "cpu_usage": {"total_usage": total},
+                        "system_cpu_usage": system,
+                        "online_cpus": 4,
+                    },
+                    "precpu_stats": {"cpu_usage": {"total_usage": 0}},
+                    "memory_stats": {
+                        "usage": 300 * 1024 * 1024,
+                        "limit": 1024 * 1024 * 1024,
+                        "stats": {"inactive_file": 100 * 1024 * 1024},
+                    },
+                    "networks": {
+                        "eth0": {"rx_bytes": 2 * 1024 * 1024, "tx_bytes": 1024 * 1024},
+                        "eth1": {"rx_bytes": 1024 * 1024, "tx_bytes": 0},
+                    },
+                    "blkio_stats": {
+                        "io_service_bytes_recursive": [
+                            {"op": "read", "value": 5 * 1024 * 1024},
+                            {"op": "write", "value": 1024 * 1024},
+                        ]
+                    },
+                },
+            )
+
+        self.daemon.route("GET", "/containers/json", (200, [CONTAINER]))
+        self.daemon.route("GET", f"/containers/{CONTAINER['Id']}/stats", stats)
+        collector = MetricsCollector()
+
+        first = self.run_async(collector.collect_docker_metrics_async(self.client))
+        second = self.run_async(collector.collect_docker_metrics_async(self.client))
+
+        self.assertEqual(first[0]["cpu_percent"], 0)
+        # 2s of CPU time over 100s of system time on 4 CPUs
+        self.assertEqual(second[0]["cpu_percent"], 8.0)
+        self.assertEqual(
+            {k: v for k, v in second[0].items() if k != "cpu_percent"},
+            {
+                "container_id": "a" * 12,
+                "container_name": "web",
+                "memory_usage_mb": 200.0,
+                "memory_limit_mb": 1024.0,
+                "network_rx_mb": 3.0,
+                "network_tx_mb": 1.0,
+                "block_read_mb": 5.0,
+                "block_write_mb": 1.0,
+            },
+        )
+
+    def test_event_monitor_resumes_stream(self):
+        monitor = DockerEventMonitor()
+        monitor.client = self.client
+        monitor.retry_delay = 0
+        monitor.monitoring = True
+        monitor.cursor = 5
+        start = json.dumps(
+            {"Type": "container", "Action": "start", "id": "w", "timeNano": 7}
+        )
+        die = json.dumps(
+            {"Type": "container", "Action": "die", "id": "w", "timeNano": 8}
+        )
+        streams = iter(
+            [
+                Stream([start.encode() + b"\n"], complete=False),
+                Stream([f"{start}\n{die}\n".encode()]),
+            ]
+        )
+
+        def events(query):
+            stream = next(streams, None)
+            if stream is None:
+                monitor.monitoring = False
+                return Stream([])
+            return stream
+
+        self.daemon.route("GET", "/events", events)
+
+        monitor._monitor_events()
+
+        sinces = [q.get("since") for _, _, q in self.daemon.requests]
+        self.assertEqual(sinces, ["0.000000005", "0.000000007", "0.000000008"])
+        queued = [monitor._queue.get_nowait()["Action"] for _ in range(2)]
+        self.assertEqual(queued, ["start", "die"])
+        self.assertTrue(monitor._queue.empty())
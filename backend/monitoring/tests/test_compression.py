@@ -0,0 +1,196 @@
+import json
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from monitoring.compression import CHUNK_FIELDS
+from monitoring.compression import MetricsCompressor
+from monitoring.compression import decode_chunk
+from monitoring.compression import encode_chunk
+from monitoring.compression import to_ms
+from monitoring.models import DockerMetrics
+from monitoring.models import DockerMetricsChunk
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+def create_sample(
+    container_id, timestamp, cpu_percent=1.5, name="web", error_lines_per_minute=None
+):
+    metrics = DockerMetrics.objects.create(
+        container_id=container_id,
+        container_name=name,
+        cpu_percent=cpu_percent,
+        memory_usage_mb=128.25,
+        memory_limit_mb=512,
+        network_rx_mb=1.0,
+        network_tx_mb=2.0,
+        block_read_mb=3.0,
+        block_write_mb=4.0,
+        error_lines_per_minute=error_lines_per_minute,
+    )
+    DockerMetrics.objects.filter(id=metrics.id).update(timestamp=timestamp)
+    return metrics
+
+
+class ChunkCodecTestCase(TestCase):
+    def test_round_trip(self):
+        """Timestamps and floats decode to exactly what was encoded"""
+        timestamps = [1_700_000_000_000, 1_700_000_005_000, 1_700_000_010_000]
+        timestamps += [
+            1_700_000_015_013,  # small jitter
+            1_700_000_020_000,
+            1_700_000_021_000,  # large negative delta-of-delta
+            1_700_009_000_000,  # gap needing the widest bucket
+            1_800_000_000_000,
+        ]
+        columns = [
+            [0.0, 0.0, 12.5, 12.5, -3.25, 1e-300, 1e300, 7.1],
+            [float(i) / 3 for i in range(8)],
+        ]
+
+        data = encode_chunk(timestamps, columns)
+
+        self.assertEqual(decode_chunk(data), (timestamps, columns))
+
+    def test_regular_series_compresses(self):
+        """A steady series takes a few bits per sample"""
+        timestamps = [1_700_000_000_000 + i * 5000 for i in range(720)]
+        columns = [[512.0] * 720 for _ in CHUNK_FIELDS]
+
+        data = encode_chunk(timestamps, columns)
+
+        self.assertLess(len(data), 720 * 8 * (len(CHUNK_FIELDS) + 1) / 50)
+
+    def test_unknown_version_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_chunk(b"\x09" + encode_chunk([0], [[1.0]])[1:])
+
+
+class MetricsCompressorTestCase(TestCase):
+    def setUp(self):
+        self.hour = datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc)
+
+    def test_compress_groups_by_container_and_hour(self):
+        for minute in (0, 15, 59):
+            create_sample("aaa", self.hour + timedelta(minutes=minute))
+        create_sample("aaa", self.hour + timedelta(hours=1, minutes=5))
+        create_sample("bbb", self.hour + timedelta(minutes=30), name="db")
+        create_sample("aaa", self.hour + timedelta(hours=2, minutes=30))
+
+        stats = MetricsCompressor().compress_before(
+            self.hour + timedelta(hours=2, minutes=45)
+        )
+
+        self.assertEqual(stats, {"chunks": 3, "rows": 5})
+        # The hour containing the cutoff stays uncompressed
+        self.assertEqual(DockerMetrics.objects.count(), 1)
+        chunk = DockerMetricsChunk.objects.get(container_id="aaa", start=self.hour)
+        self.assertEqual(chunk.count, 3)
+        self.assertEqual(chunk.end, self.hour + timedelta(minutes=59))
+        self.assertEqual(
+            DockerMetricsChunk.objects.get(container_id="bbb").container_name, "db"
+        )
+
+    def test_batches_split_on_chunk_boundaries(self):
+        for minute in range(6):
+            create_sample("aaa", self.hour + timedelta(minutes=minute))
+            create_sample("bbb", self.hour + timedelta(minutes=minute))
+
+        stats = MetricsCompressor(batch_size=4).compress_before(
+            self.hour + timedelta(hours=1)
+        )
+
+        self.assertEqual(stats["rows"], 12)
+        self.assertEqual(DockerMetrics.objects.count(), 0)
+        total = sum(chunk.count for chunk in DockerMetricsChunk.objects.all())
+        self.assertEqual(total, 12)
+
+    def test_read_columns(self):
+        compressor = MetricsCompressor()
+        create_sample("aaa", self.hour + timedelta(minutes=1), cpu_percent=1.0)
+        create_sample("aaa", self.hour + timedelta(minutes=2), cpu_percent=2.0)
+        create_sample("bbb", self.hour + timedelta(minutes=3), cpu_percent=3.0)
+        compressor.compress_before(self.hour + timedelta(hours=1))
+
+        columns = compressor.read_columns(
+            None, self.hour + timedelta(minutes=2), ["container_id", "cpu_percent"]
+        )
+
+        self.assertEqual(columns["container_id"], ["bbb", "aaa"])
+        self.assertEqual(columns["cpu_percent"], [3.0, 2.0])
+
+    def test_read_columns_keeps_error_rate(self):
+        """Error rates are archived and missing ones read back as None"""
+        compressor = MetricsCompressor()
+        create_sample("aaa", self.hour + timedelta(minutes=1))
+        create_sample("aaa", self.hour + timedelta(minutes=2), error_lines_per_minute=4)
+        compressor.compress_before(self.hour + timedelta(hours=1))
+
+        columns = compressor.read_columns(
+            "aaa", self.hour, ["cpu_percent", "error_lines_per_minute"]
+        )
+
+        self.assertEqual(columns["error_lines_per_minute"], [4.0, None])
+        self.assertEqual(columns["cpu_percent"], [1.5, 1.5])
+
+    def test_version_one_chunks_still_read(self):
+        """Chunks written before the error rate was archived still decode"""
+        timestamps = [to_ms(self.hour), to_ms(self.hour + timedelta(minutes=1))]
+        data = bytearray(encode_chunk(timestamps, [[2.0, 3.0]] * 7))
+        data[0] = 1
+        DockerMetricsChunk.objects.create(
+            container_id="aaa",
+            container_name="web",
+            start=self.hour,
+            end=self.hour + timedelta(minutes=1),
+            count=2,
+            data=bytes(data),
+        )
+
+        columns = MetricsCompressor().read_columns(
+            "aaa", self.hour, ["cpu_percent", "error_lines_per_minute"]
+        )
+
+        self.assertEqual(columns["cpu_percent"], [3.0, 2.0])
+        self.assertEqual(columns["error_lines_per_minute"], [None, None])
+
+    def test_management_command(self):
+        create_sample("aaa", timezone.now() - timedelta(hours=30))
+        out = StringIO()
+
+        call_command("compress_metrics", "--older-than-hours", "24", stdout=out)
+
+        self.assertIn("Compressed 1 samples into 1 chunks", out.getvalue())
+        self.assertEqual(DockerMetricsChunk.objects.count(), 1)
+
+
+class CompressedHistoryViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_history_includes_compressed_samples(self):
+        now = timezone.now()
+        create_sample("aaa", now - timedelta(hours=3), cpu_percent=3.0)
+        MetricsCompressor().compress_before(now - timedelta(hours=1))
+        create_sample("aaa", now - timedelta(minutes=5), cpu_percent=5.0)
+
+        response = self.client.get(reverse("docker-metrics"), {"hours": 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["cpu_percent"] for row in response.data], [5.0, 3.0])
+        self.assertIsNone(response.data[1]["id"])
+
+        response = self.client.get(
+            reverse("docker-metrics"), {"hours": 4, "format": "columnar"}
+        )
+        data = json.loads(response.content)
+        self.assertEqual(data["cpu_percent"], [5.0, 3.0])
+        self.assertEqual(data["container_name"], ["web", "web"])
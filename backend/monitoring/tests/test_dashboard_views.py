@@ -44,6 +44,43 @@ class DashboardViewsTestCase(APITestCase):
         self.assertEqual(response.data[0]['cpu_percent'], 25.5)
         self.assertEqual(response.data[0]['memory_percent'], 60.2)
 
+    def test_server_metrics_columnar(self):
+        """Test getting server metrics in columnar format"""
+        url = reverse('server-metrics')
+        response = self.client.get(url, {'hours': 1, 'format': 'columnar'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertNotIn('id', data)
+        self.assertEqual(data['cpu_percent'], [25.5])
+        self.assertEqual(data['memory_percent'], [60.2])
+        self.assertEqual(len(data['timestamp']), 1)
+
+    def test_docker_metrics_columnar(self):
+        """Test getting Docker metrics in columnar format"""
+        for cpu in (1.0, 2.0):
+            DockerMetrics.objects.create(
+                container_id='abc123',
+                container_name='web-app',
+                cpu_percent=cpu,
+                memory_usage_mb=128,
+                memory_limit_mb=512,
+                network_rx_mb=0,
+                network_tx_mb=0,
+                block_read_mb=0,
+                block_write_mb=0
+            )
+
+        url = reverse('docker-metrics')
+        response = self.client.get(
+            url, {'container_id': 'abc123', 'format': 'columnar'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual(sorted(data['cpu_percent']), [1.0, 2.0])
+        self.assertEqual(data['container_name'], ['web-app', 'web-app'])
+
     @patch('monitoring.views.metrics_collector')
     @patch('monitoring.views.event_broadcaster')
     def test_server_metrics_collect(self, mock_broadcaster, mock_collector):
@@ -88,8 +125,8 @@ class DashboardViewsTestCase(APITestCase):
         self.assertIn('running_containers', response.data)
 
     @patch('monitoring.views.metrics_collector')
-    @patch('services.docker_service.docker_service')
-    def test_live_metrics(self, mock_docker_service, mock_collector):
+    @patch('services.container_inventory.container_inventory')
+    def test_live_metrics(self, mock_inventory, mock_collector):
         """Test getting live metrics"""
         # Mock server metrics
         mock_collector.collect_server_metrics.return_value = {
@@ -110,9 +147,8 @@ class DashboardViewsTestCase(APITestCase):
         # Mock docker metrics
         mock_collector.collect_docker_metrics.return_value = []
         
-        # Mock docker service
-        mock_docker_service.is_available.return_value = True
-        mock_docker_service.list_containers.return_value = [
+        # Mock container inventory
+        mock_inventory.list_containers.return_value = [
             {
                 'id': 'container1',
                 'name': 'web-app',
@@ -291,3 +327,39 @@ class DockerServiceTestCase(TestCase):
         ports = docker_service.get_container_ports("test-container")
         
         self.assertEqual(ports, ['8080:80', '8443:443', '5432:5432'])
+
+    @patch('services.docker_service.docker.APIClient')
+    def test_list_containers_ports_from_listing(self, mock_docker_client):
+        """Test that listing builds ports without inspecting each container"""
+        from services.docker_service import DockerService
+
+        mock_client = MagicMock()
+        mock_docker_client.return_value = mock_client
+        mock_client.version.return_value = {'Version': '20.10.0'}
+        mock_client.containers.return_value = [
+            {
+                'Id': 'abc123',
+                'Names': ['/web'],
+                'Image': 'nginx:latest',
+                'State': 'running',
+                'Created': 1700000000,
+                'Ports': [
+                    {'IP': '0.0.0.0', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+                    {'IP': '::', 'PrivatePort': 80, 'PublicPort': 8080, 'Type': 'tcp'},
+                    {'PrivatePort': 9000, 'Type': 'tcp'}
+                ]
+            }
+        ]
+        mock_client.inspect_container.return_value = {
+            "NetworkSettings": {"Ports": {"80/tcp": [{"HostPort": "8081"}]}}
+        }
+
+        docker_service = DockerService()
+
+        containers = docker_service.list_containers()
+        self.assertEqual(containers[0]['ports'], ['8080:80', '9000:9000'])
+        mock_client.inspect_container.assert_not_called()
+
+        containers = docker_service.list_containers(detailed_ports=True)
+        self.assertEqual(containers[0]['ports'], ['8081:80'])
+        mock_client.inspect_container.assert_called_once_with('abc123')
@@ -0,0 +1,163 @@
+from collections import namedtuple
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from monitoring.device_collector import DeviceMetricsCollector
+from monitoring.device_collector import RateCalculator
+from monitoring.models import DeviceMetrics
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+CpuTimes = namedtuple("CpuTimes", ["user", "system", "idle", "iowait"])
+NetIO = namedtuple(
+    "NetIO", ["bytes_sent", "bytes_recv", "packets_sent", "packets_recv"]
+)
+DiskIO = namedtuple(
+    "DiskIO", ["read_count", "write_count", "read_bytes", "write_bytes", "busy_time"]
+)
+Partition = namedtuple("Partition", ["device", "mountpoint", "fstype", "opts"])
+Usage = namedtuple("Usage", ["total", "used", "free", "percent"])
+
+
+class RateCalculatorTestCase(TestCase):
+    def test_rate_uses_elapsed_time(self):
+        """Rates are normalized by the time between samples"""
+        rates = RateCalculator()
+
+        self.assertIsNone(rates.rate("eth0", 1000, now=10.0))
+        self.assertEqual(rates.rate("eth0", 3000, now=12.0), 1000)
+        self.assertEqual(rates.rate("eth0", 3500, now=12.5), 1000)
+
+    def test_counter_reset(self):
+        """A counter going backwards yields no rate and a fresh baseline"""
+        rates = RateCalculator()
+        rates.rate("eth0", 5000, now=1.0)
+
+        self.assertIsNone(rates.rate("eth0", 10, now=2.0))
+        self.assertEqual(rates.rate("eth0", 110, now=3.0), 100)
+
+
+class DeviceMetricsCollectorTestCase(TestCase):
+    def setUp(self):
+        self.collector = DeviceMetricsCollector(min_interval=0)
+        self.clock = [100.0]
+        self.sample = 0
+
+        patcher = patch("monitoring.device_collector.time.monotonic")
+        self.addCleanup(patcher.stop)
+        patcher.start().side_effect = lambda: self.clock[0]
+
+        patcher = patch("monitoring.device_collector.psutil")
+        self.addCleanup(patcher.stop)
+        psutil = patcher.start()
+        psutil.cpu_times.side_effect = self.cpu_times
+        psutil.net_io_counters.side_effect = self.net_io
+        psutil.disk_io_counters.side_effect = self.disk_io
+        psutil.disk_partitions.return_value = [
+            Partition("/dev/sda1", "/", "ext4", "rw"),
+            Partition("/dev/sdb1", "/data", "ext4", "rw"),
+        ]
+        psutil.disk_usage.side_effect = lambda mountpoint: Usage(
+            100 * 1024**3, 90 * 1024**3, 10 * 1024**3, 90.0
+        )
+
+    def cpu_times(self, percpu):
+        n = self.sample
+        return [
+            CpuTimes(user=10 * n, system=0, idle=100 + 10 * n, iowait=0),
+            CpuTimes(user=18 * n, system=0, idle=100 + 2 * n, iowait=0),
+        ]
+
+    def net_io(self, pernic):
+        n = self.sample
+        return {"eth0": NetIO(500 * n, 2000 * n, 5 * n, 20 * n)}
+
+    def disk_io(self, perdisk):
+        n = self.sample
+        return {"sda": DiskIO(10 * n, 30 * n, 4096 * n, 8192 * n, 500 * n)}
+
+    def advance(self, seconds):
+        self.sample += 1
+        self.clock[0] += seconds
+
+    def by_device(self, metrics):
+        return {(m["device_type"], m["device"]): m for m in metrics}
+
+    def test_first_sample_has_only_filesystems(self):
+        """Rate-based devices need a baseline sample"""
+        metrics = self.by_device(self.collector.collect_device_metrics())
+
+        self.assertEqual(set(metrics), {("filesystem", "/"), ("filesystem", "/data")})
+        self.assertEqual(metrics[("filesystem", "/data")]["percent"], 90.0)
+        self.assertEqual(metrics[("filesystem", "/data")]["total_gb"], 100.0)
+
+    def test_per_device_rates(self):
+        """Second sample yields per-core, per-NIC and per-disk figures"""
+        self.collector.collect_device_metrics()
+        self.advance(2)
+        metrics = self.by_device(self.collector.collect_device_metrics())
+
+        self.assertEqual(metrics[("cpu", "cpu0")]["percent"], 50.0)
+        self.assertEqual(metrics[("cpu", "cpu1")]["percent"], 90.0)
+
+        eth0 = metrics[("network", "eth0")]
+        self.assertEqual(eth0["read_rate"], 1000)
+        self.assertEqual(eth0["write_rate"], 250)
+        self.assertEqual(eth0["read_ops_rate"], 10)
+
+        sda = metrics[("disk", "sda")]
+        self.assertEqual(sda["read_rate"], 2048)
+        self.assertEqual(sda["write_ops_rate"], 15)
+        self.assertEqual(sda["percent"], 25.0)
+
+    def test_callers_share_recent_sample(self):
+        """Calls within min_interval reuse the previous sample"""
+        self.collector.min_interval = 5
+        first = self.collector.collect_device_metrics()
+        self.advance(1)
+
+        self.assertEqual(self.collector.collect_device_metrics(), first)
+
+    def test_save_device_metrics(self):
+        """Samples are stored with one bulk insert"""
+        self.collector.collect_device_metrics()
+        self.advance(1)
+        metrics = self.collector.collect_device_metrics()
+
+        self.collector.save_device_metrics(metrics)
+
+        self.assertEqual(DeviceMetrics.objects.count(), len(metrics))
+        self.assertTrue(
+            DeviceMetrics.objects.filter(device_type="disk", device="sda").exists()
+        )
+
+
+class DeviceMetricsViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        DeviceMetrics.objects.create(device_type="network", device="eth0", read_rate=1)
+        DeviceMetrics.objects.create(device_type="disk", device="sda", read_rate=2)
+
+    def test_filter_by_device_type(self):
+        """History can be filtered by device type"""
+        response = self.client.get(reverse("device-metrics"), {"device_type": "disk"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["device"], "sda")
+
+    @patch("monitoring.views.device_collector")
+    def test_collect(self, mock_collector):
+        """POST collects and stores a sample"""
+        mock_collector.collect_device_metrics.return_value = []
+        mock_collector.save_device_metrics.return_value = []
+
+        response = self.client.post(reverse("device-metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_collector.save_device_metrics.assert_called_once_with([])
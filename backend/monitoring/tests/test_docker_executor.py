@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from monitoring.consumers import MonitoringConsumer
+from monitoring.docker_executor import DockerExecutor
+from monitoring.docker_executor import DockerExecutorFull
+from monitoring.prometheus import DOCKER_EXECUTOR_QUEUED
+from monitoring.prometheus import metrics_registry
+
+
+class DockerExecutorTestCase(TransactionTestCase):
+    def setUp(self):
+        self.executor = DockerExecutor(max_workers=1, max_pending=1)
+        self.addCleanup(self.executor.shutdown)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocking_call(self):
+        self.release.wait(5)
+        return "done"
+
+    def test_slow_call_does_not_hold_database_thread(self):
+        async def scenario():
+            slow = asyncio.ensure_future(self.executor.run(self.blocking_call))
+            await asyncio.sleep(0.01)
+            # The ORM thread is free while the Docker call is still running
+            count = await database_sync_to_async(User.objects.count)()
+            finished_first = slow.done()
+            self.release.set()
+            return count, finished_first, await slow
+
+        self.assertEqual(asyncio.run(scenario()), (0, False, "done"))
+        self.assertEqual(self.executor.stats()["completed"], 1)
+
+    def test_waiting_calls_bounded(self):
+        async def scenario():
+            running = asyncio.ensure_future(self.executor.run(self.blocking_call))
+            waiting = asyncio.ensure_future(self.executor.run(lambda: "queued"))
+            await asyncio.sleep(0.01)
+            stats = self.executor.stats()
+            queued_gauge = metrics_registry.families[DOCKER_EXECUTOR_QUEUED].samples[()]
+            with self.assertRaises(DockerExecutorFull):
+                await self.executor.run(lambda: "rejected")
+            self.release.set()
+            return stats, queued_gauge, await running, await waiting
+
+        stats, queued_gauge, *results = asyncio.run(scenario())
+
+        self.assertEqual((stats["queued"], stats["running"]), (1, 1))
+        self.assertEqual(queued_gauge, 1)
+        self.assertEqual(results, ["done", "queued"])
+        self.assertEqual(self.executor.stats()["rejected"], 1)
+
+    def test_cancelled_call_leaves_queue(self):
+        async def scenario():
+            running = asyncio.ensure_future(self.executor.run(self.blocking_call))
+            waiting = asyncio.ensure_future(self.executor.run(lambda: "queued"))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.sleep(0.01)
+            self.release.set()
+            await running
+
+        asyncio.run(scenario())
+
+        self.assertEqual(self.executor.stats()["queued"], 0)
+        self.assertEqual(self.executor.stats()["completed"], 1)
+
+    def test_container_list_read_from_inventory_on_executor(self):
+        """Even with a local socket, listings come from the inventory cache"""
+        with patch("monitoring.consumers.async_docker") as async_docker, patch(
+            "monitoring.consumers.docker_executor", self.executor
+        ), patch("monitoring.consumers.container_inventory") as inventory:
+            async_docker.is_available.return_value = True
+            inventory.list_containers.side_effect = lambda: [
+                threading.current_thread().name
+            ]
+            containers = asyncio.run(MonitoringConsumer().get_containers())
+
+        self.assertTrue(containers[0].startswith("docker-io"))
+        async_docker.list_containers.assert_not_called()
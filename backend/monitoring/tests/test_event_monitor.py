@@ -0,0 +1,158 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from events.models import Event
+from monitoring.event_monitor import DockerEventMonitor
+from services.models import Service
+
+
+def docker_event(name, action, time_nano=1, container_id=None):
+    container_id = container_id or f"{name}-id"
+    return {
+        "Type": "container",
+        "Action": action,
+        "id": container_id,
+        "Actor": {"ID": container_id, "Attributes": {"name": name}},
+        "time": time_nano // 1_000_000_000,
+        "timeNano": time_nano,
+    }
+
+
+@patch("monitoring.event_monitor.event_broadcaster")
+class DockerEventMonitorTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.web = Service.objects.create(
+            name="web",
+            service_type="docker",
+            config={"container_name": "web"},
+            status="healthy",
+            created_by=self.user,
+        )
+        self.db = Service.objects.create(
+            name="db",
+            service_type="docker",
+            config={"container_name": "db"},
+            status="healthy",
+            created_by=self.user,
+        )
+        self.monitor = DockerEventMonitor()
+        self.monitor.retry_delay = 0
+
+    def test_batch_applies_last_status_per_service(self, broadcaster):
+        """A container that dies and restarts within a batch keeps its status"""
+        events = self.monitor.process_events(
+            [
+                docker_event("web", "die"),
+                docker_event("web", "start"),
+                docker_event("db", "health_status: unhealthy"),
+                docker_event("db", "exec_start: sh"),
+                docker_event("unmanaged", "start"),
+            ]
+        )
+
+        self.web.refresh_from_db()
+        self.db.refresh_from_db()
+        self.assertEqual((self.web.status, self.db.status), ("healthy", "unhealthy"))
+        self.assertEqual(
+            [e.event_type for e in events],
+            ["service_stopped", "service_started", "health_check_failed"],
+        )
+        self.assertEqual(Event.objects.filter(source="docker_events").count(), 3)
+        self.assertEqual(broadcaster.broadcast_service_status_change.call_count, 1)
+        broadcaster.broadcast_service_status_change.assert_called_with(
+            self.db, "healthy", "unhealthy"
+        )
+
+    def test_services_loaded_with_one_query(self, broadcaster):
+        batch = [docker_event(name, "start") for name in ("web", "db")] * 10
+
+        # Select services, then bulk update and bulk insert in a transaction
+        with self.assertNumQueries(5):
+            self.monitor.process_events(batch)
+
+    def test_queued_events_applied_together(self, broadcaster):
+        self.monitor._queue.put(docker_event("web", "start"))
+        self.monitor._queue.put(docker_event("db", "stop"))
+        self.monitor._queue.put(None)
+
+        with patch.object(
+            self.monitor, "process_events", wraps=self.monitor.process_events
+        ) as process_events:
+            self.monitor._apply_events()
+
+        process_events.assert_called_once()
+        self.web.refresh_from_db()
+        self.db.refresh_from_db()
+        self.assertEqual((self.web.status, self.db.status), ("healthy", "unhealthy"))
+
+    def test_reconnect_resumes_from_cursor(self, broadcaster):
+        calls = []
+
+        async def dropped_stream():
+            yield docker_event("web", "start", time_nano=1_500_000_000_000_000_007)
+            raise ConnectionError("stream closed")
+
+        async def resumed_stream():
+            # The replay repeats the event at the cursor
+            yield docker_event("web", "start", time_nano=1_500_000_000_000_000_007)
+            yield docker_event("web", "die", time_nano=1_500_000_000_000_000_008)
+            self.monitor.monitoring = False
+
+        def events(**kwargs):
+            calls.append(kwargs)
+            return dropped_stream() if len(calls) == 1 else resumed_stream()
+
+        self.monitor.client = MagicMock()
+        self.monitor.client.events.side_effect = events
+        self.monitor.monitoring = True
+        self.monitor.cursor = 1_500_000_000_000_000_000
+
+        self.monitor._monitor_events()
+
+        self.assertEqual(calls[0]["since"], "1500000000.000000000")
+        self.assertEqual(calls[1]["since"], "1500000000.000000007")
+        queued = [self.monitor._queue.get_nowait()["Action"] for _ in range(2)]
+        self.assertEqual(queued, ["start", "die"])
+        self.assertTrue(self.monitor._queue.empty())
+
+    @patch("monitoring.event_monitor.time.time_ns")
+    def test_drop_before_first_event_resumes_from_start(self, time_ns, broadcaster):
+        """Events during a gap before the first event are still replayed"""
+        time_ns.return_value = 1_500_000_000_000_000_000
+        calls = []
+
+        async def dropped_stream():
+            raise ConnectionError("stream closed")
+            yield
+
+        async def resumed_stream():
+            yield docker_event("web", "die", time_nano=1_500_000_000_000_000_005)
+            self.monitor.monitoring = False
+
+        def events(**kwargs):
+            calls.append(kwargs)
+            return dropped_stream() if len(calls) == 1 else resumed_stream()
+
+        self.monitor.client = MagicMock()
+        self.monitor.client.events.side_effect = events
+        self.monitor.monitoring = True
+
+        self.monitor._monitor_events()
+
+        self.assertEqual(
+            [call["since"] for call in calls], ["1500000000.000000000"] * 2
+        )
+        self.assertEqual(self.monitor._queue.get_nowait()["Action"], "die")
+
+    def test_replayed_and_older_events_skipped(self, broadcaster):
+        first = docker_event("web", "start", time_nano=10)
+        same_time = docker_event("db", "start", time_nano=10)
+
+        self.assertTrue(self.monitor._advance(first))
+        self.assertTrue(self.monitor._advance(same_time))
+        self.assertFalse(self.monitor._advance(first))
+        self.assertFalse(self.monitor._advance(docker_event("web", "stop", 9)))
+        self.assertTrue(self.monitor._advance(docker_event("web", "stop", 11)))
@@ -0,0 +1,134 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from events.models import Event
+from healthchecks.models import HealthCheck
+from monitoring.models import DockerMetrics
+from rest_framework import status
+from rest_framework.test import APITestCase
+from services.models import Service
+
+
+class ExportViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for container_id in ("aaa", "aaa", "bbb"):
+            DockerMetrics.objects.create(
+                container_id=container_id,
+                container_name=f"{container_id}-name",
+                cpu_percent=1.5,
+                memory_usage_mb=128,
+                memory_limit_mb=512,
+                network_rx_mb=0,
+                network_tx_mb=0,
+                block_read_mb=0,
+                block_write_mb=0,
+            )
+
+        self.service = Service.objects.create(
+            name="Web", service_type="http", created_by=self.user
+        )
+        other_user = User.objects.create_user(username="other", password="pass12345")
+        self.other_service = Service.objects.create(
+            name="Other", service_type="http", created_by=other_user
+        )
+        for service in (self.service, self.other_service):
+            HealthCheck.objects.create(service=service, status="success")
+            Event.objects.create(
+                service=service,
+                event_type="service_started",
+                title="Started",
+                message="Started",
+            )
+
+    def export(self, dataset, **params):
+        response = self.client.get(reverse("export", args=[dataset]), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_ndjson_export(self):
+        """Docker metrics export as one JSON object per line"""
+        response = self.export("docker_metrics")
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["cpu_percent"], 1.5)
+
+    def test_container_filter(self):
+        """Exports can be restricted to one container"""
+        response = self.export("docker_metrics", container_id="bbb")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["container_id"], "bbb")
+
+    def test_csv_export(self):
+        """CSV exports start with a header row"""
+        response = self.export("healthchecks", output="csv")
+
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["service_id"], str(self.service.id))
+
+    def test_gzip_export(self):
+        """Compressed exports decompress to the plain stream"""
+        response = self.export("events", gzip="1")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["service_id"] for row in rows], [self.service.id])
+
+    def test_events_without_service_exported(self):
+        """Host-level events belong to no service and are exported too"""
+        Event.objects.create(
+            event_type="anomaly_detected", title="CPU spike", message="CPU spike"
+        )
+
+        response = self.export("events")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(row["event_type"], row["service_id"]) for row in rows],
+            [("service_started", self.service.id), ("anomaly_detected", None)],
+        )
+
+    def test_time_range_filter(self):
+        """since/until bound the exported range"""
+        response = self.export(
+            "events", since="2000-01-01T00:00:00", until="2000-01-02T00:00:00"
+        )
+
+        self.assertEqual(b"".join(response.streaming_content), b"")
+
+    def test_invalid_requests(self):
+        """Unknown datasets, outputs and bad time bounds are rejected"""
+        response = self.client.get(reverse("export", args=["nope"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(
+            reverse("export", args=["events"]), {"output": "xml"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("export", args=["events"]), {"since": "bad"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for hours in ("abc", "-1", "nan"):
+            response = self.client.get(
+                reverse("export", args=["events"]), {"hours": hours}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
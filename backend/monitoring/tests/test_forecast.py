@@ -0,0 +1,138 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from events.models import Event
+from monitoring.forecast import exhaustion_forecaster
+from monitoring.compression import metrics_compressor
+from monitoring.forecast import fit_trends
+from monitoring.models import DeviceMetrics
+from monitoring.models import DockerMetrics
+from monitoring.models import ServerMetrics
+from rest_framework.test import APITestCase
+
+SERVER_SAMPLE = {
+    "cpu_percent": 10,
+    "memory_percent": 50,
+    "memory_used_mb": 1024,
+    "memory_total_mb": 2048,
+    "disk_used_gb": 50,
+    "disk_total_gb": 100,
+    "network_rx_mb": 0,
+    "network_tx_mb": 0,
+    "load_average_1m": 0,
+    "load_average_5m": 0,
+    "load_average_15m": 0,
+}
+DOCKER_SAMPLE = {
+    "container_name": "web",
+    "cpu_percent": 1,
+    "memory_limit_mb": 512,
+    "network_rx_mb": 0,
+    "network_tx_mb": 0,
+    "block_read_mb": 0,
+    "block_write_mb": 0,
+}
+
+
+class FitTrendsTestCase(APITestCase):
+    def test_fits_many_series_at_once(self):
+        hours = np.tile(np.arange(10, dtype=np.float64), 3)
+        series = np.repeat(np.arange(3), 10)
+        values = np.concatenate([2 * hours[:10] + 5, np.full(10, 7.0), 30 - hours[:10]])
+
+        trends = fit_trends(series, hours, values)
+
+        np.testing.assert_allclose(trends["slope"], [2, 0, -1], atol=1e-9)
+        np.testing.assert_allclose(trends["current"], [23, 7, 21], atol=1e-9)
+        np.testing.assert_array_equal(trends["points"], [10, 10, 10])
+
+
+@patch("monitoring.forecast.event_broadcaster")
+class ExhaustionForecasterTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        for hour in range(12):
+            at = self.now - timedelta(hours=12 - hour)
+            ServerMetrics.objects.create(
+                **SERVER_SAMPLE, disk_percent=50 + 2 * hour, timestamp=at
+            )
+            DockerMetrics.objects.create(
+                **DOCKER_SAMPLE,
+                container_id="grow",
+                memory_usage_mb=100 + 4 * hour,
+                timestamp=at,
+            )
+            DockerMetrics.objects.create(
+                **{**DOCKER_SAMPLE, "container_name": "flat"},
+                container_id="flat",
+                memory_usage_mb=100,
+                timestamp=at,
+            )
+            device = DeviceMetrics.objects.create(
+                device_type="filesystem", device="/data", percent=90 + 0.5 * hour
+            )
+            DeviceMetrics.objects.filter(pk=device.pk).update(timestamp=at)
+
+    def series(self, forecasts):
+        return {s["series"]: s for s in forecasts["series"]}
+
+    def test_time_to_exhaustion(self, broadcaster):
+        series = self.series(exhaustion_forecaster.build_forecasts())
+
+        disk = series["disk:local"]
+        self.assertAlmostEqual(disk["slope_per_hour"], 2.0)
+        # 72% an hour ago, 28 points left at 2 per hour
+        self.assertAlmostEqual(disk["hours_to_exhaustion"], 13, delta=0.6)
+        grow = series["container_memory:local:grow"]
+        self.assertAlmostEqual(
+            grow["hours_to_exhaustion"], (512 - 144) / 4 - 1, delta=0.6
+        )
+        self.assertIsNone(series["container_memory:local:flat"]["hours_to_exhaustion"])
+        self.assertEqual(series["filesystem:local:/data"]["name"], "/data")
+
+    def test_compressed_hours_included(self, broadcaster):
+        before = self.series(exhaustion_forecaster.build_forecasts())
+
+        metrics_compressor.compress_before(self.now - timedelta(hours=6))
+        after = self.series(exhaustion_forecaster.build_forecasts())
+
+        self.assertLess(DockerMetrics.objects.filter(container_id="grow").count(), 12)
+        grow = "container_memory:local:grow"
+        self.assertEqual(after[grow]["points"], before[grow]["points"])
+        self.assertAlmostEqual(
+            after[grow]["hours_to_exhaustion"], before[grow]["hours_to_exhaustion"]
+        )
+
+    def test_run_alerts_once(self, broadcaster):
+        exhaustion_forecaster.run()
+        forecasts = exhaustion_forecaster.run()
+
+        self.assertEqual(forecasts["alerts"], 0)
+        events = Event.objects.filter(event_type="capacity_forecast")
+        self.assertEqual(
+            sorted(e.metadata["series"] for e in events),
+            ["disk:local", "filesystem:local:/data"],
+        )
+        self.assertEqual(
+            events.get(metadata__series="filesystem:local:/data").severity, "critical"
+        )
+
+    def test_api(self, broadcaster):
+        user = User.objects.create_user(username="user", password="pass")
+        self.client.force_authenticate(user=user)
+
+        response = self.client.get(
+            reverse("forecasts"), {"kind": "container_memory", "within_hours": 200}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [s["series"] for s in response.data["series"]],
+            ["container_memory:local:grow"],
+        )
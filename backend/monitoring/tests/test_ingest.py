@@ -0,0 +1,156 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from monitoring.models import DockerMetrics
+from monitoring.models import ServerMetrics
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+SERVER_SAMPLE = {
+    "cpu_percent": 25.5,
+    "memory_percent": 60.2,
+    "memory_used_mb": 1024,
+    "memory_total_mb": 2048,
+    "disk_percent": 45.8,
+    "disk_used_gb": 50,
+    "disk_total_gb": 100,
+    "network_rx_mb": 10.5,
+    "network_tx_mb": 8.2,
+    "load_average_1m": 1.2,
+    "load_average_5m": 1.1,
+    "load_average_15m": 1.0,
+}
+
+DOCKER_SAMPLE = {
+    "container_id": "abc123def456",
+    "container_name": "web",
+    "cpu_percent": 5.0,
+    "memory_usage_mb": 64,
+    "memory_limit_mb": 512,
+    "network_rx_mb": 1,
+    "network_tx_mb": 2,
+    "block_read_mb": 3,
+    "block_write_mb": 4,
+}
+
+
+class IngestViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="agent", password="pass")
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse("metrics-ingest")
+
+    def post(self, payload, compress=False, **extra):
+        body = json.dumps(payload).encode()
+        if compress:
+            body = gzip.compress(body)
+            extra["HTTP_CONTENT_ENCODING"] = "gzip"
+        return self.client.post(
+            self.url,
+            body,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+            **extra,
+        )
+
+    def test_ingest_gzip_batch(self):
+        """Samples keep their host and their own timestamps"""
+        sampled_at = timezone.now() - timedelta(minutes=10)
+        payload = {
+            "host": "rack-01",
+            "server_metrics": [
+                {**SERVER_SAMPLE, "timestamp": sampled_at.isoformat()},
+            ],
+            "docker_metrics": [
+                {**DOCKER_SAMPLE, "timestamp": sampled_at.isoformat()},
+                {**DOCKER_SAMPLE, "cpu_percent": 6.0},
+            ],
+        }
+
+        response = self.post(payload, compress=True)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["server_metrics"], 1)
+        self.assertEqual(response.data["docker_metrics"], 2)
+        server = ServerMetrics.objects.get()
+        self.assertEqual(server.host, "rack-01")
+        self.assertEqual(server.timestamp, sampled_at)
+        self.assertEqual(DockerMetrics.objects.filter(host="rack-01").count(), 2)
+
+    def test_invalid_sample_rejects_whole_batch(self):
+        payload = {
+            "host": "rack-01",
+            "server_metrics": [SERVER_SAMPLE, {**SERVER_SAMPLE, "cpu_percent": "x"}],
+        }
+
+        response = self.post(payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cpu_percent", response.data["error"])
+        self.assertEqual(ServerMetrics.objects.count(), 0)
+
+    def test_optional_fields_kept(self):
+        payload = {
+            "host": "rack-01",
+            "docker_metrics": [
+                {**DOCKER_SAMPLE, "error_lines_per_minute": 4},
+                {**DOCKER_SAMPLE, "container_name": "db"},
+            ],
+        }
+
+        response = self.post(payload)
+        bad = self.post(
+            {
+                "host": "rack-01",
+                "docker_metrics": [{**DOCKER_SAMPLE, "error_lines_per_minute": "x"}],
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            dict(
+                DockerMetrics.objects.values_list(
+                    "container_name", "error_lines_per_minute"
+                )
+            ),
+            {"web": 4.0, "db": None},
+        )
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_local_host_is_reserved(self):
+        response = self.post({"host": "local", "server_metrics": [SERVER_SAMPLE]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_corrupt_gzip(self):
+        response = self.client.post(
+            self.url,
+            b"not gzip",
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+            HTTP_CONTENT_ENCODING="gzip",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        response = self.client.post(self.url, {"host": "rack-01"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_history_filters_by_host(self):
+        """History defaults to this server and selects others with ?host="""
+        self.post({"host": "rack-01", "server_metrics": [SERVER_SAMPLE]})
+        ServerMetrics.objects.create(**{**SERVER_SAMPLE, "cpu_percent": 99.0})
+        self.client.force_authenticate(user=self.user)
+
+        local = self.client.get(reverse("server-metrics"))
+        remote = self.client.get(reverse("server-metrics"), {"host": "rack-01"})
+
+        self.assertEqual([row["cpu_percent"] for row in local.data], [99.0])
+        self.assertEqual([row["host"] for row in remote.data], ["rack-01"])
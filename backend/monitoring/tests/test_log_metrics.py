@@ -0,0 +1,198 @@
+import asyncio
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.utils import timezone
+from monitoring.log_ingest import LogIngester
+from monitoring.log_metrics import LOG_ERROR_METRIC
+from monitoring.log_metrics import LogErrorCounter
+from monitoring.log_metrics import LogMatcher
+from monitoring.log_metrics import latest_error_rates
+from monitoring.log_store import LogStore
+from monitoring.metrics_collector import MetricsCollector
+from monitoring.models import CustomMetric
+from monitoring.models import DockerMetrics
+
+from .test_log_store import FakeDocker
+from .test_log_store import FakeLogClient
+from .test_log_store import line
+from .test_log_store import settle
+
+DOCKER_SAMPLE = {
+    "container_id": "abc123",
+    "container_name": "web",
+    "cpu_percent": 12.5,
+    "memory_usage_mb": 256.0,
+    "memory_limit_mb": 1024.0,
+    "network_rx_mb": 1.0,
+    "network_tx_mb": 2.0,
+    "block_read_mb": 3.0,
+    "block_write_mb": 4.0,
+}
+
+
+class LogMatcherTestCase(SimpleTestCase):
+    def test_levels_match_whole_words(self):
+        matcher = LogMatcher(levels=["error", "fatal"])
+
+        self.assertTrue(matcher.match("2024/01/01 ERROR connection refused"))
+        self.assertTrue(matcher.match('{"level":"error","msg":"boom"}'))
+        self.assertTrue(matcher.match("Fatal: out of memory"))
+        self.assertFalse(matcher.match("0 errors, all good"))
+        self.assertFalse(matcher.match("INFO request served"))
+
+    def test_prefilter_skips_regex(self):
+        matcher = LogMatcher(pattern=r"status=5\d\d", contains=["status=5"])
+
+        with patch.object(matcher, "regex") as regex:
+            self.assertFalse(matcher.match("GET / status=200"))
+        regex.search.assert_not_called()
+        self.assertTrue(matcher.match("GET / status=503"))
+
+    def test_literal_pattern_is_its_own_prefilter(self):
+        self.assertEqual(LogMatcher(pattern="Traceback").contains, ["Traceback"])
+        self.assertEqual(LogMatcher(pattern=r"5\d\d").contains, [])
+
+    def test_ignore_case_literal_has_no_prefilter(self):
+        matcher = LogMatcher(pattern="timeout", ignore_case=True)
+
+        self.assertEqual(matcher.contains, [])
+        self.assertTrue(matcher.match("TIMEOUT talking to db"))
+
+    def test_needs_pattern_or_levels(self):
+        with self.assertRaises(ValueError):
+            LogMatcher.from_config({})
+
+
+class LogErrorCounterTestCase(TestCase):
+    def setUp(self):
+        self.counter = LogErrorCounter(
+            [LogMatcher(levels=["error"]), LogMatcher(pattern="Traceback")],
+            interval=60,
+        )
+
+    def test_counts_per_container_interval(self):
+        self.counter.track("idle")
+        for text in ("ERROR one", "fine", "Traceback (most recent call last):"):
+            self.counter.observe("web", text)
+        self.counter.observe("worker", "ok")
+
+        rows = self.counter.flush(active=["web", "idle"])
+
+        counts = {row.tags["container"]: (row.value, row.count) for row in rows}
+        self.assertEqual(
+            counts, {"web": (2.0, 3), "worker": (0.0, 1), "idle": (0.0, 0)}
+        )
+        self.assertTrue(all(row.name == LOG_ERROR_METRIC for row in rows))
+        # Only active containers carry on into the next interval
+        self.assertEqual(set(self.counter.lines), {"web", "idle"})
+
+    def test_forget_keeps_unflushed_counts(self):
+        self.counter.track("idle")
+        self.counter.observe("web", "ERROR")
+
+        self.counter.forget("idle")
+        self.counter.forget("web")
+
+        self.assertEqual(self.counter.lines, {"web": 1})
+
+    def test_latest_rate_per_minute(self):
+        now = timezone.now()
+        CustomMetric.objects.bulk_create(
+            [
+                CustomMetric(
+                    name=LOG_ERROR_METRIC,
+                    metric_type="counter",
+                    tags={"container": "web"},
+                    timestamp=timestamp,
+                    interval=30,
+                    value=value,
+                    count=100,
+                )
+                for timestamp, value in (
+                    (now - timedelta(minutes=10), 99),
+                    (now - timedelta(seconds=40), 4),
+                    (now - timedelta(seconds=10), 6),
+                )
+            ]
+        )
+
+        rates = latest_error_rates(["web", "db"])
+
+        self.assertEqual(rates, {"web": 12.0})
+
+    def test_saved_docker_metrics_carry_rate(self):
+        rows = [
+            CustomMetric(
+                name=LOG_ERROR_METRIC,
+                metric_type="counter",
+                tags={"container": "web"},
+                interval=60,
+                value=5,
+                count=50,
+            )
+        ]
+        self.counter.write(rows)
+
+        MetricsCollector().save_docker_metrics(
+            [dict(DOCKER_SAMPLE), dict(DOCKER_SAMPLE, container_name="db")]
+        )
+
+        saved = dict(
+            DockerMetrics.objects.values_list(
+                "container_name", "error_lines_per_minute"
+            )
+        )
+        self.assertEqual(saved, {"web": 5.0, "db": None})
+
+
+class LogIngesterCountingTestCase(TransactionTestCase):
+    def test_streams_feed_counter_without_store(self):
+        counter = LogErrorCounter([LogMatcher(levels=["error"])], interval=60)
+        client = FakeLogClient()
+        ingester = LogIngester(None, client, FakeDocker("web"), counter=counter)
+        ingester.flush_interval = 0.01
+
+        async def scenario():
+            stopped = asyncio.Event()
+            task = asyncio.ensure_future(ingester.run(stopped))
+            await asyncio.sleep(0.01)
+            for second, text in enumerate(("ERROR a", "ok", "ERROR b")):
+                client.streams[0].put_nowait(line(second, text))
+            await settle()
+            stopped.set()
+            await task
+
+        asyncio.run(scenario())
+
+        row = CustomMetric.objects.get(name=LOG_ERROR_METRIC)
+        self.assertEqual((row.tags, row.value, row.count), ({"container": "web"}, 2, 3))
+
+    def test_store_and_counter_share_streams(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        store = LogStore(root)
+        counter = LogErrorCounter([LogMatcher(levels=["error"])], interval=60)
+        client = FakeLogClient()
+        ingester = LogIngester(store, client, FakeDocker("web"), counter=counter)
+
+        async def scenario():
+            await ingester.sync_containers()
+            await settle()
+            client.streams[0].put_nowait(line(1, "ERROR stored and counted"))
+            await settle()
+            await ingester.flush()
+
+        asyncio.run(scenario())
+
+        self.assertEqual(len(client.follow_calls), 1)
+        self.assertEqual(counter.errors, {"web": 1})
+        self.assertEqual(
+            [r["line"] for r in store.search()["results"]],
+            ["ERROR stored and counted"],
+        )
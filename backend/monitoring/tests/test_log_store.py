@@ -0,0 +1,326 @@
+import asyncio
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.test import override_settings
+from django.urls import reverse
+from monitoring.log_ingest import LogIngester
+from monitoring.log_ingest import key_to_ns
+from monitoring.log_store import LogStore
+from monitoring.log_streams import timestamp_key
+from monitoring.tsdb import NS_PER_SECOND
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+HOUR_NS = 3600 * NS_PER_SECOND
+# 2024-01-01T10:00:00Z
+BASE_NS = 1704103200 * NS_PER_SECOND
+
+
+def line(second, text):
+    return f"2024-01-01T10:00:{second:02d}.5Z {text}\n"
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class FakeLogClient:
+    def __init__(self):
+        self.follow_calls = []
+        self.streams = []
+
+    async def stream_logs(self, container_name, tail, timestamps, since):
+        self.follow_calls.append((container_name, since))
+        queue = asyncio.Queue()
+        self.streams.append(queue)
+        while (text := await queue.get()) is not None:
+            yield text
+
+
+class FakeDocker:
+    def __init__(self, *names):
+        self.names = list(names)
+
+    async def list_containers(self):
+        return [{"Names": [f"/{name}"]} for name in self.names]
+
+
+class LogStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = LogStore(self.root, segment_seconds=3600)
+
+    def fill(self):
+        self.store.add("web", BASE_NS, "GET /health 200")
+        self.store.add("web", BASE_NS + HOUR_NS, "ERROR connection refused")
+        self.store.add("web", BASE_NS + HOUR_NS + 1, "GET /api 200")
+        self.store.add("db", BASE_NS + 5, "checkpoint starting")
+        self.assertEqual(self.store.flush(), 4)
+
+    def lines(self, found):
+        return [result["line"] for result in found["results"]]
+
+    def test_lines_bucketed_per_container(self):
+        self.fill()
+
+        segments = self.store.segments("web")
+        self.assertEqual([s.start_ns for s in segments], [BASE_NS, BASE_NS + HOUR_NS])
+        self.assertEqual([s.count for s in segments], [1, 2])
+        self.assertEqual(self.store.last_timestamp("web"), BASE_NS + HOUR_NS + 1)
+        self.assertEqual(self.store.pending(), 0)
+
+    def test_index_rules_out_segments(self):
+        self.fill()
+
+        found = self.store.search(query="Connection REFUSED")
+
+        self.assertEqual(self.lines(found), ["ERROR connection refused"])
+        self.assertEqual(found["segments_scanned"], 1)
+        self.assertEqual(found["segments_skipped"], 2)
+
+    def test_unindexed_terms_still_match(self):
+        self.fill()
+
+        found = self.store.search(query="200")
+
+        self.assertEqual(self.lines(found), ["GET /api 200", "GET /health 200"])
+        self.assertEqual(found["segments_scanned"], 3)
+
+    def test_filters_and_limit(self):
+        self.fill()
+
+        newest = self.store.search(containers=["web"], limit=2)
+        in_range = self.store.search(start_ns=BASE_NS + 1, end_ns=BASE_NS + HOUR_NS)
+
+        self.assertEqual(
+            self.lines(newest), ["GET /api 200", "ERROR connection refused"]
+        )
+        self.assertEqual(self.lines(in_range), ["checkpoint starting"])
+        self.assertEqual(in_range["segments_skipped"], 2)
+
+    def test_appends_across_flushes(self):
+        self.store.add("web", BASE_NS, "first flush")
+        self.store.flush()
+        self.store.add("web", BASE_NS + 1, "second flush")
+        self.store.flush()
+
+        # A fresh store reads the segment back from disk
+        reopened = LogStore(self.root, segment_seconds=3600)
+        self.assertEqual(
+            self.lines(reopened.search(query="flush")), ["second flush", "first flush"]
+        )
+
+    def test_unindexed_write_discarded(self):
+        self.store.add("web", BASE_NS, "kept")
+        self.store.flush()
+        segment = self.store.segments("web")[0]
+        # A crash after writing data but before its index
+        with open(segment.data_path, "ab") as f:
+            f.write(b"\x1f\x8b\x08partial")
+
+        self.assertEqual(self.lines(self.store.search()), ["kept"])
+
+        self.store.add("web", BASE_NS + 1, "after restart")
+        self.store.flush()
+        self.assertEqual(self.lines(self.store.search()), ["after restart", "kept"])
+
+    def test_token_limit_disables_index(self):
+        store = LogStore(self.root, segment_seconds=3600, max_tokens=2)
+        store.add("web", BASE_NS, "alpha beta gamma")
+        store.flush()
+
+        segment = store.segments("web")[0]
+        self.assertIsNone(segment.tokens)
+        found = store.search(query="delta")
+        self.assertEqual((found["results"], found["segments_scanned"]), ([], 1))
+
+    def test_invalid_container_name_rejected(self):
+        with self.assertRaises(ValueError):
+            self.store.search(containers=["../etc"])
+
+    def test_prune_removes_old_buckets(self):
+        self.fill()
+
+        removed = self.store.prune(BASE_NS + HOUR_NS)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(
+            [s.start_ns for s in self.store.segments("web")], [BASE_NS + HOUR_NS]
+        )
+        self.assertEqual(self.store.segments("db"), [])
+
+
+class LogIngesterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = LogStore(self.root, segment_seconds=3600)
+        self.client = FakeLogClient()
+
+    def ingester(self, *names):
+        ingester = LogIngester(self.store, self.client, FakeDocker(*names))
+        ingester.retry_delay = 0
+        return ingester
+
+    def test_timestamp_key_to_ns(self):
+        self.assertEqual(
+            key_to_ns(timestamp_key("2024-01-01T10:00:01.5Z")),
+            BASE_NS + NS_PER_SECOND + NS_PER_SECOND // 2,
+        )
+
+    def test_running_containers_ingested(self):
+        ingester = self.ingester("web", "db")
+
+        async def scenario():
+            await ingester.sync_containers()
+            await settle()
+            streams = dict(
+                zip([c for c, _ in self.client.follow_calls], self.client.streams)
+            )
+            streams["web"].put_nowait(line(1, "web line"))
+            streams["db"].put_nowait(line(2, "db line"))
+            await settle()
+            await ingester.flush()
+
+            ingester.docker.names = ["web"]
+            await ingester.sync_containers()
+            return set(ingester.streams)
+
+        followed = asyncio.run(scenario())
+
+        self.assertEqual(followed, {"web"})
+        self.assertEqual(ingester.written, 2)
+        found = self.store.search()
+        self.assertEqual(
+            [(r["container"], r["line"]) for r in found["results"]],
+            [("db", "db line"), ("web", "web line")],
+        )
+
+    def test_resumes_after_last_stored_line(self):
+        self.store.add("web", key_to_ns(timestamp_key("2024-01-01T10:00:01.5Z")), "old")
+        self.store.flush()
+        ingester = self.ingester("web")
+
+        async def scenario():
+            await ingester.sync_containers()
+            await settle()
+            # ``since`` is inclusive, so the stored line comes again
+            self.client.streams[0].put_nowait(line(1, "old"))
+            self.client.streams[0].put_nowait(line(2, "new"))
+            await settle()
+            await ingester.flush()
+
+        asyncio.run(scenario())
+
+        self.assertEqual(self.client.follow_calls, [("web", "1704103201.500000000")])
+        self.assertEqual(
+            [r["line"] for r in self.store.search()["results"]], ["new", "old"]
+        )
+
+    def test_full_buffer_requests_flush(self):
+        ingester = self.ingester("web")
+        ingester.flush_lines = 2
+
+        async def scenario():
+            await ingester.sync_containers()
+            await settle()
+            self.client.streams[0].put_nowait(line(1, "one"))
+            await settle()
+            before = ingester.flush_now.is_set()
+            self.client.streams[0].put_nowait(line(2, "two"))
+            await settle()
+            return before, ingester.flush_now.is_set()
+
+        self.assertEqual(asyncio.run(scenario()), (False, True))
+
+    def test_run_flushes_on_stop(self):
+        ingester = self.ingester("web")
+        ingester.flush_interval = 0.01
+
+        async def scenario():
+            stopped = asyncio.Event()
+            task = asyncio.ensure_future(ingester.run(stopped))
+            await asyncio.sleep(0.01)
+            self.client.streams[0].put_nowait(line(1, "last words"))
+            await settle()
+            stopped.set()
+            await task
+            return ingester.streams
+
+        self.assertEqual(asyncio.run(scenario()), {})
+        self.assertEqual(
+            [r["line"] for r in self.store.search()["results"]], ["last words"]
+        )
+
+
+class LogSearchViewTestCase(APITestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(LOG_STORE_PATH=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        store = LogStore(self.root)
+        store.add("web", BASE_NS, "ERROR timeout talking to db")
+        store.add("web", BASE_NS + HOUR_NS, "GET /health 200")
+        store.add("worker", BASE_NS + 10, "ERROR job failed")
+        store.flush()
+
+    def test_search(self):
+        response = self.client.get(
+            reverse("log-search"), {"q": "error", "container": ["web", "worker"]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["container"], r["line"]) for r in response.data["results"]],
+            [("worker", "ERROR job failed"), ("web", "ERROR timeout talking to db")],
+        )
+        self.assertEqual(
+            response.data["results"][1]["timestamp"], "2024-01-01T10:00:00+00:00"
+        )
+        self.assertEqual(response.data["segments_skipped"], 1)
+
+    def test_time_range(self):
+        response = self.client.get(
+            reverse("log-search"), {"since": "2024-01-01T10:30:00Z"}
+        )
+
+        self.assertEqual(
+            [r["line"] for r in response.data["results"]], ["GET /health 200"]
+        )
+
+    def test_bad_parameters(self):
+        bad_time = self.client.get(reverse("log-search"), {"since": "yesterday"})
+        bad_name = self.client.get(reverse("log-search"), {"container": "../x"})
+
+        self.assertEqual(bad_time.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(bad_name.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bad_hours_and_limit(self):
+        for params in (
+            {"hours": "abc"},
+            {"hours": "-1"},
+            {"hours": "nan"},
+            {"hours": "1e300"},
+            {"limit": "ten"},
+            {"limit": "-5"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("log-search"), params)
+
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_store_not_configured(self):
+        with override_settings(LOG_STORE_PATH=""):
+            response = self.client.get(reverse("log-search"))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
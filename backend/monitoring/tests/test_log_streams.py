@@ -0,0 +1,195 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.test import TransactionTestCase
+from monitoring.consumers import ServiceDetailConsumer
+from monitoring.log_streams import LogStreamHub
+from monitoring.log_streams import key_to_since
+from monitoring.log_streams import timestamp_key
+from services.models import Service
+
+
+def line(second, text, fraction="5"):
+    return f"2024-01-01T10:00:{second:02d}.{fraction}Z {text}\n"
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class FakeLogClient:
+    """Followed streams are fed by the test through queues"""
+
+    def __init__(self, backlog=""):
+        self.backlog = backlog
+        self.logs_calls = []
+        self.follow_calls = []
+        self.streams = []
+
+    def is_available(self):
+        return True
+
+    async def logs(self, container_name, tail, since, timestamps):
+        self.logs_calls.append({"tail": tail, "since": since})
+        return self.backlog
+
+    async def stream_logs(self, container_name, tail, timestamps, since):
+        self.follow_calls.append(since)
+        queue = asyncio.Queue()
+        self.streams.append(queue)
+        while (text := await queue.get()) is not None:
+            yield text
+
+
+def texts(batch):
+    lines, dropped = batch
+    return [entry["line"] for entry in lines], dropped
+
+
+class LogStreamHubTestCase(SimpleTestCase):
+    def setUp(self):
+        self.client = FakeLogClient()
+        self.hub = LogStreamHub(self.client)
+        self.hub.retry_delay = 0
+
+    def test_timestamp_keys_sort_with_trimmed_fractions(self):
+        self.assertLess(
+            timestamp_key("2024-01-01T10:00:00.1Z"),
+            timestamp_key("2024-01-01T10:00:00.12Z"),
+        )
+        self.assertEqual(
+            key_to_since(timestamp_key("2024-01-01T10:00:00.12Z")),
+            "1704103200.120000000",
+        )
+
+    def test_clients_share_one_upstream(self):
+        async def scenario():
+            first = await self.hub.subscribe("web")
+            second = await self.hub.subscribe("web")
+            await settle()
+            self.client.streams[0].put_nowait(line(1, "hello"))
+            await settle()
+            received = [texts(await s.next_batch(10)) for s in (first, second)]
+
+            self.hub.unsubscribe(first)
+            still_open = "web" in self.hub.streams
+            task = self.hub.streams["web"].task
+            self.hub.unsubscribe(second)
+            await settle()
+            return received, still_open, task.cancelled()
+
+        received, still_open, cancelled = asyncio.run(scenario())
+
+        self.assertEqual(received, [(["hello"], 0), (["hello"], 0)])
+        self.assertEqual(len(self.client.follow_calls), 1)
+        self.assertTrue(still_open)
+        self.assertTrue(cancelled)
+        self.assertEqual(self.hub.streams, {})
+
+    def test_slow_client_loses_oldest_lines(self):
+        self.hub.buffer_lines = 3
+
+        async def scenario():
+            slow = await self.hub.subscribe("web")
+            fast = await self.hub.subscribe("web")
+            await settle()
+            fast_lines = []
+            for second in range(5):
+                self.client.streams[0].put_nowait(line(second, f"line {second}"))
+                await settle()
+                fast_lines += texts(await fast.next_batch(10))[0]
+            return texts(await slow.next_batch(10)), fast_lines
+
+        slow_batch, fast_lines = asyncio.run(scenario())
+
+        self.assertEqual(slow_batch, (["line 2", "line 3", "line 4"], 2))
+        self.assertEqual(fast_lines, [f"line {n}" for n in range(5)])
+
+    def test_backlog_since_joins_live_lines(self):
+        self.client.backlog = line(1, "old") + line(2, "overlap")
+
+        async def scenario():
+            subscription = await self.hub.subscribe("web", since="1704103200")
+            await settle()
+            for text in (line(2, "overlap"), line(3, "new")):
+                self.client.streams[0].put_nowait(text)
+            await settle()
+            return texts(await subscription.next_batch(10))
+
+        self.assertEqual(asyncio.run(scenario()), (["old", "overlap", "new"], 0))
+        self.assertEqual(
+            self.client.logs_calls, [{"tail": 100, "since": "1704103200"}]
+        )
+
+    def test_stream_resumes_after_last_line(self):
+        async def scenario():
+            subscription = await self.hub.subscribe("web")
+            await settle()
+            self.client.streams[0].put_nowait(line(1, "before restart"))
+            self.client.streams[0].put_nowait(None)
+            await settle()
+            # The resumed stream repeats the line at ``since``
+            self.client.streams[1].put_nowait(line(1, "before restart"))
+            self.client.streams[1].put_nowait(line(2, "after restart"))
+            await settle()
+            return texts(await subscription.next_batch(10))
+
+        self.assertEqual(
+            asyncio.run(scenario()), (["before restart", "after restart"], 0)
+        )
+        self.assertEqual(self.client.follow_calls[1], "1704103201.500000000")
+
+
+class ServiceDetailConsumerLogsTestCase(TransactionTestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="testuser", password="pass")
+        self.service = Service.objects.create(
+            name="web",
+            service_type="docker",
+            config={"container_name": "web-1", "image": "nginx:latest"},
+            created_by=user,
+        )
+        self.consumer = ServiceDetailConsumer()
+        self.consumer.service_id = self.service.id
+        self.consumer.log_subscription = None
+        self.consumer.log_sender = None
+        self.sent = []
+
+        async def send(text_data):
+            self.sent.append(json.loads(text_data))
+
+        self.consumer.send = send
+
+    def test_service_data_read_from_config(self):
+        data = asyncio.run(self.consumer.get_service_data())
+
+        self.assertEqual(data["container_name"], "web-1")
+        self.assertEqual(data["image_name"], "nginx:latest")
+
+    def test_follow_logs_streams_batches(self):
+        client = FakeLogClient(backlog=line(1, "old"))
+        hub = LogStreamHub(client)
+
+        async def scenario():
+            await self.consumer.follow_logs(tail=10)
+            await settle()
+            client.streams[0].put_nowait(line(2, "new"))
+            await settle()
+            await self.consumer.unfollow_logs()
+
+        with patch("monitoring.consumers.log_streams", hub):
+            asyncio.run(scenario())
+
+        lines = [
+            entry["line"]
+            for message in self.sent
+            if message["type"] == "log_lines"
+            for entry in message["lines"]
+        ]
+        self.assertEqual(lines, ["old", "new"])
+        self.assertEqual(client.logs_calls, [{"tail": 10, "since": None}])
+        self.assertEqual(hub.streams, {})
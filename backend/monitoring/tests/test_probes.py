@@ -0,0 +1,236 @@
+import gzip
+import json
+import shutil
+import socket
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import LiveServerTestCase
+from django.urls import reverse
+from django.utils import timezone
+from events.models import Event
+from healthchecks.models import HealthCheck
+from healthchecks.models import Probe
+from monitoring.hub_client import PROBE_RESULTS_PATH
+from monitoring.hub_client import BatchSender
+from monitoring.hub_client import HubClient
+from monitoring.hub_client import Spool
+from monitoring.probe import ProbeRunner
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from services.models import Service
+
+
+def make_probe(name, services=()):
+    user = User.objects.create_user(username=f"probe-{name}", password="pass")
+    probe = Probe.objects.create(name=name, user=user)
+    probe.services.set(services)
+    return probe, Token.objects.create(user=user).key
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@patch("monitoring.probe_results.event_broadcaster")
+class ProbeAPITestCase(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="pass")
+        self.web = Service.objects.create(
+            name="web",
+            service_type="http",
+            config={"url": "http://example.com"},
+            created_by=self.owner,
+        )
+        self.container = Service.objects.create(
+            name="db", service_type="docker", created_by=self.owner
+        )
+        self.other = Service.objects.create(
+            name="other", service_type="tcp", created_by=self.owner
+        )
+
+    def upload(self, token, results):
+        return self.client.post(
+            reverse("probe-results"),
+            gzip.compress(json.dumps({"results": results}).encode()),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {token}",
+            HTTP_CONTENT_ENCODING="gzip",
+        )
+
+    def result(self, service, success, checked_at=None):
+        checked_at = checked_at or timezone.now()
+        return {
+            "service": service.id,
+            "checked_at": checked_at.isoformat(),
+            "success": success,
+            "response_time": 12.5,
+            "status_code": 200 if success else 503,
+            "error": None if success else "Expected status 200, got 503",
+        }
+
+    def test_assignments(self, broadcaster):
+        """Probes only receive enabled services they can check remotely"""
+        probe, token = make_probe("eu-1", [self.web, self.container])
+
+        response = self.client.get(
+            reverse("probe-assignments"), HTTP_AUTHORIZATION=f"Token {token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s["id"] for s in response.data["services"]], [self.web.id])
+        probe.refresh_from_db()
+        self.assertIsNotNone(probe.last_seen)
+
+    def test_non_probe_user_forbidden(self, broadcaster):
+        self.client.force_authenticate(user=self.owner)
+
+        response = self.client.get(reverse("probe-assignments"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_upload_deduplicates_retries(self, broadcaster):
+        probe, token = make_probe("eu-1", [self.web])
+        results = [self.result(self.web, True), self.result(self.other, True)]
+
+        first = self.upload(token, results)
+        retry = self.upload(token, results)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data, {"received": 2, "stored": 1, "skipped": 1})
+        self.assertEqual(retry.data["stored"], 0)
+        check = HealthCheck.objects.get()
+        self.assertEqual(check.probe, probe)
+        self.assertEqual(check.http_status, 200)
+        self.web.refresh_from_db()
+        self.assertEqual(self.web.status, "healthy")
+
+    def test_partial_retry_counts_new_results(self, broadcaster):
+        probe, token = make_probe("eu-1", [self.web])
+        earlier = self.result(self.web, True, timezone.now() - timedelta(minutes=1))
+        self.upload(token, [earlier])
+
+        response = self.upload(token, [earlier, self.result(self.web, False)])
+
+        self.assertEqual(response.data["stored"], 1)
+        self.assertEqual(HealthCheck.objects.filter(probe=probe).count(), 2)
+
+    def test_invalid_result_rejects_batch(self, broadcaster):
+        _, token = make_probe("eu-1", [self.web])
+
+        response = self.upload(
+            token, [self.result(self.web, True), {"service": self.web.id}]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(HealthCheck.objects.count(), 0)
+
+    def test_status_follows_majority_of_probes(self, broadcaster):
+        tokens = [make_probe(name, [self.web])[1] for name in ("a", "b", "c")]
+
+        self.upload(tokens[0], [self.result(self.web, False)])
+        self.upload(tokens[1], [self.result(self.web, True)])
+        self.upload(tokens[2], [self.result(self.web, True)])
+        self.web.refresh_from_db()
+        self.assertEqual(self.web.status, "healthy")
+
+        self.upload(tokens[1], [self.result(self.web, False)])
+        self.web.refresh_from_db()
+        self.assertEqual(self.web.status, "unhealthy")
+        event = (
+            Event.objects.filter(event_type="health_check_failed").order_by("id").last()
+        )
+        broadcaster.broadcast_service_status_change.assert_called_with(
+            self.web, "healthy", "unhealthy"
+        )
+        self.assertEqual(
+            event.metadata["probes"], {"a": "failure", "b": "failure", "c": "success"}
+        )
+
+    def test_stale_results_ignored(self, broadcaster):
+        """Only results from the last two check intervals count"""
+        tokens = [make_probe(name, [self.web])[1] for name in ("a", "b")]
+        stale = timezone.now() - timedelta(seconds=3 * self.web.check_interval)
+
+        self.upload(tokens[0], [self.result(self.web, True, stale)])
+        self.upload(tokens[1], [self.result(self.web, False)])
+
+        self.web.refresh_from_db()
+        self.assertEqual(self.web.status, "unhealthy")
+
+
+@patch("monitoring.probe_results.event_broadcaster")
+class ProbeRunnerTestCase(LiveServerTestCase):
+    """A probe runner checking services for a live hub"""
+
+    def setUp(self):
+        owner = User.objects.create_user(username="owner", password="pass")
+        host, port = self.server_thread.host, self.server_thread.port
+        self.up = Service.objects.create(
+            name="hub",
+            service_type="tcp",
+            config={"host": host, "port": port},
+            timeout=2,
+            created_by=owner,
+        )
+        self.down = Service.objects.create(
+            name="closed",
+            service_type="tcp",
+            config={"host": "127.0.0.1", "port": closed_port()},
+            timeout=2,
+            created_by=owner,
+        )
+        self.probe, self.token = make_probe("eu-1", [self.up, self.down])
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+    def make_runner(self, hub_url):
+        client = HubClient(hub_url, self.token, timeout=5)
+        sender = BatchSender(client, Spool(self.spool_dir), path=PROBE_RESULTS_PATH)
+        runner = ProbeRunner(client, sender, max_workers=2)
+        self.addCleanup(runner.executor.shutdown)
+        return runner
+
+    def test_run_once(self, broadcaster):
+        runner = self.make_runner(self.live_server_url)
+
+        runner.run_once()
+
+        self.assertEqual(
+            dict(HealthCheck.objects.values_list("service__name", "status")),
+            {"hub": "success", "closed": "failure"},
+        )
+        self.up.refresh_from_db()
+        self.down.refresh_from_db()
+        self.assertEqual((self.up.status, self.down.status), ("healthy", "unhealthy"))
+
+    def test_checks_wait_for_interval(self, broadcaster):
+        runner = self.make_runner(self.live_server_url)
+        runner.run_once()
+
+        runner.run_once()
+
+        self.assertEqual(HealthCheck.objects.count(), 2)
+
+    def test_results_spooled_while_hub_unreachable(self, broadcaster):
+        runner = self.make_runner(self.live_server_url)
+        runner.refresh()
+        runner.sender.client = HubClient("http://127.0.0.1:9", self.token, timeout=5)
+
+        runner.run_once()
+
+        self.assertEqual(len(runner.sender.spool.pending()), 1)
+        self.assertEqual(HealthCheck.objects.count(), 0)
+
+        runner.sender.client = runner.client
+        runner.flush()
+
+        self.assertEqual(runner.sender.spool.pending(), [])
+        self.assertEqual(HealthCheck.objects.count(), 2)
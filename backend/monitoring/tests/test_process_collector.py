@@ -0,0 +1,134 @@
+import os
+import tempfile
+from collections import namedtuple
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from monitoring.process_collector import ProcessCollector
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+CpuTimes = namedtuple("CpuTimes", ["user", "system"])
+MemoryInfo = namedtuple("MemoryInfo", ["rss", "vms"])
+
+CONTAINER_ID = "4f1c0e7a2b3d" + "0" * 52
+
+
+def fake_process(pid, cpu_seconds, rss_mb, create_time=1000.0):
+    proc = Mock()
+    proc.info = {
+        "pid": pid,
+        "name": f"proc{pid}",
+        "username": "root",
+        "cpu_times": CpuTimes(user=cpu_seconds, system=0.0),
+        "memory_info": MemoryInfo(rss=rss_mb * 1024 * 1024, vms=0),
+        "create_time": create_time,
+    }
+    return proc
+
+
+class ProcessCollectorTestCase(TestCase):
+    def setUp(self):
+        self.proc_root = tempfile.mkdtemp()
+        self.write_cgroup(1, "0::/init.scope\n")
+        self.write_cgroup(2, f"0::/system.slice/docker-{CONTAINER_ID}.scope\n")
+        self.write_cgroup(3, f"12:memory:/docker/{CONTAINER_ID}\n")
+
+        self.collector = ProcessCollector(top_n=2, proc_root=self.proc_root)
+        self.clock = [50.0]
+        patcher = patch("monitoring.process_collector.time.monotonic")
+        self.addCleanup(patcher.stop)
+        patcher.start().side_effect = lambda: self.clock[0]
+
+        patcher = patch("monitoring.process_collector.psutil.process_iter")
+        self.addCleanup(patcher.stop)
+        self.process_iter = patcher.start()
+
+    def write_cgroup(self, pid, content):
+        os.makedirs(os.path.join(self.proc_root, str(pid)))
+        with open(os.path.join(self.proc_root, str(pid), "cgroup"), "w") as f:
+            f.write(content)
+
+    def test_cpu_percent_from_cpu_time_deltas(self):
+        """CPU% is the CPU time delta over the wall-clock delta"""
+        self.process_iter.return_value = [
+            fake_process(1, 10.0, 100),
+            fake_process(2, 20.0, 50),
+            fake_process(3, 5.0, 300),
+        ]
+        first = self.collector.sample()
+        self.assertTrue(all(p["cpu_percent"] == 0 for p in first["top_cpu"]))
+
+        self.clock[0] += 2
+        self.process_iter.return_value = [
+            fake_process(1, 10.5, 100),
+            fake_process(2, 23.0, 50),
+            fake_process(3, 5.2, 300),
+        ]
+        snapshot = self.collector.sample()
+
+        self.assertEqual(snapshot["process_count"], 3)
+        self.assertEqual(
+            [(p["pid"], p["cpu_percent"]) for p in snapshot["top_cpu"]],
+            [(2, 150.0), (1, 25.0)],
+        )
+        self.assertEqual([p["pid"] for p in snapshot["top_memory"]], [3, 1])
+
+    def test_recycled_pid_gets_no_baseline(self):
+        """A new process reusing a PID starts from zero"""
+        self.process_iter.return_value = [fake_process(1, 100.0, 10)]
+        self.collector.sample()
+
+        self.clock[0] += 1
+        self.process_iter.return_value = [fake_process(1, 0.5, 10, create_time=2000.0)]
+        snapshot = self.collector.sample()
+
+        self.assertEqual(snapshot["top_cpu"][0]["cpu_percent"], 0)
+
+    def test_container_mapping(self):
+        """PIDs are mapped to containers through their cgroup"""
+        self.process_iter.return_value = [
+            fake_process(1, 1.0, 300),
+            fake_process(2, 1.0, 200),
+            fake_process(3, 1.0, 100),
+        ]
+        self.collector.top_n = 3
+
+        containers = {
+            p["pid"]: p["container_id"] for p in self.collector.sample()["top_memory"]
+        }
+
+        self.assertEqual(
+            containers, {1: None, 2: CONTAINER_ID[:12], 3: CONTAINER_ID[:12]}
+        )
+
+    def test_get_snapshot_reuses_recent_sample(self):
+        """Snapshots younger than min_interval are not resampled"""
+        self.process_iter.return_value = [fake_process(1, 1.0, 10)]
+        self.collector.get_snapshot()
+        self.collector.get_snapshot()
+
+        self.assertEqual(self.process_iter.call_count, 1)
+
+
+class ProcessMetricsViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @patch("monitoring.views.event_broadcaster")
+    @patch("monitoring.views.process_collector")
+    def test_sample_broadcasts_snapshot(self, mock_collector, mock_broadcaster):
+        """POST samples processes and broadcasts to the monitoring group"""
+        snapshot = {"process_count": 0, "top_cpu": [], "top_memory": []}
+        mock_collector.sample.return_value = snapshot
+
+        response = self.client.post(reverse("process-metrics"))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_broadcaster.broadcast_process_update.assert_called_once_with(snapshot)
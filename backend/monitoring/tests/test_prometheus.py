@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from monitoring.prometheus import MetricsRegistry
+from monitoring.prometheus import metrics_registry
+from monitoring.prometheus import record_docker_metrics
+from monitoring.prometheus import record_health_check
+from monitoring.prometheus import record_server_metrics
+
+
+class MetricsRegistryTestCase(TestCase):
+    def test_render_gauge_and_counter(self):
+        registry = MetricsRegistry()
+        registry.gauge("up", "Whether it is up")
+        registry.counter("checks_total", "Checks run")
+
+        registry.set("up", 1, name='we"b')
+        registry.inc("checks_total", result="success")
+        registry.inc("checks_total", 2, result="success")
+
+        output = registry.render()
+        self.assertIn("# HELP up Whether it is up\n# TYPE up gauge\n", output)
+        self.assertIn('up{name="we\\"b"} 1.0\n', output)
+        self.assertIn('checks_total{result="success"} 3.0\n', output)
+
+    def test_render_histogram(self):
+        registry = MetricsRegistry()
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+
+        for value in (0.05, 0.5, 0.7, 3):
+            registry.observe("latency_seconds", value)
+
+        output = registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1.0\n', output)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3.0\n', output)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4.0\n', output)
+        self.assertIn("latency_seconds_sum 4.25\n", output)
+        self.assertIn("latency_seconds_count 4.0\n", output)
+
+    def test_replace_drops_missing_label_sets(self):
+        registry = MetricsRegistry()
+        registry.gauge("cpu", "CPU")
+        registry.replace("cpu", {(("id", "a"),): 1, (("id", "b"),): 2})
+
+        registry.replace("cpu", {(("id", "b"),): 3})
+
+        output = registry.render()
+        self.assertNotIn('cpu{id="a"}', output)
+        self.assertIn('cpu{id="b"} 3.0', output)
+
+    def test_throttled_batch_defers_write(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        registry = MetricsRegistry(directory)
+        registry.gauge("queued", "Queued")
+        registry.set("queued", 1)
+
+        with patch.object(registry, "_persist") as persist:
+            with registry.batch(persist_after=60):
+                registry.set("queued", 2)
+            persist.assert_not_called()
+            registry.set("queued", 0)
+            persist.assert_called_once()
+
+    def test_merges_state_from_other_processes(self):
+        """Counters are summed and gauges keep the newest value across workers"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        def build():
+            registry = MetricsRegistry(directory)
+            registry.gauge("up", "Up")
+            registry.counter("checks_total", "Checks")
+            return registry
+
+        peer = build()
+        peer.set("up", 0, service="a")
+        peer.inc("checks_total", 5)
+        os.rename(
+            os.path.join(directory, f"{os.getpid()}.json"),
+            os.path.join(directory, "peer.json"),
+        )
+
+        local = build()
+        local.set("up", 1, service="a")
+        local.inc("checks_total", 2)
+
+        output = local.render()
+        self.assertIn('up{service="a"} 1.0', output)
+        self.assertIn("checks_total 7.0", output)
+
+    def test_summed_gauges_add_up_across_processes(self):
+        """An idle worker's zero does not hide another worker's queue"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        def build():
+            registry = MetricsRegistry(directory)
+            registry.gauge("queued", "Queued", summed=True)
+            return registry
+
+        peer = build()
+        peer.set("queued", 3)
+        os.rename(
+            os.path.join(directory, f"{os.getpid()}.json"),
+            os.path.join(directory, "peer.json"),
+        )
+
+        local = build()
+        local.set("queued", 0)
+
+        self.assertIn("queued 3.0", local.render())
+
+
+class RecordersTestCase(TestCase):
+    def test_collector_samples_published(self):
+        record_server_metrics({"cpu_percent": 12.5, "memory_used_mb": 2})
+        record_docker_metrics(
+            [{"container_id": "abc", "container_name": "web", "cpu_percent": 4.0}]
+        )
+        service = SimpleNamespace(id=7, name="api", service_type="http")
+        record_health_check(service, True, 0.2)
+
+        output = metrics_registry.render()
+        self.assertIn("sauron_host_cpu_percent 12.5", output)
+        self.assertIn("sauron_host_memory_used_bytes 2097152.0", output)
+        self.assertIn(
+            'sauron_container_cpu_percent{container_id="abc",container_name="web"} 4.0',
+            output,
+        )
+        self.assertIn(
+            'sauron_service_up{service_id="7",service_name="api",service_type="http"} 1.0',
+            output,
+        )
+        self.assertIn(
+            "sauron_service_check_duration_seconds_bucket{"
+            'service_id="7",service_name="api",service_type="http",le="0.25"}',
+            output,
+        )
+
+
+class PrometheusMetricsViewTestCase(TestCase):
+    def test_scrape(self):
+        record_server_metrics({"cpu_percent": 33.0})
+
+        response = self.client.get(reverse("prometheus-metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        self.assertIn(b"sauron_host_cpu_percent 33.0", response.content)
+
+    @override_settings(METRICS_SCRAPE_TOKEN="secret")
+    def test_scrape_token(self):
+        url = reverse("prometheus-metrics")
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
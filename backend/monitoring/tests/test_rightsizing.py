@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from monitoring.compression import metrics_compressor
+from monitoring.models import DockerMetrics
+from monitoring.rightsizing import group_percentiles
+from monitoring.rightsizing import rightsizing_analyzer
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+DOCKER_SAMPLE = {
+    "network_rx_mb": 0,
+    "network_tx_mb": 0,
+    "block_read_mb": 0,
+    "block_write_mb": 0,
+}
+
+
+class GroupPercentilesTestCase(APITestCase):
+    def test_matches_numpy_per_series(self):
+        rng = np.random.default_rng(1)
+        series = rng.integers(0, 4, 500)
+        values = rng.normal(50, 10, 500)
+
+        result = group_percentiles(series, values, (50, 95, 99))
+
+        for index in range(4):
+            np.testing.assert_allclose(
+                result[:, index], np.percentile(values[series == index], [50, 95, 99])
+            )
+
+    def test_single_point_and_empty_series(self):
+        result = group_percentiles(np.array([0, 2]), np.array([3.0, 7.0]), (50, 99))
+
+        np.testing.assert_array_equal(result[:, 0], [3.0, 3.0])
+        self.assertTrue(np.isnan(result[:, 1]).all())
+        np.testing.assert_array_equal(result[:, 2], [7.0, 7.0])
+
+
+class RightsizingAnalyzerTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        containers = {
+            # name: (cpu_percent, memory_usage_mb, memory_limit_mb)
+            "idle": (5, 100, 2048),
+            "tight": (150, 480, 512),
+            "fine": (40, 300, 512),
+        }
+        samples = []
+        for hour in range(30):
+            for name, (cpu, memory, limit) in containers.items():
+                samples.append(
+                    DockerMetrics(
+                        **DOCKER_SAMPLE,
+                        container_id=name,
+                        container_name=name,
+                        cpu_percent=cpu + hour % 3,
+                        memory_usage_mb=memory + hour % 5,
+                        memory_limit_mb=limit,
+                        timestamp=now - timedelta(hours=30 - hour),
+                    )
+                )
+        DockerMetrics.objects.bulk_create(samples)
+
+    def by_name(self, recommendations):
+        return {c["container_name"]: c for c in recommendations["containers"]}
+
+    def test_flags_provisioning(self):
+        containers = self.by_name(rightsizing_analyzer.refresh())
+
+        self.assertEqual(containers["idle"]["status"], "over_provisioned")
+        self.assertEqual(containers["tight"]["status"], "under_provisioned")
+        self.assertEqual(containers["fine"]["status"], "ok")
+        self.assertEqual(containers["idle"]["memory"]["max"], 104)
+        self.assertEqual(containers["idle"]["memory"]["recommended_limit_mb"], 128)
+        self.assertEqual(containers["tight"]["memory"]["recommended_limit_mb"], 640)
+        self.assertEqual(containers["tight"]["cpu"]["recommended_cpus"], 1.9)
+        self.assertEqual(containers["tight"]["cpu"]["recommended_shares"], 1946)
+
+    def test_compressed_hours_included(self):
+        before = self.by_name(rightsizing_analyzer.refresh())
+        cache.clear()
+
+        metrics_compressor.compress_before(timezone.now() - timedelta(hours=12))
+        after = self.by_name(rightsizing_analyzer.refresh())
+
+        self.assertEqual(after["fine"]["hours"], before["fine"]["hours"])
+        self.assertEqual(after["fine"]["memory"], before["fine"]["memory"])
+
+    def test_settled_hours_not_read_again(self):
+        rightsizing_analyzer.refresh()
+        DockerMetrics.objects.filter(
+            timestamp__lt=timezone.now() - timedelta(hours=3)
+        ).delete()
+        DockerMetrics.objects.create(
+            **DOCKER_SAMPLE,
+            container_id="fine",
+            container_name="fine",
+            cpu_percent=40,
+            memory_usage_mb=500,
+            memory_limit_mb=512,
+        )
+
+        containers = self.by_name(rightsizing_analyzer.refresh())
+
+        self.assertEqual(containers["fine"]["samples"], 31)
+        self.assertEqual(containers["fine"]["memory"]["max"], 500)
+        self.assertEqual(containers["fine"]["status"], "under_provisioned")
+
+    def test_endpoint_filters_by_status(self):
+        response = self.client.get(
+            reverse("rightsizing"), {"status": "under_provisioned"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [c["container_name"] for c in response.data["containers"]], ["tight"]
+        )
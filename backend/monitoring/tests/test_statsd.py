@@ -0,0 +1,158 @@
+import asyncio
+import socket
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.urls import reverse
+from monitoring.management.commands.statsd_benchmark import run_benchmark
+from monitoring.models import CustomMetric
+from monitoring.statsd import StatsdAggregator
+from monitoring.statsd import StatsdServer
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+def rows_by_name(rows):
+    return {row.name: row for row in rows}
+
+
+class StatsdAggregatorTestCase(TestCase):
+    def setUp(self):
+        self.aggregator = StatsdAggregator()
+
+    def test_counters_scale_by_sample_rate(self):
+        self.aggregator.ingest(b"requests:1|c\nrequests:2|c|@0.5")
+
+        row = rows_by_name(self.aggregator.flush(10))["requests"]
+
+        self.assertEqual(row.metric_type, "counter")
+        self.assertEqual(row.value, 5.0)
+        self.assertEqual(row.count, 2)
+        self.assertEqual(row.interval, 10)
+
+    def test_gauges_apply_deltas_and_persist(self):
+        self.aggregator.ingest(b"queue:10|g\nqueue:+5|g\nqueue:-3|g")
+        self.assertEqual(rows_by_name(self.aggregator.flush(10))["queue"].value, 12.0)
+
+        row = rows_by_name(self.aggregator.flush(10))["queue"]
+
+        self.assertEqual(row.value, 12.0)
+        self.assertEqual(row.count, 0)
+
+    def test_idle_gauges_expire(self):
+        aggregator = StatsdAggregator(gauge_expire_intervals=2)
+        aggregator.ingest(b"queue:1|g\nworkers:4|g")
+        aggregator.flush(10)
+
+        aggregator.ingest(b"workers:3|g")
+        idle_once = rows_by_name(aggregator.flush(10))
+        expired = rows_by_name(aggregator.flush(10))
+
+        self.assertEqual(set(idle_once), {"queue", "workers"})
+        self.assertEqual(set(expired), {"workers"})
+        self.assertNotIn(b"queue", aggregator.gauge_idle)
+
+    def test_timer_percentiles(self):
+        self.aggregator.ingest(
+            b"\n".join(b"latency:%d|ms" % value for value in range(1, 101))
+        )
+
+        row = rows_by_name(self.aggregator.flush(10))["latency"]
+
+        self.assertEqual(row.metric_type, "timer")
+        self.assertEqual((row.min, row.max, row.count), (1.0, 100.0, 100))
+        self.assertAlmostEqual(row.value, 50.5)
+        self.assertAlmostEqual(row.p50, 50.5)
+        self.assertAlmostEqual(row.p99, 99.01)
+
+    def test_sets_count_unique_members(self):
+        self.aggregator.ingest(b"users:alice|s\nusers:bob|s\nusers:alice|s")
+
+        self.assertEqual(rows_by_name(self.aggregator.flush(10))["users"].value, 2.0)
+
+    def test_tags_split_series(self):
+        self.aggregator.ingest(b"hits:1|c|#env:prod,region:eu\nhits:1|c|#env:dev")
+
+        rows = self.aggregator.flush(10)
+
+        self.assertEqual(
+            sorted(row.tags["env"] for row in rows if row.name == "hits"),
+            ["dev", "prod"],
+        )
+        self.assertIn({"env": "prod", "region": "eu"}, [row.tags for row in rows])
+
+    def test_bad_lines_skipped(self):
+        self.aggregator.ingest(b"nope\nx:abc|c\ny:1|zz\nok:1|c")
+
+        self.assertEqual(self.aggregator.bad_lines, 3)
+        self.assertEqual([row.name for row in self.aggregator.flush(10)], ["ok"])
+
+    def test_flush_starts_new_interval(self):
+        self.aggregator.ingest(b"requests:1|c|@0.1\nlatency:3|ms")
+        self.aggregator.flush(10)
+
+        self.assertEqual(self.aggregator.flush(10), [])
+
+
+class StatsdServerTestCase(TransactionTestCase):
+    """A listener receiving real datagrams and writing aggregates"""
+
+    def setUp(self):
+        self.server = StatsdServer("127.0.0.1", 0, flush_interval=3600)
+        self.thread = threading.Thread(target=asyncio.run, args=(self.server.serve(),))
+        self.thread.start()
+        self.assertTrue(self.server.ready.wait(5))
+
+    def test_aggregates_written_on_flush(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for _ in range(10):
+            sock.sendto(b"jobs:1|c\nduration:20|ms", ("127.0.0.1", self.server.port))
+        sock.close()
+        deadline = time.monotonic() + 5
+        while self.server.aggregator.packets < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.server.stop()
+        self.thread.join(5)
+
+        self.assertEqual(
+            dict(CustomMetric.objects.values_list("name", "value")),
+            {"jobs": 10.0, "duration": 20.0},
+        )
+
+
+class StatsdBenchmarkTestCase(TestCase):
+    def test_benchmark_counts_packets(self):
+        result = run_benchmark(2000, senders=1)
+
+        self.assertEqual(result["sent"], 2000)
+        self.assertGreater(result["received"], 0)
+        self.assertEqual(result["rows"], 4)
+
+
+class CustomMetricsAPITestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+        CustomMetric.objects.create(
+            name="jobs", metric_type="counter", interval=10, value=3
+        )
+        CustomMetric.objects.create(
+            name="latency", metric_type="timer", interval=10, value=20, p99=35
+        )
+
+    def test_filter_by_name(self):
+        response = self.client.get(reverse("custom-metrics"), {"name": "latency"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["p99"], 35)
+
+    def test_columnar_format(self):
+        response = self.client.get(reverse("custom-metrics"), {"format": "columnar"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data["name"]), ["jobs", "latency"])
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from monitoring.models import DockerMetrics
+from monitoring.models import ServerMetrics
+from monitoring.summary import MetricsSummaryEngine
+
+
+def create_docker_metrics(container_id, memory_usage_mb, cpu_percent, age_seconds):
+    metrics = DockerMetrics.objects.create(
+        container_id=container_id,
+        container_name=f"{container_id}-name",
+        cpu_percent=cpu_percent,
+        memory_usage_mb=memory_usage_mb,
+        memory_limit_mb=1024,
+        network_rx_mb=0,
+        network_tx_mb=0,
+        block_read_mb=0,
+        block_write_mb=0,
+    )
+    DockerMetrics.objects.filter(id=metrics.id).update(
+        timestamp=timezone.now() - timedelta(seconds=age_seconds)
+    )
+    return metrics
+
+
+class MetricsSummaryEngineTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.engine = MetricsSummaryEngine(ttl=60)
+        ServerMetrics.objects.create(
+            cpu_percent=25.5,
+            memory_percent=60.2,
+            memory_used_mb=1024,
+            memory_total_mb=2048,
+            disk_percent=45.8,
+            disk_used_gb=50,
+            disk_total_gb=100,
+            network_rx_mb=0,
+            network_tx_mb=0,
+            load_average_1m=1.2,
+            load_average_5m=1.1,
+            load_average_15m=1.0,
+        )
+
+    @patch("monitoring.summary.container_inventory")
+    def test_totals_use_latest_sample_per_container(self, mock_inventory):
+        """Totals sum the newest sample of each container, not every sample"""
+        mock_inventory.list_containers.return_value = []
+        create_docker_metrics("aaa", 100, 10, age_seconds=120)
+        create_docker_metrics("aaa", 200, 20, age_seconds=60)
+        create_docker_metrics("aaa", 300, 30, age_seconds=5)
+        create_docker_metrics("bbb", 50, 5, age_seconds=30)
+        create_docker_metrics("ccc", 999, 99, age_seconds=2 * 3600)
+
+        summary = self.engine.build_summary()
+
+        self.assertEqual(summary["total_memory_usage"], 350)
+        self.assertEqual(summary["total_cpu_usage"], 35)
+        self.assertEqual(summary["current_cpu"], 25.5)
+        self.assertEqual(summary["current_disk"], 45.8)
+
+    @patch("monitoring.summary.metrics_collector")
+    @patch("monitoring.summary.container_inventory")
+    def test_uses_stored_server_sample(self, mock_inventory, mock_collector):
+        """A recent stored host sample avoids a blocking collection"""
+        mock_inventory.list_containers.return_value = []
+
+        self.engine.build_summary()
+
+        mock_collector.collect_server_metrics.assert_not_called()
+
+    @patch("monitoring.summary.container_inventory")
+    def test_container_counts(self, mock_inventory):
+        """Container counts come from the container listing"""
+        mock_inventory.list_containers.return_value = [
+            {"id": "a", "status": "running", "ports": ["80:80"]},
+            {"id": "b", "status": "up 2 hours (healthy)", "ports": []},
+            {"id": "c", "status": "exited", "ports": []},
+        ]
+
+        summary = self.engine.build_summary()
+
+        self.assertEqual(summary["total_containers"], 3)
+        self.assertEqual(summary["running_containers"], 2)
+        self.assertEqual(summary["healthy_containers"], 1)
+        self.assertEqual(summary["containers_with_ports"], 1)
+
+    @patch("monitoring.summary.container_inventory")
+    def test_summary_is_cached(self, mock_inventory):
+        """Repeated polls are served from the cache until invalidated"""
+        mock_inventory.list_containers.return_value = []
+
+        self.engine.get_summary()
+        self.engine.get_summary()
+        self.assertEqual(mock_inventory.list_containers.call_count, 1)
+
+        self.engine.invalidate()
+        self.engine.get_summary()
+        self.assertEqual(mock_inventory.list_containers.call_count, 2)
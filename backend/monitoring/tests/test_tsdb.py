@@ -0,0 +1,239 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from monitoring.metrics_collector import MetricsCollector
+from monitoring.models import ServerMetrics
+from monitoring.tsdb import TimeSeriesStore
+from monitoring.tsdb import get_tsdb
+from monitoring.tsdb import read_columns
+from monitoring.tsdb import to_ns
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+SERVER_SAMPLE = {
+    "cpu_percent": 25.5,
+    "memory_percent": 60.2,
+    "memory_used_mb": 1024,
+    "memory_total_mb": 2048,
+    "disk_percent": 45.8,
+    "disk_used_gb": 50,
+    "disk_total_gb": 100,
+    "network_rx_mb": 10.5,
+    "network_tx_mb": 8.2,
+    "load_average_1m": 1.2,
+    "load_average_5m": 1.1,
+    "load_average_15m": 1.0,
+}
+
+
+class TimeSeriesStoreTestCase(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def fill(self, store, count=300, start=1000):
+        for i in range(count):
+            store.append("server", start + i, {"cpu": i, "load": i / 2})
+
+    def test_range_read(self):
+        """Reads return the samples in [start, end)"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store)
+
+        records = store.read("server", 1010, 1015)
+
+        self.assertEqual(records["cpu"].tolist(), [10, 11, 12, 13, 14])
+        self.assertEqual(records["ts"][0], to_ns(1010))
+
+    def test_read_within_segment_is_zero_copy(self):
+        """A range inside one segment is a view of the memory map"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store)
+
+        records = store.read("server", 1001, 1010)
+        segment = store.get_series("server").segments[0]
+
+        self.assertTrue(np.shares_memory(records, segment.records()))
+
+    def test_read_across_segments(self):
+        """Ranges spanning segment boundaries are stitched together"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store)
+
+        records = store.read("server", 1050, 1130)
+
+        self.assertEqual(len(store.get_series("server").segments), 6)
+        self.assertEqual(records["cpu"].tolist(), list(range(50, 130)))
+
+    def test_out_of_order_sample_rejected(self):
+        store = TimeSeriesStore(self.root)
+        store.append("server", 2000, {"cpu": 1})
+
+        with self.assertRaises(ValueError):
+            store.append("server", 1999, {"cpu": 2})
+
+    def test_reopen_rebuilds_index(self):
+        """A new store instance finds existing series and segments"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store)
+
+        reopened = TimeSeriesStore(self.root, segment_seconds=60)
+
+        self.assertEqual(reopened.series_names(), ["server"])
+        self.assertEqual(len(reopened.read("server", 0)), 300)
+        self.assertEqual(reopened.created_ns, store.created_ns)
+
+    def test_sees_appends_from_other_instances(self):
+        """Readers pick up samples written by another process"""
+        writer = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(writer, count=10)
+        reader = TimeSeriesStore(self.root, segment_seconds=60)
+        self.assertEqual(len(reader.read("server", 0)), 10)
+
+        writer.append("server", 5000, {"cpu": 1, "load": 1})
+
+        self.assertEqual(len(reader.read("server", 0)), 11)
+
+    def test_torn_record_truncated(self):
+        """A partially written trailing record is dropped on open"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store, count=5)
+        segment = store.get_series("server").segments[0]
+        with open(segment.path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        reopened = TimeSeriesStore(self.root, segment_seconds=60)
+
+        self.assertEqual(len(reopened.read("server", 0)), 5)
+        store.append("server", 2000, {"cpu": 1, "load": 1})
+
+    def test_new_fields_extend_layout(self):
+        """A field added to an existing series is kept from then on"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        reader = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store, count=2)
+        self.assertEqual(len(reader.read("server", 0)), 2)
+
+        store.append("server", 1002, {"cpu": 2, "load": 1, "errors": 4})
+        store.append("server", 1003, {"cpu": 3, "load": 1, "errors": 5})
+
+        for current in (store, reader, TimeSeriesStore(self.root, 60)):
+            records = current.read("server", 0)
+            self.assertEqual(records["cpu"].tolist(), [0, 1, 2, 3])
+            self.assertEqual(np.isnan(records["errors"][:2]).tolist(), [True, True])
+            self.assertEqual(records["errors"][2:].tolist(), [4, 5])
+        self.assertEqual(len(store.get_series("server").segments), 2)
+
+    def test_prune_deletes_old_segments(self):
+        """Expired segments go, and so do series left without any"""
+        store = TimeSeriesStore(self.root, segment_seconds=60)
+        reader = TimeSeriesStore(self.root, segment_seconds=60)
+        self.fill(store)
+        store.append("stale", 1000, {"cpu": 1})
+        self.assertEqual(len(reader.read("server", 0)), 300)
+
+        removed = store.prune(1120)
+
+        self.assertEqual(removed, 3)
+        self.assertEqual(store.series_names(), ["server"])
+        self.assertEqual(reader.series_names(), ["server"])
+        self.assertEqual(reader.read("server", 0)["cpu"][0], 80)
+        self.assertEqual(len(reader.read("stale", 0)), 0)
+
+    def test_retention_limits_coverage(self):
+        store = TimeSeriesStore(self.root, retention_hours=1)
+        store.created_ns = 0
+
+        self.assertTrue(store.covers(timezone.now() - timedelta(minutes=30)))
+        self.assertFalse(store.covers(timezone.now() - timedelta(hours=2)))
+
+    def test_read_columns_merges_series_newest_first(self):
+        store = TimeSeriesStore(self.root)
+        store.append("docker.a", 10, {"cpu": 1}, {"container_id": "a"})
+        store.append("docker.b", 11, {"cpu": 2}, {"container_id": "b"})
+        store.append("docker.a", 12, {"cpu": None}, {"container_id": "a"})
+
+        columns = read_columns(
+            store,
+            store.series_names("docker."),
+            0,
+            ["timestamp", "container_id", "cpu"],
+        )
+
+        self.assertEqual(columns["container_id"], ["a", "b", "a"])
+        self.assertEqual(columns["cpu"], [None, 2.0, 1.0])
+        self.assertEqual(columns["timestamp"][0].timestamp(), 12)
+
+
+class TimeSeriesViewsTestCase(APITestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(METRICS_TSDB_PATH=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.client.force_authenticate(user=self.user)
+
+    def test_saved_metrics_mirrored_to_store(self):
+        collector = MetricsCollector()
+        collector.save_server_metrics(SERVER_SAMPLE)
+        collector.save_docker_metrics(
+            [
+                {
+                    "container_id": "abc123",
+                    "container_name": "web",
+                    "cpu_percent": 5.0,
+                    "memory_usage_mb": 64,
+                    "memory_limit_mb": 512,
+                    "network_rx_mb": 1,
+                    "network_tx_mb": 2,
+                    "block_read_mb": 3,
+                    "block_write_mb": 4,
+                }
+            ]
+        )
+
+        store = get_tsdb()
+        self.assertEqual(store.series_names(), ["docker.abc123", "server"])
+        self.assertEqual(
+            store.get_series("docker.abc123").labels["container_name"], "web"
+        )
+        self.assertEqual(store.read("server", 0)["cpu_percent"].tolist(), [25.5])
+
+    def test_history_served_from_store(self):
+        """History comes from the store once it covers the requested window"""
+        collector = MetricsCollector()
+        collector.save_server_metrics(SERVER_SAMPLE)
+        ServerMetrics.objects.all().delete()
+        get_tsdb().created_ns = to_ns(timezone.now() - timedelta(hours=2))
+
+        response = self.client.get(reverse("server-metrics"), {"hours": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["cpu_percent"], 25.5)
+        self.assertNotIn("id", response.data[0])
+
+        response = self.client.get(
+            reverse("server-metrics"), {"hours": 1, "format": "columnar"}
+        )
+        self.assertEqual(response.json()["load_average_15m"], [1.0])
+
+    def test_falls_back_to_database_before_coverage(self):
+        """Windows older than the store are read from the database"""
+        collector = MetricsCollector()
+        collector.save_server_metrics(SERVER_SAMPLE)
+
+        response = self.client.get(reverse("server-metrics"), {"hours": 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("id", response.data[0])
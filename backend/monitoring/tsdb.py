@@ -0,0 +1,503 @@
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+SEGMENT_SUFFIX = ".seg"
+META_FILE = "meta.json"
+SERIES_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+SERVER_SERIES = "server"
+DOCKER_SERIES_PREFIX = "docker."
+
+
+def to_ns(value) -> int:
+    """Convert a datetime or epoch seconds to integer nanoseconds"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=dt_timezone.utc)
+        return int(value.timestamp() * NS_PER_SECOND)
+    return int(value * NS_PER_SECOND)
+
+
+def from_ns(value: int) -> datetime:
+    """Convert integer nanoseconds to an aware UTC datetime"""
+    return datetime.fromtimestamp(int(value) / NS_PER_SECOND, tz=dt_timezone.utc)
+
+
+def record_dtype(fields: Sequence[str]) -> np.dtype:
+    return np.dtype([("ts", "<i8")] + [(field, "<f8") for field in fields])
+
+
+def _conform(records: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Records of an older layout, with NaN for the fields added since"""
+    if records.dtype == dtype:
+        return records
+    conformed = np.empty(len(records), dtype=dtype)
+    for field in dtype.names:
+        if field in records.dtype.names:
+            conformed[field] = records[field]
+        else:
+            conformed[field] = np.nan
+    return conformed
+
+
+class Segment:
+    """One append-only file of fixed-width records covering a time window"""
+
+    def __init__(self, path: Path, start_ns: int, dtype: np.dtype):
+        self.path = path
+        self.start_ns = start_ns
+        self.dtype = dtype
+        self.count = 0
+        self.first_ns: Optional[int] = None
+        self.last_ns: Optional[int] = None
+        self._map: Optional[np.memmap] = None
+        self._map_count = 0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        size = self.path.stat().st_size
+        if size % self.dtype.itemsize:
+            # Drop a torn trailing record left by an interrupted write
+            size -= size % self.dtype.itemsize
+            os.truncate(self.path, size)
+        self.count = size // self.dtype.itemsize
+        if self.count:
+            records = self.records()
+            self.first_ns = int(records["ts"][0])
+            self.last_ns = int(records["ts"][-1])
+
+    def refresh(self):
+        """Pick up records appended by other processes"""
+        try:
+            count = self.path.stat().st_size // self.dtype.itemsize
+        except FileNotFoundError:
+            return
+        if count != self.count:
+            self.count = count
+            records = self.records()
+            self.first_ns = int(records["ts"][0])
+            self.last_ns = int(records["ts"][-1])
+
+    def append(self, records: np.ndarray):
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+        if self.first_ns is None:
+            self.first_ns = int(records["ts"][0])
+        self.last_ns = int(records["ts"][-1])
+        self.count += len(records)
+
+    def records(self) -> np.ndarray:
+        """Memory-mapped view of every record in the segment"""
+        if self.count == 0:
+            return np.empty(0, dtype=self.dtype)
+        if self._map is None or self._map_count != self.count:
+            self._map = np.memmap(
+                self.path, dtype=self.dtype, mode="r", shape=(self.count,)
+            )
+            self._map_count = self.count
+        return self._map
+
+    def slice(self, start_ns: int, end_ns: int) -> np.ndarray:
+        """Zero-copy view of the records in [start_ns, end_ns)"""
+        records = self.records()
+        timestamps = records["ts"]
+        lo = np.searchsorted(timestamps, start_ns, side="left")
+        hi = np.searchsorted(timestamps, end_ns, side="left")
+        return records[lo:hi]
+
+
+class Series:
+    """A named series and its segment index
+
+    Each segment keeps the field layout it was created with. Fields that
+    show up later extend the layout from the next new segment on; records
+    of older segments read back with NaN for them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.labels: Dict[str, str] = {}
+        # (start of the first segment using it, fields), oldest first
+        self.layouts: List[Tuple[int, List[str]]] = []
+        self.segments: List[Segment] = []
+        self._scanned_mtime = None
+        self.refresh()
+
+    @property
+    def fields(self) -> List[str]:
+        return self.layouts[-1][1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return record_dtype(self.fields)
+
+    def dtype_at(self, start_ns: int) -> np.dtype:
+        """Record layout of the segment starting at ``start_ns``"""
+        for layout_start, fields in reversed(self.layouts):
+            if layout_start <= start_ns:
+                return record_dtype(fields)
+        return record_dtype(self.layouts[0][1])
+
+    def _load_meta(self):
+        with open(self.path / META_FILE) as f:
+            meta = json.load(f)
+        self.labels = meta.get("labels", {})
+        layouts = meta.get("layouts") or [{"start": 0, "fields": meta["fields"]}]
+        self.layouts = [(layout["start"], layout["fields"]) for layout in layouts]
+
+    def write_meta(self):
+        meta = {
+            "fields": self.fields,
+            "labels": self.labels,
+            "layouts": [
+                {"start": start, "fields": fields} for start, fields in self.layouts
+            ],
+        }
+        tmp_path = self.path / f"{META_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.path / META_FILE)
+
+    def extend(self, fields: Sequence[str], start_ns: int):
+        """Use a wider layout for segments starting at or after ``start_ns``"""
+        self.layouts.append((start_ns, self.fields + sorted(fields)))
+        self.write_meta()
+
+    def refresh(self):
+        """Sync the segment index with files written by other processes"""
+        mtime = self.path.stat().st_mtime_ns
+        if mtime != self._scanned_mtime:
+            self._scanned_mtime = mtime
+            self._load_meta()
+            present = set(self.path.glob(f"*{SEGMENT_SUFFIX}"))
+            # Drop segments pruned by other processes
+            self.segments = [
+                segment
+                for segment in self.segments
+                if segment.path in present or not segment.count
+            ]
+            known = {segment.path for segment in self.segments}
+            for segment_path in present:
+                if segment_path not in known:
+                    start_ns = int(segment_path.stem)
+                    segment = Segment(segment_path, start_ns, self.dtype_at(start_ns))
+                    self.segments.append(segment)
+            self.segments.sort(key=lambda segment: segment.start_ns)
+        if self.segments:
+            self.segments[-1].refresh()
+
+    @property
+    def first_ns(self) -> Optional[int]:
+        for segment in self.segments:
+            if segment.count:
+                return segment.first_ns
+        return None
+
+    @property
+    def last_ns(self) -> Optional[int]:
+        for segment in reversed(self.segments):
+            if segment.count:
+                return segment.last_ns
+        return None
+
+    def segment_for(self, start_ns: int) -> Segment:
+        # A segment opened by a layout change starts inside its window
+        if self.segments and self.segments[-1].start_ns >= start_ns:
+            return self.segments[-1]
+        segment = Segment(
+            self.path / f"{start_ns}{SEGMENT_SUFFIX}", start_ns, self.dtype
+        )
+        self.segments.append(segment)
+        return segment
+
+    def overlapping(self, start_ns: int, end_ns: int) -> List[Segment]:
+        return [
+            segment
+            for segment in self.segments
+            if segment.count
+            and segment.first_ns < end_ns
+            and segment.last_ns >= start_ns
+        ]
+
+
+class TimeSeriesStore:
+    """Embedded time-series storage for high-frequency samples
+
+    Each series lives in its own directory as a set of append-only segment
+    files, one per ``segment_seconds`` window. A record is an int64
+    nanosecond timestamp followed by one float64 per field, so segments
+    can be memory-mapped and sliced with a binary search. Range reads
+    inside a single segment return views of the mapping without copying.
+    A sample with fields its series lacks starts a new segment with the
+    wider layout. With ``retention_hours`` set, segments older than that
+    are deleted as samples are appended.
+    """
+
+    def __init__(self, root, segment_seconds: int = 3600, retention_hours: float = 0):
+        self.root = Path(root)
+        self.segment_ns = segment_seconds * NS_PER_SECOND
+        self.retention_hours = retention_hours
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.created_ns = self._load_created()
+        self._series: Dict[str, Series] = {}
+        self._scanned_mtime = None
+        self._pruned_at = float("-inf")
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _load_created(self) -> int:
+        """When the store started recording, persisted across restarts"""
+        path = self.root / "store.json"
+        try:
+            with open(path) as f:
+                return json.load(f)["created"]
+        except FileNotFoundError:
+            created = to_ns(datetime.now(dt_timezone.utc))
+            with open(path, "w") as f:
+                json.dump({"created": created}, f)
+            return created
+
+    def _scan(self):
+        """Open series created since the last scan, possibly by other processes"""
+        mtime = self.root.stat().st_mtime_ns
+        if mtime == self._scanned_mtime:
+            return
+        self._scanned_mtime = mtime
+        for name in [name for name in self._series if not (self.root / name).exists()]:
+            del self._series[name]
+        for meta_path in self.root.glob(f"*/{META_FILE}"):
+            if meta_path.parent.name not in self._series:
+                self._open_series(meta_path.parent.name)
+
+    def _open_series(self, name: str) -> Optional[Series]:
+        try:
+            series = Series(self.root / name)
+        except FileNotFoundError:
+            return None
+        self._series[name] = series
+        return series
+
+    def _get(self, name: str) -> Optional[Series]:
+        series = self._series.get(name) or self._open_series(name)
+        if series is not None:
+            try:
+                series.refresh()
+            except FileNotFoundError:
+                # Pruned by another process
+                del self._series[name]
+                return None
+        return series
+
+    def _create_series(
+        self, name: str, fields: Sequence[str], labels: Dict[str, str]
+    ) -> Series:
+        if not SERIES_NAME_RE.match(name):
+            raise ValueError(f"Invalid series name: {name}")
+        path = self.root / name
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / META_FILE, "w") as f:
+            json.dump({"fields": list(fields), "labels": labels}, f)
+        series = Series(path)
+        self._series[name] = series
+        return series
+
+    def series_names(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            self._scan()
+            return sorted(name for name in self._series if name.startswith(prefix))
+
+    def get_series(self, name: str) -> Optional[Series]:
+        with self._lock:
+            return self._get(name)
+
+    def append(
+        self,
+        name: str,
+        timestamp,
+        values: Dict[str, float],
+        labels: Optional[Dict[str, str]] = None,
+    ):
+        """Append one sample; samples must arrive in timestamp order"""
+        with self._lock:
+            series = self._get(name) or self._create_series(
+                name, sorted(values), labels or {}
+            )
+            ts = to_ns(timestamp)
+            if series.last_ns is not None and ts < series.last_ns:
+                raise ValueError(f"Out-of-order sample for series {name}")
+
+            start_ns = ts - ts % self.segment_ns
+            added = set(values) - set(series.fields)
+            if added:
+                last = series.segments[-1] if series.segments else None
+                if last is not None and last.start_ns >= start_ns:
+                    start_ns = max(ts, last.start_ns + 1)
+                series.extend(added, start_ns)
+
+            record = np.zeros(1, dtype=series.dtype)
+            record["ts"] = ts
+            for field in series.fields:
+                value = values.get(field)
+                record[field] = np.nan if value is None else value
+
+            segment = series.segment_for(start_ns)
+            segment.append(record)
+
+        self.prune_expired()
+
+    def prune(self, before) -> int:
+        """Delete segments holding only samples older than ``before``
+
+        A series left without segments is removed. Returns the number of
+        segments deleted.
+        """
+        cutoff = to_ns(before)
+        removed = 0
+        with self._lock:
+            self._scan()
+            for name in list(self._series):
+                series = self._get(name)
+                if series is None:
+                    continue
+                expired = [
+                    segment
+                    for segment in series.segments
+                    if segment.count and segment.last_ns < cutoff
+                ]
+                for segment in expired:
+                    segment.path.unlink(missing_ok=True)
+                removed += len(expired)
+                series.segments = [s for s in series.segments if s not in expired]
+                if not series.segments:
+                    shutil.rmtree(series.path, ignore_errors=True)
+                    del self._series[name]
+        return removed
+
+    def prune_expired(self) -> int:
+        """Apply the retention, at most once per segment window"""
+        if not self.retention_hours:
+            return 0
+        now = time.monotonic()
+        if now - self._pruned_at < self.segment_ns / NS_PER_SECOND:
+            return 0
+        self._pruned_at = now
+        removed = self.prune(time.time() - self.retention_hours * 3600)
+        if removed:
+            logger.info(f"Removed {removed} expired time-series segments")
+        return removed
+
+    def covers(self, since) -> bool:
+        """Whether every sample from ``since`` onwards is held here"""
+        since_ns = to_ns(since)
+        if self.retention_hours:
+            retained_ns = to_ns(time.time() - self.retention_hours * 3600)
+            if since_ns < retained_ns:
+                return False
+        return self.created_ns <= since_ns
+
+    def read(self, name: str, start, end=None) -> np.ndarray:
+        """Records of a series in [start, end) as a structured array
+
+        A range that falls inside one segment is returned as a read-only
+        view of the memory map.
+        """
+        start_ns = to_ns(start)
+        end_ns = to_ns(end) if end is not None else np.iinfo(np.int64).max
+        with self._lock:
+            series = self._get(name)
+            if series is None:
+                return np.empty(0, dtype=[("ts", "<i8")])
+            dtype = series.dtype
+            parts = [
+                segment.slice(start_ns, end_ns)
+                for segment in series.overlapping(start_ns, end_ns)
+            ]
+        parts = [_conform(part, dtype) for part in parts if len(part)]
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+
+def _series_column(series: Series, records: np.ndarray, field: str) -> np.ndarray:
+    if field in records.dtype.names:
+        return records[field]
+    return np.full(len(records), series.labels.get(field), dtype=object)
+
+
+def read_columns(
+    store: TimeSeriesStore, names: Sequence[str], start, fields: Sequence[str]
+) -> Dict[str, List]:
+    """Merge series into newest-first columns
+
+    ``fields`` may name record fields, series labels or ``timestamp``.
+    Missing values (NaN) are returned as None.
+    """
+    parts = []
+    for name in names:
+        records = store.read(name, start)
+        if len(records):
+            parts.append((store.get_series(name), records))
+
+    if not parts:
+        return {field: [] for field in fields}
+
+    timestamps = np.concatenate([records["ts"] for _, records in parts])
+    order = np.argsort(timestamps, kind="stable")[::-1]
+
+    columns = {}
+    for field in fields:
+        if field == "timestamp":
+            columns[field] = [from_ns(ts) for ts in timestamps[order]]
+            continue
+        values = np.concatenate(
+            [_series_column(series, records, field) for series, records in parts]
+        )
+        columns[field] = [
+            None if isinstance(value, float) and math.isnan(value) else value
+            for value in values[order].tolist()
+        ]
+    return columns
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tsdb() -> Optional[TimeSeriesStore]:
+    """The configured store, or None when METRICS_TSDB_PATH is not set"""
+    global _store
+    path = getattr(settings, "METRICS_TSDB_PATH", "")
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.root != Path(path):
+            _store = TimeSeriesStore(
+                path,
+                getattr(settings, "METRICS_TSDB_SEGMENT_SECONDS", 3600),
+                getattr(settings, "METRICS_TSDB_RETENTION_HOURS", 0),
+            )
+        return _store
@@ -28,14 +28,64 @@ urlpatterns = [
         views.DockerMetricsView.as_view(),
         name="docker-metrics",
     ),
+    path(
+        "monitoring/device_metrics/",
+        views.DeviceMetricsView.as_view(),
+        name="device-metrics",
+    ),
+    path(
+        "monitoring/custom_metrics/",
+        views.CustomMetricsView.as_view(),
+        name="custom-metrics",
+    ),
+    path(
+        "monitoring/processes/",
+        views.ProcessMetricsView.as_view(),
+        name="process-metrics",
+    ),
     path(
         "monitoring/summary/",
         views.MetricsSummaryView.as_view(),
         name="metrics-summary",
     ),
+    path(
+        "monitoring/forecasts/",
+        views.ForecastView.as_view(),
+        name="forecasts",
+    ),
+    path(
+        "monitoring/rightsizing/",
+        views.RightsizingView.as_view(),
+        name="rightsizing",
+    ),
+    path(
+        "monitoring/logs/search/",
+        views.LogSearchView.as_view(),
+        name="log-search",
+    ),
     path(
         "monitoring/live/",
         views.LiveMetricsView.as_view(),
         name="live-metrics",
     ),
+    path(
+        "monitoring/export/<str:dataset>/",
+        views.ExportView.as_view(),
+        name="export",
+    ),
+    path(
+        "monitoring/ingest/",
+        views.IngestView.as_view(),
+        name="metrics-ingest",
+    ),
+    path(
+        "monitoring/probes/assignments/",
+        views.ProbeAssignmentsView.as_view(),
+        name="probe-assignments",
+    ),
+    path(
+        "monitoring/probes/results/",
+        views.ProbeResultsView.as_view(),
+        name="probe-results",
+    ),
 ]
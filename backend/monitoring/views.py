@@ -1,19 +1,78 @@
 from datetime import datetime
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from django.views import View
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
 from .broadcast import event_broadcaster
+from .compression import metrics_compressor
+from .device_collector import device_collector
+from .export import EXPORT_CONTENT_TYPES
+from .export import EXPORT_DATASETS
+from .export import async_stream
+from .export import build_export
+from .forecast import exhaustion_forecaster
+from .log_store import get_log_store
+from .ingest import metrics_ingestor
 from .metrics_collector import metrics_collector
+from .models import LOCAL_HOST
 from .models import DockerMetrics
 from .models import ServerMetrics
+from .parsers import GzipJSONParser
+from .probe_results import probe_assignments
+from .probe_results import probe_result_ingestor
+from .process_collector import process_collector
+from .prometheus import CONTENT_TYPE
+from .prometheus import metrics_registry
+from .renderers import ColumnarJSONRenderer
+from .rightsizing import rightsizing_analyzer
+from .serializers import CUSTOM_METRICS_COLUMNS
+from .serializers import DEVICE_METRICS_COLUMNS
+from .serializers import DOCKER_METRICS_COLUMNS
+from .serializers import SERVER_METRICS_COLUMNS
+from .serializers import CustomMetricSerializer
+from .serializers import DeviceMetricsSerializer
 from .serializers import DockerMetricsSerializer
 from .serializers import MetricsSummarySerializer
 from .serializers import ServerMetricsSerializer
+from .serializers import serialize_columnar
+from .statsd import get_recent_custom_metrics
+from .summary import metrics_summary
+from .tsdb import DOCKER_SERIES_PREFIX
+from .tsdb import SERVER_SERIES
+from .tsdb import from_ns
+from .tsdb import get_tsdb
+from .tsdb import read_columns
+from .tsdb import to_ns
+
+
+def tsdb_response(request, series: str, hours: int, fields):
+    """Serve metric history from the time-series store when it covers the window
+
+    ``series`` ending in ``.`` selects every series with that prefix.
+    Returns None so the caller falls back to the database otherwise.
+    """
+    store = get_tsdb()
+    since = timezone.now() - timedelta(hours=hours)
+    if store is None or not store.covers(since):
+        return None
+    names = store.series_names(series) if series.endswith(".") else [series]
+    columns = read_columns(store, names, since, fields)
+    if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+        return Response(columns)
+    return Response([dict(zip(fields, row)) for row in zip(*columns.values())])
 
 
 class DockerStatusView(APIView):
@@ -73,11 +132,22 @@ class TestBroadcastView(APIView):
 
 class ServerMetricsView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
 
     def get(self, request):
         """Get server metrics"""
         hours = int(request.query_params.get("hours", 1))
-        metrics = metrics_collector.get_recent_server_metrics(hours)
+        host = request.query_params.get("host", LOCAL_HOST)
+        if host == LOCAL_HOST:
+            response = tsdb_response(
+                request, SERVER_SERIES, hours, SERVER_METRICS_COLUMNS
+            )
+            if response is not None:
+                return response
+
+        metrics = metrics_collector.get_recent_server_metrics(hours, host)
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            return Response(serialize_columnar(metrics, SERVER_METRICS_COLUMNS))
         serializer = ServerMetricsSerializer(metrics, many=True)
         return Response(serializer.data)
 
@@ -110,15 +180,38 @@ class ServerMetricsView(APIView):
 
 class DockerMetricsView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
 
     def get(self, request):
         """Get Docker container metrics"""
         container_id = request.query_params.get("container_id")
         hours = int(request.query_params.get("hours", 1))
+        host = request.query_params.get("host", LOCAL_HOST)
+
+        if host == LOCAL_HOST:
+            series = f"{DOCKER_SERIES_PREFIX}{container_id or ''}"
+            response = tsdb_response(request, series, hours, DOCKER_METRICS_COLUMNS)
+            if response is not None:
+                return response
+
+        metrics = metrics_collector.get_recent_docker_metrics(container_id, hours, host)
+        since = timezone.now() - timedelta(hours=hours)
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            columns = serialize_columnar(metrics, DOCKER_METRICS_COLUMNS)
+            archived = metrics_compressor.read_columns(
+                container_id, since, DOCKER_METRICS_COLUMNS, host
+            )
+            for field, values in archived.items():
+                columns[field].extend(values)
+            return Response(columns)
 
-        metrics = metrics_collector.get_recent_docker_metrics(container_id, hours)
         serializer = DockerMetricsSerializer(metrics, many=True)
-        return Response(serializer.data)
+        fields = DockerMetricsSerializer.Meta.fields
+        archived = metrics_compressor.read_columns(container_id, since, fields, host)
+        return Response(
+            serializer.data
+            + [dict(zip(fields, row)) for row in zip(*archived.values())]
+        )
 
     def post(self, request):
         """Collect and save current Docker metrics"""
@@ -129,12 +222,9 @@ class DockerMetricsView(APIView):
                 serializer = DockerMetricsSerializer(saved_metrics, many=True)
                 
                 # Broadcast container update via WebSocket
-                from services.docker_service import docker_service
-                containers = (
-                    docker_service.list_containers()
-                    if docker_service.is_available()
-                    else []
-                )
+                from services.container_inventory import container_inventory
+
+                containers = container_inventory.list_containers()
                 event_broadcaster.broadcast_container_update(containers)
                 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -149,66 +239,221 @@ class DockerMetricsView(APIView):
             )
 
 
+class DeviceMetricsView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
+
+    def get(self, request):
+        """Get per-device metrics"""
+        device_type = request.query_params.get("device_type")
+        device = request.query_params.get("device")
+        hours = int(request.query_params.get("hours", 1))
+
+        metrics = device_collector.get_recent_device_metrics(device_type, device, hours)
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            return Response(serialize_columnar(metrics, DEVICE_METRICS_COLUMNS))
+        serializer = DeviceMetricsSerializer(metrics, many=True)
+        return Response(serializer.data)
+
+    def post(self, request):
+        """Collect and save current per-device metrics"""
+        try:
+            metrics_list = device_collector.collect_device_metrics()
+            saved_metrics = device_collector.save_device_metrics(metrics_list)
+            serializer = DeviceMetricsSerializer(saved_metrics, many=True)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class CustomMetricsView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [ColumnarJSONRenderer]
+
+    def get(self, request):
+        """Get aggregated application metrics received over StatsD"""
+        name = request.query_params.get("name")
+        metric_type = request.query_params.get("metric_type")
+        host = request.query_params.get("host")
+        hours = int(request.query_params.get("hours", 1))
+
+        metrics = get_recent_custom_metrics(name, metric_type, host, hours)
+        if request.accepted_renderer.format == ColumnarJSONRenderer.format:
+            return Response(serialize_columnar(metrics, CUSTOM_METRICS_COLUMNS))
+        serializer = CustomMetricSerializer(metrics, many=True)
+        return Response(serializer.data)
+
+
+class ProcessMetricsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Get the top host processes by CPU and memory"""
+        return Response(process_collector.get_snapshot())
+
+    def post(self, request):
+        """Sample host processes and broadcast the result"""
+        try:
+            snapshot = process_collector.sample()
+            event_broadcaster.broadcast_process_update(snapshot)
+            return Response(snapshot, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class MetricsSummaryView(APIView):
     permission_classes = []  # Allow unauthenticated access for development
 
     def get(self, request):
         """Get current metrics summary"""
         try:
-            # Get current server metrics
-            server_metrics = metrics_collector.collect_server_metrics()
+            serializer = MetricsSummarySerializer(metrics_summary.get_summary())
+            return Response(serializer.data)
+
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-            # Get Docker container count
-            from services.docker_service import docker_service
 
-            containers = (
-                docker_service.list_containers()
-                if docker_service.is_available()
-                else []
+class ForecastView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Time-to-exhaustion forecasts for filesystems and container memory"""
+        try:
+            forecasts = exhaustion_forecaster.get_forecasts()
+            series = forecasts["series"]
+            kind = request.query_params.get("kind")
+            if kind:
+                series = [s for s in series if s["kind"] == kind]
+            host = request.query_params.get("host")
+            if host:
+                series = [s for s in series if s["host"] == host]
+            within = request.query_params.get("within_hours")
+            if within:
+                limit = float(within)
+                series = [
+                    s
+                    for s in series
+                    if s["hours_to_exhaustion"] is not None
+                    and s["hours_to_exhaustion"] <= limit
+                ]
+            return Response(
+                {"generated_at": forecasts["generated_at"], "series": series}
             )
 
-            # Calculate totals
-            total_containers = len(containers)
-            running_containers = len(
-                [c for c in containers if c.get("status") == "running" or c.get("status", "").startswith("up")]
+        except ValueError:
+            return Response(
+                {"error": "within_hours must be a number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-            # Get recent Docker metrics for totals
-            recent_docker_metrics = metrics_collector.get_recent_docker_metrics(hours=1)
-            total_memory_usage = sum(m.memory_usage_mb for m in recent_docker_metrics)
-            total_cpu_usage = sum(m.cpu_percent for m in recent_docker_metrics)
 
-            # Calculate healthy containers (containers with "healthy" in status)
-            healthy_containers = len(
-                [c for c in containers if "healthy" in c.get("status", "").lower()]
+class RightsizingView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Memory limit and CPU share recommendations per container"""
+        try:
+            recommendations = rightsizing_analyzer.get_recommendations()
+            containers = recommendations["containers"]
+            host = request.query_params.get("host")
+            if host:
+                containers = [c for c in containers if c["host"] == host]
+            provisioning = request.query_params.get("status")
+            if provisioning:
+                containers = [c for c in containers if c["status"] == provisioning]
+            return Response(
+                {
+                    "generated_at": recommendations["generated_at"],
+                    "containers": containers,
+                }
             )
 
-            # Calculate containers with exposed ports
-            containers_with_ports = len(
-                [c for c in containers if c.get("ports") and len(c.get("ports", [])) > 0]
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-            summary = {
-                "current_cpu": server_metrics.get("cpu_percent", 0),
-                "current_memory": server_metrics.get("memory_percent", 0),
-                "current_disk": server_metrics.get("disk_percent", 0),
-                "current_load": server_metrics.get("load_average_1m", 0),
-                "total_containers": total_containers,
-                "running_containers": running_containers,
-                "healthy_containers": healthy_containers,
-                "containers_with_ports": containers_with_ports,
-                "total_memory_usage": round(total_memory_usage, 2),
-                "total_cpu_usage": round(total_cpu_usage, 2),
-            }
 
-            serializer = MetricsSummarySerializer(summary)
-            return Response(serializer.data)
+class LogSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Search container logs kept by the log store"""
+        store = get_log_store()
+        if store is None:
+            return Response(
+                {"error": "Log store is not configured"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        bounds = {}
+        for param in ("since", "until"):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return Response(
+                    {"error": f"Invalid {param} timestamp: {value}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            bounds[param] = to_ns(parsed)
+        if "hours" in request.query_params:
+            try:
+                hours = float(request.query_params["hours"])
+                if not hours >= 0:
+                    raise ValueError
+                since = timezone.now() - timedelta(hours=hours)
+            except (OverflowError, ValueError):
+                return Response(
+                    {"error": "hours must be a non-negative number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            bounds["since"] = to_ns(since)
 
+        containers = request.query_params.getlist("container")
+        try:
+            limit = int(request.query_params.get("limit", 100))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(limit, 1000)
+        try:
+            found = store.search(
+                containers,
+                bounds.get("since"),
+                bounds.get("until"),
+                request.query_params.get("q", ""),
+                limit,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        for result in found["results"]:
+            result["timestamp"] = from_ns(result["timestamp_ns"]).isoformat()
+        return Response(found)
+
 
 class LiveMetricsView(APIView):
     permission_classes = []  # Allow unauthenticated access for development
@@ -221,13 +466,9 @@ class LiveMetricsView(APIView):
             docker_metrics = metrics_collector.collect_docker_metrics()
 
             # Get container list
-            from services.docker_service import docker_service
+            from services.container_inventory import container_inventory
 
-            containers = (
-                docker_service.list_containers()
-                if docker_service.is_available()
-                else []
-            )
+            containers = container_inventory.list_containers()
 
             return Response(
                 {
@@ -242,3 +483,165 @@ class LiveMetricsView(APIView):
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class ExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset):
+        """Stream a bulk export as NDJSON or CSV"""
+        config = EXPORT_DATASETS.get(dataset)
+        if not config:
+            return Response(
+                {"error": f"Unknown dataset: {dataset}"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"error": "output must be one of: ndjson, csv"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = config["model"].objects.all()
+        if "owner_field" in config:
+            owned = Q(**{config["owner_field"]: request.user})
+            if "shared_field" in config:
+                owned |= Q(**{f"{config['shared_field']}__isnull": True})
+            queryset = queryset.filter(owned)
+
+        time_field = config["time_field"]
+        for param, lookup in (("since", "gte"), ("until", "lt")):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return Response(
+                    {"error": f"Invalid {param} timestamp: {value}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            queryset = queryset.filter(**{f"{time_field}__{lookup}": parsed})
+
+        if "hours" in request.query_params:
+            try:
+                hours = float(request.query_params["hours"])
+                if not hours >= 0:
+                    raise ValueError
+                since = timezone.now() - timedelta(hours=hours)
+            except (OverflowError, ValueError):
+                return Response(
+                    {"error": "hours must be a non-negative number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            queryset = queryset.filter(**{f"{time_field}__gte": since})
+
+        service_id = request.query_params.get("service_id")
+        if service_id and "service_field" in config:
+            queryset = queryset.filter(**{config["service_field"]: service_id})
+
+        host = request.query_params.get("host")
+        if host and "host_field" in config:
+            queryset = queryset.filter(**{config["host_field"]: host})
+
+        container_id = request.query_params.get("container_id")
+        if container_id and "container_field" in config:
+            queryset = queryset.filter(**{config["container_field"]: container_id})
+
+        compress = request.query_params.get("gzip", "").lower() in ("1", "true")
+        chunks = build_export(config, queryset, output, compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_stream(chunks)
+
+        extension = "csv" if output == "csv" else "ndjson"
+        filename = f"{dataset}.{extension}" + (".gz" if compress else "")
+        response = StreamingHttpResponse(
+            chunks, content_type=EXPORT_CONTENT_TYPES[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+
+class IngestView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [GzipJSONParser]
+
+    def post(self, request):
+        """Store a batch of samples pushed by a remote host"""
+        payload = request.data  # Malformed bodies raise ParseError (400)
+        try:
+            counts = metrics_ingestor.ingest(payload)
+            return Response(counts, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+def _request_probe(request):
+    """The enabled probe the request is authenticated as, if any"""
+    from healthchecks.models import Probe
+
+    return Probe.objects.filter(user=request.user, enabled=True).first()
+
+
+class ProbeAssignmentsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Services assigned to the calling probe"""
+        probe = _request_probe(request)
+        if probe is None:
+            return Response(
+                {"error": "Not a registered probe"}, status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            probe.last_seen = timezone.now()
+            probe.save(update_fields=["last_seen"])
+            return Response({"probe": probe.name, "services": probe_assignments(probe)})
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ProbeResultsView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [GzipJSONParser]
+
+    def post(self, request):
+        """Store a batch of check results uploaded by a probe"""
+        probe = _request_probe(request)
+        if probe is None:
+            return Response(
+                {"error": "Not a registered probe"}, status=status.HTTP_403_FORBIDDEN
+            )
+        payload = request.data  # Malformed bodies raise ParseError (400)
+        try:
+            counts = probe_result_ingestor.ingest(probe, payload)
+            return Response(counts, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class PrometheusMetricsView(View):
+    """Prometheus scrape target rendered from the in-memory registry"""
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_SCRAPE_TOKEN", "")
+        if token and not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponse(status=401)
+        return HttpResponse(metrics_registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,436 @@
+import asyncio
+import json
+import logging
+import os
+import weakref
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import quote
+from urllib.parse import urlencode
+
+# No Django imports: the standalone agent collects Docker stats with this client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = "/var/run/docker.sock"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 10.0
+STREAM_READ_SIZE = 65536
+
+
+class DockerAPIError(Exception):
+    """Error response from the Docker Engine API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def _socket_path() -> str:
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://") :]
+    return DEFAULT_SOCKET_PATH
+
+
+def _query(params: Optional[Dict[str, Any]]) -> str:
+    if not params:
+        return ""
+    encoded = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = "1" if value else "0"
+        elif key == "filters":
+            value = json.dumps(
+                {
+                    name: values if isinstance(values, list) else [values]
+                    for name, values in value.items()
+                }
+            )
+        encoded[key] = value
+    return "?" + urlencode(encoded) if encoded else ""
+
+
+def _demultiplex(buffer: bytearray) -> Tuple[bytes, bool]:
+    """Take complete frames of a multiplexed log stream off ``buffer``
+
+    Returns the payload read and whether the stream is multiplexed at all;
+    containers with a TTY send raw output without frame headers.
+    """
+    if len(buffer) >= 4 and (buffer[0] > 2 or buffer[1:4] != b"\x00\x00\x00"):
+        return b"", False
+    payload = bytearray()
+    while len(buffer) >= 8:
+        size = int.from_bytes(buffer[4:8], "big")
+        if len(buffer) < 8 + size:
+            break
+        payload += buffer[8 : 8 + size]
+        del buffer[: 8 + size]
+    return bytes(payload), True
+
+
+class _Connection:
+    """One HTTP/1.1 connection to the daemon socket"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    async def send(self, method: str, target: str, body: Optional[bytes] = None):
+        lines = [f"{method} {target} HTTP/1.1", "Host: docker"]
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        elif method in ("POST", "PUT"):
+            lines.append("Content-Length: 0")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        await self.writer.drain()
+
+    async def read_head(self) -> Tuple[int, Dict[str, str]]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Docker daemon closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def iter_body(
+        self, method: str, status: int, headers: Dict[str, str]
+    ) -> AsyncIterator[bytes]:
+        """Yield the response body as it arrives"""
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await self.reader.readline()
+                if not size_line:
+                    raise ConnectionResetError("Docker daemon closed the stream")
+                size = int(size_line.split(b";")[0].strip(), 16)
+                if size == 0:
+                    while await self.reader.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining:
+                data = await self.reader.read(min(remaining, STREAM_READ_SIZE))
+                if not data:
+                    raise ConnectionResetError("Docker daemon closed the stream")
+                remaining -= len(data)
+                yield data
+        else:
+            while data := await self.reader.read(STREAM_READ_SIZE):
+                yield data
+
+    async def read_body(self, method: str, status: int, headers: Dict[str, str]):
+        return b"".join(
+            [chunk async for chunk in self.iter_body(method, status, headers)]
+        )
+
+    def keep_alive(self, headers: Dict[str, str]) -> bool:
+        return (
+            headers.get("connection", "").lower() != "close"
+            and ("content-length" in headers or "transfer-encoding" in headers)
+            and not self.reader.at_eof()
+        )
+
+    def close(self):
+        self.writer.close()
+
+
+class _Pool:
+    """Idle keep-alive connections and a cap on connections in use"""
+
+    def __init__(self, size: int):
+        self.idle: List[_Connection] = []
+        self.slots = asyncio.Semaphore(size)
+
+
+class AsyncDockerClient:
+    """asyncio Docker Engine API client over the daemon's unix socket
+
+    Requests reuse up to ``pool_size`` keep-alive connections, so callers in an
+    event loop talk to Docker without a thread. Streams (events, followed logs
+    and live stats) hold a connection of their own for as long as they run.
+    Connections belong to the event loop that opened them; each loop gets its
+    own pool.
+
+    The socket is ``DOCKER_HOST`` when it is a ``unix://`` URL and
+    ``/var/run/docker.sock`` otherwise.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.socket_path = socket_path or _socket_path()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pool]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def is_available(self) -> bool:
+        """Whether the daemon socket exists"""
+        return os.path.exists(self.socket_path)
+
+    def _pool(self) -> _Pool:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = _Pool(self.pool_size)
+        return pool
+
+    async def _connect(self) -> _Connection:
+        async with asyncio.timeout(self.timeout):
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        return _Connection(reader, writer)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[int, bytes]:
+        """Make one request on a pooled connection and read the whole response
+
+        ``timeout`` replaces the client's for requests the daemon takes long
+        to answer.
+        """
+        target = path + _query(params)
+        payload = json.dumps(body).encode() if body is not None else None
+        pool = self._pool()
+        async with pool.slots:
+            while True:
+                conn = pool.idle.pop() if pool.idle else await self._connect()
+                try:
+                    async with asyncio.timeout(timeout or self.timeout):
+                        await conn.send(method, target, payload)
+                        status, headers = await conn.read_head()
+                        data = await conn.read_body(method, status, headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    # The daemon may have dropped an idle connection; retry
+                    # once on a new one
+                    if conn.reused:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                break
+
+            if conn.keep_alive(headers):
+                conn.reused = True
+                pool.idle.append(conn)
+            else:
+                conn.close()
+
+        if status >= 400:
+            raise DockerAPIError(status, self._error_message(data))
+        return status, data
+
+    async def _stream(
+        self, method: str, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[bytes]:
+        """Make a streaming request on a dedicated connection"""
+        conn = await self._connect()
+        try:
+            await conn.send(method, path + _query(params))
+            async with asyncio.timeout(self.timeout):
+                status, headers = await conn.read_head()
+            if status >= 400:
+                data = await conn.read_body(method, status, headers)
+                raise DockerAPIError(status, self._error_message(data))
+            async for chunk in conn.iter_body(method, status, headers):
+                yield chunk
+        finally:
+            conn.close()
+
+    async def _stream_json(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict]:
+        """Stream newline-delimited JSON objects"""
+        buffer = b""
+        async for chunk in self._stream("GET", path, params):
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        if buffer.strip():
+            yield json.loads(buffer)
+
+    def _error_message(self, data: bytes) -> str:
+        try:
+            return json.loads(data)["message"]
+        except (ValueError, KeyError, TypeError):
+            return data.decode(errors="replace").strip()
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None):
+        _, data = await self._request("GET", path, params)
+        return json.loads(data)
+
+    async def ping(self) -> bool:
+        """Whether the daemon answers"""
+        try:
+            await self._request("GET", "/_ping")
+            return True
+        except (OSError, DockerAPIError, asyncio.TimeoutError):
+            return False
+
+    async def list_containers(
+        self, all_containers: bool = False, filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """Container summaries, as ``GET /containers/json`` returns them"""
+        return await self._get_json(
+            "/containers/json", {"all": all_containers, "filters": filters}
+        )
+
+    async def inspect_container(self, container_id: str) -> Dict:
+        return await self._get_json(f"/containers/{quote(container_id)}/json")
+
+    async def stats(self, container_id: str, one_shot: bool = True) -> Dict:
+        """One stats sample
+
+        With ``one_shot`` the daemon answers at once and leaves
+        ``precpu_stats`` empty; otherwise it waits for a second sample to fill
+        it in.
+        """
+        return await self._get_json(
+            f"/containers/{quote(container_id)}/stats",
+            {"stream": False, "one-shot": one_shot},
+        )
+
+    async def stream_stats(self, container_id: str) -> AsyncIterator[Dict]:
+        """Stats samples as the daemon produces them, about one per second"""
+        async for sample in self._stream_json(
+            f"/containers/{quote(container_id)}/stats", {"stream": True}
+        ):
+            yield sample
+
+    def _log_params(self, tail, timestamps, since, follow) -> Dict[str, Any]:
+        return {
+            "stdout": True,
+            "stderr": True,
+            "tail": "all" if tail is None else tail,
+            "timestamps": timestamps,
+            "since": since,
+            "follow": follow,
+        }
+
+    async def logs(
+        self,
+        container_id: str,
+        tail: Optional[int] = 100,
+        timestamps: bool = False,
+        since: Optional[str] = None,
+    ) -> str:
+        """stdout and stderr of a container, interleaved as written
+
+        ``since`` is a unix time and may carry a fraction down to nanoseconds.
+        """
+        _, data = await self._request(
+            "GET",
+            f"/containers/{quote(container_id)}/logs",
+            self._log_params(tail, timestamps, since, False),
+        )
+        buffer = bytearray(data)
+        payload, multiplexed = _demultiplex(buffer)
+        return (payload if multiplexed else data).decode(errors="replace")
+
+    async def stream_logs(
+        self,
+        container_id: str,
+        tail: Optional[int] = 0,
+        timestamps: bool = False,
+        since: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Follow a container's output, yielding text as it is written"""
+        buffer = bytearray()
+        multiplexed = None
+        async for chunk in self._stream(
+            "GET",
+            f"/containers/{quote(container_id)}/logs",
+            self._log_params(tail, timestamps, since, True),
+        ):
+            if multiplexed is False:
+                yield chunk.decode(errors="replace")
+                continue
+            buffer += chunk
+            payload, multiplexed = _demultiplex(buffer)
+            if not multiplexed:
+                payload = bytes(buffer)
+                buffer.clear()
+            if payload:
+                yield payload.decode(errors="replace")
+
+    async def events(
+        self, since: Optional[str] = None, filters: Optional[Dict] = None
+    ) -> AsyncIterator[Dict]:
+        """Daemon events from ``since`` on, until the stream is closed"""
+        async for event in self._stream_json(
+            "/events", {"since": since, "filters": filters}
+        ):
+            yield event
+
+    async def _container_action(
+        self, container_id: str, action: str, params=None, timeout=None
+    ):
+        await self._request(
+            "POST",
+            f"/containers/{quote(container_id)}/{action}",
+            params,
+            timeout=timeout,
+        )
+
+    async def start(self, container_id: str):
+        """Start a container; starting a running one is not an error"""
+        await self._container_action(container_id, "start")
+
+    async def stop(self, container_id: str, timeout: int = 10):
+        # The daemon answers only after waiting up to ``timeout`` seconds
+        await self._container_action(
+            container_id, "stop", {"t": timeout}, self.timeout + timeout
+        )
+
+    async def restart(self, container_id: str, timeout: int = 10):
+        await self._container_action(
+            container_id, "restart", {"t": timeout}, self.timeout + timeout
+        )
+
+    async def close(self):
+        """Close the idle connections of the running event loop"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is None:
+            return
+        for conn in pool.idle:
+            conn.close()
+            try:
+                await conn.writer.wait_closed()
+            except OSError:
+                pass
+        pool.idle.clear()
+
+
+# Global instance
+async_docker = AsyncDockerClient()
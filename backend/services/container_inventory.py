@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from django.conf import settings
+
+from .docker_service import docker_service
+
+logger = logging.getLogger(__name__)
+
+# Container events that change what ``list_containers`` reports
+INVENTORY_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "stop",
+    "die",
+    "kill",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+    "health_status",
+}
+
+
+class ContainerInventory:
+    """Process-wide container list kept current by the Docker event stream
+
+    The inventory is filled with one full listing and then updated per
+    container as Docker reports changes, so reads never reach the daemon.
+    When the event stream drops it reconnects and replays the missed events
+    with ``since``; after a gap longer than ``DOCKER_INVENTORY_REPLAY_SECONDS``
+    it re-lists everything instead. Without the Docker SDK there is no event
+    stream, and the list is re-read at most every
+    ``DOCKER_INVENTORY_FALLBACK_TTL`` seconds.
+
+    Returned lists are shared between callers and must not be modified.
+    """
+
+    def __init__(self):
+        self.replay_seconds = getattr(settings, "DOCKER_INVENTORY_REPLAY_SECONDS", 60)
+        self.fallback_ttl = getattr(settings, "DOCKER_INVENTORY_FALLBACK_TTL", 10)
+        self.retry_delay = 1.0
+        self.containers: Dict[str, Dict] = {}
+        self._all: List[Dict] = []
+        self._running: List[Dict] = []
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._stream = None
+        self._thread: Optional[threading.Thread] = None
+
+    def is_available(self) -> bool:
+        return docker_service.is_available()
+
+    def list_containers(self, all_containers: bool = False) -> List[Dict]:
+        """Running containers, or every container, from the inventory"""
+        if not docker_service.is_available():
+            return []
+        self._ensure_current()
+        return self._all if all_containers else self._running
+
+    def _ensure_current(self):
+        if docker_service.client is None:
+            if (
+                self._synced_at is None
+                or time.monotonic() - self._synced_at > self.fallback_ttl
+            ):
+                self.resync()
+            return
+
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    since = time.time()
+                    self.resync()
+                    self._stopped.clear()
+                    self._thread = threading.Thread(
+                        target=self._watch,
+                        args=(since,),
+                        name="container-inventory",
+                        daemon=True,
+                    )
+                    self._thread.start()
+
+    def resync(self):
+        """Replace the inventory with a full listing"""
+        containers = docker_service.list_containers(all_containers=True)
+        with self._lock:
+            self.containers = {container["id"]: container for container in containers}
+            self._publish()
+            self._synced_at = time.monotonic()
+
+    def _publish(self):
+        ordered = sorted(
+            self.containers.values(),
+            key=lambda c: c.get("created") or 0,
+            reverse=True,
+        )
+        self._all = ordered
+        # `docker ps` status text reads "up 2 hours" instead of "running"
+        self._running = [
+            c
+            for c in ordered
+            if c.get("status") == "running" or c.get("status", "").startswith("up")
+        ]
+
+    def _watch(self, since: float):
+        while not self._stopped.is_set():
+            if time.time() - since > self.replay_seconds:
+                since = time.time()
+                try:
+                    self.resync()
+                except Exception as e:
+                    logger.error(f"Error listing containers: {e}")
+            try:
+                self._stream = docker_service.client.events(
+                    since=int(since), filters={"type": "container"}, decode=True
+                )
+            except Exception as e:
+                logger.warning(f"Could not subscribe to Docker events: {e}")
+                self._stopped.wait(self.retry_delay)
+                continue
+
+            try:
+                for event in self._stream:
+                    self.apply_event(event)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Docker event stream interrupted: {e}")
+            # Replay from just before the stream ended; applying an event twice
+            # only re-reads the container
+            since = time.time() - 1
+            self._stopped.wait(self.retry_delay)
+
+    def apply_event(self, event: Dict):
+        """Update the inventory from one Docker container event"""
+        if event.get("Type") != "container":
+            return
+        action = event.get("Action", "").split(":")[0]
+        container_id = event.get("Actor", {}).get("ID") or event.get("id")
+        if not container_id:
+            return
+
+        if action == "destroy":
+            container = None
+        elif action in INVENTORY_ACTIONS:
+            container = docker_service.get_container(container_id)
+        else:
+            return
+
+        with self._lock:
+            if container is None:
+                self.containers.pop(container_id, None)
+            else:
+                self.containers[container_id] = container
+            self._publish()
+
+    def stop(self):
+        self._stopped.set()
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# Global instance
+container_inventory = ContainerInventory()
@@ -7,7 +7,6 @@ from typing import List
 from typing import Optional
 
 import docker
-from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -78,8 +77,16 @@ class DockerService:
                     formatted_ports.append(f"{port_num}:{port_num}")
         return formatted_ports
 
-    def list_containers(self, all_containers: bool = False) -> List[Dict]:
-        """List all containers"""
+    def list_containers(
+        self, all_containers: bool = False, detailed_ports: bool = False
+    ) -> List[Dict]:
+        """List all containers
+
+        Ports come from the listing itself. ``detailed_ports`` inspects every
+        container for its port bindings instead, one extra call per container.
+        Without the SDK the listing is always one `docker ps` and one batched
+        `docker inspect`, which already carries the port bindings.
+        """
         if not self.is_available():
             return []
 
@@ -87,30 +94,13 @@ class DockerService:
             if self.client:
                 # Use Docker SDK
                 containers = self.client.containers(all=all_containers)
-                result_containers = []
-                for container in containers:
-                    container_id = container["Id"]
-                    # Get detailed port information
-                    ports = self.get_container_ports(container_id)
-                    
-                    result_containers.append({
-                        "id": container_id,
-                        "name": (
-                            container["Names"][0][1:]
-                            if container["Names"]
-                            else container_id[:12]
-                        ),
-                        "image": container["Image"],
-                        "status": container["State"],
-                        "state": container,
-                        "labels": container.get("Labels", {}),
-                        "ports": ports,
-                        "created": container["Created"],
-                    })
-                return result_containers
+                return [
+                    self._container_entry(container, detailed_ports)
+                    for container in containers
+                ]
             elif self.use_subprocess:
-                # Use subprocess with better port information
-                cmd = ["docker", "ps", "--format", "table {{.ID}}\t{{.Names}}\t{{.Image}}\t{{.Status}}\t{{.Ports}}"]
+                # One `docker ps` and one `docker inspect` for all containers
+                cmd = ["docker", "ps", "--no-trunc", "--format", "{{json .}}"]
                 if all_containers:
                     cmd.append("-a")
 
@@ -119,80 +109,135 @@ class DockerService:
                     logger.error(f"Subprocess failed: {result.stderr}")
                     return []
 
-                containers = []
-                lines = result.stdout.strip().split("\n")
-                if len(lines) <= 1:  # Only header or empty
-                    return containers
-                
-                # Skip header line
-                for line in lines[1:]:
-                    if line.strip():
-                        # Split by multiple spaces/tabs and clean up
-                        parts = [part.strip() for part in line.split() if part.strip()]
-                        if len(parts) >= 4:
-                            container_id = parts[0]
-                            name = parts[1]
-                            image = parts[2]
-                            
-                            # Status might be multiple words, find where ports start
-                            status_parts = []
-                            ports_str = ""
-                            
-                            # Look for port patterns to separate status from ports
-                            for i, part in enumerate(parts[3:], 3):
-                                if "/tcp" in part or "/udp" in part or "->" in part or ":" in part:
-                                    # Found ports, everything before this is status
-                                    status_parts = parts[3:i]
-                                    ports_str = " ".join(parts[i:])
-                                    break
-                                else:
-                                    status_parts.append(part)
-                            
-                            status = " ".join(status_parts).lower()
-                            
-                            # Parse ports from string format
-                            ports = []
-                            if ports_str and ports_str != "<none>":
-                                # Handle multiple ports separated by commas or spaces
-                                port_parts = []
-                                if "," in ports_str:
-                                    port_parts = [p.strip() for p in ports_str.split(",")]
-                                else:
-                                    port_parts = [ports_str.strip()]
-                                
-                                for port_part in port_parts:
-                                    if "->" in port_part:
-                                        # Format: "0.0.0.0:8080->80/tcp"
-                                        parts = port_part.split("->")
-                                        if len(parts) == 2:
-                                            public_part = parts[0].split(":")[-1]
-                                            private_part = parts[1].split("/")[0]
-                                            ports.append(f"{public_part}:{private_part}")
-                                    elif "/" in port_part:
-                                        # Format: "80/tcp" (no public port)
-                                        port_num = port_part.split("/")[0]
-                                        ports.append(f"{port_num}:{port_num}")
-                            
-                            # Get detailed port information using docker inspect
-                            detailed_ports = self.get_container_ports(container_id)
-                            
-                            containers.append(
-                                {
-                                    "id": container_id,
-                                    "name": name,
-                                    "image": image,
-                                    "status": status,
-                                    "state": {"Status": status},
-                                    "labels": {},
-                                    "ports": detailed_ports if detailed_ports else ports,
-                                    "created": "",
-                                }
-                            )
-                return containers
+                rows = self._parse_ps_output(result.stdout)
+                details = self._inspect_containers([row["ID"] for row in rows])
+                return [
+                    self._subprocess_entry(row, details.get(row["ID"])) for row in rows
+                ]
         except Exception as e:
             logger.error(f"Error listing containers: {e}")
             return []
 
+    def _container_entry(self, container: Dict, detailed_ports: bool = False) -> Dict:
+        """Build a list entry from a Docker SDK container summary"""
+        container_id = container["Id"]
+        if detailed_ports:
+            ports = self.get_container_ports(container_id)
+        else:
+            # IPv4 and IPv6 bindings of the same port are listed separately
+            ports = self._format_ports(container.get("Ports") or [])
+            ports = list(dict.fromkeys(ports))
+        return {
+            "id": container_id,
+            "name": (
+                container["Names"][0][1:] if container["Names"] else container_id[:12]
+            ),
+            "image": container["Image"],
+            "status": container["State"],
+            "state": container,
+            "labels": container.get("Labels", {}),
+            "ports": ports,
+            "created": container["Created"],
+        }
+
+    def get_container(
+        self, container_id: str, detailed_ports: bool = False
+    ) -> Optional[Dict]:
+        """Get one container in the same shape as ``list_containers`` entries"""
+        if not self.client:
+            return None
+
+        try:
+            containers = self.client.containers(all=True, filters={"id": container_id})
+            return (
+                self._container_entry(containers[0], detailed_ports)
+                if containers
+                else None
+            )
+        except Exception as e:
+            logger.error(f"Error getting container {container_id}: {e}")
+            return None
+
+    def _parse_ps_output(self, output: str) -> List[Dict]:
+        """Parse `docker ps --format '{{json .}}'` output, one object per line"""
+        rows = []
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unparseable docker ps line: {line[:200]}")
+        return rows
+
+    def _inspect_containers(self, container_ids: List[str]) -> Dict[str, Dict]:
+        """Inspect many containers with one `docker inspect`, keyed by full ID"""
+        if not container_ids:
+            return {}
+
+        result = subprocess.run(
+            ["docker", "inspect", "--type", "container", *container_ids],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        # A container removed since `docker ps` fails the command, but the
+        # others are still printed
+        try:
+            containers = json.loads(result.stdout or "[]")
+        except json.JSONDecodeError:
+            logger.error(f"Subprocess inspect failed: {result.stderr}")
+            return {}
+        return {container["Id"]: container for container in containers}
+
+    def _subprocess_entry(self, row: Dict, info: Optional[Dict]) -> Dict:
+        """Build a list entry from a `docker ps` row and its inspect data"""
+        if info is None:
+            status = (row.get("Status") or row.get("State", "")).lower()
+            ports = row.get("Ports", "")
+            return {
+                "id": row["ID"],
+                "name": row.get("Names", "").split(",")[0],
+                "image": row.get("Image", ""),
+                "status": status,
+                "state": {"Status": status},
+                "labels": {},
+                "ports": list(
+                    dict.fromkeys(self._format_ports(ports.split(", ") if ports else []))
+                ),
+                "created": row.get("CreatedAt", ""),
+            }
+
+        network_settings = info.get("NetworkSettings") or {}
+        # The ps text carries uptime and health, e.g. "up 2 hours (healthy)"
+        status = (row.get("Status") or info["State"]["Status"]).lower()
+        return {
+            "id": info["Id"],
+            "name": info["Name"][1:] if info.get("Name") else info["Id"][:12],
+            "image": info.get("Config", {}).get("Image", row.get("Image", "")),
+            "status": status,
+            "state": info["State"],
+            "labels": info.get("Config", {}).get("Labels") or {},
+            "ports": self._format_port_bindings(network_settings.get("Ports") or {}),
+            "created": info.get("Created", ""),
+        }
+
+    def _format_port_bindings(self, ports: Dict) -> List[str]:
+        """Format inspect-style port bindings for frontend display"""
+        formatted_ports = []
+        for container_port, host_bindings in ports.items():
+            container_port_num = container_port.split("/")[0]
+            if host_bindings:
+                for binding in host_bindings:
+                    host_port = binding.get("HostPort")
+                    if host_port:
+                        formatted_ports.append(f"{host_port}:{container_port_num}")
+            else:
+                # No host binding, just container port
+                formatted_ports.append(f"{container_port_num}:{container_port_num}")
+        # IPv4 and IPv6 bindings of the same port are listed separately
+        return list(dict.fromkeys(formatted_ports))
+
     def get_container_ports(self, container_id: str) -> List[str]:
         """Get detailed port information for a specific container"""
         if not self.is_available():
@@ -203,22 +248,7 @@ class DockerService:
                 # Use Docker SDK
                 container_info = self.client.inspect_container(container_id)
                 network_settings = container_info.get("NetworkSettings", {})
-                ports = network_settings.get("Ports", {})
-                
-                formatted_ports = []
-                for container_port, host_bindings in ports.items():
-                    if host_bindings:
-                        for binding in host_bindings:
-                            host_port = binding.get("HostPort")
-                            if host_port:
-                                container_port_num = container_port.split("/")[0]
-                                formatted_ports.append(f"{host_port}:{container_port_num}")
-                    else:
-                        # No host binding, just container port
-                        container_port_num = container_port.split("/")[0]
-                        formatted_ports.append(f"{container_port_num}:{container_port_num}")
-                
-                return formatted_ports
+                return self._format_port_bindings(network_settings.get("Ports", {}))
             elif self.use_subprocess:
                 # Use subprocess with docker inspect
                 cmd = ["docker", "inspect", container_id, "--format", "{{json .NetworkSettings.Ports}}"]
@@ -226,25 +256,12 @@ class DockerService:
                 
                 if result.returncode == 0:
                     try:
-                        ports_data = json.loads(result.stdout.strip())
-                        formatted_ports = []
-                        
-                        for container_port, host_bindings in ports_data.items():
-                            if host_bindings:
-                                for binding in host_bindings:
-                                    host_port = binding.get("HostPort")
-                                    if host_port:
-                                        container_port_num = container_port.split("/")[0]
-                                        formatted_ports.append(f"{host_port}:{container_port_num}")
-                            else:
-                                # No host binding
-                                container_port_num = container_port.split("/")[0]
-                                formatted_ports.append(f"{container_port_num}:{container_port_num}")
-                        
-                        return formatted_ports
+                        return self._format_port_bindings(
+                            json.loads(result.stdout.strip())
+                        )
                     except json.JSONDecodeError:
                         pass
-                
+
                 return []
         except Exception as e:
             logger.error(f"Error getting container ports for {container_id}: {e}")
@@ -0,0 +1,340 @@
+import asyncio
+import json
+import logging
+import mmap
+import os
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from django.conf import settings
+
+from .async_docker import async_docker
+
+logger = logging.getLogger(__name__)
+
+MAX_ROTATED_FILES = 32
+# A rotation replaces the file at once; gone for longer, the container was removed
+REMOVED_AFTER_SECONDS = 5.0
+
+
+def timestamp_key(timestamp: str) -> Tuple[str, int]:
+    """Sortable key for a Docker RFC 3339 timestamp with nanoseconds
+
+    Docker trims trailing zeros from the fraction, so the strings themselves
+    do not sort.
+    """
+    base, _, fraction = timestamp.rstrip("Z").partition(".")
+    return base, int(fraction[:9].ljust(9, "0") or 0)
+
+
+def since_to_key(since: str) -> Tuple[str, int]:
+    """Timestamp key of a unix time given as ``seconds[.fraction]``"""
+    seconds, _, fraction = str(since).partition(".")
+    base = datetime.fromtimestamp(int(seconds), timezone.utc)
+    return base.strftime("%Y-%m-%dT%H:%M:%S"), int(fraction[:9].ljust(9, "0") or 0)
+
+
+def format_entries(entries: List[Dict], timestamps: bool = False) -> str:
+    """Render entries like the logs API does"""
+    if timestamps:
+        return "".join(f"{e['time']} {e['log']}" for e in entries)
+    return "".join(e["log"] for e in entries)
+
+
+def _parse(line: bytes) -> Optional[Dict]:
+    try:
+        return json.loads(line)
+    except ValueError:
+        # A line cut short by a crash or being written right now
+        return None
+
+
+class JsonLogFile:
+    """Random access to a container's json-file log and its rotated files
+
+    Files are memory-mapped, so a tail reads only the end of the newest file
+    and a ``since`` query binary-searches for its first line instead of
+    scanning: both cost the same on a multi-GB log as on a small one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def files(self) -> List[str]:
+        """Log files from newest to oldest; compressed rotations are skipped"""
+        paths = [self.path]
+        for n in range(1, MAX_ROTATED_FILES + 1):
+            rotated = f"{self.path}.{n}"
+            if not os.path.exists(rotated):
+                break
+            paths.append(rotated)
+        return paths
+
+    def _map(self, path: str) -> Tuple[Optional[mmap.mmap], int, int]:
+        """Map a file as it is now; also returns its inode and the mapped size"""
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size == 0:
+                    return None, stat.st_ino, 0
+                mm = mmap.mmap(f.fileno(), stat.st_size, access=mmap.ACCESS_READ)
+                return mm, stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            # Rotated away since it was listed
+            return None, 0, 0
+
+    def tail(self, lines: int) -> List[Dict]:
+        """The last ``lines`` entries, oldest first"""
+        entries: List[Dict] = []
+        for path in self.files():
+            if len(entries) >= lines:
+                break
+            mm, _, _ = self._map(path)
+            if mm is None:
+                continue
+            with mm:
+                end = len(mm)
+                if mm[end - 1 : end] == b"\n":
+                    end -= 1
+                newest_first = []
+                while end > 0 and len(entries) + len(newest_first) < lines:
+                    start = mm.rfind(b"\n", 0, end) + 1
+                    entry = _parse(mm[start:end])
+                    if entry is not None:
+                        newest_first.append(entry)
+                    end = start - 1
+            entries = newest_first[::-1] + entries
+        return entries
+
+    def since(self, key: Tuple[str, int]) -> Tuple[List[Dict], int, int]:
+        """Entries at or after a timestamp key, oldest first
+
+        Also returns the inode and size of the newest file as read, for a
+        ``JsonLogFollower`` to carry on from.
+        """
+        chunks = []
+        inode, size = 0, 0
+        for index, path in enumerate(self.files()):
+            mm, file_inode, file_size = self._map(path)
+            if index == 0:
+                inode, size = file_inode, file_size
+            if mm is None:
+                continue
+            with mm:
+                offset = self._first_at_or_after(mm, key)
+                chunks.append(
+                    [e for e in map(_parse, mm[offset:].splitlines()) if e is not None]
+                )
+                if offset > 0:
+                    # Older files hold only earlier lines
+                    break
+        entries = [entry for chunk in reversed(chunks) for entry in chunk]
+        return entries, inode, size
+
+    def _first_at_or_after(self, mm: mmap.mmap, key: Tuple[str, int]) -> int:
+        """Offset of the first line whose time is at or after ``key``"""
+        low, high = 0, len(mm)
+        while low < high:
+            middle = (low + high) // 2
+            newline = mm.rfind(b"\n", low, middle)
+            start = newline + 1 if newline >= 0 else low
+            end = mm.find(b"\n", start)
+            end = len(mm) if end < 0 else end
+            entry = _parse(mm[start:end])
+            if entry is None or timestamp_key(entry["time"]) < key:
+                low = end + 1
+            else:
+                high = start
+        return min(low, len(mm))
+
+
+class JsonLogFollower:
+    """Reads what is appended to a json-file log, across rotations
+
+    Docker rotates by renaming the file and starting a new one. The follower
+    keeps the old file open, drains it when the inode at ``path`` changes and
+    then continues with the new file from the start.
+    """
+
+    def __init__(self, path: str, inode: Optional[int] = None, offset: int = 0):
+        """Follow from ``offset`` of the file with ``inode``, or from the end"""
+        self.path = path
+        self._partial = b""
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        if inode is None:
+            offset = stat.st_size
+        elif stat.st_ino != inode:
+            # Rotated since the caller read it
+            offset = 0
+        self.inode = stat.st_ino
+        self.offset = offset
+        self.missing_since: Optional[float] = None
+        self.removed = False
+
+    def poll(self) -> List[Dict]:
+        """Entries appended since the last poll
+
+        Sets ``removed`` once the file has been gone for longer than a
+        rotation takes, as when the container is removed or recreated.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Between the rename and the new file being created, or removed
+            now = time.monotonic()
+            if self.missing_since is None:
+                self.missing_since = now
+            elif now - self.missing_since > REMOVED_AFTER_SECONDS:
+                self.removed = True
+            return self._read()
+        self.missing_since = None
+
+        entries = []
+        if stat.st_ino != self.inode:
+            entries += self._read()
+            self._file.close()
+            self._file = open(self.path, "rb")
+            self._partial = b""
+            self.inode = os.fstat(self._file.fileno()).st_ino
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # Truncated in place
+            self.offset = 0
+            self._partial = b""
+        return entries + self._read()
+
+    def _read(self) -> List[Dict]:
+        self._file.seek(self.offset)
+        data = self._file.read()
+        if not data:
+            return []
+        self.offset += len(data)
+        data = self._partial + data
+        data, _, self._partial = data.rpartition(b"\n")
+        return [e for e in map(_parse, data.splitlines()) if e is not None]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonFileLogs:
+    """Container logs read straight from json-file logs on this host
+
+    Same interface as the log methods of ``AsyncDockerClient``. When a
+    container logs with another driver, or its log directory is not mounted
+    into the backend, calls go to the Docker API instead.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or async_docker
+        self.poll_interval = getattr(settings, "DOCKER_LOG_POLL_INTERVAL", 0.25)
+        self._paths: Dict[str, Optional[str]] = {}
+
+    def is_available(self) -> bool:
+        return self.client.is_available()
+
+    async def log_path(self, container: str) -> Optional[str]:
+        """The readable json-file log of a container, or None"""
+        path = self._paths.get(container)
+        if path is not None and os.path.exists(path):
+            return path
+
+        info = await self.client.inspect_container(container)
+        log_type = info.get("HostConfig", {}).get("LogConfig", {}).get("Type")
+        path = info.get("LogPath")
+        if log_type != "json-file" or not path or not os.access(path, os.R_OK):
+            logger.debug(f"Reading logs of {container} through the Docker API")
+            path = None
+        self._paths[container] = path
+        return path
+
+    async def logs(
+        self,
+        container: str,
+        tail: Optional[int] = 100,
+        timestamps: bool = False,
+        since: Optional[str] = None,
+    ) -> str:
+        path = await self.log_path(container)
+        if path is None:
+            return await self.client.logs(
+                container, tail=tail, timestamps=timestamps, since=since
+            )
+
+        # Scanning and parsing a large log would stall the event loop
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, self._read, path, tail, since)
+        return format_entries(entries, timestamps)
+
+    def _read(self, path: str, tail: Optional[int], since: Optional[str]):
+        log_file = JsonLogFile(path)
+        if since is None:
+            if tail is None:
+                return log_file.since(("", 0))[0]
+            return log_file.tail(tail)
+        key = since_to_key(since)
+        if tail is None:
+            return log_file.since(key)[0]
+        # Lines are in time order, so the last ``tail`` lines at or after
+        # ``since`` are among the last ``tail`` lines of the log
+        return [e for e in log_file.tail(tail) if timestamp_key(e["time"]) >= key]
+
+    def _open_follower(
+        self, path: str, tail: Optional[int], since: Optional[str]
+    ) -> Tuple[List[Dict], JsonLogFollower]:
+        log_file = JsonLogFile(path)
+        if since is not None:
+            entries, inode, size = log_file.since(since_to_key(since))
+            return entries, JsonLogFollower(path, inode, size)
+        follower = JsonLogFollower(path)
+        return (log_file.tail(tail) if tail else []), follower
+
+    async def stream_logs(
+        self,
+        container: str,
+        tail: Optional[int] = 0,
+        timestamps: bool = False,
+        since: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Follow a container's log file, polling for appended lines
+
+        The stream ends when the file is removed with its container, so the
+        caller can follow the container that replaced it.
+        """
+        path = await self.log_path(container)
+        if path is None:
+            async for text in self.client.stream_logs(
+                container, tail=tail, timestamps=timestamps, since=since
+            ):
+                yield text
+            return
+
+        loop = asyncio.get_running_loop()
+        entries, follower = await loop.run_in_executor(
+            None, self._open_follower, path, tail, since
+        )
+        try:
+            while True:
+                if entries:
+                    yield format_entries(entries, timestamps)
+                if follower.removed:
+                    logger.info(f"Log file of {container} was removed")
+                    self._paths.pop(container, None)
+                    return
+                await asyncio.sleep(self.poll_interval)
+                entries = await loop.run_in_executor(None, follower.poll)
+        finally:
+            follower.close()
+
+
+# Global instance
+json_file_logs = JsonFileLogs()
@@ -0,0 +1,99 @@
+import json
+import subprocess
+import time
+
+from django.core.management.base import BaseCommand
+from services.docker_service import docker_service
+
+
+def fake_listing(containers: int):
+    """`docker ps --format '{{json .}}'` and `docker inspect` output"""
+    ps_lines = []
+    inspected = []
+    for n in range(containers):
+        container_id = f"{n:064x}"
+        ps_lines.append(
+            json.dumps(
+                {
+                    "ID": container_id,
+                    "Names": f"app-{n}",
+                    "Image": "nginx:latest",
+                    "State": "running",
+                    "Status": "Up 2 hours (healthy)",
+                    "Ports": f"0.0.0.0:{8000 + n}->80/tcp, :::{8000 + n}->80/tcp",
+                    "Labels": "com.docker.compose.project=app,tier=web",
+                    "CreatedAt": "2024-01-01 10:00:00 +0000 UTC",
+                }
+            )
+        )
+        inspected.append(
+            {
+                "Id": container_id,
+                "Name": f"/app-{n}",
+                "Created": "2024-01-01T10:00:00.000000000Z",
+                "State": {"Status": "running", "Running": True, "Pid": 1000 + n},
+                "Config": {
+                    "Image": "nginx:latest",
+                    "Labels": {"com.docker.compose.project": "app", "tier": "web"},
+                    "Env": [f"VAR_{i}=value" for i in range(20)],
+                },
+                "NetworkSettings": {
+                    "Ports": {
+                        "80/tcp": [
+                            {"HostIp": "0.0.0.0", "HostPort": str(8000 + n)},
+                            {"HostIp": "::", "HostPort": str(8000 + n)},
+                        ],
+                        "443/tcp": None,
+                    }
+                },
+            }
+        )
+    return "\n".join(ps_lines) + "\n", json.dumps(inspected)
+
+
+def run_benchmark(containers: int = 150, repeat: int = 20) -> dict:
+    """Time parsing a subprocess listing and compare it with the forks it saves"""
+    ps_output, inspect_output = fake_listing(containers)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        rows = docker_service._parse_ps_output(ps_output)
+        details = {c["Id"]: c for c in json.loads(inspect_output)}
+        entries = [
+            docker_service._subprocess_entry(r, details.get(r["ID"])) for r in rows
+        ]
+    parse_seconds = (time.perf_counter() - started) / repeat
+
+    forks = 20
+    started = time.perf_counter()
+    for _ in range(forks):
+        subprocess.run(["true"], capture_output=True)
+    fork_seconds = (time.perf_counter() - started) / forks
+
+    return {
+        "containers": len(entries),
+        "parse_ms": parse_seconds * 1000,
+        "parse_us_per_container": parse_seconds * 1e6 / containers,
+        "fork_ms": fork_seconds * 1000,
+        # Forks no longer made per listing: one `docker inspect` per container
+        # replaced by a single batched call
+        "saved_ms": (containers - 1) * fork_seconds * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure parsing of the Docker CLI fallback listing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--containers", type=int, default=150)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        result = run_benchmark(options["containers"], options["repeat"])
+        self.stdout.write(
+            f"Parsed {result['containers']} containers in "
+            f"{result['parse_ms']:.2f} ms "
+            f"({result['parse_us_per_container']:.1f} us per container); "
+            f"a process spawn costs {result['fork_ms']:.2f} ms, so batching "
+            f"inspects saves about {result['saved_ms']:.0f} ms per listing"
+        )
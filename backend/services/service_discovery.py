@@ -73,7 +73,10 @@ class ServiceDiscovery:
             "paused": "maintenance",
             "restarting": "unknown",
         }
-        return status_mapping.get(docker_status, "unknown")
+        # `docker ps` status text, e.g. "up 2 hours (healthy)" or "exited (0) ..."
+        if docker_status.startswith("up"):
+            docker_status = "paused" if "(paused)" in docker_status else "running"
+        return status_mapping.get(docker_status.split(" ")[0], "unknown")
 
     def sync_discovered_services(self, user: User) -> List[Service]:
         """Sync discovered services with database"""
@@ -1,3 +1,8 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -8,7 +13,12 @@ from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
+from .container_inventory import ContainerInventory
 from .docker_service import DockerService
+from .json_log_reader import JsonFileLogs
+from .json_log_reader import JsonLogFile
+from .json_log_reader import JsonLogFollower
+from .json_log_reader import since_to_key
 from .models import Service
 from .service_discovery import ServiceDiscovery
 
@@ -251,11 +261,11 @@ class ServiceAPITest(APITestCase):
         self.assertEqual(len(response.data["results"]), 1)
         self.assertEqual(response.data["results"][0]["name"], "My Service")
 
-    @patch("services.views.docker_service")
-    def test_docker_containers_endpoint(self, mock_docker_service):
+    @patch("services.views.container_inventory")
+    def test_docker_containers_endpoint(self, mock_inventory):
         """Test Docker containers endpoint"""
-        mock_docker_service.is_available.return_value = True
-        mock_docker_service.list_containers.return_value = [
+        mock_inventory.is_available.return_value = True
+        mock_inventory.list_containers.return_value = [
             {
                 "id": "test-id",
                 "name": "test-container",
@@ -441,3 +451,390 @@ class ServiceDiscoveryTest(TestCase):
         result = self.discovery.sync_discovered_services(self.user)
         self.assertEqual(len(result), 0)  # No new services created
         self.assertEqual(Service.objects.count(), 1)  # Still only one service
+
+
+def container_entry(container_id, status="running", created=1):
+    return {
+        "id": container_id,
+        "name": container_id,
+        "status": status,
+        "created": created,
+    }
+
+
+def container_event(container_id, action):
+    return {"Type": "container", "Action": action, "Actor": {"ID": container_id}}
+
+
+@patch("services.container_inventory.docker_service")
+class ContainerInventoryTest(TestCase):
+    """Test the event-driven container inventory"""
+
+    def setUp(self):
+        self.inventory = ContainerInventory()
+        self.inventory.retry_delay = 0
+        self.addCleanup(self.inventory.stop)
+
+    def test_events_update_single_containers(self, mock_docker_service):
+        """Events re-read only the container they are about"""
+        mock_docker_service.client = None
+        mock_docker_service.list_containers.return_value = [
+            container_entry("web", created=2),
+            container_entry("old", status="exited"),
+        ]
+        self.inventory.resync()
+        mock_docker_service.get_container.return_value = container_entry(
+            "db", created=3
+        )
+
+        self.inventory.apply_event(container_event("db", "start"))
+        self.inventory.apply_event(container_event("web", "exec_start"))
+        self.inventory.apply_event(container_event("old", "destroy"))
+
+        mock_docker_service.get_container.assert_called_once_with("db")
+        self.assertEqual(
+            [c["id"] for c in self.inventory.list_containers()], ["db", "web"]
+        )
+        self.assertEqual(len(self.inventory.list_containers(all_containers=True)), 2)
+        mock_docker_service.list_containers.assert_called_once()
+
+    def test_reconnect_replays_missed_events(self, mock_docker_service):
+        """A dropped stream resumes from where it stopped without re-listing"""
+
+        def dropped_stream():
+            yield container_event("web", "die")
+            raise ConnectionError("stream closed")
+
+        mock_docker_service.get_container.return_value = container_entry(
+            "web", status="exited"
+        )
+        calls = []
+
+        def events(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                return dropped_stream()
+            self.inventory._stopped.set()
+            return iter([])
+
+        mock_docker_service.client.events.side_effect = events
+        started = time.time()
+
+        self.inventory._watch(started)
+
+        self.assertEqual(calls[0]["since"], int(started))
+        self.assertGreaterEqual(calls[1]["since"], int(started) - 1)
+        mock_docker_service.list_containers.assert_not_called()
+        self.assertEqual(self.inventory.containers["web"]["status"], "exited")
+
+    def test_gap_triggers_full_resync(self, mock_docker_service):
+        """Events older than the replay window are replaced by a listing"""
+        mock_docker_service.list_containers.return_value = [container_entry("web")]
+
+        def events(**kwargs):
+            self.inventory._stopped.set()
+            return iter([])
+
+        mock_docker_service.client.events.side_effect = events
+
+        self.inventory._watch(time.time() - 2 * self.inventory.replay_seconds)
+
+        mock_docker_service.list_containers.assert_called_once_with(all_containers=True)
+
+    def test_without_sdk_listing_is_reused_within_ttl(self, mock_docker_service):
+        """Without an event stream the listing is cached for a short TTL"""
+        mock_docker_service.client = None
+        mock_docker_service.list_containers.return_value = [container_entry("web")]
+
+        self.inventory.list_containers()
+        self.inventory.list_containers()
+        self.assertEqual(mock_docker_service.list_containers.call_count, 1)
+
+        self.inventory._synced_at -= self.inventory.fallback_ttl + 1
+        self.inventory.list_containers()
+        self.assertEqual(mock_docker_service.list_containers.call_count, 2)
+
+
+class DockerSubprocessListingTest(TestCase):
+    """Test the Docker CLI fallback listing"""
+
+    def setUp(self):
+        self.docker_service = DockerService()
+        self.docker_service.client = None
+        self.docker_service.use_subprocess = True
+        self.ps_output = "\n".join(
+            json.dumps(row)
+            for row in [
+                {
+                    "ID": "a" * 64,
+                    "Names": "web",
+                    "Image": "nginx:latest",
+                    "State": "running",
+                    "Status": "Up 2 hours",
+                    "Ports": "0.0.0.0:8080->80/tcp, :::8080->80/tcp",
+                },
+                {
+                    "ID": "b" * 64,
+                    "Names": "gone",
+                    "Image": "redis:7",
+                    "State": "exited",
+                    "Status": "Exited (0) 1 minute ago",
+                    "Ports": "",
+                },
+            ]
+        )
+        self.inspect_output = json.dumps(
+            [
+                {
+                    "Id": "a" * 64,
+                    "Name": "/web",
+                    "Created": "2024-01-01T10:00:00Z",
+                    "State": {"Status": "running"},
+                    "Config": {"Image": "nginx:latest", "Labels": {"tier": "web"}},
+                    "NetworkSettings": {
+                        "Ports": {
+                            "80/tcp": [
+                                {"HostIp": "0.0.0.0", "HostPort": "8080"},
+                                {"HostIp": "::", "HostPort": "8080"},
+                            ],
+                            "443/tcp": None,
+                        }
+                    },
+                }
+            ]
+        )
+
+    @patch("services.docker_service.subprocess.run")
+    def test_listing_uses_two_processes(self, mock_run):
+        """One docker ps and one batched docker inspect, whatever the count"""
+        mock_run.side_effect = [
+            MagicMock(returncode=0, stdout=self.ps_output, stderr=""),
+            # The second container was removed between the two calls
+            MagicMock(returncode=1, stdout=self.inspect_output, stderr="No such"),
+        ]
+
+        containers = self.docker_service.list_containers(all_containers=True)
+
+        self.assertEqual(mock_run.call_count, 2)
+        inspect_cmd = mock_run.call_args_list[1][0][0]
+        self.assertEqual(inspect_cmd[-2:], ["a" * 64, "b" * 64])
+        web, gone = containers
+        self.assertEqual(web["name"], "web")
+        self.assertEqual(web["labels"], {"tier": "web"})
+        self.assertEqual(web["ports"], ["8080:80", "443:443"])
+        self.assertEqual(web["status"], "up 2 hours")
+        self.assertEqual(gone["status"], "exited (0) 1 minute ago")
+        self.assertEqual(gone["ports"], [])
+
+    @patch("services.docker_service.subprocess.run")
+    def test_health_kept_in_status(self, mock_run):
+        """The summary counts healthy containers from the ps status text"""
+        from monitoring.summary import MetricsSummaryEngine
+
+        rows = [json.loads(line) for line in self.ps_output.splitlines()]
+        rows[0]["Status"] = "Up 2 hours (healthy)"
+        mock_run.side_effect = [
+            MagicMock(
+                returncode=0,
+                stdout="\n".join(json.dumps(row) for row in rows),
+                stderr="",
+            ),
+            MagicMock(returncode=0, stdout=self.inspect_output, stderr=""),
+        ]
+        containers = self.docker_service.list_containers(all_containers=True)
+
+        self.assertEqual(containers[0]["status"], "up 2 hours (healthy)")
+        with patch("monitoring.summary.container_inventory") as inventory:
+            inventory.list_containers.return_value = containers
+            summary = MetricsSummaryEngine().build_summary()
+        self.assertEqual(summary["healthy_containers"], 1)
+        self.assertEqual(summary["running_containers"], 1)
+
+    @patch("services.docker_service.subprocess.run")
+    def test_unparseable_lines_skipped(self, mock_run):
+        mock_run.side_effect = [
+            MagicMock(returncode=0, stdout="not json\n" + self.ps_output, stderr=""),
+            MagicMock(returncode=0, stdout=self.inspect_output, stderr=""),
+        ]
+
+        containers = self.docker_service.list_containers(all_containers=True)
+
+        self.assertEqual(len(containers), 2)
+
+    def test_benchmark(self):
+        from .management.commands.docker_parse_benchmark import run_benchmark
+
+        result = run_benchmark(containers=10, repeat=1)
+
+        self.assertEqual(result["containers"], 10)
+
+
+def json_log_line(second, text):
+    return (
+        json.dumps(
+            {
+                "log": f"{text}\n",
+                "stream": "stdout",
+                "time": f"2024-01-01T10:00:{second:02d}.5Z",
+            }
+        )
+        + "\n"
+    )
+
+
+class JsonLogReaderTest(TestCase):
+    """Test reading json-file container logs directly"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "abc-json.log")
+        self.write(self.path + ".1", range(0, 5))
+        self.write(self.path, range(5, 8))
+
+    def write(self, path, seconds, mode="w"):
+        with open(path, mode) as f:
+            f.writelines(json_log_line(n, f"line {n}") for n in seconds)
+
+    def texts(self, entries):
+        return [entry["log"].strip() for entry in entries]
+
+    def test_tail_reads_into_rotated_file(self):
+        log_file = JsonLogFile(self.path)
+
+        self.assertEqual(
+            self.texts(log_file.tail(5)), [f"line {n}" for n in range(3, 8)]
+        )
+        self.assertEqual(self.texts(log_file.tail(2)), ["line 6", "line 7"])
+
+    def test_since_binary_searches_each_file(self):
+        log_file = JsonLogFile(self.path)
+
+        entries, inode, size = log_file.since(since_to_key("1704103203.5"))
+        later, _, _ = log_file.since(since_to_key("1704103206"))
+
+        self.assertEqual(self.texts(entries), [f"line {n}" for n in range(3, 8)])
+        self.assertEqual(self.texts(later), ["line 6", "line 7"])
+        self.assertEqual(
+            (inode, size), (os.stat(self.path).st_ino, os.path.getsize(self.path))
+        )
+
+    def test_follower_reads_appends_and_rotation(self):
+        follower = JsonLogFollower(self.path)
+        self.addCleanup(follower.close)
+        partial = json_log_line(9, "line 9")
+
+        self.write(self.path, [8], mode="a")
+        with open(self.path, "a") as f:
+            f.write(partial[:10])
+        first = follower.poll()
+        with open(self.path, "a") as f:
+            f.write(partial[10:])
+        os.rename(self.path, self.path + ".1")
+        self.write(self.path, [10])
+        second = follower.poll()
+
+        self.assertEqual(self.texts(first), ["line 8"])
+        self.assertEqual(self.texts(second), ["line 9", "line 10"])
+        self.assertEqual(follower.poll(), [])
+
+    def test_file_logs_fall_back_to_api(self):
+        client = MagicMock()
+        log_types = {"web": "json-file", "journal": "journald"}
+
+        async def inspect_container(container):
+            return {
+                "LogPath": self.path,
+                "HostConfig": {"LogConfig": {"Type": log_types[container]}},
+            }
+
+        async def logs(container, **kwargs):
+            return "from api\n"
+
+        client.inspect_container.side_effect = inspect_container
+        client.logs.side_effect = logs
+        file_logs = JsonFileLogs(client)
+
+        async def read():
+            return (
+                await file_logs.logs("web", tail=2, timestamps=True),
+                await file_logs.logs("journal", tail=2),
+            )
+
+        from_file, from_api = asyncio.run(read())
+
+        self.assertEqual(
+            from_file,
+            "2024-01-01T10:00:06.5Z line 6\n2024-01-01T10:00:07.5Z line 7\n",
+        )
+        self.assertEqual(from_api, "from api\n")
+
+    def test_file_logs_since_reads_only_tail(self):
+        client = MagicMock()
+
+        async def inspect_container(container):
+            return {
+                "LogPath": self.path,
+                "HostConfig": {"LogConfig": {"Type": "json-file"}},
+            }
+
+        client.inspect_container.side_effect = inspect_container
+        file_logs = JsonFileLogs(client)
+
+        async def read():
+            return (
+                await file_logs.logs("web", tail=2, since="1704103200"),
+                await file_logs.logs("web", tail=2, since="1704103207"),
+            )
+
+        self.assertEqual(asyncio.run(read()), ("line 6\nline 7\n", "line 7\n"))
+
+    def test_stream_follows_file(self):
+        client = MagicMock()
+
+        async def inspect_container(container):
+            return {
+                "LogPath": self.path,
+                "HostConfig": {"LogConfig": {"Type": "json-file"}},
+            }
+
+        client.inspect_container.side_effect = inspect_container
+        file_logs = JsonFileLogs(client)
+        file_logs.poll_interval = 0
+
+        async def follow():
+            received = []
+            stream = file_logs.stream_logs("web", since="1704103207")
+            received.append(await anext(stream))
+            self.write(self.path, [8], mode="a")
+            received.append(await anext(stream))
+            await stream.aclose()
+            return received
+
+        self.assertEqual(asyncio.run(follow()), ["line 7\n", "line 8\n"])
+
+    @patch("services.json_log_reader.REMOVED_AFTER_SECONDS", -1)
+    def test_stream_ends_when_file_removed(self):
+        client = MagicMock()
+
+        async def inspect_container(container):
+            return {
+                "LogPath": self.path,
+                "HostConfig": {"LogConfig": {"Type": "json-file"}},
+            }
+
+        client.inspect_container.side_effect = inspect_container
+        file_logs = JsonFileLogs(client)
+        file_logs.poll_interval = 0
+
+        async def follow():
+            stream = file_logs.stream_logs("web", since="1704103207")
+            received = [await anext(stream)]
+            self.write(self.path, [8], mode="a")
+            # The container is removed along with its log files
+            os.remove(self.path)
+            received.extend([text async for text in stream])
+            return received
+
+        self.assertEqual(asyncio.run(follow()), ["line 7\n", "line 8\n"])
+        self.assertNotIn("web", file_logs._paths)
@@ -6,6 +6,7 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .container_inventory import container_inventory
 from .docker_service import docker_service
 from .models import Service
 from .serializers import ServiceSerializer
@@ -77,11 +78,11 @@ class ServiceViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def docker_containers(self, request):
         """List Docker containers"""
-        containers = docker_service.list_containers()
+        containers = container_inventory.list_containers()
         return Response(
             {
                 "containers": containers,
-                "docker_available": docker_service.is_available(),
+                "docker_available": container_inventory.is_available(),
             }
         )
 